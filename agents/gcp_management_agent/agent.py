@@ -723,11 +723,58 @@ from .tools import (
     create_storage_bucket,
     delete_storage_bucket,
     list_storage_buckets,
+    upload_object,
+    download_object,
+    copy_object,
+    transfer_objects,
+    analyze_storage_bucket,
     create_firestore_database,
     delete_firestore_database,
     list_firestore_databases,
-    list_all_firestore_databases
+    list_all_firestore_databases,
+    import_firestore_documents,
+    export_firestore_documents
 )
+from .inventory_index import query_resource_inventory
+from .operations import check_operation_status, list_tracked_operations
+from .bulk_provisioning import provision_resources
+from .plan_apply import plan_desired_state, apply_desired_state
+from .idle_scanner import find_idle_resources
+from .billing_export import query_billing_costs
+from .firestore_query import query_firestore_documents
+from .result_shaping import fetch_tool_result, shaped_tool
+from .tool_dispatch import ToolDispatcher
+
+# Results are shaped to a token budget before they are returned to the model
+management_tools = [shaped_tool(tool) for tool in [
+    create_storage_bucket,
+    delete_storage_bucket,
+    list_storage_buckets,
+    upload_object,
+    download_object,
+    copy_object,
+    transfer_objects,
+    analyze_storage_bucket,
+    create_firestore_database,
+    delete_firestore_database,
+    list_firestore_databases,
+    list_all_firestore_databases,
+    query_resource_inventory,
+    check_operation_status,
+    list_tracked_operations,
+    provision_resources,
+    plan_desired_state,
+    apply_desired_state,
+    find_idle_resources,
+    query_billing_costs,
+    query_firestore_documents,
+    import_firestore_documents,
+    export_firestore_documents,
+    fetch_tool_result
+]]
+
+# Read-only calls emitted in the same model turn run concurrently; mutating calls stay in order
+tool_dispatcher = ToolDispatcher(management_tools)
 
 # Define the agent
 root_agent = Agent(
@@ -736,20 +783,78 @@ root_agent = Agent(
     description="Agent that manages GCP Storage buckets and Firestore databases — create, delete, list resources with custom configs.",
     instruction=(
         "You are a GCP resource management agent that helps users manage Google Cloud Storage buckets and Firestore databases. "
-        "You have access to seven main functions for storage and Firestore database operations. "
+        "You have access to functions for storage and Firestore database operations and a resource inventory. "
         "\n\nYour capabilities:"
         "\n\nStorage Buckets:"
         "\n- Create storage buckets with custom configurations (location, storage class, versioning)"
         "\n- Delete storage buckets (with option to force delete objects)"
         "\n- List all existing storage buckets in the project"
+        "\n- Upload and download objects, and copy or move objects between buckets, one at a time or in bulk"
+        "\n- Analyze what a bucket contains: size, object count, size and age distribution, largest prefixes"
         "\n\nFirestore Database:"
         "\n- Create/initialize Firestore databases (default or named databases)"
         "\n- Delete named databases completely, or clear data from default database"
         "\n- List specific database information and collections"
         "\n- List ALL Firestore databases in the project (including named databases)"
+        "\n- Query documents in a collection with filters, ordering and selected fields"
+        "\n- Import documents from NDJSON or CSV files and export collections to them"
+        "\n\nResource Inventory:"
+        "\n- Query a fast local index of buckets, compute instances and Firestore databases"
+        "\n- Filter by name, location, class, labels and creation time; sort or group the results"
+        "\n\nMultiple projects:"
+        "\n- list_storage_buckets, list_all_firestore_databases and query_resource_inventory accept projects "
+        "(a list of project IDs) or folder (folders/123 or organizations/456) to cover many projects in one call"
+        "\n- Pass the same projects or folder together with next_page_token to get the next page"
+        "\n- Report project_errors separately; the other projects' results are still complete"
+        "\n\nLong-running operations:"
+        "\n- Named Firestore database creation and deletion run in the background and return an operation_id"
+        "\n- Use check_operation_status to report progress; do not assume completion"
+        "\n\nBulk provisioning:"
+        "\n- When the user asks for several resources at once, build one manifest and call provision_resources "
+        "once instead of calling the individual create functions repeatedly"
+        "\n- Use dry_run=True to validate a manifest and show the plan before creating anything"
+        "\n\nDesired state:"
+        "\n- To reconcile the project with a desired-state document, call plan_desired_state first and show the plan"
+        "\n- Only call apply_desired_state with the returned plan_id after the user approves the plan"
+        "\n- Pass confirm_deletes=True only when the user has explicitly confirmed the listed deletions"
+        "\n\nIdle resources:"
+        "\n- For questions about waste or cleanup, call find_idle_resources: it flags long-stopped instances, "
+        "empty buckets and unused or leftover test Firestore databases, ranked by estimated monthly cost"
+        "\n- Present the findings, then use apply_desired_state with the returned plan_id only after the user "
+        "confirms which resources to delete"
+        "\n\nFirestore data:"
+        "\n- To look at documents, call query_firestore_documents, e.g. collection='orders', "
+        "filters=['status == failed'], order_by='created_at desc', limit=50"
+        "\n- Pass fields to return only the fields the user asked about"
+        "\n- If next_page_token is set, more documents match; fetch the next page only when the user wants it"
+        "\n- list_all_firestore_databases returns database metadata only; pass include_collections=True (or "
+        "include_document_counts=True) only when the user asks what the databases contain"
+        "\n- For seeding or migrating data use import_firestore_documents and export_firestore_documents; "
+        "if they return complete=False, call them again with the same arguments to continue"
+        "\n\nCosts:"
+        "\n- For spend questions (by service, SKU, project, region, label or over time), call query_billing_costs; "
+        "it reads the billing export files, e.g. period='last_month', service='storage', group_by='label:team'"
+        "\n\nObject transfers:"
+        "\n- Use upload_object, download_object and copy_object to move data; copy_object copies server-side"
+        "\n- Report the throughput and whether the checksum was verified"
+        "\n- If a transfer fails part-way, run it again with resume=True to continue from the finished parts"
+        "\n- For many objects (a prefix, glob, date range or whole bucket) call transfer_objects once instead of "
+        "copy_object per object; use delete_source=True only when the user asked to move the objects"
+        "\n- If transfer_objects returns complete=False, call it again with the same arguments to continue"
+        "\n- For questions about how big a bucket is or what is in it, call analyze_storage_bucket; "
+        "list_storage_buckets only returns bucket metadata"
+        "\n\nLarge results:"
+        "\n- Long lists in tool results may be shortened; result_shaping then lists totals and aggregates per list"
+        "\n- Answer from the totals and aggregates; call fetch_tool_result with the handle and list path only "
+        "when the user needs the remaining rows"
         "\n\nWhen users request operations:"
-        "\n1. For listing: Use appropriate list functions to show existing resources"
-        "\n2. For creation: Ask for required parameters and suggest appropriate defaults"
+        "\n1. For listing: Prefer query_resource_inventory for filtered, sorted or grouped listings; "
+        "use the live list functions when full details are needed. List functions return one page plus a "
+        "summary of counts; report the summary first and pass next_page_token as page_token only when the "
+        "user asks for more"
+        "\n2. For creation: Ask for required parameters and suggest appropriate defaults. Creation tools check "
+        "names, locations and types locally; when they return validation_errors, fix the listed fields "
+        "(offer the suggestions) instead of retrying unchanged"
         "\n3. For deletions: Always warn about data loss and ask for confirmation"
         "\n4. Execute the requested operation using the appropriate tool"
         "\n5. Provide clear feedback on success or failure with relevant details"
@@ -779,15 +884,9 @@ root_agent = Agent(
         "\n- Remember that Firestore charges per read/write operation"
         "\n- Use batch operations for multiple document updates when possible"
     ),
-    tools=[
-        create_storage_bucket,
-        delete_storage_bucket,
-        list_storage_buckets,
-        create_firestore_database,
-        delete_firestore_database,
-        list_firestore_databases,
-        list_all_firestore_databases
-    ]
+    tools=management_tools,
+    after_model_callback=tool_dispatcher.after_model,
+    before_tool_callback=tool_dispatcher.before_tool
 )
 
 # Session + runner setup
@@ -13,82 +13,76 @@ import json
 import os
 from datetime import datetime, timedelta
 from google.adk.agents import Agent
-from google.cloud import storage
-from google.cloud import billing_v1
-from google.cloud import compute_v1
-from google.cloud import container_v1
-from google.cloud import sql_v1
-from google.cloud import functions_v1
-from google.cloud import resourcemanager_v3
 from google.api_core import exceptions
 from dotenv import load_dotenv
 
+from .billing import clear_billing_cache, project_billing_info
+from .buckets import bucket_conflict_result, bucket_details, insert_bucket
+from .clients import compute_instances_client, sql_instances_client, storage_client
+from .fanout import fan_out_listing
+from .inventory import collect_inventory
+from .inventory_index import invalidate_inventory
+from .lazy_imports import lazy_import
+from .listing import clamp_page_size, offset_page
+from .operations import check_operation_status, get_tracker, list_tracked_operations
+from .preflight import (
+    preflight_error,
+    validate_bucket_request,
+    validate_instance_request,
+    validate_sql_instance_request,
+)
+from .result_shaping import fetch_tool_result, shaped_tool
+from .tool_dispatch import ToolDispatcher
+
+# Client libraries are imported on first use (see lazy_imports)
+compute_v1 = lazy_import("google.cloud.compute_v1")
+sql_v1 = lazy_import("google.cloud.sql_v1")
+
 # Load environment variables
 load_dotenv()
 
 def create_storage_bucket(bucket_name: str, location: str = "US", storage_class: str = "STANDARD", 
-                         versioning_enabled: bool = False, lifecycle_rules: Optional[Dict] = None) -> Dict:
+                         versioning_enabled: bool = False, lifecycle_rules: Optional[Dict] = None,
+                         labels: Optional[Dict[str, str]] = None) -> Dict:
     """
     Creates a Google Cloud Storage bucket with specified configuration.
     
+    The whole configuration is sent in a single insert request.
+    
     Args:
         bucket_name: Name of the bucket to create
         location: Location for the bucket (default: US)
         storage_class: Storage class (STANDARD, NEARLINE, COLDLINE, ARCHIVE)
         versioning_enabled: Enable object versioning
         lifecycle_rules: Optional lifecycle management rules
+        labels: Optional bucket labels
         
     Returns:
         Dictionary containing operation status and details
     """
+    errors = validate_bucket_request(bucket_name, location, storage_class, labels)
+    if errors:
+        return preflight_error("storage_bucket", errors)
+    
     try:
         project_id = os.getenv('GOOGLE_CLOUD_PROJECT')
-        client = storage.Client(project=project_id)
-        
-        # Check if bucket already exists
-        try:
-            bucket = client.get_bucket(bucket_name)
-            return {
-                "status": "error",
-                "message": f"Bucket '{bucket_name}' already exists",
-                "resource_type": "storage_bucket"
-            }
-        except exceptions.NotFound:
-            pass  # Bucket doesn't exist, we can create it
-        
-        # Create the bucket
-        bucket = client.create_bucket(bucket_name, location=location)
-        bucket.storage_class = storage_class
+        client = storage_client(project_id)
         
-        # Configure versioning if requested
-        if versioning_enabled:
-            bucket.versioning_enabled = True
+        # Create the bucket with its full configuration; a 409 means it already exists
+        bucket = insert_bucket(client, bucket_name, location, storage_class,
+                               versioning_enabled=versioning_enabled,
+                               lifecycle_rules=lifecycle_rules, labels=labels)
         
-        # Apply lifecycle rules if provided
-        if lifecycle_rules:
-            bucket.lifecycle_rules = lifecycle_rules
-            
-        bucket.patch()
+        invalidate_inventory(project_id, "storage")
         
         return {
             "status": "success",
             "message": f"Storage bucket '{bucket_name}' created successfully",
             "resource_type": "storage_bucket",
-            "details": {
-                "name": bucket.name,
-                "location": bucket.location,
-                "storage_class": bucket.storage_class,
-                "versioning_enabled": bucket.versioning_enabled,
-                "created": bucket.time_created.isoformat() if bucket.time_created else None,
-                "self_link": bucket.self_link
-            }
-        }
-    except exceptions.Conflict:
-        return {
-            "status": "error",
-            "message": f"Bucket name '{bucket_name}' is already taken globally",
-            "resource_type": "storage_bucket"
+            "details": bucket_details(bucket)
         }
+    except exceptions.Conflict as e:
+        return bucket_conflict_result(bucket_name, e)
     except Exception as e:
         return {
             "status": "error",
@@ -109,7 +103,7 @@ def delete_storage_bucket(bucket_name: str, force_delete_objects: bool = False)
     """
     try:
         project_id = os.getenv('GOOGLE_CLOUD_PROJECT')
-        client = storage.Client(project=project_id)
+        client = storage_client(project_id)
         bucket = client.bucket(bucket_name)
         
         if not bucket.exists():
@@ -136,6 +130,8 @@ def delete_storage_bucket(bucket_name: str, force_delete_objects: bool = False)
         
         bucket.delete()
         
+        invalidate_inventory(project_id, "storage")
+        
         return {
             "status": "success",
             "message": f"Storage bucket '{bucket_name}' deleted successfully",
@@ -168,9 +164,13 @@ def create_compute_instance(instance_name: str, zone: str = "us-central1-a",
     Returns:
         Dictionary containing operation status and details
     """
+    errors = validate_instance_request(instance_name, zone, machine_type, disk_size_gb, network_tags)
+    if errors:
+        return preflight_error("compute_instance", errors)
+    
     try:
         project_id = os.getenv('GOOGLE_CLOUD_PROJECT')
-        compute_client = compute_v1.InstancesClient()
+        compute_client = compute_instances_client()
         
         # Prepare startup script metadata if provided
         metadata_items = []
@@ -222,6 +222,13 @@ def create_compute_instance(instance_name: str, zone: str = "us-central1-a",
         )
         
         operation = compute_client.insert(request=request)
+        get_tracker().track(
+            "compute", operation.name, project_id, zone=zone,
+            resource=f"compute_instance/{instance_name}",
+            on_complete=lambda record: invalidate_inventory(project_id, "compute")
+        )
+        
+        invalidate_inventory(project_id, "compute")
         
         return {
             "status": "success",
@@ -257,7 +264,7 @@ def delete_compute_instance(instance_name: str, zone: str) -> Dict:
     """
     try:
         project_id = os.getenv('GOOGLE_CLOUD_PROJECT')
-        compute_client = compute_v1.InstancesClient()
+        compute_client = compute_instances_client()
         
         request = compute_v1.DeleteInstanceRequest(
             project=project_id,
@@ -266,6 +273,13 @@ def delete_compute_instance(instance_name: str, zone: str) -> Dict:
         )
         
         operation = compute_client.delete(request=request)
+        get_tracker().track(
+            "compute", operation.name, project_id, zone=zone,
+            resource=f"compute_instance/{instance_name}",
+            on_complete=lambda record: invalidate_inventory(project_id, "compute")
+        )
+        
+        invalidate_inventory(project_id, "compute")
         
         return {
             "status": "success",
@@ -308,9 +322,13 @@ def create_cloud_sql_instance(instance_name: str, database_version: str = "MYSQL
     Returns:
         Dictionary containing operation status and details
     """
+    errors = validate_sql_instance_request(instance_name, database_version, tier, region)
+    if errors:
+        return preflight_error("cloud_sql_instance", errors)
+    
     try:
         project_id = os.getenv('GOOGLE_CLOUD_PROJECT')
-        sql_client = sql_v1.SqlInstancesServiceClient()
+        sql_client = sql_instances_client()
         
         # Configure the instance
         instance_config = {
@@ -341,6 +359,7 @@ def create_cloud_sql_instance(instance_name: str, database_version: str = "MYSQL
         )
         
         operation = sql_client.insert(request=request)
+        get_tracker().track("sql", operation.name, project_id, resource=f"cloud_sql_instance/{instance_name}")
         
         return {
             "status": "success",
@@ -373,7 +392,7 @@ def delete_cloud_sql_instance(instance_name: str) -> Dict:
     """
     try:
         project_id = os.getenv('GOOGLE_CLOUD_PROJECT')
-        sql_client = sql_v1.SqlInstancesServiceClient()
+        sql_client = sql_instances_client()
         
         request = sql_v1.SqlInstancesDeleteRequest(
             project=project_id,
@@ -381,6 +400,7 @@ def delete_cloud_sql_instance(instance_name: str) -> Dict:
         )
         
         operation = sql_client.delete(request=request)
+        get_tracker().track("sql", operation.name, project_id, resource=f"cloud_sql_instance/{instance_name}")
         
         return {
             "status": "success",
@@ -398,109 +418,85 @@ def delete_cloud_sql_instance(instance_name: str) -> Dict:
             "resource_type": "cloud_sql_instance"
         }
 
-def list_all_resources(resource_types: Optional[List[str]] = None) -> Dict:
+def list_all_resources(resource_types: Optional[List[str]] = None, page_size: int = 50,
+                       page_token: Optional[str] = None, projects: Optional[List[str]] = None,
+                       folder: Optional[str] = None) -> Dict:
     """
     Lists all resources in the project, optionally filtered by type.
     
+    Resource types are listed concurrently with a per-type timeout; a type that
+    fails or times out is reported in incomplete_types while the others are
+    still returned. Each type returns at most page_size resources; the full
+    per-type counts are always included, and next_page_token fetches the next
+    page of every type that has more.
+    
+    With projects or folder, every project in the scope is inventoried
+    concurrently and the resources are merged into one list, each tagged with
+    its project and resource type; failed projects and types are reported in
+    project_errors.
+    
     Args:
-        resource_types: List of resource types to include (storage, compute, sql, etc.)
-                       If None, lists all supported resource types
+        resource_types: List of resource types to include (storage, compute, sql, gke,
+                       functions, firestore). If None, lists storage, compute and sql
+        page_size: Maximum resources returned per type (default: 50, max: 500)
+        page_token: Token from a previous response's next_page_token
+        projects: Project IDs to list across (default: the configured project)
+        folder: Folder or organization (folders/123, organizations/456) whose projects are all listed
         
     Returns:
-        Dictionary containing all resources organized by type
+        Dictionary containing a page of resources organized by type and per-type counts
     """
     try:
-        project_id = os.getenv('GOOGLE_CLOUD_PROJECT')
-        
-        if resource_types is None:
-            resource_types = ["storage", "compute", "sql"]
-        
-        all_resources = {}
-        
-        # List Storage Buckets
-        if "storage" in resource_types:
-            try:
-                storage_client = storage.Client(project=project_id)
-                buckets = list(storage_client.list_buckets())
-                all_resources["storage_buckets"] = [
-                    {
-                        "name": bucket.name,
-                        "location": bucket.location,
-                        "storage_class": bucket.storage_class,
-                        "versioning_enabled": bucket.versioning_enabled,
-                        "created": bucket.time_created.isoformat() if bucket.time_created else None
-                    } for bucket in buckets
+        if projects or folder:
+            def inventory_project(project):
+                inventory = collect_inventory(project, resource_types)
+                rows = [
+                    {"resource_type": result_key, **item}
+                    for result_key, items in inventory["resources"].items() if isinstance(items, list)
+                    for item in items
                 ]
-            except Exception as e:
-                all_resources["storage_buckets"] = {"error": str(e)}
-        
-        # List Compute Instances
-        if "compute" in resource_types:
-            try:
-                compute_client = compute_v1.InstancesClient()
-                zones_client = compute_v1.ZonesClient()
-                
-                # Get all zones in the project
-                zones_request = compute_v1.ListZonesRequest(project=project_id)
-                zones = zones_client.list(request=zones_request)
-                
-                instances = []
-                for zone in zones:
-                    try:
-                        instances_request = compute_v1.ListInstancesRequest(
-                            project=project_id,
-                            zone=zone.name
-                        )
-                        zone_instances = compute_client.list(request=instances_request)
-                        
-                        for instance in zone_instances:
-                            instances.append({
-                                "name": instance.name,
-                                "zone": zone.name,
-                                "machine_type": instance.machine_type.split("/")[-1],
-                                "status": instance.status,
-                                "internal_ip": instance.network_interfaces[0].network_i_p if instance.network_interfaces else None,
-                                "external_ip": instance.network_interfaces[0].access_configs[0].nat_i_p if instance.network_interfaces and instance.network_interfaces[0].access_configs else None,
-                                "created": instance.creation_timestamp
-                            })
-                    except:
-                        continue  # Skip zones with no access or instances
-                
-                all_resources["compute_instances"] = instances
-            except Exception as e:
-                all_resources["compute_instances"] = {"error": str(e)}
-        
-        # List Cloud SQL Instances
-        if "sql" in resource_types:
-            try:
-                sql_client = sql_v1.SqlInstancesServiceClient()
-                request = sql_v1.SqlInstancesListRequest(project=project_id)
-                sql_instances = sql_client.list(request=request)
-                
-                all_resources["sql_instances"] = [
-                    {
-                        "name": instance.name,
-                        "database_version": instance.database_version,
-                        "region": instance.region,
-                        "tier": instance.settings.tier,
-                        "state": instance.state,
-                        "ip_addresses": [
-                            {"ip": ip.ip_address, "type": ip.type_} 
-                            for ip in instance.ip_addresses
-                        ]
-                    } for instance in sql_instances.items
+                warnings = [
+                    {"resource_type": result_key, "error": items.get("error")}
+                    for result_key, items in inventory["resources"].items() if isinstance(items, dict)
                 ]
-            except Exception as e:
-                all_resources["sql_instances"] = {"error": str(e)}
+                return rows, warnings
+            
+            return fan_out_listing(
+                "resources", "resource_count", inventory_project, projects, folder, page_size, page_token,
+                summary_keys=["resource_type"], sort_key="resource_type"
+            )
+        
+        project_id = os.getenv('GOOGLE_CLOUD_PROJECT')
+        
+        inventory = collect_inventory(project_id, resource_types)
+        page_size = clamp_page_size(page_size)
+        
+        resources = {}
+        resource_counts = {}
+        next_page_token = None
+        for result_key, items in inventory["resources"].items():
+            if not isinstance(items, list):
+                resources[result_key] = items
+                continue
+            resource_counts[result_key] = len(items)
+            resources[result_key], type_token = offset_page(items, page_size, page_token)
+            next_page_token = next_page_token or type_token
         
         return {
-            "status": "success",
+            "status": "success" if not inventory["incomplete_types"] else "partial_success",
             "project_id": project_id,
-            "resources": all_resources,
-            "resource_count": sum(
-                len(resources) if isinstance(resources, list) else 0 
-                for resources in all_resources.values()
-            )
+            "resources": resources,
+            "resource_count": sum(resource_counts.values()),
+            "resource_counts": resource_counts,
+            "next_page_token": next_page_token,
+            "page_size": page_size,
+            "incomplete_types": inventory["incomplete_types"],
+            "timings_ms": inventory["timings_ms"]
+        }
+    except ValueError as e:
+        return {
+            "status": "error",
+            "message": str(e)
         }
     except Exception as e:
         return {
@@ -508,29 +504,31 @@ def list_all_resources(resource_types: Optional[List[str]] = None) -> Dict:
             "message": f"Failed to list resources: {str(e)}"
         }
 
-def get_billing_summary() -> Dict:
+def get_billing_summary(force_refresh: bool = False) -> Dict:
     """
     Retrieves current billing information and cost summary.
     
+    Args:
+        force_refresh: Read the billing status from the API instead of the cache
+    
     Returns:
         Dictionary containing billing information
     """
     try:
         project_id = os.getenv('GOOGLE_CLOUD_PROJECT')
-        billing_client = billing_v1.CloudBillingClient()
         
-        # Get project billing info
-        project_name = f"projects/{project_id}"
-        billing_info = billing_client.get_project_billing_info(name=project_name)
+        # Get project billing info (cached, billing status rarely changes)
+        billing_info, cached = project_billing_info(project_id, force_refresh)
         
         # Note: Detailed cost breakdown requires Cloud Billing API with proper setup
         # This is a simplified version showing billing account status
         return {
             "status": "success",
             "project_id": project_id,
-            "billing_enabled": billing_info.billing_enabled,
-            "billing_account": billing_info.billing_account_name,
-            "message": "Billing is active" if billing_info.billing_enabled else "Billing is not enabled"
+            "billing_enabled": billing_info["billing_enabled"],
+            "billing_account": billing_info["billing_account_name"],
+            "cached": cached,
+            "message": "Billing is active" if billing_info["billing_enabled"] else "Billing is not enabled"
         }
     except Exception as e:
         return {
@@ -538,48 +536,24 @@ def get_billing_summary() -> Dict:
             "message": f"Failed to retrieve billing information: {str(e)}"
         }
 
-def check_operation_status(operation_id: str, operation_type: str, zone: Optional[str] = None) -> Dict:
-    """
-    Checks the status of a long-running operation.
-    
-    Args:
-        operation_id: The operation ID to check
-        operation_type: Type of operation (compute, sql, etc.)
-        zone: Zone for compute operations
-        
-    Returns:
-        Dictionary containing operation status
-    """
-    try:
-        project_id = os.getenv('GOOGLE_CLOUD_PROJECT')
-        
-        if operation_type == "compute" and zone:
-            compute_client = compute_v1.ZoneOperationsClient()
-            request = compute_v1.GetZoneOperationRequest(
-                project=project_id,
-                zone=zone,
-                operation=operation_id
-            )
-            operation = compute_client.get(request=request)
-            
-            return {
-                "status": "success",
-                "operation_id": operation_id,
-                "operation_status": operation.status,
-                "progress": operation.progress if hasattr(operation, 'progress') else None,
-                "completed": operation.status in ["DONE"],
-                "error": operation.error.errors if hasattr(operation, 'error') and operation.error else None
-            }
-        
-        return {
-            "status": "error",
-            "message": f"Unsupported operation type: {operation_type}"
-        }
-    except Exception as e:
-        return {
-            "status": "error",
-            "message": f"Failed to check operation status: {str(e)}"
-        }
+# Results are shaped to a token budget before they are returned to the model
+resource_tools = [shaped_tool(tool) for tool in [
+    create_storage_bucket,
+    delete_storage_bucket,
+    create_compute_instance,
+    delete_compute_instance,
+    create_cloud_sql_instance,
+    delete_cloud_sql_instance,
+    list_all_resources,
+    get_billing_summary,
+    clear_billing_cache,
+    check_operation_status,
+    list_tracked_operations,
+    fetch_tool_result
+]]
+
+# Read-only calls emitted in the same model turn run concurrently; mutating calls stay in order
+tool_dispatcher = ToolDispatcher(resource_tools)
 
 # Initialize the GCP Resource Management Agent
 root_agent = Agent(
@@ -593,7 +567,8 @@ root_agent = Agent(
         "\n- Create and delete GCP resources based on specific instructions"
         "\n- List existing resources for inventory management"
         "\n- Monitor resource creation/deletion operations"
-        "\n- Provide billing status information"
+        "\n- Provide billing status information (cached; call clear_billing_cache after billing is linked, "
+        "unlinked or changed outside this agent)"
         "\n- Execute resource management tasks efficiently and safely"
         "\n\nSupported resource types:"
         "\n- Cloud Storage buckets (with advanced configuration options)"
@@ -612,17 +587,11 @@ root_agent = Agent(
         "\n3. Execute the operation using appropriate tools"
         "\n4. Provide detailed feedback on success or failure"
         "\n5. Include relevant resource details and operation IDs"
+        "\n\nLong lists in results may be shortened (see result_shaping); use fetch_tool_result with the "
+        "handle and list path only when more rows are needed."
         "\n\nYou do NOT provide recommendations or architectural advice - focus purely on execution."
     ),
-    tools=[
-        create_storage_bucket,
-        delete_storage_bucket,
-        create_compute_instance,
-        delete_compute_instance,
-        create_cloud_sql_instance,
-        delete_cloud_sql_instance,
-        list_all_resources,
-        get_billing_summary,
-        check_operation_status
-    ],
+    tools=resource_tools,
+    after_model_callback=tool_dispatcher.after_model,
+    before_tool_callback=tool_dispatcher.before_tool
 )
\ No newline at end of file
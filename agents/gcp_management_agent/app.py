@@ -1,48 +1,91 @@
 """
 GCP Management Functions
 Clean production-ready functions for GCP resource operations
+
+Run the self-tests as a module from the repository root (the package uses
+relative imports, so `python app.py` does not work):
+    python -m agents.gcp_management_agent.app
 """
 
 import os
 from typing import Dict, Optional, List
-from google.cloud import storage
-from google.cloud import compute_v1
 from google.api_core import exceptions
 from dotenv import load_dotenv
 
-# Try to import Firestore - fall back gracefully if not available
-try:
-    from google.cloud import firestore
-    FIRESTORE_AVAILABLE = True
-except ImportError:
-    FIRESTORE_AVAILABLE = False
+from .billing import account_projects, billing_account, billing_accounts_page, project_billing_info
+from .buckets import bucket_conflict_result, bucket_details, insert_bucket
+from .clients import (
+    billing_client as shared_billing_client,
+    compute_instances_client,
+    firestore_client,
+    storage_client as shared_storage_client,
+    using_fake_backends,
+)
+from .compute_listing import (
+    DEFAULT_INSTANCE_FIELDS,
+    INSTANCE_FIELD_PATHS,
+    list_instances,
+    list_instances_page,
+    summarize_instances,
+)
+from .fanout import fan_out_listing
+from .listing import (
+    BUCKET_FIELD_PATHS,
+    DEFAULT_BUCKET_FIELDS,
+    bucket_rows,
+    clamp_page_size,
+    count_collection_documents,
+    group_counts,
+    list_buckets_page,
+    offset_page,
+    validate_fields,
+)
+from .inventory_index import invalidate_inventory
+from .lazy_imports import lazy_import, module_available
+from .operations import get_tracker
+from .preflight import (
+    preflight_error,
+    validate_bucket_request,
+    validate_firestore_request,
+    validate_instance_request,
+)
+from .retries import retry_metrics
+
+# Client libraries are imported on first use (see lazy_imports)
+compute_v1 = lazy_import("google.cloud.compute_v1")
 
-# Try to import Billing - fall back gracefully if not available
-try:
-    from google.cloud import billing_v1
-    BILLING_AVAILABLE = True
-except ImportError:
-    BILLING_AVAILABLE = False
+# Firestore and Billing are optional - fall back gracefully if not available
+firestore = lazy_import("google.cloud.firestore")
+FIRESTORE_AVAILABLE = module_available("google.cloud.firestore")
+BILLING_AVAILABLE = module_available("google.cloud.billing_v1")
 
 # Load environment variables
 load_dotenv()
 
 
 def create_storage_bucket(bucket_name: str, location: str = "US", storage_class: str = "STANDARD", 
-                         versioning_enabled: bool = False, lifecycle_rules: Optional[Dict] = None) -> Dict:
+                         versioning_enabled: bool = False, lifecycle_rules: Optional[Dict] = None,
+                         labels: Optional[Dict[str, str]] = None) -> Dict:
     """
     Creates a Google Cloud Storage bucket with specified configuration.
     
+    The whole configuration is sent in a single insert request.
+    
     Args:
         bucket_name: Name of the bucket to create
         location: Location for the bucket (default: US)
         storage_class: Storage class (STANDARD, NEARLINE, COLDLINE, ARCHIVE)
         versioning_enabled: Enable object versioning
         lifecycle_rules: Optional lifecycle management rules
+        labels: Optional bucket labels
         
     Returns:
         Dictionary containing operation status and details
     """
+    errors = validate_bucket_request(bucket_name, location, storage_class, labels)
+    if errors:
+        return preflight_error("storage_bucket", errors)
+    
     try:
         project_id = os.getenv('GOOGLE_CLOUD_PROJECT')
         if not project_id:
@@ -52,51 +95,24 @@ def create_storage_bucket(bucket_name: str, location: str = "US", storage_class:
                 "resource_type": "storage_bucket"
             }
         
-        client = storage.Client(project=project_id)
-        
-        # Check if bucket already exists
-        try:
-            bucket = client.get_bucket(bucket_name)
-            return {
-                "status": "error",
-                "message": f"Bucket '{bucket_name}' already exists",
-                "resource_type": "storage_bucket"
-            }
-        except exceptions.NotFound:
-            pass
-        
-        # Create the bucket
-        bucket = client.create_bucket(bucket_name, location=location)
-        bucket.storage_class = storage_class
+        client = shared_storage_client(project_id)
         
-        if versioning_enabled:
-            bucket.versioning_enabled = True
+        # Create the bucket with its full configuration; a 409 means it already exists
+        bucket = insert_bucket(client, bucket_name, location, storage_class,
+                               versioning_enabled=versioning_enabled,
+                               lifecycle_rules=lifecycle_rules, labels=labels)
         
-        if lifecycle_rules:
-            bucket.lifecycle_rules = lifecycle_rules
-            
-        bucket.patch()
+        invalidate_inventory(project_id, "storage")
         
         return {
             "status": "success",
             "message": f"Storage bucket '{bucket_name}' created successfully",
             "resource_type": "storage_bucket",
-            "details": {
-                "name": bucket.name,
-                "location": bucket.location,
-                "storage_class": bucket.storage_class,
-                "versioning_enabled": bucket.versioning_enabled,
-                "created": bucket.time_created.isoformat() if bucket.time_created else None,
-                "self_link": bucket.self_link
-            }
+            "details": bucket_details(bucket)
         }
         
-    except exceptions.Conflict:
-        return {
-            "status": "error",
-            "message": f"Bucket name '{bucket_name}' is already taken globally",
-            "resource_type": "storage_bucket"
-        }
+    except exceptions.Conflict as e:
+        return bucket_conflict_result(bucket_name, e)
     except exceptions.Forbidden:
         return {
             "status": "error",
@@ -131,7 +147,7 @@ def delete_storage_bucket(bucket_name: str, force_delete_objects: bool = False)
                 "resource_type": "storage_bucket"
             }
         
-        client = storage.Client(project=project_id)
+        client = shared_storage_client(project_id)
         bucket = client.bucket(bucket_name)
         
         if not bucket.exists():
@@ -165,6 +181,8 @@ def delete_storage_bucket(bucket_name: str, force_delete_objects: bool = False)
         
         bucket.delete()
         
+        invalidate_inventory(project_id, "storage")
+        
         return {
             "status": "success",
             "message": f"Storage bucket '{bucket_name}' deleted successfully",
@@ -195,14 +213,42 @@ def delete_storage_bucket(bucket_name: str, force_delete_objects: bool = False)
         }
 
 
-def list_storage_buckets() -> Dict:
+def list_storage_buckets(page_size: int = 50, page_token: Optional[str] = None,
+                         fields: Optional[List[str]] = None, prefix: Optional[str] = None,
+                         include_summary: bool = True, projects: Optional[List[str]] = None,
+                         folder: Optional[str] = None) -> Dict:
     """
-    Lists all storage buckets in the project.
+    Lists storage buckets in the project one page at a time.
     
+    The first page starts with a summary of bucket counts by location and
+    storage class; pass next_page_token back as page_token to drill down.
+    With projects or folder, every project in the scope is listed concurrently
+    and the buckets are merged, with failures reported per project.
+    
+    Args:
+        page_size: Buckets per page (default: 50, max: 500)
+        page_token: Token from a previous page's next_page_token
+        fields: Bucket fields to return (name, location, storage_class, versioning_enabled,
+                created, updated, labels). Defaults to all fields except labels.
+        prefix: Only list buckets whose names start with this prefix
+        include_summary: Include the location/storage class summary on the first page
+        projects: Project IDs to list across (default: the configured project)
+        folder: Folder or organization (folders/123, organizations/456) whose projects are all listed
+        
     Returns:
-        Dictionary containing list of buckets and their details
+        Dictionary containing a page of buckets, the next page token and a summary
     """
     try:
+        if projects or folder:
+            fields = validate_fields(fields, BUCKET_FIELD_PATHS, DEFAULT_BUCKET_FIELDS)
+            return fan_out_listing(
+                "buckets", "bucket_count",
+                lambda project: bucket_rows(shared_storage_client(project), fields, prefix),
+                projects, folder, page_size, page_token,
+                summary_keys=[key for key in ("location", "storage_class") if key in fields],
+                include_summary=include_summary
+            )
+        
         project_id = os.getenv('GOOGLE_CLOUD_PROJECT')
         if not project_id:
             return {
@@ -210,28 +256,20 @@ def list_storage_buckets() -> Dict:
                 "message": "GOOGLE_CLOUD_PROJECT environment variable not set"
             }
         
-        client = storage.Client(project=project_id)
-        buckets = list(client.list_buckets())
-        
-        bucket_list = []
-        for bucket in buckets:
-            bucket_info = {
-                "name": bucket.name,
-                "location": bucket.location,
-                "storage_class": bucket.storage_class,
-                "versioning_enabled": bucket.versioning_enabled,
-                "created": bucket.time_created.isoformat() if bucket.time_created else None,
-                "updated": bucket.updated.isoformat() if bucket.updated else None
-            }
-            bucket_list.append(bucket_info)
+        client = shared_storage_client(project_id)
+        page = list_buckets_page(client, page_size, page_token, fields, prefix, include_summary)
         
         return {
             "status": "success",
             "project_id": project_id,
-            "bucket_count": len(bucket_list),
-            "buckets": bucket_list
+            **page
         }
         
+    except ValueError as e:
+        return {
+            "status": "error",
+            "message": str(e)
+        }
     except Exception as e:
         return {
             "status": "error",
@@ -266,16 +304,16 @@ def delete_all_storage_buckets(confirm_deletion: bool = False, force_delete_obje
                 "resource_type": "storage_bucket"
             }
         
-        # First get list of all buckets
-        bucket_list_result = list_storage_buckets()
-        if bucket_list_result.get("status") != "success":
+        # First get every bucket, not just the first page that list_storage_buckets returns
+        try:
+            buckets = bucket_rows(shared_storage_client(project_id), ["name"])
+        except Exception as e:
             return {
                 "status": "error",
-                "message": f"Failed to list buckets: {bucket_list_result.get('message')}",
+                "message": f"Failed to list buckets: {str(e)}",
                 "resource_type": "storage_bucket"
             }
         
-        buckets = bucket_list_result.get("buckets", [])
         if not buckets:
             return {
                 "status": "success",
@@ -346,6 +384,10 @@ def create_compute_instance(instance_name: str, zone: str = "us-central1-a",
     Returns:
         Dictionary containing operation status and details
     """
+    errors = validate_instance_request(instance_name, zone, machine_type, disk_size_gb, network_tags)
+    if errors:
+        return preflight_error("compute_instance", errors)
+    
     try:
         project_id = os.getenv('GOOGLE_CLOUD_PROJECT')
         if not project_id:
@@ -355,7 +397,7 @@ def create_compute_instance(instance_name: str, zone: str = "us-central1-a",
                 "resource_type": "compute_instance"
             }
         
-        compute_client = compute_v1.InstancesClient()
+        compute_client = compute_instances_client()
         
         # Check if instance already exists
         try:
@@ -412,6 +454,13 @@ def create_compute_instance(instance_name: str, zone: str = "us-central1-a",
         )
         
         operation = compute_client.insert(request=request)
+        get_tracker().track(
+            "compute", operation.name, project_id, zone=zone,
+            resource=f"compute_instance/{instance_name}",
+            on_complete=lambda record: invalidate_inventory(project_id, "compute")
+        )
+        
+        invalidate_inventory(project_id, "compute")
         
         return {
             "status": "success",
@@ -463,7 +512,7 @@ def delete_compute_instance(instance_name: str, zone: str) -> Dict:
                 "resource_type": "compute_instance"
             }
         
-        compute_client = compute_v1.InstancesClient()
+        compute_client = compute_instances_client()
         
         # Check if instance exists before trying to delete
         try:
@@ -488,6 +537,13 @@ def delete_compute_instance(instance_name: str, zone: str) -> Dict:
         )
         
         operation = compute_client.delete(request=request)
+        get_tracker().track(
+            "compute", operation.name, project_id, zone=zone,
+            resource=f"compute_instance/{instance_name}",
+            on_complete=lambda record: invalidate_inventory(project_id, "compute")
+        )
+        
+        invalidate_inventory(project_id, "compute")
         
         return {
             "status": "success",
@@ -516,17 +572,46 @@ def delete_compute_instance(instance_name: str, zone: str) -> Dict:
         }
 
 
-def list_compute_instances(zone: Optional[str] = None) -> Dict:
+def list_compute_instances(zone: Optional[str] = None, fields: Optional[List[str]] = None,
+                           page_size: int = 50, page_token: Optional[str] = None,
+                           include_summary: bool = True, projects: Optional[List[str]] = None,
+                           folder: Optional[str] = None) -> Dict:
     """
-    Lists compute instances in the project.
+    Lists compute instances in the project one page at a time.
+    
+    All zones are listed with the aggregated-list API; a specific zone is listed
+    directly. The first page starts with instance counts by zone, machine type
+    and status. With projects or folder, every project in the scope is listed
+    concurrently and the instances are merged, with failures reported per project.
     
     Args:
         zone: Specific zone to list instances from (if None, lists from all zones)
+        fields: Instance fields to return (name, zone, machine_type, status, internal_ip,
+                external_ip, created, disk_size_gb, image, network_tags, labels).
+                Defaults to all fields except labels.
+        page_size: Instances per page (default: 50, max: 500)
+        page_token: Token from a previous page's next_page_token
+        include_summary: Include the zone/machine type/status summary on the first page
+        projects: Project IDs to list across (default: the configured project)
+        folder: Folder or organization (folders/123, organizations/456) whose projects are all listed
         
     Returns:
-        Dictionary containing list of instances and their details
+        Dictionary containing a page of instances, the next page token and a summary
     """
     try:
+        if projects or folder:
+            fields = validate_fields(fields, INSTANCE_FIELD_PATHS, DEFAULT_INSTANCE_FIELDS)
+            
+            def list_project(project):
+                listing = list_instances(project, zones=[zone] if zone else None, fields=fields)
+                return listing["instances"], listing["zone_errors"]
+            
+            return fan_out_listing(
+                "instances", "instance_count", list_project, projects, folder, page_size, page_token,
+                summary_keys=[key for key in ("zone", "machine_type", "status") if key in fields],
+                include_summary=include_summary
+            )
+        
         project_id = os.getenv('GOOGLE_CLOUD_PROJECT')
         if not project_id:
             return {
@@ -534,88 +619,32 @@ def list_compute_instances(zone: Optional[str] = None) -> Dict:
                 "message": "GOOGLE_CLOUD_PROJECT environment variable not set"
             }
         
-        compute_client = compute_v1.InstancesClient()
-        zones_client = compute_v1.ZonesClient()
+        page_size = clamp_page_size(page_size)
+        page = list_instances_page(project_id, zone=zone, fields=fields,
+                                   page_size=page_size, page_token=page_token)
         
-        all_instances = []
-        zones_to_check = []
-        
-        if zone:
-            # Check specific zone only
-            zones_to_check = [zone]
-        else:
-            # Get all zones in the project
-            zones_request = compute_v1.ListZonesRequest(project=project_id)
-            zones_response = zones_client.list(request=zones_request)
-            zones_to_check = [z.name for z in zones_response]
-        
-        # List instances in each zone
-        for zone_name in zones_to_check:
-            try:
-                instances_request = compute_v1.ListInstancesRequest(
-                    project=project_id,
-                    zone=zone_name
-                )
-                zone_instances = compute_client.list(request=instances_request)
-                
-                for instance in zone_instances:
-                    # Get IP addresses
-                    internal_ip = None
-                    external_ip = None
-                    
-                    if instance.network_interfaces:
-                        internal_ip = instance.network_interfaces[0].network_i_p
-                        if instance.network_interfaces[0].access_configs:
-                            external_ip = instance.network_interfaces[0].access_configs[0].nat_i_p
-                    
-                    # Get disk size from boot disk
-                    disk_size_gb = None
-                    if instance.disks:
-                        for disk in instance.disks:
-                            if disk.boot:
-                                try:
-                                    disk_size_gb = int(disk.disk_size_gb) if hasattr(disk, 'disk_size_gb') else None
-                                except:
-                                    pass
-                                break
-                    
-                    instance_info = {
-                        "name": instance.name,
-                        "zone": zone_name,
-                        "machine_type": instance.machine_type.split("/")[-1],
-                        "status": instance.status,
-                        "internal_ip": internal_ip,
-                        "external_ip": external_ip,
-                        "created": instance.creation_timestamp,
-                        "disk_size_gb": disk_size_gb,
-                        "image": None,
-                        "network_tags": list(instance.tags.items) if instance.tags else []
-                    }
-                    
-                    # Try to get source image from boot disk
-                    if instance.disks:
-                        for disk in instance.disks:
-                            if disk.boot and hasattr(disk, 'source_image'):
-                                instance_info["image"] = disk.source_image.split("/")[-1] if disk.source_image else None
-                                break
-                    
-                    all_instances.append(instance_info)
-                    
-            except exceptions.Forbidden:
-                # Skip zones we don't have access to
-                continue
-            except Exception:
-                # Skip zones with errors
-                continue
-        
-        return {
+        result = {
             "status": "success",
             "project_id": project_id,
-            "instance_count": len(all_instances),
-            "instances": all_instances,
-            "zones_checked": zones_to_check if not zone else [zone]
+            "instance_count": len(page["instances"]),
+            "instances": page["instances"],
+            "next_page_token": page["next_page_token"],
+            "page_size": page_size
         }
+        if include_summary and not page_token:
+            summary_keys = ["zone", "machine_type", "status"]
+            if not page["next_page_token"] and set(summary_keys) <= set(fields or DEFAULT_INSTANCE_FIELDS):
+                # Everything fit on one page - no second listing needed
+                result["summary"] = group_counts(page["instances"], summary_keys)
+            else:
+                result["summary"] = summarize_instances(project_id, zones=[zone] if zone else None)
+        return result
         
+    except ValueError as e:
+        return {
+            "status": "error",
+            "message": str(e)
+        }
     except Exception as e:
         return {
             "status": "error",
@@ -638,6 +667,10 @@ def create_firestore_database(database_id: str = "(default)", location_id: str =
     Returns:
         Dictionary containing operation status and details
     """
+    errors = validate_firestore_request(database_id, location_id, database_type)
+    if errors:
+        return preflight_error("firestore_database", errors)
+    
     if not FIRESTORE_AVAILABLE:
         return {
             "status": "error",
@@ -655,7 +688,7 @@ def create_firestore_database(database_id: str = "(default)", location_id: str =
             }
         
         # Initialize Firestore client (this creates the database if it doesn't exist)
-        db = firestore.Client(project=project_id)
+        db = firestore_client(project_id)
         
         # Test the connection by creating a simple document
         test_collection = db.collection('test_collection')
@@ -668,6 +701,8 @@ def create_firestore_database(database_id: str = "(default)", location_id: str =
         # Clean up the test document
         test_doc.delete()
         
+        invalidate_inventory(project_id, "firestore")
+        
         return {
             "status": "success",
             "message": f"Firestore database initialized successfully",
@@ -727,7 +762,7 @@ def delete_firestore_database(database_id: str = "(default)") -> Dict:
             }
         
         # Initialize Firestore client
-        db = firestore.Client(project=project_id)
+        db = firestore_client(project_id)
         
         # List all collections and delete them
         collections = db.collections()
@@ -748,6 +783,8 @@ def delete_firestore_database(database_id: str = "(default)") -> Dict:
                 "documents_deleted": deleted_count
             })
         
+        invalidate_inventory(project_id, "firestore")
+        
         return {
             "status": "success",
             "message": f"Firestore database data cleared successfully",
@@ -775,12 +812,19 @@ def delete_firestore_database(database_id: str = "(default)") -> Dict:
         }
 
 
-def list_firestore_databases() -> Dict:
+def list_firestore_databases(page_size: int = 50, page_token: Optional[str] = None) -> Dict:
     """
     Lists Firestore database information and collections.
     
+    Collections are listed by ID and only the collections on the requested
+    page are counted.
+    
+    Args:
+        page_size: Collections per page (default: 50, max: 500)
+        page_token: Token from a previous page's next_page_token
+        
     Returns:
-        Dictionary containing database information and collections
+        Dictionary containing database information and a page of collections
     """
     if not FIRESTORE_AVAILABLE:
         return {
@@ -797,21 +841,26 @@ def list_firestore_databases() -> Dict:
             }
         
         # Initialize Firestore client
-        db = firestore.Client(project=project_id)
+        db = firestore_client(project_id)
         
-        # Get all collections
-        collections = list(db.collections())
+        # Get all collections, then count documents for this page only
+        collections = sorted(db.collections(), key=lambda collection: collection.id)
+        page_size = clamp_page_size(page_size)
+        page, next_page_token = offset_page(collections, page_size, page_token)
         collection_info = []
         
-        for collection in collections:
-            # Count documents in each collection
-            docs = list(collection.limit(1000).stream())  # Limit for performance
-            
-            collection_info.append({
+        for collection in page:
+            info = {
                 "collection_id": collection.id,
-                "document_count": len(docs),
                 "path": collection.path
-            })
+            }
+            # Server-side count aggregation; no documents are downloaded
+            try:
+                info["document_count"] = count_collection_documents(collection)
+            except Exception as e:
+                info["document_count"] = None
+                info["count_error"] = str(e)
+            collection_info.append(info)
         
         return {
             "status": "success",
@@ -820,9 +869,11 @@ def list_firestore_databases() -> Dict:
                 "database_id": "(default)",
                 "type": "FIRESTORE_NATIVE",
                 "status": "active",
-                "collections_count": len(collection_info)
+                "collections_count": len(collections)
             },
-            "collections": collection_info
+            "collections": collection_info,
+            "next_page_token": next_page_token,
+            "page_size": page_size
         }
         
     except exceptions.Forbidden:
@@ -839,10 +890,15 @@ def list_firestore_databases() -> Dict:
 
 # Billing Functions
 
-def get_billing_summary() -> Dict:
+def get_billing_summary(force_refresh: bool = False) -> Dict:
     """
     Retrieves current billing information and project billing status.
     
+    Billing status is cached for BILLING_CACHE_TTL seconds.
+    
+    Args:
+        force_refresh: Read the billing status from the API instead of the cache
+        
     Returns:
         Dictionary containing billing information and status
     """
@@ -860,22 +916,15 @@ def get_billing_summary() -> Dict:
                 "message": "GOOGLE_CLOUD_PROJECT environment variable not set"
             }
         
-        # Initialize billing client
-        billing_client = billing_v1.CloudBillingClient()
-        
-        # Get project billing info
-        project_name = f"projects/{project_id}"
-        
         try:
-            billing_info = billing_client.get_project_billing_info(name=project_name)
+            # Get project billing info
+            billing_info, cached = project_billing_info(project_id, force_refresh)
             
             # Get billing account details if available
             billing_account_info = None
-            if billing_info.billing_account_name:
+            if billing_info["billing_account_name"]:
                 try:
-                    billing_account_info = billing_client.get_billing_account(
-                        name=billing_info.billing_account_name
-                    )
+                    billing_account_info, _ = billing_account(billing_info["billing_account_name"], force_refresh)
                 except Exception:
                     # If we can't get billing account details, continue without them
                     pass
@@ -883,19 +932,20 @@ def get_billing_summary() -> Dict:
             return {
                 "status": "success",
                 "project_id": project_id,
-                "billing_enabled": billing_info.billing_enabled,
-                "billing_account_name": billing_info.billing_account_name,
+                "billing_enabled": billing_info["billing_enabled"],
+                "billing_account_name": billing_info["billing_account_name"],
                 "billing_account_info": {
-                    "display_name": billing_account_info.display_name if billing_account_info else "Unknown",
-                    "open": billing_account_info.open if billing_account_info else None,
-                    "currency_code": billing_account_info.currency_code if billing_account_info else "Unknown"
+                    "display_name": billing_account_info["display_name"],
+                    "open": billing_account_info["open"],
+                    "currency_code": billing_account_info["currency_code"]
                 } if billing_account_info else None,
-                "message": "Billing is enabled and active" if billing_info.billing_enabled else "Billing is not enabled for this project",
+                "cached": cached,
+                "message": "Billing is enabled and active" if billing_info["billing_enabled"] else "Billing is not enabled for this project",
                 "recommendations": [
                     "Monitor your usage regularly",
                     "Set up billing alerts",
                     "Review your billing reports monthly"
-                ] if billing_info.billing_enabled else [
+                ] if billing_info["billing_enabled"] else [
                     "Enable billing to use paid GCP services",
                     "Visit Google Cloud Console to set up billing"
                 ]
@@ -919,12 +969,21 @@ def get_billing_summary() -> Dict:
         }
 
 
-def list_billing_accounts() -> Dict:
+def list_billing_accounts(page_size: int = 50, page_token: Optional[str] = None,
+                          include_projects: bool = False, force_refresh: bool = False) -> Dict:
     """
-    Lists all billing accounts that the user has access to.
+    Lists billing accounts that the user has access to, one page at a time.
+    
+    Pages are cached for BILLING_CACHE_TTL seconds.
     
+    Args:
+        page_size: Accounts per page (default: 50, max: 500)
+        page_token: Token from a previous page's next_page_token
+        include_projects: Also list the projects linked to each account on the page (fetched concurrently)
+        force_refresh: Read from the API instead of the cache
+        
     Returns:
-        Dictionary containing list of billing accounts
+        Dictionary containing a page of billing accounts and the next page token
     """
     if not BILLING_AVAILABLE:
         return {
@@ -933,27 +992,22 @@ def list_billing_accounts() -> Dict:
         }
     
     try:
-        # Initialize billing client
-        billing_client = billing_v1.CloudBillingClient()
-        
-        # List all billing accounts
-        billing_accounts = billing_client.list_billing_accounts()
-        
-        accounts_list = []
-        for account in billing_accounts:
-            account_info = {
-                "name": account.name,
-                "display_name": account.display_name,
-                "open": account.open,
-                "currency_code": account.currency_code,
-                "master_billing_account": account.master_billing_account
-            }
-            accounts_list.append(account_info)
+        # Fetch only the requested page of billing accounts
+        page_size = clamp_page_size(page_size)
+        page, cached = billing_accounts_page(page_size, page_token, force_refresh)
+        accounts_list = [dict(account) for account in page["accounts"]]
+        
+        if include_projects:
+            linked = account_projects([account["name"] for account in accounts_list], force_refresh)
+            for account in accounts_list:
+                account.update(linked[account["name"]])
         
         return {
             "status": "success",
             "account_count": len(accounts_list),
             "billing_accounts": accounts_list,
+            "next_page_token": page["next_page_token"],
+            "cached": cached,
             "message": f"Found {len(accounts_list)} billing account(s)"
         }
         
@@ -985,38 +1039,41 @@ def validate_environment() -> Dict:
             "message": "GOOGLE_CLOUD_PROJECT environment variable not set"
         }
     
-    if not creds_path:
-        return {
-            "status": "error", 
-            "message": "GOOGLE_APPLICATION_CREDENTIALS environment variable not set"
-        }
-        
-    if not os.path.exists(creds_path):
-        return {
-            "status": "error",
-            "message": f"Credentials file not found: {creds_path}"
-        }
+    # The in-memory fake backends need no credentials
+    if not using_fake_backends():
+        if not creds_path:
+            return {
+                "status": "error", 
+                "message": "GOOGLE_APPLICATION_CREDENTIALS environment variable not set"
+            }
+            
+        if not os.path.exists(creds_path):
+            return {
+                "status": "error",
+                "message": f"Credentials file not found: {creds_path}"
+            }
     
     try:
         # Test storage client
-        storage_client = storage.Client(project=project_id)
+        storage_client = shared_storage_client(project_id)
         
         # Test compute client
-        compute_client = compute_v1.InstancesClient()
+        compute_client = compute_instances_client()
         
         # Test firestore client if available
         if FIRESTORE_AVAILABLE:
-            firestore_client = firestore.Client(project=project_id)
+            db = firestore_client(project_id)
         
         # Test billing client if available
         if BILLING_AVAILABLE:
-            billing_client = billing_v1.CloudBillingClient()
+            billing_client = shared_billing_client()
         
         return {
             "status": "success",
             "message": "Environment validation successful",
             "project_id": project_id,
             "credentials_path": creds_path,
+            "backend": "fake" if using_fake_backends() else "gcp",
             "firestore_available": FIRESTORE_AVAILABLE,
             "billing_available": BILLING_AVAILABLE
         }
@@ -1069,6 +1126,8 @@ def run_comprehensive_tests() -> Dict:
     
     print("=" * 80)
     print("COMPREHENSIVE GCP MANAGEMENT FUNCTIONS TEST")
+    if using_fake_backends():
+        print("Backend: in-memory fakes (GCP_MANAGEMENT_BACKEND=fake)")
     print("=" * 80)
     
     # Test 1: Environment Validation
@@ -1193,9 +1252,10 @@ def run_comprehensive_tests() -> Dict:
     # Test 3d: Delete Instance (only if creation succeeded)
     print("3d. Testing delete_compute_instance()...")
     if test_instance_name:
-        # Wait a moment for the instance to be created
-        print("   Waiting 30 seconds for instance to be ready...")
-        time.sleep(30)
+        # Wait a moment for the instance to be created (fake backends are ready immediately)
+        if not using_fake_backends():
+            print("   Waiting 30 seconds for instance to be ready...")
+            time.sleep(30)
         
         try:
             delete_vm_result = delete_compute_instance(test_instance_name, "us-central1-a")
@@ -1250,9 +1310,10 @@ def run_comprehensive_tests() -> Dict:
     # Test 4c: Delete Firestore Database (only if creation succeeded)
     print("4c. Testing delete_firestore_database()...")
     if test_db_id:
-        # Wait a moment for the database to be ready
-        print("   Waiting 60 seconds for database to be ready...")
-        time.sleep(60)
+        # Wait a moment for the database to be ready (fake backends are ready immediately)
+        if not using_fake_backends():
+            print("   Waiting 60 seconds for database to be ready...")
+            time.sleep(60)
         
         try:
             delete_firestore_result = delete_firestore_database(test_db_id)
@@ -1343,7 +1404,8 @@ def run_comprehensive_tests() -> Dict:
         "total_tests": total_tests,
         "passed_tests": passed_tests,
         "failed_tests": failed_tests,
-        "success_rate": round(success_rate, 1)
+        "success_rate": round(success_rate, 1),
+        "api_retries": retry_metrics()["totals"]
     }
     
     print(f"Total Tests: {total_tests}")
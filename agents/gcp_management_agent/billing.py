@@ -0,0 +1,173 @@
+"""
+Cached Cloud Billing lookups.
+
+A project's billing status changes rarely, yet the agents read it often as
+context for cost questions. Project billing info, billing account details,
+pages of the billing account listing and the projects linked to each account
+are cached for BILLING_CACHE_TTL seconds; invalidate_billing_cache drops
+entries explicitly, e.g. after billing is linked or unlinked outside the
+agent, and the clear_billing_cache tool exposes it to the model.
+
+Account listings are fetched one page at a time, and the projects linked to
+the accounts on a page are fetched concurrently.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .clients import billing_client
+
+BILLING_CACHE_TTL = float(os.getenv('BILLING_CACHE_TTL', '3600'))
+BILLING_MAX_WORKERS = int(os.getenv('BILLING_MAX_WORKERS', '8'))
+
+_cache: Dict[tuple, Tuple[float, object]] = {}
+_cache_lock = threading.Lock()
+
+
+def _cached(key: tuple, load: Callable[[], object], force_refresh: bool = False) -> Tuple[object, bool]:
+    """Returns (value, cached) for key, loading and storing it when missing or expired."""
+    now = time.time()
+    with _cache_lock:
+        entry = _cache.get(key)
+    if entry and not force_refresh and now - entry[0] < BILLING_CACHE_TTL:
+        return entry[1], True
+    value = load()
+    with _cache_lock:
+        _cache[key] = (now, value)
+    return value, False
+
+
+def _put(key: tuple, value: object) -> None:
+    with _cache_lock:
+        _cache[key] = (time.time(), value)
+
+
+def invalidate_billing_cache(project_id: Optional[str] = None, account_name: Optional[str] = None) -> int:
+    """
+    Drops cached billing data.
+
+    Args:
+        project_id: Drop only this project's billing info
+        account_name: Drop only this account's details and linked projects
+
+    With neither argument the whole cache, including account listings, is cleared.
+
+    Returns:
+        Number of cache entries dropped
+    """
+    with _cache_lock:
+        if not project_id and not account_name:
+            dropped = len(_cache)
+            _cache.clear()
+            return dropped
+        stale = [key for key in _cache
+                 if (project_id and key == ("project", project_id)) or
+                 (account_name and key[0] in ("account", "account_projects") and key[1] == account_name)]
+        if account_name:
+            # Listing pages embed account details
+            stale += [key for key in _cache if key[0] == "accounts_page"]
+        for key in stale:
+            del _cache[key]
+        return len(stale)
+
+
+def clear_billing_cache(project_id: Optional[str] = None, account_name: Optional[str] = None) -> Dict:
+    """
+    Forgets cached billing status so the next billing lookup reads it from the API.
+
+    Use after billing was linked, unlinked or changed outside the agent.
+
+    Args:
+        project_id: Only forget this project's billing info
+        account_name: Only forget this billing account (billingAccounts/...) and its linked projects
+
+    Returns:
+        Dictionary containing the number of cache entries dropped
+    """
+    dropped = invalidate_billing_cache(project_id, account_name)
+    scope = ", ".join(filter(None, [project_id, account_name])) or "all projects and accounts"
+    return {
+        "status": "success",
+        "entries_dropped": dropped,
+        "message": f"Cleared cached billing data for {scope}"
+    }
+
+
+def _account_to_dict(account) -> Dict:
+    return {
+        "name": account.name,
+        "display_name": account.display_name,
+        "open": account.open,
+        "currency_code": account.currency_code,
+        "master_billing_account": account.master_billing_account
+    }
+
+
+def project_billing_info(project_id: str, force_refresh: bool = False) -> Tuple[Dict, bool]:
+    """
+    Returns the project's billing status and whether it came from the cache.
+
+    Raises:
+        google.api_core.exceptions.NotFound: If the project does not exist or is not visible
+    """
+    def load():
+        info = billing_client().get_project_billing_info(name=f"projects/{project_id}")
+        return {"billing_enabled": info.billing_enabled, "billing_account_name": info.billing_account_name}
+
+    return _cached(("project", project_id), load, force_refresh)
+
+
+def billing_account(account_name: str, force_refresh: bool = False) -> Tuple[Dict, bool]:
+    """Returns one billing account's details and whether they came from the cache."""
+    return _cached(("account", account_name),
+                   lambda: _account_to_dict(billing_client().get_billing_account(name=account_name)),
+                   force_refresh)
+
+
+def billing_accounts_page(page_size: int, page_token: Optional[str] = None,
+                          force_refresh: bool = False) -> Tuple[Dict, bool]:
+    """
+    Returns one page of the billing account listing and whether it came from the cache.
+
+    Only the requested page is fetched. Its accounts are also cached
+    individually, so a later billing_account call for one of them is free.
+    """
+    def load():
+        pager = billing_client().list_billing_accounts(
+            request={"page_size": page_size, "page_token": page_token or ""}
+        )
+        response = next(iter(pager.pages))
+        accounts = [_account_to_dict(account) for account in response.billing_accounts]
+        for account in accounts:
+            _put(("account", account["name"]), account)
+        return {"accounts": accounts, "next_page_token": response.next_page_token or None}
+
+    return _cached(("accounts_page", page_size, page_token or ""), load, force_refresh)
+
+
+def account_projects(account_names: List[str], force_refresh: bool = False) -> Dict[str, Dict]:
+    """
+    Lists the projects linked to each billing account, fetching accounts concurrently.
+
+    Returns:
+        {account name: {"projects": [...]} or {"error": "..."}}
+    """
+    def load_one(account_name):
+        def load():
+            return [
+                info.project_id
+                for info in billing_client().list_project_billing_info(name=account_name)
+            ]
+        try:
+            projects, _ = _cached(("account_projects", account_name), load, force_refresh)
+            return account_name, {"projects": projects}
+        except Exception as e:
+            return account_name, {"error": str(e)}
+
+    if not account_names:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, min(BILLING_MAX_WORKERS, len(account_names)))) as executor:
+        return dict(executor.map(load_one, account_names))
@@ -0,0 +1,683 @@
+"""
+Offline analytics over Cloud Billing export files.
+
+Billing export files (CSV, JSON lines or Parquet, optionally gzipped) dropped
+in BILLING_EXPORT_PATH are ingested into an in-memory columnar store: the
+usage start time, cost and credits as numeric columns, and the service, SKU,
+project, region, currency and every label key as dictionary-encoded columns.
+
+Ingestion is incremental. Each query first checks the directory and parses
+only files that are new or changed since the last look; removed files are
+dropped from the store. Group-by and time-window queries then run on the
+columns with NumPy (mixed-radix group keys, bincount sums), so a year of
+line items is aggregated in milliseconds. Without NumPy the same queries run
+row by row.
+
+Both nested exports (BigQuery JSON or Parquet: service.description, labels
+as a key/value list, credits as a list) and flattened CSV columns
+(service.description or service_description, labels and credits as JSON)
+are understood.
+"""
+
+import csv
+import gzip
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .lazy_imports import lazy_import, module_available
+
+# numpy is optional and imported on first use - queries fall back to row-by-row aggregation without it
+np = lazy_import("numpy")
+NUMPY_AVAILABLE = module_available("numpy")
+
+# pyarrow is optional and imported on first use - Parquet exports are skipped without it
+pq = lazy_import("pyarrow.parquet")
+ARROW_AVAILABLE = module_available("pyarrow")
+
+BILLING_EXPORT_PATH = os.getenv('BILLING_EXPORT_PATH', 'billing_export')
+# Rows shown per query; the remainder is summed into one "(other)" row
+BILLING_QUERY_MAX_ROWS = int(os.getenv('BILLING_QUERY_MAX_ROWS', '50'))
+
+DIMENSIONS = ("service", "sku", "project", "region", "currency")
+GRANULARITIES = ("day", "month")
+PERIODS = ("today", "last_7_days", "last_30_days", "this_month", "last_month", "this_year", "last_year")
+
+NONE = "(none)"
+
+_SUFFIXES = {
+    ".csv": "csv", ".csv.gz": "csv",
+    ".jsonl": "jsonl", ".jsonl.gz": "jsonl", ".json": "jsonl", ".json.gz": "jsonl", ".ndjson": "jsonl",
+    ".parquet": "parquet",
+}
+
+# Dimension -> nested path in the export schema
+_DIMENSION_PATHS = {
+    "service": ("service", "description"),
+    "sku": ("sku", "description"),
+    "project": ("project", "id"),
+    "region": ("location", "region"),
+    "currency": ("currency",),
+}
+
+DAY = 86400
+
+
+class _Vocabulary:
+    """Maps the strings of one dimension to dense integer codes."""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.index: Dict[str, int] = {}
+
+    def code(self, value: str) -> int:
+        code = self.index.get(value)
+        if code is None:
+            code = self.index[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class _Store:
+    """Columnar billing line items, one chunk per ingested file."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.path: Optional[str] = None
+        # path -> (size, mtime, chunk)
+        self.files: Dict[str, Tuple[int, float, Dict]] = {}
+        # dimension or "label:<key>" -> vocabulary
+        self.vocabularies: Dict[str, _Vocabulary] = {}
+        # Concatenated columns, rebuilt after the files change
+        self.columns: Optional[Dict] = None
+
+    def vocabulary(self, name: str) -> _Vocabulary:
+        if name not in self.vocabularies:
+            self.vocabularies[name] = _Vocabulary()
+        return self.vocabularies[name]
+
+
+_store = _Store()
+
+
+def _path_get(row: Dict, path: Tuple[str, ...]):
+    """Reads a nested field, also accepting flattened "a.b" and "a_b" column names."""
+    value = row
+    for part in path:
+        if not isinstance(value, dict):
+            value = None
+            break
+        value = value.get(part)
+    if value is None and len(path) > 1:
+        value = row.get(".".join(path))
+        if value is None:
+            value = row.get("_".join(path))
+    return value
+
+
+def _as_json(value):
+    if isinstance(value, str) and value[:1] in ("[", "{"):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return None
+    return value
+
+
+def _labels(row: Dict) -> Dict[str, str]:
+    labels = _as_json(row.get("labels"))
+    if isinstance(labels, dict):
+        return {str(key): str(value) for key, value in labels.items()}
+    if isinstance(labels, list):
+        return {str(item.get("key")): str(item.get("value")) for item in labels if isinstance(item, dict)}
+    return {}
+
+
+def _credits(row: Dict) -> float:
+    credits = _as_json(row.get("credits"))
+    if isinstance(credits, list):
+        return sum(float(item.get("amount") or 0) for item in credits if isinstance(item, dict))
+    if credits in (None, ""):
+        return 0.0
+    return float(credits)
+
+
+_time_cache: Dict[str, int] = {}
+
+
+def _timestamp(value) -> Optional[int]:
+    """Converts a usage time (datetime, epoch or text such as "2024-01-31 10:00:00 UTC") to epoch seconds."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return int((value if value.tzinfo else value.replace(tzinfo=timezone.utc)).timestamp())
+    if isinstance(value, (int, float)):
+        # Parquet and JSON exports may carry microseconds since the epoch
+        return int(value / 1_000_000) if value > 10 ** 11 else int(value)
+    cached = _time_cache.get(value)
+    if cached is None:
+        text = str(value).strip().replace(" UTC", "+00:00").replace("Z", "+00:00")
+        parsed = datetime.fromisoformat(text)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        cached = _time_cache[value] = int(parsed.timestamp())
+    return cached
+
+
+def _read_rows(path: str, kind: str) -> Iterable[Dict]:
+    if kind == "parquet":
+        if not ARROW_AVAILABLE:
+            raise ImportError("Reading Parquet exports requires pyarrow. Install: pip install pyarrow")
+        yield from pq.read_table(path).to_pylist()
+        return
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8", newline="") as handle:
+        if kind == "csv":
+            yield from csv.DictReader(handle)
+        else:
+            for line in handle:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _ingest_file(path: str, kind: str) -> Dict:
+    """Parses one export file into a chunk of columns coded against the shared vocabularies."""
+    times, costs, credits = [], [], []
+    dimensions = {name: [] for name in DIMENSIONS}
+    labels: Dict[str, Dict[int, int]] = {}
+    skipped = 0
+
+    for row in _read_rows(path, kind):
+        try:
+            started = _timestamp(_path_get(row, ("usage_start_time",)))
+            cost = float(row.get("cost") or 0)
+            credit = _credits(row)
+        except (TypeError, ValueError):
+            skipped += 1
+            continue
+        if started is None:
+            skipped += 1
+            continue
+        position = len(times)
+        times.append(started)
+        costs.append(cost)
+        credits.append(credit)
+        for name in DIMENSIONS:
+            value = _path_get(row, _DIMENSION_PATHS[name])
+            dimensions[name].append(_store.vocabulary(name).code(str(value) if value not in (None, "") else NONE))
+        for key, value in _labels(row).items():
+            labels.setdefault(key, {})[position] = _store.vocabulary(f"label:{key}").code(value)
+
+    rows = len(times)
+    chunk = {
+        "rows": rows,
+        "skipped": skipped,
+        "time": times,
+        "cost": costs,
+        "credits": credits,
+        "dimensions": dimensions,
+        # Label codes per row; -1 where the row has no such label
+        "labels": {key: [values.get(i, -1) for i in range(rows)] for key, values in labels.items()}
+    }
+    if NUMPY_AVAILABLE:
+        chunk["time"] = np.asarray(times, dtype=np.int64)
+        chunk["cost"] = np.asarray(costs, dtype=np.float64)
+        chunk["credits"] = np.asarray(credits, dtype=np.float64)
+        chunk["dimensions"] = {name: np.asarray(codes, dtype=np.int32) for name, codes in dimensions.items()}
+        chunk["labels"] = {key: np.asarray(codes, dtype=np.int32) for key, codes in chunk["labels"].items()}
+    return chunk
+
+
+def _export_files(path: str) -> Dict[str, str]:
+    found = {}
+    for directory, _, names in os.walk(path):
+        for name in names:
+            kind = next((kind for suffix, kind in _SUFFIXES.items() if name.lower().endswith(suffix)), None)
+            if kind:
+                found[os.path.join(directory, name)] = kind
+    return found
+
+
+def ingest_billing_exports(path: Optional[str] = None) -> Dict:
+    """
+    Brings the store up to date with the export files under path.
+
+    New and changed files are parsed; unchanged files are skipped and files
+    that disappeared are dropped. Switching to another path starts a new store.
+
+    Args:
+        path: Directory of export files (default: BILLING_EXPORT_PATH)
+
+    Returns:
+        Dictionary with files added, updated, removed and unchanged, per-file errors and the row count
+
+    Raises:
+        FileNotFoundError: If the directory does not exist
+    """
+    path = os.path.abspath(path or BILLING_EXPORT_PATH)
+    if not os.path.isdir(path):
+        raise FileNotFoundError(f"Billing export directory '{path}' does not exist. Put CSV, JSONL or Parquet "
+                                f"export files there or set BILLING_EXPORT_PATH")
+
+    counts = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+    errors = []
+    started = time.monotonic()
+    with _store.lock:
+        if _store.path != path:
+            _store.path = path
+            _store.files.clear()
+            _store.vocabularies.clear()
+            _store.columns = None
+
+        found = _export_files(path)
+        for file_path in [p for p in _store.files if p not in found]:
+            del _store.files[file_path]
+            counts["removed"] += 1
+
+        for file_path, kind in sorted(found.items()):
+            stat = os.stat(file_path)
+            known = _store.files.get(file_path)
+            if known and known[0] == stat.st_size and known[1] == stat.st_mtime:
+                counts["unchanged"] += 1
+                continue
+            try:
+                chunk = _ingest_file(file_path, kind)
+            except Exception as e:
+                errors.append({"file": os.path.relpath(file_path, path), "error": str(e)})
+                continue
+            _store.files[file_path] = (stat.st_size, stat.st_mtime, chunk)
+            counts["updated" if known else "added"] += 1
+
+        if counts["added"] or counts["updated"] or counts["removed"]:
+            _store.columns = None
+        rows = sum(entry[2]["rows"] for entry in _store.files.values())
+
+    return {
+        "path": path,
+        "files": len(found),
+        **counts,
+        "rows": rows,
+        "errors": errors,
+        "ingest_ms": round((time.monotonic() - started) * 1000, 1)
+    }
+
+
+def _concatenate(chunks: List[Dict], key: str, inner: Optional[str] = None):
+    """Joins one column over all chunks; label columns missing from a chunk are filled with -1."""
+    parts = []
+    for chunk in chunks:
+        column = chunk[key] if inner is None else chunk[key].get(inner)
+        if column is None:
+            column = np.full(chunk["rows"], -1, dtype=np.int32) if NUMPY_AVAILABLE else [-1] * chunk["rows"]
+        parts.append(column)
+    if NUMPY_AVAILABLE:
+        return np.concatenate(parts) if parts else np.zeros(0)
+    return [value for part in parts for value in part]
+
+
+def _columns() -> Dict:
+    """Returns the concatenated columns of every ingested file, building them once per change."""
+    with _store.lock:
+        if _store.columns is None:
+            chunks = [entry[2] for _, entry in sorted(_store.files.items())]
+            label_keys = sorted({key for chunk in chunks for key in chunk["labels"]})
+            _store.columns = {
+                "rows": sum(chunk["rows"] for chunk in chunks),
+                "time": _concatenate(chunks, "time"),
+                "cost": _concatenate(chunks, "cost"),
+                "credits": _concatenate(chunks, "credits"),
+                "dimensions": {name: _concatenate(chunks, "dimensions", name) for name in DIMENSIONS},
+                "labels": {key: _concatenate(chunks, "labels", key) for key in label_keys}
+            }
+        return _store.columns
+
+
+def period_window(period: str, now: Optional[datetime] = None) -> Tuple[datetime, datetime]:
+    """
+    Resolves a named period to a [start, end) window in UTC.
+
+    Raises:
+        ValueError: If the period is not one of PERIODS
+    """
+    now = now or datetime.now(timezone.utc)
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    month = today.replace(day=1)
+    if period == "today":
+        return today, today + timedelta(days=1)
+    if period == "last_7_days":
+        return today - timedelta(days=6), today + timedelta(days=1)
+    if period == "last_30_days":
+        return today - timedelta(days=29), today + timedelta(days=1)
+    if period == "this_month":
+        return month, today + timedelta(days=1)
+    if period == "last_month":
+        return (month - timedelta(days=1)).replace(day=1), month
+    if period == "this_year":
+        return month.replace(month=1), today + timedelta(days=1)
+    if period == "last_year":
+        year = month.replace(month=1)
+        return year.replace(year=year.year - 1), year
+    raise ValueError(f"period must be one of: {', '.join(PERIODS)}")
+
+
+def _parse_group_by(group_by: Optional[str]) -> List[str]:
+    keys = [key.strip() for key in (group_by or "").split(",") if key.strip()]
+    for key in keys:
+        if key not in DIMENSIONS and not (key.startswith("label:") and len(key) > 6):
+            raise ValueError(f"group_by entries must be one of {', '.join(DIMENSIONS)} or label:<key>, got '{key}'")
+    return keys
+
+
+def _parse_labels(labels: Optional[str]) -> Dict[str, str]:
+    parsed = {}
+    for item in (labels or "").split(","):
+        if not item.strip():
+            continue
+        if "=" not in item:
+            raise ValueError(f"labels must look like key=value,key2=value2, got '{item.strip()}'")
+        key, value = item.split("=", 1)
+        parsed[key.strip()] = value.strip()
+    return parsed
+
+
+def _allowed_codes(vocabulary: Optional[_Vocabulary], wanted: str, substring: bool) -> List[int]:
+    """Codes whose value matches wanted, case-insensitively (as a substring when substring is set)."""
+    wanted = wanted.lower()
+    if vocabulary is None:
+        return []
+    return [code for code, value in enumerate(vocabulary.values)
+            if (wanted in value.lower() if substring else value.lower() == wanted)]
+
+
+def _key_column(columns: Dict, key: str):
+    if key.startswith("label:"):
+        return columns["labels"].get(key[6:])
+    return columns["dimensions"][key]
+
+
+def _decode(key: str, code: int) -> str:
+    if code < 0:
+        return NONE
+    return _store.vocabulary(key).values[code]
+
+
+def _period_codes(times, granularity: str):
+    """Day numbers or months since 1970 for every timestamp."""
+    if NUMPY_AVAILABLE:
+        if granularity == "day":
+            return times // DAY
+        return times.astype("datetime64[s]").astype("datetime64[M]").astype(np.int64)
+    if granularity == "day":
+        return [t // DAY for t in times]
+    months = []
+    for t in times:
+        moment = datetime.fromtimestamp(t, tz=timezone.utc)
+        months.append((moment.year - 1970) * 12 + moment.month - 1)
+    return months
+
+
+def _period_label(code: int, granularity: str) -> str:
+    if granularity == "day":
+        return (datetime(1970, 1, 1, tzinfo=timezone.utc) + timedelta(days=int(code))).date().isoformat()
+    return f"{1970 + int(code) // 12:04d}-{int(code) % 12 + 1:02d}"
+
+
+def _aggregate_numpy(columns: Dict, mask, key_columns: List, period) -> List[Tuple[Tuple, float, float, int]]:
+    """Sums cost and credits per distinct key tuple with one mixed-radix key and bincount."""
+    selected = np.nonzero(mask)[0]
+    cost = columns["cost"][selected]
+    credits = columns["credits"][selected]
+    if not key_columns and period is None:
+        return [((), float(cost.sum()), float(credits.sum()), int(selected.size))] if selected.size else []
+
+    parts = [column[selected].astype(np.int64) + 1 for column in key_columns]
+    if period is not None:
+        period = period[selected]
+        offset = int(period.min()) if period.size else 0
+        parts.append(period.astype(np.int64) - offset)
+    radices = [int(part.max()) + 1 if part.size else 1 for part in parts]
+    combined = np.zeros(selected.size, dtype=np.int64)
+    for part, radix in zip(parts, radices):
+        combined = combined * radix + part
+
+    unique, inverse = np.unique(combined, return_inverse=True)
+    cost_sums = np.bincount(inverse, weights=cost, minlength=unique.size)
+    credit_sums = np.bincount(inverse, weights=credits, minlength=unique.size)
+    counts = np.bincount(inverse, minlength=unique.size)
+
+    results = []
+    for index, value in enumerate(unique.tolist()):
+        digits = []
+        for radix in reversed(radices):
+            value, digit = divmod(value, radix)
+            digits.append(digit)
+        digits.reverse()
+        key = [digit - 1 for digit in digits[:len(key_columns)]]
+        if period is not None:
+            key.append(digits[-1] + offset)
+        results.append((tuple(key), float(cost_sums[index]), float(credit_sums[index]), int(counts[index])))
+    return results
+
+
+def _aggregate_rows(columns: Dict, mask: List[bool], key_columns: List, period) -> List[Tuple[Tuple, float, float, int]]:
+    sums: Dict[Tuple, List] = {}
+    for row, selected in enumerate(mask):
+        if not selected:
+            continue
+        key = tuple(column[row] for column in key_columns)
+        if period is not None:
+            key += (period[row],)
+        entry = sums.setdefault(key, [0.0, 0.0, 0])
+        entry[0] += columns["cost"][row]
+        entry[1] += columns["credits"][row]
+        entry[2] += 1
+    return [(key, cost, credit, count) for key, (cost, credit, count) in sums.items()]
+
+
+def query_costs(start: Optional[datetime] = None, end: Optional[datetime] = None, group_by: Optional[str] = None,
+                granularity: Optional[str] = None, service: Optional[str] = None, sku: Optional[str] = None,
+                project: Optional[str] = None, region: Optional[str] = None, labels: Optional[str] = None,
+                max_rows: Optional[int] = None) -> Dict:
+    """
+    Aggregates ingested line items by dimensions and time.
+
+    Args:
+        start: Inclusive start of the usage window (default: earliest line item)
+        end: Exclusive end of the usage window (default: no limit)
+        group_by: Comma-separated dimensions (service, sku, project, region, currency) or label:<key>
+        granularity: Also split by "day" or "month"
+        service: Case-insensitive substring of the service description, e.g. "storage"
+        sku: Case-insensitive substring of the SKU description
+        project: Project ID
+        region: Region, e.g. us-central1
+        labels: Required labels as key=value,key2=value2
+        max_rows: Rows returned; the rest is summed into one "(other)" row (default: BILLING_QUERY_MAX_ROWS)
+
+    Returns:
+        Dictionary with totals, one row per group (cost, credits, net_cost, line_items) and the currencies seen
+
+    Raises:
+        ValueError: If group_by, granularity or labels are malformed
+    """
+    keys = _parse_group_by(group_by)
+    if granularity and granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of: {', '.join(GRANULARITIES)}")
+    required_labels = _parse_labels(labels)
+    max_rows = max_rows or BILLING_QUERY_MAX_ROWS
+
+    started = time.monotonic()
+    columns = _columns()
+    with _store.lock:
+        vocabularies = dict(_store.vocabularies)
+    filters = []
+    for name, wanted, substring in (("service", service, True), ("sku", sku, True),
+                                    ("project", project, False), ("region", region, False)):
+        if wanted:
+            filters.append((columns["dimensions"][name], _allowed_codes(vocabularies.get(name), wanted, substring)))
+    for key, wanted in required_labels.items():
+        filters.append((columns["labels"].get(key), _allowed_codes(vocabularies.get(f"label:{key}"), wanted, False)))
+
+    times = columns["time"]
+    key_columns = []
+    for key in keys:
+        column = _key_column(columns, key)
+        if column is None:
+            column = np.full(columns["rows"], -1, dtype=np.int32) if NUMPY_AVAILABLE else [-1] * columns["rows"]
+        key_columns.append(column)
+    start_ts = int(start.timestamp()) if start else None
+    end_ts = int(end.timestamp()) if end else None
+
+    if NUMPY_AVAILABLE:
+        mask = np.ones(columns["rows"], dtype=bool)
+        if start_ts is not None:
+            mask &= times >= start_ts
+        if end_ts is not None:
+            mask &= times < end_ts
+        for column, codes in filters:
+            mask &= np.isin(column, codes) if column is not None else False
+        period = _period_codes(times, granularity) if granularity else None
+        groups = _aggregate_numpy(columns, mask, key_columns, period)
+        currency_codes = np.unique(columns["dimensions"]["currency"][mask]).tolist()
+    else:
+        mask = [
+            (start_ts is None or t >= start_ts) and (end_ts is None or t < end_ts)
+            for t in times
+        ]
+        for column, codes in filters:
+            allowed = set(codes)
+            mask = [selected and column is not None and column[row] in allowed for row, selected in enumerate(mask)]
+        period = _period_codes(times, granularity) if granularity else None
+        groups = _aggregate_rows(columns, mask, key_columns, period)
+        currency_codes = sorted({columns["dimensions"]["currency"][row] for row, selected in enumerate(mask) if selected})
+
+    rows = []
+    for key, cost, credit, count in groups:
+        row = {name: _decode(name, code) for name, code in zip(keys, key)}
+        if granularity:
+            row["period"] = _period_label(key[-1], granularity)
+        row.update({"cost": round(cost, 2), "credits": round(credit, 2), "net_cost": round(cost + credit, 2),
+                    "line_items": count})
+        rows.append(row)
+    if granularity:
+        rows.sort(key=lambda row: (row["period"], -row["net_cost"]))
+    else:
+        rows.sort(key=lambda row: -row["net_cost"])
+
+    other = None
+    if len(rows) > max_rows:
+        rest = rows[max_rows:]
+        rows = rows[:max_rows]
+        other = {
+            "groups": len(rest),
+            "cost": round(sum(row["cost"] for row in rest), 2),
+            "credits": round(sum(row["credits"] for row in rest), 2),
+            "net_cost": round(sum(row["net_cost"] for row in rest), 2),
+            "line_items": sum(row["line_items"] for row in rest)
+        }
+
+    total_cost = sum(group[1] for group in groups)
+    total_credits = sum(group[2] for group in groups)
+    return {
+        "totals": {
+            "cost": round(total_cost, 2),
+            "credits": round(total_credits, 2),
+            "net_cost": round(total_cost + total_credits, 2),
+            "line_items": sum(group[3] for group in groups)
+        },
+        "currencies": [_decode("currency", code) for code in currency_codes],
+        "group_count": len(groups),
+        "rows": rows,
+        "other": other,
+        "query_ms": round((time.monotonic() - started) * 1000, 1),
+        "engine": "numpy" if NUMPY_AVAILABLE else "python"
+    }
+
+
+def _parse_date(value: str, name: str) -> datetime:
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO date such as 2024-01-31, got '{value}'")
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def query_billing_costs(period: Optional[str] = None, start_date: Optional[str] = None,
+                        end_date: Optional[str] = None, group_by: Optional[str] = "service",
+                        granularity: Optional[str] = None, service: Optional[str] = None,
+                        sku: Optional[str] = None, project: Optional[str] = None,
+                        region: Optional[str] = None, labels: Optional[str] = None,
+                        max_rows: Optional[int] = None) -> Dict:
+    """
+    Answers cost questions from the billing export files in BILLING_EXPORT_PATH.
+
+    New export files are picked up automatically. Example: Cloud Storage spend
+    last month by team label is period="last_month", service="storage",
+    group_by="label:team".
+
+    Args:
+        period: today, last_7_days, last_30_days, this_month, last_month, this_year or last_year
+        start_date: Inclusive start date (ISO), instead of period
+        end_date: Exclusive end date (ISO), instead of period
+        group_by: Comma-separated service, sku, project, region, currency or label:<key> (default: service)
+        granularity: Also split the costs by "day" or "month"
+        service: Only services whose description contains this text (case-insensitive)
+        sku: Only SKUs whose description contains this text (case-insensitive)
+        project: Only this project ID
+        region: Only this region
+        labels: Only line items with these labels, as key=value,key2=value2
+        max_rows: Maximum rows to return; the rest is summed into "(other)"
+
+    Returns:
+        Dictionary containing total and grouped cost, credits and net cost
+    """
+    try:
+        if period and (start_date or end_date):
+            return {
+                "status": "error",
+                "message": "Pass either period or start_date/end_date, not both"
+            }
+        if period:
+            start, end = period_window(period)
+        else:
+            start = _parse_date(start_date, "start_date") if start_date else None
+            end = _parse_date(end_date, "end_date") if end_date else None
+
+        ingested = ingest_billing_exports()
+        if not ingested["rows"]:
+            return {
+                "status": "error",
+                "message": f"No billing line items found in '{ingested['path']}'. Export billing data "
+                           f"(CSV, JSONL or Parquet) into that directory or set BILLING_EXPORT_PATH",
+                "ingest": ingested
+            }
+
+        result = query_costs(start, end, group_by, granularity, service, sku, project, region, labels, max_rows)
+        currencies = result["currencies"]
+        message = (f"Net cost {result['totals']['net_cost']} {currencies[0] if len(currencies) == 1 else ''}".strip()
+                   + f" over {result['totals']['line_items']} line item(s)")
+        if len(currencies) > 1:
+            message += f"; amounts mix currencies ({', '.join(currencies)}), group by currency to separate them"
+        return {
+            "status": "partial_success" if ingested["errors"] else "success",
+            "message": message,
+            "window": {
+                "start": start.isoformat() if start else None,
+                "end": end.isoformat() if end else None
+            },
+            **result,
+            "ingest": ingested
+        }
+
+    except (ValueError, FileNotFoundError, ImportError) as e:
+        return {
+            "status": "error",
+            "message": str(e)
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Failed to query billing export: {str(e)}"
+        }
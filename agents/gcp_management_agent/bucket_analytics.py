@@ -0,0 +1,297 @@
+"""
+Usage analytics for one Cloud Storage bucket.
+
+The object listing is split into the same shards as bulk transfers (one per
+top-level folder, or name ranges for flat buckets) and the shards are listed
+concurrently. Pages are folded into per-shard aggregates as they arrive and
+then dropped, so memory does not grow with the number of objects. Size and
+age histograms are computed per page with numpy when it is installed.
+
+Per-shard aggregates are cached. A rescan lists only shards that are new,
+older than BUCKET_ANALYTICS_CACHE_TTL, or invalidated by a write made through
+the agent's object tools; the rest are merged from the cache.
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from .bucket_transfer import plan_shards
+from .lazy_imports import lazy_import, module_available
+
+# numpy is optional and imported on first use - pages are aggregated object by object without it
+np = lazy_import("numpy")
+NUMPY_AVAILABLE = module_available("numpy")
+
+BUCKET_ANALYTICS_MAX_WORKERS = int(os.getenv('BUCKET_ANALYTICS_MAX_WORKERS', '8'))
+# Seconds a shard's cached aggregate is reused before it is listed again
+BUCKET_ANALYTICS_CACHE_TTL = float(os.getenv('BUCKET_ANALYTICS_CACHE_TTL', '3600'))
+# Distinct prefixes kept per shard; the rest are counted under "(other)"
+BUCKET_ANALYTICS_MAX_PREFIXES = int(os.getenv('BUCKET_ANALYTICS_MAX_PREFIXES', '5000'))
+
+KIB = 1024
+MIB = 1024 * KIB
+GIB = 1024 * MIB
+DAY = 86400
+
+SIZE_EDGES = (0, KIB, 64 * KIB, MIB, 16 * MIB, 128 * MIB, GIB, 16 * GIB)
+SIZE_LABELS = ("< 1 KiB", "1-64 KiB", "64 KiB-1 MiB", "1-16 MiB", "16-128 MiB", "128 MiB-1 GiB",
+               "1-16 GiB", ">= 16 GiB")
+AGE_EDGES = (0, DAY, 7 * DAY, 30 * DAY, 90 * DAY, 365 * DAY)
+AGE_LABELS = ("< 1 day", "1-7 days", "7-30 days", "30-90 days", "90-365 days", ">= 1 year")
+
+OTHER_PREFIXES = "(other)"
+
+_LIST_FIELDS = "items(name,size,updated,storageClass),nextPageToken"
+_PAGE_SIZE = 1000
+
+# (bucket, prefix, prefix_depth) -> shard key -> aggregate
+_cache: Dict[Tuple[str, str, int], Dict[str, Dict]] = {}
+# bucket -> [(time, object name or None for the whole bucket)]
+_invalidations: Dict[str, List[Tuple[float, Optional[str]]]] = {}
+_cache_lock = threading.Lock()
+
+
+def _shard_key(shard: Dict) -> str:
+    return json.dumps([shard["prefix"], shard["delimiter"], shard["start_offset"], shard["end_offset"]])
+
+
+def _shard_contains(shard_key: str, name: str) -> bool:
+    """Returns True when the object name is listed by the shard."""
+    prefix, delimiter, start_offset, end_offset = json.loads(shard_key)
+    if not name.startswith(prefix):
+        return False
+    if delimiter and delimiter in name[len(prefix):]:
+        return False
+    if start_offset and name < start_offset:
+        return False
+    return not (end_offset and name >= end_offset)
+
+
+def _new_aggregate(scanned_at: float) -> Dict:
+    return {
+        "objects": 0,
+        "bytes": 0,
+        "size_objects": [0] * len(SIZE_EDGES),
+        "size_bytes": [0] * len(SIZE_EDGES),
+        "age_objects": [0] * len(AGE_EDGES),
+        "age_bytes": [0] * len(AGE_EDGES),
+        "classes": {},
+        "prefixes": {},
+        "newest_update": 0.0,
+        "scanned_at": scanned_at
+    }
+
+
+def _histogram(values: List[float], edges: Tuple, objects: List[int], totals: List[int], sizes: List[int]) -> None:
+    """Adds each value's object and bytes to the bin of edges it falls in."""
+    if NUMPY_AVAILABLE:
+        bins = np.searchsorted(np.asarray(edges, dtype=np.float64),
+                               np.asarray(values, dtype=np.float64), side="right") - 1
+        np.clip(bins, 0, len(edges) - 1, out=bins)
+        counts = np.bincount(bins, minlength=len(edges))
+        weights = np.bincount(bins, weights=np.asarray(sizes, dtype=np.float64), minlength=len(edges))
+        for index in range(len(edges)):
+            objects[index] += int(counts[index])
+            totals[index] += int(weights[index])
+        return
+    for value, size in zip(values, sizes):
+        index = max(0, bisect.bisect_right(edges, value) - 1)
+        objects[index] += 1
+        totals[index] += size
+
+
+def _prefix_of(name: str, prefix: str, depth: int) -> str:
+    """Returns the folder of name at depth levels below prefix; objects above that depth map to prefix."""
+    parts = name[len(prefix):].split("/")
+    if len(parts) == 1:
+        return prefix
+    return prefix + "/".join(parts[:min(depth, len(parts) - 1)]) + "/"
+
+
+def _add_page(aggregate: Dict, blobs: List, prefix: str, depth: int, now: float) -> None:
+    """Folds one listing page into a shard aggregate."""
+    if not blobs:
+        return
+    sizes = [blob.size or 0 for blob in blobs]
+    updated = [blob.updated.timestamp() if blob.updated else now for blob in blobs]
+    ages = [max(0.0, now - value) for value in updated]
+
+    aggregate["objects"] += len(blobs)
+    aggregate["bytes"] += sum(sizes)
+    aggregate["newest_update"] = max(aggregate["newest_update"], max(updated))
+    _histogram(sizes, SIZE_EDGES, aggregate["size_objects"], aggregate["size_bytes"], sizes)
+    _histogram(ages, AGE_EDGES, aggregate["age_objects"], aggregate["age_bytes"], sizes)
+
+    classes = aggregate["classes"]
+    prefixes = aggregate["prefixes"]
+    for blob, size in zip(blobs, sizes):
+        entry = classes.setdefault(blob.storage_class or "STANDARD", [0, 0])
+        entry[0] += 1
+        entry[1] += size
+        key = _prefix_of(blob.name, prefix, depth)
+        if key not in prefixes and len(prefixes) >= BUCKET_ANALYTICS_MAX_PREFIXES:
+            key = OTHER_PREFIXES
+        entry = prefixes.setdefault(key, [0, 0])
+        entry[0] += 1
+        entry[1] += size
+
+
+def _scan_shard(client, bucket_name: str, shard: Dict, prefix: str, depth: int) -> Dict:
+    """Lists one shard page by page and returns its aggregate."""
+    started = time.time()
+    aggregate = _new_aggregate(started)
+    iterator = client.list_blobs(bucket_name, prefix=shard["prefix"] or None, delimiter=shard["delimiter"],
+                                 start_offset=shard["start_offset"], end_offset=shard["end_offset"],
+                                 page_size=_PAGE_SIZE, fields=_LIST_FIELDS)
+    for page in iterator.pages:
+        _add_page(aggregate, list(page), prefix, depth, started)
+    return aggregate
+
+
+def _merge(aggregates: List[Dict]) -> Dict:
+    merged = _new_aggregate(0.0)
+    for aggregate in aggregates:
+        for key in ("objects", "bytes"):
+            merged[key] += aggregate[key]
+        for key in ("size_objects", "size_bytes", "age_objects", "age_bytes"):
+            merged[key] = [total + value for total, value in zip(merged[key], aggregate[key])]
+        for key in ("classes", "prefixes"):
+            for name, (count, size) in aggregate[key].items():
+                entry = merged[key].setdefault(name, [0, 0])
+                entry[0] += count
+                entry[1] += size
+        merged["newest_update"] = max(merged["newest_update"], aggregate["newest_update"])
+    return merged
+
+
+def _invalidated_since(bucket_name: str, shard_key: str, since: float) -> bool:
+    return any(when >= since and (name is None or _shard_contains(shard_key, name))
+               for when, name in _invalidations.get(bucket_name, []))
+
+
+def invalidate_bucket_analytics(bucket_name: str, object_name: Optional[str] = None) -> None:
+    """
+    Drops cached aggregates after a write, so the next scan lists the changed shard again.
+
+    Args:
+        bucket_name: Bucket that was written
+        object_name: Object that changed (default: every shard of the bucket)
+    """
+    now = time.time()
+    with _cache_lock:
+        history = [entry for entry in _invalidations.get(bucket_name, [])
+                   if now - entry[0] < BUCKET_ANALYTICS_CACHE_TTL]
+        history.append((now, object_name))
+        _invalidations[bucket_name] = history
+        for (cached_bucket, _, _), shards in _cache.items():
+            if cached_bucket != bucket_name:
+                continue
+            for key in [key for key in shards if object_name is None or _shard_contains(key, object_name)]:
+                del shards[key]
+
+
+def _percent(part: int, whole: int) -> float:
+    return round(100.0 * part / whole, 2) if whole else 0.0
+
+
+def analyze_bucket(client, bucket_name: str, prefix: Optional[str] = None, top_n: int = 10,
+                   prefix_depth: int = 1, force_refresh: bool = False,
+                   max_workers: Optional[int] = None) -> Dict:
+    """
+    Summarizes the objects of a bucket (or of a prefix inside it).
+
+    Args:
+        client: storage.Client
+        bucket_name: Bucket to analyze
+        prefix: Only objects whose names start with this prefix
+        top_n: Number of largest prefixes to return
+        prefix_depth: Folder depth below prefix at which sizes are grouped
+        force_refresh: List every shard again instead of using cached aggregates
+        max_workers: Shards listed at the same time (default: BUCKET_ANALYTICS_MAX_WORKERS)
+
+    Returns:
+        Dictionary with object and byte totals, the size histogram, storage class
+        split, age distribution, the largest prefixes and scan statistics
+
+    Raises:
+        google.api_core.exceptions.NotFound: If the bucket does not exist
+    """
+    prefix = prefix or ""
+    prefix_depth = max(1, int(prefix_depth))
+    started = time.perf_counter()
+    shards = plan_shards(client, bucket_name, prefix)
+    keys = [_shard_key(shard) for shard in shards]
+
+    cache_key = (bucket_name, prefix, prefix_depth)
+    now = time.time()
+    with _cache_lock:
+        cached = {} if force_refresh else dict(_cache.get(cache_key, {}))
+    fresh = {key: aggregate for key, aggregate in cached.items()
+             if key in keys and now - aggregate["scanned_at"] < BUCKET_ANALYTICS_CACHE_TTL}
+    to_scan = [(key, shard) for key, shard in zip(keys, shards) if key not in fresh]
+
+    scanned = {}
+    if to_scan:
+        workers = min(max_workers or BUCKET_ANALYTICS_MAX_WORKERS, len(to_scan))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(lambda item: _scan_shard(client, bucket_name, item[1], prefix, prefix_depth),
+                                   to_scan)
+            scanned = {key: aggregate for (key, _), aggregate in zip(to_scan, results)}
+
+    with _cache_lock:
+        # Keep a new aggregate only if no write touched its shard while it was listed
+        entries = {key: aggregate for key, aggregate in scanned.items()
+                   if not _invalidated_since(bucket_name, key, aggregate["scanned_at"])}
+        current = _cache.get(cache_key, {})
+        entries.update({key: current[key] for key in fresh if key in current})
+        _cache[cache_key] = entries
+
+    merged = _merge([fresh.get(key) or scanned[key] for key in keys])
+    total_objects, total_bytes = merged["objects"], merged["bytes"]
+    elapsed = max(time.perf_counter() - started, 1e-6)
+    objects_scanned = sum(aggregate["objects"] for aggregate in scanned.values())
+    top_prefixes = sorted(merged["prefixes"].items(), key=lambda item: item[1][1], reverse=True)[:max(1, top_n)]
+
+    return {
+        "bucket": bucket_name,
+        "prefix": prefix,
+        "objects": total_objects,
+        "bytes": total_bytes,
+        "gib": round(total_bytes / GIB, 3),
+        "average_object_bytes": total_bytes // total_objects if total_objects else 0,
+        "newest_object_updated": (time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(merged["newest_update"]))
+                                  if merged["newest_update"] else None),
+        "size_histogram": [
+            {"size": label, "objects": count, "bytes": size}
+            for label, count, size in zip(SIZE_LABELS, merged["size_objects"], merged["size_bytes"])
+        ],
+        "storage_classes": {
+            name: {"objects": count, "bytes": size, "percent_of_bytes": _percent(size, total_bytes)}
+            for name, (count, size) in sorted(merged["classes"].items(), key=lambda item: -item[1][1])
+        },
+        "age_distribution": [
+            {"age": label, "objects": count, "bytes": size}
+            for label, count, size in zip(AGE_LABELS, merged["age_objects"], merged["age_bytes"])
+        ],
+        "top_prefixes": [
+            {"prefix": name or "(bucket root)", "objects": count, "bytes": size,
+             "percent_of_bytes": _percent(size, total_bytes)}
+            for name, (count, size) in top_prefixes
+        ],
+        "scan": {
+            "shards": len(shards),
+            "shards_scanned": len(scanned),
+            "shards_from_cache": len(fresh),
+            "objects_scanned": objects_scanned,
+            "elapsed_seconds": round(elapsed, 3),
+            "objects_per_second": round(objects_scanned / elapsed, 1),
+            "oldest_cached_seconds": round(now - min(aggregate["scanned_at"] for aggregate in fresh.values()))
+                                     if fresh else None,
+            "vectorized": NUMPY_AVAILABLE
+        }
+    }
@@ -0,0 +1,345 @@
+"""
+Bulk bucket-to-bucket copies and moves with server-side rewrite.
+
+Object data never passes through this host: every object is copied with the
+Cloud Storage rewrite API. The source listing is split into shards, by the
+top-level "folders" under the prefix or, for flat buckets, by ranges of the
+object name space. Shards are listed concurrently and the objects of each
+listed page are rewritten by a shared worker pool.
+
+After each page a shard's continuation token is saved in a job checkpoint,
+so a transfer that stops at its time budget (or is interrupted) resumes from
+the saved tokens when it is called again with the same arguments. Objects whose copy
+failed are kept in the checkpoint and retried by the next call. Copies are
+sent with if_generation_match=0, so objects already present at the
+destination are skipped rather than overwritten unless overwrite is set.
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from google.api_core import exceptions
+
+from .retries import retry_policy
+from .transfers import MIB, rewrite_object
+
+BULK_TRANSFER_MAX_WORKERS = int(os.getenv('BULK_TRANSFER_MAX_WORKERS', '32'))
+# Shards listed at the same time
+BULK_TRANSFER_SHARD_WORKERS = int(os.getenv('BULK_TRANSFER_SHARD_WORKERS', '8'))
+# Upper bound on folder shards; buckets with more folders are split by name ranges
+BULK_TRANSFER_MAX_SHARDS = int(os.getenv('BULK_TRANSFER_MAX_SHARDS', '256'))
+BULK_TRANSFER_RANGE_SHARDS = int(os.getenv('BULK_TRANSFER_RANGE_SHARDS', '16'))
+BULK_TRANSFER_PAGE_SIZE = int(os.getenv('BULK_TRANSFER_PAGE_SIZE', '500'))
+# Seconds one call may run before it checkpoints and returns
+BULK_TRANSFER_MAX_SECONDS = float(os.getenv('BULK_TRANSFER_MAX_SECONDS', '300'))
+BULK_TRANSFER_STATE_DIR = os.getenv('BULK_TRANSFER_STATE_DIR',
+                                    os.path.join(tempfile.gettempdir(), 'gcp-bucket-transfers'))
+
+MAX_REPORTED_ERRORS = 20
+# Failed objects remembered for the next call to retry
+MAX_TRACKED_FAILURES = 10000
+
+_LIST_FIELDS = "items(name,size,updated,generation,crc32c),nextPageToken"
+
+_COUNTERS = ("listed", "matched", "copied", "skipped_existing", "failed", "deleted", "bytes_copied")
+
+
+def _parse_time(value: Optional[str], name: str) -> Optional[datetime.datetime]:
+    """Parses an ISO 8601 timestamp; naive values are taken as UTC."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO 8601 timestamp such as 2024-01-31T00:00:00Z, got '{value}'")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed
+
+
+def transfer_job_id(source_bucket: str, destination_bucket: str, **options) -> str:
+    """Derives the job ID from the transfer's arguments, so the same call finds its checkpoint."""
+    key = json.dumps([source_bucket, destination_bucket, options], sort_keys=True, default=str)
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+
+def _state_path(job_id: str) -> str:
+    return os.path.join(BULK_TRANSFER_STATE_DIR, f"{job_id}.json")
+
+
+def _load_state(job_id: str) -> Optional[Dict]:
+    try:
+        with open(_state_path(job_id)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_state(state: Dict) -> None:
+    os.makedirs(BULK_TRANSFER_STATE_DIR, exist_ok=True)
+    path = _state_path(state["job_id"])
+    with open(path + ".tmp", "w") as f:
+        json.dump(state, f)
+    os.replace(path + ".tmp", path)
+
+
+def plan_shards(client, bucket_name: str, prefix: str = "", match_glob: Optional[str] = None) -> List[Dict]:
+    """
+    Splits the listing of bucket_name under prefix into shards that can be listed concurrently.
+
+    Folders directly under prefix each become a shard, with one more shard for
+    the objects at the prefix itself. Without at least two folders (or with more
+    than BULK_TRANSFER_MAX_SHARDS), the name space is cut into
+    BULK_TRANSFER_RANGE_SHARDS ranges listed with start_offset/end_offset.
+
+    Returns:
+        List of shard descriptions: prefix, delimiter, start_offset and end_offset
+    """
+    iterator = client.list_blobs(bucket_name, prefix=prefix or None, delimiter="/", match_glob=match_glob,
+                                 fields="prefixes,nextPageToken")
+    for _ in iterator.pages:
+        pass
+    folders = sorted(iterator.prefixes)
+
+    if 2 <= len(folders) <= BULK_TRANSFER_MAX_SHARDS:
+        shards = [{"prefix": prefix, "delimiter": "/", "start_offset": None, "end_offset": None}]
+        shards += [{"prefix": folder, "delimiter": None, "start_offset": None, "end_offset": None}
+                   for folder in folders]
+    else:
+        # Split the printable ASCII range after the prefix; the first and last
+        # shards are open-ended so every name is covered exactly once
+        low, high = 0x21, 0x7f
+        step = max(1, -(-(high - low) // BULK_TRANSFER_RANGE_SHARDS))
+        bounds = [prefix + chr(code) for code in range(low + step, high, step)]
+        starts = [None] + bounds
+        ends = bounds + [None]
+        shards = [{"prefix": prefix, "delimiter": None, "start_offset": start, "end_offset": end}
+                  for start, end in zip(starts, ends)]
+
+    for shard in shards:
+        shard.update({"page_token": None, "done": False})
+    return shards
+
+
+class _Transfer:
+    """One run of a bulk transfer job; shard threads share its pool, counters and checkpoint."""
+
+    def __init__(self, client, state: Dict, deadline: float, max_workers: int):
+        self.client = client
+        self.state = state
+        self.options = state["options"]
+        self.deadline = deadline
+        self.destination = client.bucket(state["destination_bucket"])
+        self.modified_after = _parse_time(self.options["modified_after"], "modified_after")
+        self.modified_before = _parse_time(self.options["modified_before"], "modified_before")
+        self.pool = ThreadPoolExecutor(max_workers=max_workers)
+        self.lock = threading.Lock()
+        self.run = dict.fromkeys(_COUNTERS, 0)
+
+    def _destination_name(self, name: str) -> str:
+        destination_prefix = self.options["destination_prefix"]
+        if destination_prefix is None:
+            return name
+        return destination_prefix + name[len(self.options["prefix"]):]
+
+    def _selected(self, blob) -> bool:
+        updated = blob.updated
+        if self.modified_after and (updated is None or updated < self.modified_after):
+            return False
+        if self.modified_before and (updated is None or updated >= self.modified_before):
+            return False
+        return True
+
+    def _copy(self, blob) -> Dict:
+        """Rewrites one object and, for moves, deletes the source once the copy is verified."""
+        outcome = {"name": blob.name, "result": None, "bytes": 0, "deleted": False}
+        destination = self.destination.blob(self._destination_name(blob.name))
+        try:
+            if self.options["overwrite"]:
+                rewrite_object(blob, destination)
+            else:
+                # The precondition makes the rewrite safe to retry
+                rewrite_object(blob, destination, if_generation_match=0, retry=retry_policy("storage.rewrite"))
+            outcome["result"] = "copied"
+            outcome["bytes"] = blob.size or 0
+        except exceptions.PreconditionFailed:
+            outcome["result"] = "skipped_existing"
+            if not self.options["delete_source"]:
+                return outcome
+            destination = self.destination.get_blob(destination.name)
+            if destination is None:
+                outcome.update(result="failed", error="destination disappeared during the transfer")
+                return outcome
+        except Exception as e:
+            outcome.update(result="failed", error=str(e))
+            return outcome
+
+        if not self.options["delete_source"]:
+            return outcome
+        if blob.crc32c and destination.crc32c:
+            verified = blob.crc32c == destination.crc32c
+        else:
+            verified = blob.size == destination.size
+        if not verified:
+            outcome.update(result="failed", error="destination content differs from the source; source kept")
+            return outcome
+        try:
+            blob.delete(if_generation_match=blob.generation, retry=retry_policy("storage.delete_blob"))
+        except exceptions.NotFound:
+            pass
+        except exceptions.PreconditionFailed:
+            outcome.update(result="failed", error="source changed during the move; source kept")
+            return outcome
+        except Exception as e:
+            outcome.update(result="failed", error=f"copied but source not deleted: {e}")
+            return outcome
+        outcome["deleted"] = True
+        return outcome
+
+    def _record(self, outcomes: List[Dict], listed: int, matched: int) -> None:
+        counts = dict.fromkeys(_COUNTERS, 0)
+        counts["listed"] = listed
+        counts["matched"] = matched
+        errors = []
+        for outcome in outcomes:
+            counts[outcome["result"]] += 1
+            counts["bytes_copied"] += outcome["bytes"]
+            counts["deleted"] += outcome["deleted"]
+            if outcome["result"] == "failed":
+                errors.append({"object": outcome["name"], "error": outcome["error"]})
+        for key, value in counts.items():
+            self.run[key] += value
+            self.state["totals"][key] += value
+        reported = self.state["errors"]
+        reported.extend(errors[:MAX_REPORTED_ERRORS - len(reported)])
+        failed = self.state["failed_objects"]
+        failed.extend(error["object"] for error in errors[:MAX_TRACKED_FAILURES - len(failed)])
+
+    def retry_failed(self, names: List[str]) -> None:
+        """Copies again the objects that failed in earlier calls; objects deleted since are dropped."""
+        source = self.client.bucket(self.state["source_bucket"])
+        blobs = [blob for blob in self.pool.map(source.get_blob, names) if blob is not None]
+        outcomes = list(self.pool.map(self._copy, blobs))
+        with self.lock:
+            self._record(outcomes, 0, 0)
+            _save_state(self.state)
+
+    def transfer_shard(self, shard: Dict) -> None:
+        """Lists a shard page by page, copying each page before checkpointing its continuation token."""
+        while not shard["done"] and time.monotonic() < self.deadline:
+            iterator = self.client.list_blobs(
+                self.state["source_bucket"], prefix=shard["prefix"] or None, delimiter=shard["delimiter"],
+                start_offset=shard["start_offset"], end_offset=shard["end_offset"],
+                match_glob=self.options["match_glob"], page_token=shard["page_token"],
+                page_size=BULK_TRANSFER_PAGE_SIZE, fields=_LIST_FIELDS)
+            page = list(next(iter(iterator.pages), []))
+            selected = [blob for blob in page if self._selected(blob)]
+            outcomes = list(self.pool.map(self._copy, selected))
+            with self.lock:
+                self._record(outcomes, len(page), len(selected))
+                shard["page_token"] = iterator.next_page_token or None
+                shard["done"] = shard["page_token"] is None
+                _save_state(self.state)
+
+
+def transfer_bucket(client, source_bucket: str, destination_bucket: str, prefix: Optional[str] = None,
+                    match_glob: Optional[str] = None, modified_after: Optional[str] = None,
+                    modified_before: Optional[str] = None, destination_prefix: Optional[str] = None,
+                    delete_source: bool = False, overwrite: bool = False,
+                    max_seconds: Optional[float] = None, restart: bool = False,
+                    max_workers: Optional[int] = None) -> Dict:
+    """
+    Copies or moves every matching object from source_bucket to destination_bucket server-side.
+
+    Args:
+        client: storage.Client
+        source_bucket: Bucket to copy from
+        destination_bucket: Bucket to copy into
+        prefix: Only objects whose names start with this prefix
+        match_glob: Only objects matching this glob, e.g. "**/*.parquet"
+        modified_after: Only objects updated at or after this ISO 8601 time
+        modified_before: Only objects updated before this ISO 8601 time
+        destination_prefix: Replaces prefix in the destination names (default: same names)
+        delete_source: Delete each source object after its copy is verified (a move)
+        overwrite: Replace destination objects that already exist instead of skipping them
+        max_seconds: Time budget for this call (default: BULK_TRANSFER_MAX_SECONDS)
+        restart: Discard the job's checkpoint and start from the beginning
+        max_workers: Concurrent rewrites (default: BULK_TRANSFER_MAX_WORKERS)
+
+    Returns:
+        Dictionary with the job_id, whether the job is complete, totals across all
+        runs of the job, this run's throughput, shard progress, the number of
+        failed objects the next call will retry and sample errors from this run
+
+    Raises:
+        ValueError: If a timestamp is malformed or the copy would overlap its source
+    """
+    prefix = prefix or ""
+    if source_bucket == destination_bucket and (
+            destination_prefix is None or destination_prefix.startswith(prefix) or prefix.startswith(destination_prefix)):
+        raise ValueError("Copying within one bucket needs a destination_prefix that does not overlap prefix")
+    _parse_time(modified_after, "modified_after")
+    _parse_time(modified_before, "modified_before")
+
+    options = {"prefix": prefix, "match_glob": match_glob, "modified_after": modified_after,
+               "modified_before": modified_before, "destination_prefix": destination_prefix,
+               "delete_source": delete_source, "overwrite": overwrite}
+    job_id = transfer_job_id(source_bucket, destination_bucket, **options)
+    state = None if restart else _load_state(job_id)
+    resumed = state is not None
+    if state is None:
+        state = {"job_id": job_id, "source_bucket": source_bucket, "destination_bucket": destination_bucket,
+                 "options": options, "totals": dict.fromkeys(_COUNTERS, 0), "runs": 0,
+                 "failed_objects": [], "shards": plan_shards(client, source_bucket, prefix, match_glob)}
+    state["runs"] += 1
+    state["errors"] = []
+    retry_names = state["failed_objects"]
+    state["failed_objects"] = []
+    state["totals"]["failed"] -= len(retry_names)
+
+    started = time.monotonic()
+    budget = BULK_TRANSFER_MAX_SECONDS if max_seconds is None else max_seconds
+    transfer = _Transfer(client, state, started + budget, max_workers or BULK_TRANSFER_MAX_WORKERS)
+    pending = [shard for shard in state["shards"] if not shard["done"]]
+    try:
+        if retry_names:
+            transfer.retry_failed(retry_names)
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(BULK_TRANSFER_SHARD_WORKERS, len(pending))) as shard_pool:
+                list(shard_pool.map(transfer.transfer_shard, pending))
+    finally:
+        transfer.pool.shutdown(wait=True)
+
+    complete = all(shard["done"] for shard in state["shards"]) and not state["failed_objects"]
+    if complete:
+        if os.path.exists(_state_path(job_id)):
+            os.remove(_state_path(job_id))
+    else:
+        _save_state(state)
+
+    elapsed = max(time.monotonic() - started, 1e-6)
+    run = transfer.run
+    return {
+        "job_id": job_id,
+        "complete": complete,
+        "resumed": resumed,
+        "runs": state["runs"],
+        "totals": dict(state["totals"]),
+        "this_run": {
+            **run,
+            "elapsed_seconds": round(elapsed, 3),
+            "objects_per_second": round((run["copied"] + run["skipped_existing"]) / elapsed, 1),
+            "bytes_per_second": round(run["bytes_copied"] / elapsed),
+            "throughput_mib_per_second": round(run["bytes_copied"] / MIB / elapsed, 2)
+        },
+        "shards": {"total": len(state["shards"]), "done": sum(shard["done"] for shard in state["shards"])},
+        "objects_to_retry": len(state["failed_objects"]),
+        "errors": list(state["errors"])
+    }
@@ -0,0 +1,452 @@
+"""
+Manifest-driven bulk provisioning.
+
+A YAML or JSON manifest describes buckets, Compute Engine instances and
+Firestore databases. The whole manifest is validated before anything is
+created; resources are then created level by level in dependency order, with
+each level running concurrently and identical VMs in a zone created through a
+single native bulk-insert call.
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Tuple
+
+from .buckets import normalize_lifecycle_rules
+from .clients import compute_instances_client
+from .inventory_index import invalidate_inventory
+from .lazy_imports import lazy_import
+from .operations import get_tracker
+from .preflight import validate_bucket_request, validate_firestore_request, validate_instance_request
+from .tools import create_storage_bucket, create_firestore_database
+
+# Try to import YAML - JSON manifests work without it
+try:
+    import yaml
+    YAML_AVAILABLE = True
+except ImportError:
+    YAML_AVAILABLE = False
+
+compute_v1 = lazy_import("google.cloud.compute_v1")
+
+BULK_MAX_WORKERS = int(os.getenv('BULK_MAX_WORKERS', '16'))
+# Seconds to wait for an asynchronous create (VMs, named databases) that other resources depend on
+BULK_DEPENDENCY_TIMEOUT = float(os.getenv('BULK_DEPENDENCY_TIMEOUT', '600'))
+
+RESOURCE_TYPE_ALIASES = {
+    "bucket": "bucket",
+    "storage_bucket": "bucket",
+    "instance": "instance",
+    "compute_instance": "instance",
+    "vm": "instance",
+    "firestore_database": "firestore_database",
+    "firestore": "firestore_database",
+}
+
+# Accepted keys per resource type and their defaults
+RESOURCE_FIELDS = {
+    "bucket": {
+        "location": "US",
+        "storage_class": "STANDARD",
+        "versioning_enabled": False,
+        "lifecycle_rules": None,
+        "labels": None,
+    },
+    "instance": {
+        "zone": "us-central1-a",
+        "machine_type": "e2-micro",
+        "disk_size_gb": 10,
+        "image_family": "ubuntu-2204-lts",
+        "image_project": "ubuntu-os-cloud",
+        "network_tags": None,
+    },
+    "firestore_database": {
+        "location_id": "nam5",
+        "database_type": "FIRESTORE_NATIVE",
+    },
+}
+
+
+def parse_manifest(manifest: str) -> Dict:
+    """
+    Parses a manifest given as JSON/YAML text or as a path to a manifest file.
+
+    Raises:
+        ValueError: If the manifest can not be parsed
+    """
+    text = manifest
+    if len(manifest) < 4096 and "\n" not in manifest and os.path.isfile(manifest):
+        with open(manifest, "r", encoding="utf-8") as f:
+            text = f.read()
+
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+
+    if not YAML_AVAILABLE:
+        raise ValueError("Manifest is not valid JSON and YAML support is not installed. Install: pip install pyyaml")
+    try:
+        return yaml.safe_load(text)
+    except yaml.YAMLError as e:
+        raise ValueError(f"Manifest is neither valid JSON nor YAML: {str(e)}")
+
+
+def validate_manifest(document: Dict) -> Tuple[List[Dict], List[str]]:
+    """
+    Validates a parsed manifest and normalizes every resource spec.
+
+    Args:
+        document: Parsed manifest with a "resources" list and optional "defaults"
+
+    Returns:
+        Tuple of (normalized resource specs, list of validation errors)
+    """
+    errors = []
+    if not isinstance(document, dict) or not isinstance(document.get("resources"), list):
+        return [], ["Manifest must be a mapping with a 'resources' list"]
+
+    defaults = document.get("defaults") or {}
+    specs = []
+    seen = set()
+
+    for index, raw in enumerate(document["resources"]):
+        where = f"resources[{index}]"
+        if not isinstance(raw, dict):
+            errors.append(f"{where}: must be a mapping")
+            continue
+
+        resource_type = RESOURCE_TYPE_ALIASES.get(str(raw.get("type", "")).lower())
+        if not resource_type:
+            errors.append(f"{where}: unknown type '{raw.get('type')}'. "
+                          f"Use one of: {', '.join(sorted(set(RESOURCE_TYPE_ALIASES.values())))}")
+            continue
+
+        name = raw.get("name")
+        if not name or not isinstance(name, str):
+            errors.append(f"{where}: 'name' is required")
+            continue
+        if name in seen:
+            errors.append(f"{where}: duplicate resource name '{name}'")
+        seen.add(name)
+
+        allowed = RESOURCE_FIELDS[resource_type]
+        unknown = set(raw) - set(allowed) - {"type", "name", "depends_on"}
+        if unknown:
+            errors.append(f"{where} ({name}): unsupported fields {', '.join(sorted(unknown))}")
+
+        spec = {
+            "type": resource_type,
+            "name": name,
+            "depends_on": list(raw.get("depends_on") or []),
+        }
+        for key, default in allowed.items():
+            spec[key] = raw.get(key, defaults.get(key, default))
+
+        if resource_type == "bucket":
+            problems = validate_bucket_request(name, spec["location"], spec["storage_class"], spec["labels"])
+            try:
+                normalize_lifecycle_rules(spec["lifecycle_rules"])
+            except (TypeError, ValueError) as e:
+                problems.append({"field": "lifecycle_rules", "code": "invalid_lifecycle_rule", "message": str(e),
+                                 "value": spec["lifecycle_rules"]})
+        elif resource_type == "instance":
+            problems = validate_instance_request(name, spec["zone"], spec["machine_type"],
+                                                 spec["disk_size_gb"], spec["network_tags"])
+            if not any(problem["field"] == "disk_size_gb" for problem in problems):
+                spec["disk_size_gb"] = int(spec["disk_size_gb"])
+        else:
+            problems = validate_firestore_request(name, spec["location_id"], spec["database_type"])
+        for problem in problems:
+            errors.append(f"{where} ({name}): {problem['field']}: {problem['message']}"
+                          + (f" (did you mean {', '.join(problem['suggestions'])}?)"
+                             if problem.get("suggestions") else ""))
+
+        specs.append(spec)
+
+    for spec in specs:
+        missing = [dep for dep in spec["depends_on"] if dep not in seen]
+        if missing:
+            errors.append(f"{spec['name']}: depends_on references unknown resources {', '.join(missing)}")
+
+    return specs, errors
+
+
+def dependency_levels(specs: List[Dict], satisfied: Iterable[str] = ()) -> List[List[Dict]]:
+    """
+    Groups specs into levels where every resource only depends on earlier levels.
+
+    Args:
+        specs: Resource specs to order
+        satisfied: Names of resources that already exist, so depending on them never blocks
+
+    Raises:
+        ValueError: If the dependencies contain a cycle
+    """
+    remaining = {spec["name"]: spec for spec in specs}
+    done = set(satisfied)
+    levels = []
+    while remaining:
+        level = [spec for spec in remaining.values() if all(dep in done for dep in spec["depends_on"])]
+        if not level:
+            raise ValueError(f"Dependency cycle between: {', '.join(sorted(remaining))}")
+        levels.append(level)
+        for spec in level:
+            done.add(spec["name"])
+            del remaining[spec["name"]]
+    return levels
+
+
+def _instance_properties(spec: Dict) -> "compute_v1.InstanceProperties":
+    properties = {
+        "machine_type": spec["machine_type"],
+        "disks": [
+            {
+                "boot": True,
+                "auto_delete": True,
+                "initialize_params": {
+                    "source_image": f"projects/{spec['image_project']}/global/images/family/{spec['image_family']}",
+                    "disk_size_gb": spec["disk_size_gb"]
+                }
+            }
+        ],
+        "network_interfaces": [
+            {
+                "network": "global/networks/default",
+                "access_configs": [{"type_": "ONE_TO_ONE_NAT", "name": "External NAT"}]
+            }
+        ]
+    }
+    if spec["network_tags"]:
+        properties["tags"] = {"items": list(spec["network_tags"])}
+    return compute_v1.InstanceProperties(properties)
+
+
+def _instance_group_key(spec: Dict) -> Tuple:
+    return (spec["zone"], spec["machine_type"], spec["disk_size_gb"], spec["image_family"],
+            spec["image_project"], tuple(spec["network_tags"] or ()))
+
+
+def _bulk_insert_instances(project_id: str, specs: List[Dict]) -> List[Dict]:
+    """Creates identically configured instances in one zone with a single bulkInsert call."""
+    names = [spec["name"] for spec in specs]
+    zone = specs[0]["zone"]
+    try:
+        request = compute_v1.BulkInsertInstanceRequest(
+            project=project_id,
+            zone=zone,
+            bulk_insert_instance_resource_resource=compute_v1.BulkInsertInstanceResource(
+                count=len(names),
+                min_count=len(names),
+                instance_properties=_instance_properties(specs[0]),
+                per_instance_properties={
+                    name: compute_v1.BulkInsertInstanceResourcePerInstanceProperties() for name in names
+                }
+            )
+        )
+        operation = compute_instances_client().bulk_insert(request=request)
+        get_tracker().track(
+            "compute", operation.name, project_id, zone=zone,
+            resource=f"compute_instances/{','.join(names)}",
+            on_complete=lambda record: invalidate_inventory(project_id, "compute")
+        )
+        invalidate_inventory(project_id, "compute")
+        return [
+            {"type": "instance", "name": name, "status": "pending",
+             "message": f"Bulk insert of {len(names)} instance(s) in {zone} initiated",
+             "operation_id": operation.name}
+            for name in names
+        ]
+    except Exception as e:
+        return [{"type": "instance", "name": name, "status": "failed", "message": str(e)} for name in names]
+
+
+def _create_single(spec: Dict) -> List[Dict]:
+    """Creates one bucket or Firestore database through the regular tool functions."""
+    if spec["type"] == "bucket":
+        result = create_storage_bucket(
+            bucket_name=spec["name"],
+            location=spec["location"],
+            storage_class=str(spec["storage_class"]).upper(),
+            versioning_enabled=bool(spec["versioning_enabled"]),
+            lifecycle_rules=spec["lifecycle_rules"],
+            labels=spec["labels"]
+        )
+    else:
+        result = create_firestore_database(
+            database_id=spec["name"],
+            location_id=spec["location_id"],
+            database_type=spec["database_type"]
+        )
+
+    details = result.get("details") or {}
+    if result.get("status") == "success":
+        status = "pending" if details.get("operation_id") else "created"
+    elif "already exists" in result.get("message", ""):
+        status = "exists"
+    else:
+        status = "failed"
+    return [{
+        "type": spec["type"],
+        "name": spec["name"],
+        "status": status,
+        "message": result.get("message"),
+        "operation_id": details.get("operation_id")
+    }]
+
+
+def _run_level(project_id: str, level: List[Dict]) -> List[Dict]:
+    """Creates every resource of one dependency level concurrently."""
+    tasks = []
+    instance_groups: Dict[Tuple, List[Dict]] = {}
+    for spec in level:
+        if spec["type"] == "instance":
+            instance_groups.setdefault(_instance_group_key(spec), []).append(spec)
+        else:
+            tasks.append((_create_single, (spec,)))
+    for group in instance_groups.values():
+        tasks.append((_bulk_insert_instances, (project_id, group)))
+
+    rows = []
+    with ThreadPoolExecutor(max_workers=max(1, min(BULK_MAX_WORKERS, len(tasks)))) as executor:
+        for result in executor.map(lambda task: task[0](*task[1]), tasks):
+            rows.extend(result)
+    return rows
+
+
+def _wait_for_dependencies(rows: List[Dict], needed: set) -> None:
+    """
+    Waits for the pending creates that later resources depend on.
+
+    Rows are updated in place to created or failed; a create that is still
+    running after BULK_DEPENDENCY_TIMEOUT is marked failed, so its dependents
+    are skipped rather than started before it exists.
+    """
+    deadline = time.monotonic() + BULK_DEPENDENCY_TIMEOUT
+    for row in rows:
+        if row["status"] != "pending" or row["name"] not in needed:
+            continue
+        record = get_tracker().wait(row["operation_id"], timeout=max(0.0, deadline - time.monotonic()))
+        if record and record["status"] == "DONE":
+            row["status"] = "created"
+            row["message"] = "Created; dependent resources can use it"
+        elif record and record["status"] == "FAILED":
+            row["status"] = "failed"
+            row["message"] = f"Operation failed: {record.get('error')}"
+        else:
+            row["status"] = "failed"
+            row["message"] = (f"Still running after {BULK_DEPENDENCY_TIMEOUT:.0f}s; dependent resources "
+                              f"were not created. Check operation {row['operation_id']}")
+
+
+def execute_manifest(project_id: str, specs: List[Dict], satisfied: Iterable[str] = ()) -> List[Dict]:
+    """
+    Creates validated specs in dependency order and returns one row per resource.
+
+    Resources whose dependencies failed are skipped. Asynchronous creates that
+    other resources depend on are waited for before the next level starts.
+    Dependencies named in satisfied are resources that already exist.
+    """
+    rows = []
+    failed = set()
+    needed = {dep for spec in specs for dep in spec["depends_on"]}
+    for level in dependency_levels(specs, satisfied):
+        runnable = []
+        for spec in level:
+            blocked = [dep for dep in spec["depends_on"] if dep in failed]
+            if blocked:
+                failed.add(spec["name"])
+                rows.append({"type": spec["type"], "name": spec["name"], "status": "skipped",
+                             "message": f"Dependency failed: {', '.join(blocked)}"})
+            else:
+                runnable.append(spec)
+        if not runnable:
+            continue
+        level_rows = _run_level(project_id, runnable)
+        _wait_for_dependencies(level_rows, needed)
+        for row in level_rows:
+            if row["status"] == "failed":
+                failed.add(row["name"])
+            rows.append(row)
+    return rows
+
+
+def summarize_rows(rows: List[Dict]) -> Dict:
+    """Counts result rows by status."""
+    summary = {}
+    for row in rows:
+        summary[row["status"]] = summary.get(row["status"], 0) + 1
+    return summary
+
+
+def provision_resources(manifest: str, dry_run: bool = False) -> Dict:
+    """
+    Creates many buckets, compute instances and Firestore databases from one manifest.
+
+    The manifest (JSON or YAML text, or a path to a file) looks like:
+        defaults: {location: US, zone: us-central1-a}
+        resources:
+          - {type: bucket, name: app-assets, storage_class: STANDARD, versioning_enabled: true,
+             lifecycle_rules: [{action: {type: Delete}, condition: {age: 30}}]}
+          - {type: instance, name: web-1, machine_type: e2-small, depends_on: [app-assets]}
+          - {type: firestore_database, name: orders-db, location_id: nam5}
+
+    Args:
+        manifest: Manifest text or file path
+        dry_run: Only validate and return the execution plan
+
+    Returns:
+        Dictionary containing one result row per resource and a status summary
+    """
+    try:
+        project_id = os.getenv('GOOGLE_CLOUD_PROJECT')
+        if not project_id:
+            return {
+                "status": "error",
+                "message": "GOOGLE_CLOUD_PROJECT environment variable not set"
+            }
+
+        specs, errors = validate_manifest(parse_manifest(manifest))
+        if not errors:
+            try:
+                levels = dependency_levels(specs)
+            except ValueError as e:
+                errors.append(str(e))
+        if errors:
+            return {
+                "status": "error",
+                "message": f"Manifest validation failed with {len(errors)} error(s); nothing was created",
+                "validation_errors": errors
+            }
+
+        if dry_run:
+            return {
+                "status": "success",
+                "message": f"Manifest is valid: {len(specs)} resource(s) in {len(levels)} dependency level(s)",
+                "plan": [[f"{spec['type']}/{spec['name']}" for spec in level] for level in levels]
+            }
+
+        rows = execute_manifest(project_id, specs)
+        summary = summarize_rows(rows)
+        failed = summary.get("failed", 0) + summary.get("skipped", 0)
+
+        return {
+            "status": "success" if not failed else ("partial_success" if failed < len(rows) else "error"),
+            "message": f"Processed {len(rows)} resource(s): " + ", ".join(f"{v} {k}" for k, v in summary.items()),
+            "project_id": project_id,
+            "summary": summary,
+            "results": rows
+        }
+
+    except ValueError as e:
+        return {
+            "status": "error",
+            "message": str(e)
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Failed to provision resources: {str(e)}"
+        }
@@ -0,0 +1,216 @@
+"""
+Shared GCP API clients for the management tools.
+
+Clients are created once per process (and per project where the client is
+project-bound) and reused across tool calls and worker threads, instead of
+every function building its own.
+
+Every client is wrapped by retries.with_retries, so repeatable calls are
+retried on transient errors under a shared retry budget.
+
+Set GCP_MANAGEMENT_BACKEND=fake to get the in-memory stand-ins from
+fake_backends instead of real clients.
+
+The client libraries are imported when their first client is created (see
+lazy_imports), so the agent starts without loading every API's protobufs.
+"""
+
+import os
+import threading
+from typing import Callable, Dict, Hashable, Optional
+
+from .lazy_imports import lazy_import, module_available
+from .retries import with_retries
+
+storage = lazy_import("google.cloud.storage")
+compute_v1 = lazy_import("google.cloud.compute_v1")
+sql_v1 = lazy_import("google.cloud.sql_v1")
+container_v1 = lazy_import("google.cloud.container_v1")
+functions_v1 = lazy_import("google.cloud.functions_v1")
+
+# Optional libraries - handled gracefully if not available
+firestore_admin_v1 = lazy_import("google.cloud.firestore_admin_v1")
+FIRESTORE_ADMIN_AVAILABLE = module_available("google.cloud.firestore_admin_v1")
+
+firestore = lazy_import("google.cloud.firestore")
+FIRESTORE_AVAILABLE = module_available("google.cloud.firestore")
+
+billing_v1 = lazy_import("google.cloud.billing_v1")
+BILLING_AVAILABLE = module_available("google.cloud.billing_v1")
+
+resourcemanager_v3 = lazy_import("google.cloud.resourcemanager_v3")
+RESOURCE_MANAGER_AVAILABLE = module_available("google.cloud.resourcemanager_v3")
+
+# "gcp" for real clients, "fake" for the in-memory backends
+GCP_MANAGEMENT_BACKEND = os.getenv('GCP_MANAGEMENT_BACKEND', 'gcp').lower()
+
+_clients: Dict[Hashable, object] = {}
+_clients_lock = threading.Lock()
+
+
+def using_fake_backends() -> bool:
+    """Returns True when clients are served by the in-memory fake backends."""
+    return GCP_MANAGEMENT_BACKEND == "fake"
+
+
+def set_backend(backend: str) -> None:
+    """
+    Switches between real ("gcp") and in-memory ("fake") clients at runtime.
+
+    Raises:
+        ValueError: If backend is not "gcp" or "fake"
+    """
+    global GCP_MANAGEMENT_BACKEND
+    backend = backend.lower()
+    if backend not in ("gcp", "fake"):
+        raise ValueError(f"Unknown backend '{backend}'. Use 'gcp' or 'fake'")
+    GCP_MANAGEMENT_BACKEND = backend
+    reset_clients()
+
+
+def _fake_factory(key: Hashable) -> Callable[[], object]:
+    from . import fake_backends
+
+    name, args = (key[0], key[1:]) if isinstance(key, tuple) else (key, ())
+    if name not in fake_backends.FAKE_CLIENTS:
+        raise NotImplementedError(f"No fake backend for '{name}' clients")
+    return lambda: fake_backends.FAKE_CLIENTS[name](*args)
+
+
+def _get_or_create(key: Hashable, factory: Callable[[], object]):
+    """Returns the cached client for key, creating it with factory on first use."""
+    if using_fake_backends():
+        factory = _fake_factory(key)
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                service = key[0] if isinstance(key, tuple) else key
+                client = with_retries(factory(), service)
+                _clients[key] = client
+    return client
+
+
+def reset_clients() -> None:
+    """Drops every cached client, e.g. after credentials change."""
+    with _clients_lock:
+        _clients.clear()
+
+
+def storage_client(project_id: str):
+    """Returns a shared Cloud Storage client for project_id."""
+    return _get_or_create(("storage", project_id), lambda: storage.Client(project=project_id))
+
+
+def compute_instances_client():
+    """Returns a shared Compute Engine InstancesClient."""
+    return _get_or_create("compute_instances", lambda: compute_v1.InstancesClient())
+
+
+def compute_zones_client():
+    """Returns a shared Compute Engine ZonesClient."""
+    return _get_or_create("compute_zones", lambda: compute_v1.ZonesClient())
+
+
+def compute_machine_types_client():
+    """Returns a shared Compute Engine MachineTypesClient."""
+    return _get_or_create("compute_machine_types", lambda: compute_v1.MachineTypesClient())
+
+
+def compute_zone_operations_client():
+    """Returns a shared Compute Engine ZoneOperationsClient."""
+    return _get_or_create("compute_zone_operations", lambda: compute_v1.ZoneOperationsClient())
+
+
+def compute_region_operations_client():
+    """Returns a shared Compute Engine RegionOperationsClient."""
+    return _get_or_create("compute_region_operations", lambda: compute_v1.RegionOperationsClient())
+
+
+def compute_global_operations_client():
+    """Returns a shared Compute Engine GlobalOperationsClient."""
+    return _get_or_create("compute_global_operations", lambda: compute_v1.GlobalOperationsClient())
+
+
+def sql_operations_client():
+    """Returns a shared Cloud SQL operations client."""
+    return _get_or_create("sql_operations", lambda: sql_v1.SqlOperationsServiceClient())
+
+
+def sql_instances_client():
+    """Returns a shared Cloud SQL instances client."""
+    return _get_or_create("sql_instances", lambda: sql_v1.SqlInstancesServiceClient())
+
+
+def gke_client():
+    """Returns a shared GKE ClusterManagerClient."""
+    return _get_or_create("gke", lambda: container_v1.ClusterManagerClient())
+
+
+def functions_client():
+    """Returns a shared Cloud Functions client."""
+    return _get_or_create("functions", lambda: functions_v1.CloudFunctionsServiceClient())
+
+
+def firestore_admin_client():
+    """
+    Returns a shared Firestore Admin client.
+
+    Raises:
+        ImportError: If google-cloud-firestore is not installed
+    """
+    if not FIRESTORE_ADMIN_AVAILABLE and not using_fake_backends():
+        raise ImportError("Firestore not available. Install: pip install google-cloud-firestore")
+    return _get_or_create("firestore_admin", lambda: firestore_admin_v1.FirestoreAdminClient())
+
+
+def firestore_client(project_id: str, database: Optional[str] = None):
+    """
+    Returns a shared Firestore data client for a database in project_id.
+
+    Raises:
+        ImportError: If google-cloud-firestore is not installed
+    """
+    if not FIRESTORE_AVAILABLE and not using_fake_backends():
+        raise ImportError("Firestore not available. Install: pip install google-cloud-firestore")
+    if database in (None, "(default)"):
+        return _get_or_create(("firestore", project_id), lambda: firestore.Client(project=project_id))
+    return _get_or_create(("firestore", project_id, database),
+                          lambda: firestore.Client(project=project_id, database=database))
+
+
+def billing_client():
+    """
+    Returns a shared Cloud Billing client.
+
+    Raises:
+        ImportError: If google-cloud-billing is not installed
+    """
+    if not BILLING_AVAILABLE and not using_fake_backends():
+        raise ImportError("Billing API not available. Install: pip install google-cloud-billing")
+    return _get_or_create("billing", lambda: billing_v1.CloudBillingClient())
+
+
+def projects_client():
+    """
+    Returns a shared Resource Manager ProjectsClient.
+
+    Raises:
+        ImportError: If google-cloud-resource-manager is not installed
+    """
+    if not RESOURCE_MANAGER_AVAILABLE and not using_fake_backends():
+        raise ImportError("Resource Manager not available. Install: pip install google-cloud-resource-manager")
+    return _get_or_create("resource_manager_projects", lambda: resourcemanager_v3.ProjectsClient())
+
+
+def folders_client():
+    """
+    Returns a shared Resource Manager FoldersClient.
+
+    Raises:
+        ImportError: If google-cloud-resource-manager is not installed
+    """
+    if not RESOURCE_MANAGER_AVAILABLE and not using_fake_backends():
+        raise ImportError("Resource Manager not available. Install: pip install google-cloud-resource-manager")
+    return _get_or_create("resource_manager_folders", lambda: resourcemanager_v3.FoldersClient())
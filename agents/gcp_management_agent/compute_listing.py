@@ -0,0 +1,322 @@
+"""
+Compute Engine instance listing engine.
+
+Uses the aggregated-list API so a whole project is listed in about one round
+trip, with a bounded concurrent per-zone fallback for narrower scopes. Field
+projection keeps responses limited to the columns that are actually displayed.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+from google.api_core import exceptions
+
+from .clients import compute_instances_client, compute_zones_client
+from .lazy_imports import lazy_import
+from .listing import group_counts
+
+compute_v1 = lazy_import("google.cloud.compute_v1")
+
+# Upper bound on concurrent per-zone list calls
+COMPUTE_LIST_MAX_WORKERS = int(os.getenv('COMPUTE_LIST_MAX_WORKERS', '16'))
+
+# Page size requested from the API (500 is the Compute Engine maximum)
+COMPUTE_LIST_PAGE_SIZE = 500
+
+# Output columns and the API response fields each of them needs
+INSTANCE_FIELD_PATHS = {
+    "name": "name",
+    "zone": "zone",
+    "machine_type": "machineType",
+    "status": "status",
+    "internal_ip": "networkInterfaces/networkIP",
+    "external_ip": "networkInterfaces/accessConfigs/natIP",
+    "created": "creationTimestamp",
+    "last_stop": "lastStopTimestamp",
+    "disk_size_gb": "disks(boot,diskSizeGb,licenses)",
+    "disks_total_gb": "disks(boot,diskSizeGb,licenses)",
+    "image": "disks(boot,diskSizeGb,licenses)",
+    "network_tags": "tags/items",
+    "labels": "labels",
+    "fingerprint": "fingerprint",
+}
+
+DEFAULT_INSTANCE_FIELDS = (
+    "name", "zone", "machine_type", "status", "internal_ip", "external_ip",
+    "created", "disk_size_gb", "image", "network_tags"
+)
+
+
+def build_field_mask(fields: Iterable[str], aggregated: bool = True) -> str:
+    """
+    Builds a partial-response field mask for an instance list call.
+
+    Args:
+        fields: Output columns to fetch (keys of INSTANCE_FIELD_PATHS)
+        aggregated: Whether the mask is for aggregatedList or a zonal list
+
+    Returns:
+        Field mask string suitable for the X-Goog-FieldMask header
+    """
+    # zone is always needed to attribute instances to their zone
+    paths = sorted({INSTANCE_FIELD_PATHS[f] for f in fields} | {"name", "zone"})
+    selection = ",".join(paths)
+    if aggregated:
+        return f"nextPageToken,items/*/instances({selection})"
+    return f"nextPageToken,items({selection})"
+
+
+def instance_to_dict(instance, fields: Iterable[str], zone_name: Optional[str] = None) -> Dict:
+    """
+    Converts an Instance message into a flat dictionary of the requested columns.
+
+    Args:
+        instance: compute_v1.Instance message
+        fields: Output columns to include
+        zone_name: Zone to report when the instance message does not carry one
+
+    Returns:
+        Dictionary containing the requested instance fields
+    """
+    fields = set(fields)
+    info = {}
+
+    if "name" in fields:
+        info["name"] = instance.name
+    if "zone" in fields:
+        info["zone"] = instance.zone.split("/")[-1] if instance.zone else zone_name
+    if "machine_type" in fields:
+        info["machine_type"] = instance.machine_type.split("/")[-1] if instance.machine_type else None
+    if "status" in fields:
+        info["status"] = instance.status
+    if "created" in fields:
+        info["created"] = instance.creation_timestamp
+    if "last_stop" in fields:
+        info["last_stop"] = instance.last_stop_timestamp or None
+
+    if "internal_ip" in fields or "external_ip" in fields:
+        internal_ip = None
+        external_ip = None
+        if instance.network_interfaces:
+            internal_ip = instance.network_interfaces[0].network_i_p or None
+            if instance.network_interfaces[0].access_configs:
+                external_ip = instance.network_interfaces[0].access_configs[0].nat_i_p or None
+        if "internal_ip" in fields:
+            info["internal_ip"] = internal_ip
+        if "external_ip" in fields:
+            info["external_ip"] = external_ip
+
+    if "disk_size_gb" in fields or "image" in fields:
+        boot_disk = next((disk for disk in instance.disks if disk.boot), None)
+        if "disk_size_gb" in fields:
+            info["disk_size_gb"] = int(boot_disk.disk_size_gb) if boot_disk and boot_disk.disk_size_gb else None
+        if "image" in fields:
+            info["image"] = boot_disk.licenses[0].split("/")[-1] if boot_disk and boot_disk.licenses else None
+    if "disks_total_gb" in fields:
+        info["disks_total_gb"] = sum(int(disk.disk_size_gb or 0) for disk in instance.disks)
+
+    if "network_tags" in fields:
+        info["network_tags"] = list(instance.tags.items) if instance.tags else []
+    if "labels" in fields:
+        info["labels"] = dict(instance.labels) if instance.labels else {}
+    if "fingerprint" in fields:
+        info["fingerprint"] = instance.fingerprint or None
+
+    return info
+
+
+def _list_aggregated(client, project_id: str, fields: List[str], use_field_mask: bool = True) -> Dict:
+    """
+    Lists instances across all zones with a single aggregated-list call chain.
+
+    Partial success is requested, so an unreachable zone is reported in
+    zone_errors instead of failing the whole call.
+    """
+    request = compute_v1.AggregatedListInstancesRequest(
+        project=project_id,
+        max_results=COMPUTE_LIST_PAGE_SIZE
+    )
+    # Client versions without the field fall back to the all-or-nothing behaviour
+    if "return_partial_success" in compute_v1.AggregatedListInstancesRequest.meta.fields:
+        request.return_partial_success = True
+    metadata = [("x-goog-fieldmask", build_field_mask(fields, aggregated=True))] if use_field_mask else []
+
+    instances = []
+    zones_seen = []
+    zone_errors = []
+    for scope, scoped_list in client.aggregated_list(request=request, metadata=metadata):
+        zone_name = scope.split("/")[-1]
+        zones_seen.append(zone_name)
+        if "warning" in scoped_list and scoped_list.warning.code not in ("", "NO_RESULTS_ON_PAGE"):
+            zone_errors.append({"zone": zone_name,
+                                "error": scoped_list.warning.message or scoped_list.warning.code})
+        for instance in scoped_list.instances:
+            instances.append(instance_to_dict(instance, fields, zone_name))
+
+    return {"instances": instances, "zones_checked": zones_seen, "zone_errors": zone_errors}
+
+
+def _list_zone(client, project_id: str, zone_name: str, fields: List[str], use_field_mask: bool = True) -> List[Dict]:
+    """Lists instances in a single zone."""
+    request = compute_v1.ListInstancesRequest(
+        project=project_id,
+        zone=zone_name,
+        max_results=COMPUTE_LIST_PAGE_SIZE
+    )
+    metadata = [("x-goog-fieldmask", build_field_mask(fields, aggregated=False))] if use_field_mask else []
+    return [
+        instance_to_dict(instance, fields, zone_name)
+        for instance in client.list(request=request, metadata=metadata)
+    ]
+
+
+def _list_zones_concurrently(client, project_id: str, zones: List[str], fields: List[str],
+                             max_workers: int, use_field_mask: bool = True) -> Dict:
+    """Lists instances zone by zone with bounded parallelism, keeping zone order."""
+    def list_one(zone_name):
+        try:
+            return zone_name, _list_zone(client, project_id, zone_name, fields, use_field_mask), None
+        except exceptions.Forbidden as e:
+            return zone_name, [], f"Permission denied: {str(e)}"
+        except Exception as e:
+            return zone_name, [], str(e)
+
+    instances = []
+    zone_errors = []
+    if zones:
+        workers = max(1, min(max_workers, len(zones)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for zone_name, zone_instances, error in executor.map(list_one, zones):
+                instances.extend(zone_instances)
+                if error:
+                    zone_errors.append({"zone": zone_name, "error": error})
+
+    return {"instances": instances, "zones_checked": list(zones), "zone_errors": zone_errors}
+
+
+def _resolve_fields(fields: Optional[List[str]]) -> List[str]:
+    fields = list(fields or DEFAULT_INSTANCE_FIELDS)
+    unknown = [f for f in fields if f not in INSTANCE_FIELD_PATHS]
+    if unknown:
+        raise ValueError(f"Unknown instance fields: {', '.join(unknown)}. "
+                         f"Valid fields: {', '.join(INSTANCE_FIELD_PATHS)}")
+    return fields
+
+
+def list_instances(project_id: str, zones: Optional[List[str]] = None, fields: Optional[List[str]] = None,
+                   max_workers: Optional[int] = None, client=None) -> Dict:
+    """
+    Lists Compute Engine instances using the cheapest available strategy.
+
+    With no zones the aggregated-list API is used; if that fails the project's
+    zones are listed concurrently instead. With explicit zones only those zones
+    are queried, concurrently.
+
+    Args:
+        project_id: Project to list instances in
+        zones: Zones to restrict the listing to (default: all zones)
+        fields: Output columns to fetch (default: DEFAULT_INSTANCE_FIELDS)
+        max_workers: Maximum concurrent per-zone calls (default: COMPUTE_LIST_MAX_WORKERS)
+        client: Optional InstancesClient to reuse
+
+    Returns:
+        Dictionary with instances, zones checked, per-zone errors and the strategy used
+
+    Raises:
+        ValueError: If an unknown field is requested
+    """
+    fields = _resolve_fields(fields)
+    client = client or compute_instances_client()
+    max_workers = max_workers or COMPUTE_LIST_MAX_WORKERS
+
+    if zones:
+        result = _list_zones_concurrently(client, project_id, zones, fields, max_workers)
+        result["strategy"] = "zonal"
+        return result
+
+    try:
+        try:
+            result = _list_aggregated(client, project_id, fields)
+        except exceptions.InvalidArgument:
+            # Field mask rejected by the API - retry once without projection
+            result = _list_aggregated(client, project_id, fields, use_field_mask=False)
+        result["strategy"] = "aggregated"
+        return result
+    except Exception as aggregated_error:
+        zones_client = compute_zones_client()
+        zone_names = [z.name for z in zones_client.list(request=compute_v1.ListZonesRequest(project=project_id))]
+        result = _list_zones_concurrently(client, project_id, zone_names, fields, max_workers)
+        result["strategy"] = "zonal_fallback"
+        result["fallback_reason"] = str(aggregated_error)
+        return result
+
+
+def list_instances_page(project_id: str, zone: Optional[str] = None, fields: Optional[List[str]] = None,
+                        page_size: int = COMPUTE_LIST_PAGE_SIZE, page_token: Optional[str] = None,
+                        client=None) -> Dict:
+    """
+    Lists a single page of instances, across all zones or in one zone.
+
+    Page tokens are the API's own, so each call costs exactly one list request
+    and holds at most page_size instances.
+
+    Args:
+        project_id: Project to list instances in
+        zone: Zone to list (default: all zones via the aggregated list)
+        fields: Output columns to fetch (default: DEFAULT_INSTANCE_FIELDS)
+        page_size: Maximum instances on the page (max 500)
+        page_token: Token from a previous page's next_page_token
+        client: Optional InstancesClient to reuse
+
+    Returns:
+        Dictionary with the instances and the next_page_token (None on the last page)
+
+    Raises:
+        ValueError: If an unknown field is requested
+    """
+    fields = _resolve_fields(fields)
+    client = client or compute_instances_client()
+    page_size = min(page_size, COMPUTE_LIST_PAGE_SIZE)
+
+    def fetch(use_field_mask):
+        if zone:
+            request = compute_v1.ListInstancesRequest(
+                project=project_id, zone=zone, max_results=page_size, page_token=page_token or ""
+            )
+            metadata = [("x-goog-fieldmask", build_field_mask(fields, aggregated=False))] if use_field_mask else []
+            response = next(iter(client.list(request=request, metadata=metadata).pages))
+            instances = [instance_to_dict(instance, fields, zone) for instance in response.items]
+        else:
+            request = compute_v1.AggregatedListInstancesRequest(
+                project=project_id, max_results=page_size, page_token=page_token or ""
+            )
+            metadata = [("x-goog-fieldmask", build_field_mask(fields, aggregated=True))] if use_field_mask else []
+            response = next(iter(client.aggregated_list(request=request, metadata=metadata).pages))
+            instances = [
+                instance_to_dict(instance, fields, scope.split("/")[-1])
+                for scope, scoped_list in response.items.items()
+                for instance in scoped_list.instances
+            ]
+        return {"instances": instances, "next_page_token": response.next_page_token or None}
+
+    try:
+        return fetch(use_field_mask=True)
+    except exceptions.InvalidArgument:
+        # Field mask rejected by the API - retry once without projection
+        return fetch(use_field_mask=False)
+
+
+def summarize_instances(project_id: str, zones: Optional[List[str]] = None, client=None) -> Dict:
+    """
+    Counts instances by zone, machine type and status.
+
+    Only those three columns are fetched, so the listing stays small even for
+    large projects.
+
+    Returns:
+        Dictionary with the total, per-group counts and any per-zone errors
+    """
+    listing = list_instances(project_id, zones=zones, fields=["zone", "machine_type", "status"], client=client)
+    summary = group_counts(listing["instances"], ["zone", "machine_type", "status"])
+    summary["zone_errors"] = listing["zone_errors"]
+    return summary
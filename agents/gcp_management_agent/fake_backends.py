@@ -0,0 +1,1648 @@
+"""
+In-memory stand-ins for the GCP clients used by the management tools.
+
+With GCP_MANAGEMENT_BACKEND=fake the getters in clients.py return these fakes
+instead of real clients, so listing, bulk deletes and long-running operation
+handling can be exercised and benchmarked offline in seconds. All fakes share
+one process-wide store: a bucket created through one client is visible to
+every other client, and a Firestore database created through the admin client
+can be written to through the data client.
+
+Every API call goes through _api_call, which adds the configured latency and
+can raise injected errors:
+
+    GCP_FAKE_LATENCY_MS         Fixed latency added to every call (default 0)
+    GCP_FAKE_JITTER_MS          Extra uniformly random latency per call (default 0)
+    GCP_FAKE_ERROR_RATE         Probability that a call raises ServiceUnavailable (default 0)
+    GCP_FAKE_OPERATION_SECONDS  How long long-running operations report RUNNING (default 0)
+    GCP_FAKE_SEED               Seed for latency jitter and error injection
+"""
+
+import base64
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+from google.cloud import compute_v1
+from google.api_core import exceptions
+
+# Try to import the CRC32C implementation - fake objects report no crc32c without it
+try:
+    import google_crc32c
+    CRC32C_AVAILABLE = True
+except ImportError:
+    CRC32C_AVAILABLE = False
+
+
+class FakeConfig:
+    """Latency and error injection settings shared by all fakes."""
+
+    def __init__(self):
+        self.latency_ms = float(os.getenv('GCP_FAKE_LATENCY_MS', '0'))
+        self.jitter_ms = float(os.getenv('GCP_FAKE_JITTER_MS', '0'))
+        self.error_rate = float(os.getenv('GCP_FAKE_ERROR_RATE', '0'))
+        self.operation_seconds = float(os.getenv('GCP_FAKE_OPERATION_SECONDS', '0'))
+        # "<service>.<method>" -> exception instance raised on every call
+        self.failures: Dict[str, Exception] = {}
+        # Zones whose instance listings fail, as if the zone were unreachable
+        self.unreachable_zones: set = set()
+        self.random = random.Random(os.getenv('GCP_FAKE_SEED'))
+
+
+class _FakeStore:
+    """Process-wide state behind every fake client."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.calls = Counter()
+        # bucket name -> {"project", "meta", "blobs": {name: blob dict}}
+        self.buckets: Dict[str, Dict] = {}
+        # (project, zone, name) -> compute_v1.Instance
+        self.instances: Dict[tuple, compute_v1.Instance] = {}
+        # operation name -> {"started", "project", "zone", "type", "target", "error"}
+        self.operations: Dict[str, Dict] = {}
+        # (project, database_id) -> database dict
+        self.databases: Dict[tuple, Dict] = {}
+        # (project, database_id) -> {collection path: {document id: data}}
+        self.documents: Dict[tuple, Dict[str, Dict[str, Dict]]] = {}
+        # (project, database_id, document path) -> last write time
+        self.document_times: Dict[tuple, datetime] = {}
+        # billing account name -> account dict
+        self.billing_accounts: Dict[str, Dict] = {
+            "billingAccounts/000000-FAKE00-000000": {
+                "display_name": "Fake Billing Account",
+                "open": True,
+                "currency_code": "USD",
+                "master_billing_account": ""
+            }
+        }
+        # project -> billing account name ("" when billing is disabled)
+        self.project_billing: Dict[str, str] = {}
+        # project -> parent folder or organization
+        self.projects: Dict[str, str] = {}
+        # folder name -> parent folder or organization
+        self.folders: Dict[str, str] = {}
+
+
+_config = FakeConfig()
+_store = _FakeStore()
+
+FAKE_ZONES = ["us-central1-a", "us-central1-b", "us-east1-b", "europe-west1-b", "asia-southeast1-a"]
+DEFAULT_BILLING_ACCOUNT = "billingAccounts/000000-FAKE00-000000"
+
+
+def configure_fakes(latency_ms: Optional[float] = None, jitter_ms: Optional[float] = None,
+                    error_rate: Optional[float] = None, operation_seconds: Optional[float] = None,
+                    failures: Optional[Dict[str, Exception]] = None, seed: Optional[int] = None,
+                    unreachable_zones: Optional[List[str]] = None) -> None:
+    """
+    Changes latency and error injection at runtime.
+
+    Args:
+        latency_ms: Fixed latency added to every call
+        jitter_ms: Extra uniformly random latency per call
+        error_rate: Probability (0-1) that any call raises ServiceUnavailable
+        operation_seconds: How long long-running operations report RUNNING
+        failures: Map of "<service>.<method>" (e.g. "storage.delete_bucket") to the
+                  exception raised on every call of that method; replaces earlier entries
+        seed: Seed for jitter and error injection, for reproducible runs
+        unreachable_zones: Zones whose instance listings fail; an aggregated list
+                           only succeeds for them with return_partial_success
+    """
+    if latency_ms is not None:
+        _config.latency_ms = latency_ms
+    if jitter_ms is not None:
+        _config.jitter_ms = jitter_ms
+    if error_rate is not None:
+        _config.error_rate = error_rate
+    if operation_seconds is not None:
+        _config.operation_seconds = operation_seconds
+    if failures is not None:
+        _config.failures = dict(failures)
+    if seed is not None:
+        _config.random.seed(seed)
+    if unreachable_zones is not None:
+        _config.unreachable_zones = set(unreachable_zones)
+
+
+def reset_fakes() -> None:
+    """Drops all fake resources, call counters and injected failures."""
+    global _config, _store
+    _config = FakeConfig()
+    _store = _FakeStore()
+
+
+def call_counts() -> Dict[str, int]:
+    """Returns the number of fake API calls made per "<service>.<method>"."""
+    with _store.lock:
+        return dict(_store.calls)
+
+
+def _api_call(method: str, retry=None) -> None:
+    """
+    Counts a call, applies latency and raises any injected error.
+
+    A retry passed to a fake client method is applied here, the way the real
+    clients apply their retry= argument to each request.
+    """
+    if retry is not None:
+        return retry(_api_call)(method)
+    with _store.lock:
+        _store.calls[method] += 1
+        jitter = _config.random.uniform(0, _config.jitter_ms) if _config.jitter_ms else 0.0
+        fail = _config.error_rate and _config.random.random() < _config.error_rate
+    delay = (_config.latency_ms + jitter) / 1000
+    if delay:
+        time.sleep(delay)
+    if method in _config.failures:
+        raise _config.failures[method]
+    if fail:
+        raise exceptions.ServiceUnavailable(f"Injected failure in {method}")
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _etag() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def _glob_regex(pattern: str):
+    """Compiles a Cloud Storage match_glob pattern (*, **, ?, [...], {a,b})."""
+    regex = ""
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if pattern.startswith("**", index):
+            regex += ".*"
+            index += 2
+            continue
+        if char == "*":
+            regex += "[^/]*"
+        elif char == "?":
+            regex += "[^/]"
+        elif char == "[":
+            end = pattern.index("]", index)
+            regex += "[" + pattern[index + 1:end].replace("!", "^", 1) + "]"
+            index = end
+        elif char == "{":
+            end = pattern.index("}", index)
+            regex += "(" + "|".join(re.escape(option) for option in pattern[index + 1:end].split(",")) + ")"
+            index = end
+        else:
+            regex += re.escape(char)
+        index += 1
+    return re.compile(regex + r"\Z")
+
+
+def _crc32c(content: bytes) -> Optional[str]:
+    if not CRC32C_AVAILABLE:
+        return None
+    return base64.b64encode(google_crc32c.Checksum(content).digest()).decode("ascii")
+
+
+def _field(request, name: str, default=None):
+    """Reads a request field from a proto message, a dict or None."""
+    if request is None:
+        return default
+    if isinstance(request, dict):
+        return request.get(name, default)
+    return getattr(request, name, default)
+
+
+class _FakeIterator:
+    """
+    Page iterator with the HTTPIterator surface used by the tools.
+
+    Page tokens are offsets into the listing, or the key of the last item
+    returned when token_key is given (the caller then skips to the token);
+    each page fetch counts as one call.
+    """
+
+    def __init__(self, method: str, items: List, page_size: Optional[int] = None,
+                 max_results: Optional[int] = None, page_token: Optional[str] = None, retry=None,
+                 token_key=None):
+        self._method = method
+        self._retry = retry
+        self._token_key = token_key
+        self._start = int(page_token) if page_token and not token_key else 0
+        end = len(items) if max_results is None else min(len(items), self._start + max_results)
+        self._items = items[self._start:end]
+        self._total = len(items)
+        self._page_size = page_size or 1000
+        self.next_page_token = None
+        self.prefixes = set()
+
+    @property
+    def pages(self):
+        offset = 0
+        while True:
+            _api_call(self._method, self._retry)
+            page = self._items[offset:offset + self._page_size]
+            offset += len(page)
+            position = self._start + offset
+            more = offset < len(self._items)
+            self.next_page_token = str(position) if position < self._total else None
+            if self._token_key and self.next_page_token:
+                self.next_page_token = self._token_key(page[-1])
+            yield page
+            if not more:
+                return
+
+    def __iter__(self):
+        for page in self.pages:
+            yield from page
+
+
+class _FakePager:
+    """
+    Stand-in for GAPIC list pagers.
+
+    .pages yields one response per page (built by make_response from a chunk of
+    items and the next page token); iterating the pager yields the items of
+    every page, as unpacked from each response.
+    """
+
+    def __init__(self, method: str, items: List, page_size: Optional[int], page_token: Optional[str],
+                 make_response, unpack=lambda response: response.items, retry=None):
+        self._method = method
+        self._retry = retry
+        self._items = items
+        self._start = int(page_token) if page_token else 0
+        self._page_size = page_size or 500
+        self._make_response = make_response
+        self._unpack = unpack
+        self._response = None
+
+    @property
+    def pages(self):
+        offset = self._start
+        while True:
+            _api_call(self._method, self._retry)
+            chunk = self._items[offset:offset + self._page_size]
+            offset += len(chunk)
+            token = str(offset) if offset < len(self._items) else ""
+            self._response = self._make_response(chunk, token)
+            yield self._response
+            if not token:
+                return
+
+    def __iter__(self):
+        for response in self.pages:
+            yield from self._unpack(response)
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+
+class _FakeResponse:
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+# Cloud Storage
+
+class FakeBlob:
+    """Stand-in for google.cloud.storage.Blob."""
+
+    def __init__(self, name: str, bucket: "FakeBucket", data: Optional[Dict] = None):
+        self.name = name
+        self.bucket = bucket
+        self.content_type = None
+        self._load(data)
+
+    def _load(self, data: Optional[Dict]) -> None:
+        data = data or {}
+        self._content = data.get("content")
+        self.size = data.get("size")
+        self.md5_hash = data.get("md5_hash")
+        self.crc32c = data.get("crc32c")
+        self.generation = data.get("generation")
+        self.storage_class = data.get("storage_class")
+        self.time_created = data.get("time_created")
+        self.updated = data.get("updated")
+        self.content_type = data.get("content_type", self.content_type)
+        self.etag = data.get("etag")
+
+    def _state(self) -> Dict:
+        return self.bucket._state()["blobs"]
+
+    def upload_from_string(self, data, content_type: Optional[str] = None, **kwargs) -> None:
+        _api_call("storage.upload_blob", kwargs.get("retry"))
+        content = data.encode("utf-8") if isinstance(data, str) else bytes(data)
+        self._store_content(content, content_type)
+
+    def _store_content(self, content: bytes, content_type: Optional[str] = None) -> None:
+        now = _now()
+        with _store.lock:
+            blobs = self._state()
+            previous = blobs.get(self.name)
+            record = {
+                "content": content,
+                "size": len(content),
+                "md5_hash": hashlib.md5(content).hexdigest(),
+                "crc32c": _crc32c(content),
+                "generation": int(time.time() * 1e6),
+                "storage_class": self.bucket.storage_class,
+                "time_created": previous["time_created"] if previous else now,
+                "updated": now,
+                "content_type": content_type or self.content_type or "application/octet-stream",
+                "etag": _etag()
+            }
+            blobs[self.name] = record
+        self._load(record)
+
+    def upload_from_filename(self, filename: str, content_type: Optional[str] = None, **kwargs) -> None:
+        with open(filename, "rb") as f:
+            self.upload_from_string(f.read(), content_type=content_type)
+
+    def upload_from_file(self, file_obj, rewind: bool = False, size: Optional[int] = None,
+                         content_type: Optional[str] = None, **kwargs) -> None:
+        if rewind:
+            file_obj.seek(0)
+        self.upload_from_string(file_obj.read() if size is None else file_obj.read(size),
+                                content_type=content_type, **kwargs)
+
+    def download_as_bytes(self, **kwargs) -> bytes:
+        _api_call("storage.download_blob", kwargs.get("retry"))
+        with _store.lock:
+            record = self._state().get(self.name)
+        if record is None:
+            raise exceptions.NotFound(f"No such object: {self.bucket.name}/{self.name}")
+        return record["content"]
+
+    def download_to_file(self, file_obj, start: Optional[int] = None, end: Optional[int] = None,
+                         **kwargs) -> None:
+        """Writes the object, or the inclusive byte range start..end, to file_obj."""
+        content = self.download_as_bytes(**kwargs)
+        file_obj.write(content[start or 0:None if end is None else end + 1])
+
+    def compose(self, sources: List["FakeBlob"], **kwargs) -> None:
+        _api_call("storage.compose", kwargs.get("retry"))
+        if not 1 <= len(sources) <= 32:
+            raise exceptions.BadRequest("A compose request takes 1 to 32 source objects")
+        with _store.lock:
+            blobs = self._state()
+            missing = [source.name for source in sources if source.name not in blobs]
+            content = b"".join(blobs[source.name]["content"] for source in sources if source.name in blobs)
+        if missing:
+            raise exceptions.NotFound(f"No such object: {self.bucket.name}/{missing[0]}")
+        self._store_content(content)
+        with _store.lock:
+            # Like the API, composite objects carry a CRC32C but no MD5
+            self._state()[self.name]["md5_hash"] = None
+        self.md5_hash = None
+
+    def rewrite(self, source: "FakeBlob", token: Optional[str] = None,
+                if_generation_match: Optional[int] = None, **kwargs) -> tuple:
+        """Copies source in one call; returns (token, bytes_rewritten, total_bytes) like the API."""
+        _api_call("storage.rewrite", kwargs.get("retry"))
+        with _store.lock:
+            record = source._state().get(source.name)
+            if record is None:
+                raise exceptions.NotFound(f"No such object: {source.bucket.name}/{source.name}")
+            existing = self._state().get(self.name)
+            if if_generation_match is not None and (existing["generation"] if existing else 0) != if_generation_match:
+                raise exceptions.PreconditionFailed(f"Generation mismatch for {self.bucket.name}/{self.name}")
+            copied = dict(record, time_created=_now(), updated=_now(), etag=_etag(),
+                          generation=int(time.time() * 1e6), storage_class=self.bucket.storage_class)
+            self._state()[self.name] = copied
+        self._load(copied)
+        return None, copied["size"], copied["size"]
+
+    def download_to_filename(self, filename: str, **kwargs) -> None:
+        content = self.download_as_bytes()
+        with open(filename, "wb") as f:
+            f.write(content)
+
+    def exists(self, **kwargs) -> bool:
+        _api_call("storage.get_blob", kwargs.get("retry"))
+        with _store.lock:
+            return self.name in self.bucket._state(missing_ok=True).get("blobs", {})
+
+    def reload(self, **kwargs) -> None:
+        _api_call("storage.get_blob", kwargs.get("retry"))
+        with _store.lock:
+            record = self._state().get(self.name)
+        if record is None:
+            raise exceptions.NotFound(f"No such object: {self.bucket.name}/{self.name}")
+        self._load(record)
+
+    def delete(self, if_generation_match: Optional[int] = None, **kwargs) -> None:
+        _api_call("storage.delete_blob", kwargs.get("retry"))
+        with _store.lock:
+            record = self._state().get(self.name)
+            if record is None:
+                raise exceptions.NotFound(f"No such object: {self.bucket.name}/{self.name}")
+            if if_generation_match is not None and record["generation"] != if_generation_match:
+                raise exceptions.PreconditionFailed(f"Generation mismatch for {self.bucket.name}/{self.name}")
+            del self._state()[self.name]
+
+
+# Bucket properties a patch() can change
+_BUCKET_PATCH_FIELDS = frozenset({"location", "storage_class", "versioning_enabled", "labels", "lifecycle_rules"})
+
+
+class FakeBucket:
+    """Stand-in for google.cloud.storage.Bucket."""
+
+    def __init__(self, client: "FakeStorageClient", name: str, meta: Optional[Dict] = None):
+        self.client = client
+        self.name = name
+        self.location = None
+        self.storage_class = None
+        self.versioning_enabled = False
+        self.labels: Dict[str, str] = {}
+        self.lifecycle_rules: List[Dict] = []
+        self.iam_configuration = {}
+        self.time_created = None
+        self.updated = None
+        self.etag = None
+        self.self_link = f"https://www.googleapis.com/storage/v1/b/{name}"
+        if meta:
+            self._load(meta)
+        self._changes = set()
+
+    def __setattr__(self, name: str, value) -> None:
+        # Like Bucket._changes: patch() only sends the properties set since the last load
+        if name in _BUCKET_PATCH_FIELDS and hasattr(self, "_changes"):
+            self._changes.add(name)
+        super().__setattr__(name, value)
+
+    def _load(self, meta: Dict) -> None:
+        self.location = meta["location"]
+        self.storage_class = meta["storage_class"]
+        self.versioning_enabled = meta["versioning_enabled"]
+        self.labels = dict(meta["labels"])
+        self.lifecycle_rules = list(meta["lifecycle_rules"])
+        self.time_created = meta["time_created"]
+        self.updated = meta["updated"]
+        self.etag = meta["etag"]
+        self._changes = set()
+
+    def _meta(self) -> Dict:
+        return {
+            "location": self.location,
+            "storage_class": self.storage_class,
+            "versioning_enabled": bool(self.versioning_enabled),
+            "labels": dict(self.labels or {}),
+            "lifecycle_rules": list(self.lifecycle_rules or []),
+        }
+
+    def _state(self, missing_ok: bool = False) -> Dict:
+        state = _store.buckets.get(self.name)
+        if state is None:
+            if missing_ok:
+                return {}
+            raise exceptions.NotFound(f"The specified bucket does not exist: {self.name}")
+        return state
+
+    def exists(self, **kwargs) -> bool:
+        _api_call("storage.get_bucket", kwargs.get("retry"))
+        with _store.lock:
+            return self.name in _store.buckets
+
+    def reload(self, **kwargs) -> None:
+        _api_call("storage.get_bucket", kwargs.get("retry"))
+        with _store.lock:
+            self._load(self._state()["meta"])
+
+    def patch(self, **kwargs) -> None:
+        _api_call("storage.patch_bucket", kwargs.get("retry"))
+        with _store.lock:
+            meta = self._state()["meta"]
+            meta.update({key: value for key, value in self._meta().items() if key in self._changes})
+            meta["updated"] = _now()
+            meta["etag"] = _etag()
+            self._load(meta)
+
+    def delete(self, force: bool = False, **kwargs) -> None:
+        _api_call("storage.delete_bucket", kwargs.get("retry"))
+        with _store.lock:
+            state = self._state()
+            if state["blobs"] and not force:
+                raise exceptions.Conflict(f"The bucket you tried to delete is not empty: {self.name}")
+            del _store.buckets[self.name]
+
+    def blob(self, blob_name: str, **kwargs) -> FakeBlob:
+        return FakeBlob(blob_name, self)
+
+    def get_blob(self, blob_name: str, **kwargs) -> Optional[FakeBlob]:
+        _api_call("storage.get_blob", kwargs.get("retry"))
+        with _store.lock:
+            record = self._state()["blobs"].get(blob_name)
+        return FakeBlob(blob_name, self, record) if record else None
+
+    def list_blobs(self, max_results: Optional[int] = None, page_token: Optional[str] = None,
+                   prefix: Optional[str] = None, page_size: Optional[int] = None,
+                   delimiter: Optional[str] = None, start_offset: Optional[str] = None,
+                   end_offset: Optional[str] = None, match_glob: Optional[str] = None,
+                   **kwargs) -> _FakeIterator:
+        prefix = prefix or ""
+        pattern = _glob_regex(match_glob) if match_glob else None
+        prefixes = set()
+        items = []
+        with _store.lock:
+            blobs = sorted(self._state()["blobs"].items())
+        for name, record in blobs:
+            # Like Cloud Storage, page tokens name the last object returned, so
+            # deleting listed objects does not shift later pages
+            if not name.startswith(prefix) or (start_offset and name < start_offset) or (
+                    end_offset and name >= end_offset) or (pattern and not pattern.match(name)) or (
+                    page_token and name <= page_token):
+                continue
+            if delimiter and delimiter in name[len(prefix):]:
+                prefixes.add(name[:name.index(delimiter, len(prefix)) + len(delimiter)])
+                continue
+            items.append(FakeBlob(name, self, record))
+        iterator = _FakeIterator("storage.list_blobs", items, page_size, max_results, page_token, kwargs.get("retry"),
+                                 token_key=lambda blob: blob.name)
+        iterator.prefixes = prefixes
+        return iterator
+
+    def copy_blob(self, blob: FakeBlob, destination_bucket: "FakeBucket",
+                  new_name: Optional[str] = None, **kwargs) -> FakeBlob:
+        _api_call("storage.copy_blob", kwargs.get("retry"))
+        with _store.lock:
+            record = self._state()["blobs"].get(blob.name)
+            if record is None:
+                raise exceptions.NotFound(f"No such object: {self.name}/{blob.name}")
+            copied = dict(record, time_created=_now(), updated=_now(), etag=_etag())
+            destination_bucket._state()["blobs"][new_name or blob.name] = copied
+        return FakeBlob(new_name or blob.name, destination_bucket, copied)
+
+
+class FakeStorageClient:
+    """Stand-in for google.cloud.storage.Client."""
+
+    def __init__(self, project: Optional[str] = None, credentials=None, **kwargs):
+        self.project = project
+
+    def bucket(self, bucket_name: str, **kwargs) -> FakeBucket:
+        return FakeBucket(self, bucket_name)
+
+    def get_bucket(self, bucket_or_name, **kwargs) -> FakeBucket:
+        name = getattr(bucket_or_name, "name", bucket_or_name)
+        _api_call("storage.get_bucket", kwargs.get("retry"))
+        with _store.lock:
+            state = _store.buckets.get(name)
+            if state is None:
+                raise exceptions.NotFound(f"The specified bucket does not exist: {name}")
+            return FakeBucket(self, name, state["meta"])
+
+    def lookup_bucket(self, bucket_name: str, **kwargs) -> Optional[FakeBucket]:
+        try:
+            return self.get_bucket(bucket_name)
+        except exceptions.NotFound:
+            return None
+
+    def create_bucket(self, bucket_or_name, location: Optional[str] = None, **kwargs) -> FakeBucket:
+        """Creates a bucket from a name or a configured FakeBucket; Conflict if the name is taken."""
+        _api_call("storage.create_bucket", kwargs.get("retry"))
+        bucket = bucket_or_name if isinstance(bucket_or_name, FakeBucket) else self.bucket(bucket_or_name)
+        now = _now()
+        meta = bucket._meta()
+        meta.update({
+            "location": (location or bucket.location or "US").upper(),
+            "storage_class": bucket.storage_class or "STANDARD",
+            "time_created": now,
+            "updated": now,
+            "etag": _etag()
+        })
+        with _store.lock:
+            if bucket.name in _store.buckets:
+                raise exceptions.Conflict(f"Your previous request to create the named bucket succeeded "
+                                          f"and you already own it: {bucket.name}")
+            _store.buckets[bucket.name] = {"project": self.project, "meta": meta, "blobs": {}}
+        return FakeBucket(self, bucket.name, meta)
+
+    def list_buckets(self, max_results: Optional[int] = None, page_token: Optional[str] = None,
+                     prefix: Optional[str] = None, fields: Optional[str] = None,
+                     page_size: Optional[int] = None, **kwargs) -> _FakeIterator:
+        with _store.lock:
+            items = [
+                FakeBucket(self, name, state["meta"])
+                for name, state in sorted(_store.buckets.items())
+                if state["project"] == self.project and (not prefix or name.startswith(prefix))
+            ]
+        return _FakeIterator("storage.list_buckets", items, page_size, max_results, page_token, kwargs.get("retry"))
+
+    def list_blobs(self, bucket_or_name, **kwargs) -> _FakeIterator:
+        name = getattr(bucket_or_name, "name", bucket_or_name)
+        return self.bucket(name).list_blobs(**kwargs)
+
+
+# Compute Engine
+
+def _new_operation(project: str, zone: Optional[str], operation_type: str, target: str,
+                   error: Optional[str] = None) -> compute_v1.Operation:
+    name = f"operation-{int(time.time() * 1000)}-{uuid.uuid4().hex[:12]}"
+    with _store.lock:
+        _store.operations[name] = {
+            "started": time.monotonic(),
+            "project": project,
+            "zone": zone,
+            "type": operation_type,
+            "target": target,
+            "error": error
+        }
+    return _operation_message(name)
+
+
+def _operation_message(name: str) -> compute_v1.Operation:
+    with _store.lock:
+        record = _store.operations.get(name)
+    if record is None:
+        raise exceptions.NotFound(f"The resource 'operations/{name}' was not found")
+    done = time.monotonic() - record["started"] >= _config.operation_seconds
+    operation = compute_v1.Operation(
+        name=name,
+        operation_type=record["type"],
+        target_link=record["target"],
+        zone=record["zone"] or "",
+        status=compute_v1.Operation.Status.DONE if done else compute_v1.Operation.Status.RUNNING,
+        progress=100 if done else 50
+    )
+    if done and record["error"]:
+        operation.error = compute_v1.Error(errors=[compute_v1.Errors(message=record["error"])])
+    return operation
+
+
+def _fingerprint() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def _build_instance(project: str, zone: str, name: str, properties) -> compute_v1.Instance:
+    """Builds the stored Instance from an Instance or InstanceProperties message."""
+    machine_type = properties.machine_type.split("/")[-1] or "e2-micro"
+    disks = []
+    for disk in properties.disks:
+        params = disk.initialize_params
+        disks.append(compute_v1.AttachedDisk(
+            boot=disk.boot,
+            auto_delete=disk.auto_delete,
+            disk_size_gb=int(params.disk_size_gb or 10),
+            licenses=[params.source_image.replace("/global/images/family/", "/global/licenses/")]
+            if params.source_image else []
+        ))
+    index = len(_store.instances) + 2
+    return compute_v1.Instance(
+        name=name,
+        id=int(uuid.uuid4().int % 10 ** 18),
+        zone=f"https://www.googleapis.com/compute/v1/projects/{project}/zones/{zone}",
+        machine_type=f"https://www.googleapis.com/compute/v1/projects/{project}/zones/{zone}/machineTypes/{machine_type}",
+        status="RUNNING",
+        creation_timestamp=_now().isoformat(),
+        disks=disks,
+        network_interfaces=[compute_v1.NetworkInterface(
+            network_i_p=f"10.128.{index // 256 % 256}.{index % 256}",
+            access_configs=[compute_v1.AccessConfig(name="External NAT", nat_i_p=f"34.0.{index // 256 % 256}.{index % 256}")]
+        )],
+        tags=compute_v1.Tags(items=list(properties.tags.items)) if properties.tags else None,
+        labels=dict(properties.labels),
+        fingerprint=_fingerprint()
+    )
+
+
+class FakeInstancesClient:
+    """Stand-in for compute_v1.InstancesClient."""
+
+    def __init__(self, credentials=None, **kwargs):
+        pass
+
+    def _key(self, request) -> tuple:
+        return (request.project, request.zone, request.instance)
+
+    def get(self, request=None, **kwargs) -> compute_v1.Instance:
+        _api_call("compute.get", kwargs.get("retry"))
+        with _store.lock:
+            instance = _store.instances.get(self._key(request))
+        if instance is None:
+            raise exceptions.NotFound(f"The resource 'projects/{request.project}/zones/{request.zone}"
+                                      f"/instances/{request.instance}' was not found")
+        return compute_v1.Instance(instance)
+
+    def insert(self, request=None, **kwargs) -> compute_v1.Operation:
+        _api_call("compute.insert", kwargs.get("retry"))
+        resource = request.instance_resource
+        key = (request.project, request.zone, resource.name)
+        with _store.lock:
+            if key in _store.instances:
+                raise exceptions.Conflict(f"The resource 'projects/{request.project}/zones/{request.zone}"
+                                          f"/instances/{resource.name}' already exists")
+            _store.instances[key] = _build_instance(request.project, request.zone, resource.name, resource)
+        return _new_operation(request.project, request.zone, "insert", resource.name)
+
+    def bulk_insert(self, request=None, **kwargs) -> compute_v1.Operation:
+        _api_call("compute.bulk_insert", kwargs.get("retry"))
+        resource = request.bulk_insert_instance_resource_resource
+        names = list(resource.per_instance_properties)
+        with _store.lock:
+            taken = [name for name in names if (request.project, request.zone, name) in _store.instances]
+            if taken:
+                raise exceptions.Conflict(f"Instances already exist: {', '.join(taken)}")
+            for name in names:
+                _store.instances[(request.project, request.zone, name)] = _build_instance(
+                    request.project, request.zone, name, resource.instance_properties
+                )
+        return _new_operation(request.project, request.zone, "bulkInsert", ",".join(names))
+
+    def delete(self, request=None, **kwargs) -> compute_v1.Operation:
+        _api_call("compute.delete", kwargs.get("retry"))
+        with _store.lock:
+            if _store.instances.pop(self._key(request), None) is None:
+                raise exceptions.NotFound(f"The resource 'projects/{request.project}/zones/{request.zone}"
+                                          f"/instances/{request.instance}' was not found")
+        return _new_operation(request.project, request.zone, "delete", request.instance)
+
+    def _set_status(self, request, status: str, operation_type: str) -> compute_v1.Operation:
+        with _store.lock:
+            instance = _store.instances.get(self._key(request))
+            if instance is None:
+                raise exceptions.NotFound(f"The resource 'instances/{request.instance}' was not found")
+            instance.status = status
+            instance.fingerprint = _fingerprint()
+            if status == "TERMINATED":
+                instance.last_stop_timestamp = _now().isoformat()
+        return _new_operation(request.project, request.zone, operation_type, request.instance)
+
+    def stop(self, request=None, **kwargs) -> compute_v1.Operation:
+        _api_call("compute.stop", kwargs.get("retry"))
+        return self._set_status(request, "TERMINATED", "stop")
+
+    def start(self, request=None, **kwargs) -> compute_v1.Operation:
+        _api_call("compute.start", kwargs.get("retry"))
+        return self._set_status(request, "RUNNING", "start")
+
+    def list(self, request=None, metadata=None, **kwargs) -> _FakePager:
+        if request.zone in _config.unreachable_zones:
+            raise exceptions.ServiceUnavailable(f"Zone {request.zone} is unreachable")
+        with _store.lock:
+            items = [compute_v1.Instance(instance) for (project, zone, _), instance
+                     in sorted(_store.instances.items())
+                     if project == request.project and zone == request.zone]
+        return _FakePager(
+            "compute.list", items, request.max_results or None, request.page_token or None,
+            lambda chunk, token: compute_v1.InstanceList(items=chunk, next_page_token=token),
+            retry=kwargs.get("retry")
+        )
+
+    def aggregated_list(self, request=None, metadata=None, **kwargs) -> _FakePager:
+        unreachable = set(_config.unreachable_zones)
+        # Like the API, one unreachable zone fails the call unless partial success was requested
+        if unreachable and not getattr(request, "return_partial_success", False):
+            raise exceptions.ServiceUnavailable(f"Zones unreachable: {', '.join(sorted(unreachable))}")
+        with _store.lock:
+            items = [(zone, compute_v1.Instance(instance)) for (project, zone, _), instance
+                     in sorted(_store.instances.items(), key=lambda item: (item[0][1], item[0][2]))
+                     if project == request.project and zone not in unreachable]
+
+        def make_response(chunk, token):
+            # Like the API, a page covers every zone; zones without instances on it are empty
+            by_zone = {f"zones/{zone}": [] for zone in FAKE_ZONES}
+            for zone, instance in chunk:
+                by_zone.setdefault(f"zones/{zone}", []).append(instance)
+            scoped = {scope: compute_v1.InstancesScopedList(instances=instances)
+                      for scope, instances in by_zone.items()}
+            for zone in unreachable:
+                scoped[f"zones/{zone}"] = compute_v1.InstancesScopedList(warning=compute_v1.Warning(
+                    code="UNREACHABLE", message=f"Zone {zone} is unreachable"
+                ))
+            return compute_v1.InstanceAggregatedList(items=scoped, next_page_token=token)
+
+        return _FakePager("compute.aggregated_list", items, request.max_results or None,
+                          request.page_token or None, make_response,
+                          unpack=lambda response: response.items.items(), retry=kwargs.get("retry"))
+
+
+class FakeZonesClient:
+    """Stand-in for compute_v1.ZonesClient."""
+
+    def __init__(self, credentials=None, **kwargs):
+        pass
+
+    def list(self, request=None, **kwargs) -> _FakePager:
+        with _store.lock:
+            zones = sorted(set(FAKE_ZONES) | {zone for _, zone, _ in _store.instances})
+        items = [compute_v1.Zone(name=zone, status="UP", region=zone.rsplit("-", 1)[0]) for zone in zones]
+        return _FakePager("compute.list_zones", items, None, None,
+                          lambda chunk, token: compute_v1.ZoneList(items=chunk, next_page_token=token),
+                          retry=kwargs.get("retry"))
+
+
+class FakeComputeOperationsClient:
+    """Stand-in for the zone, region and global Compute Engine operations clients."""
+
+    def __init__(self, credentials=None, **kwargs):
+        pass
+
+    def get(self, request=None, **kwargs) -> compute_v1.Operation:
+        _api_call("compute.get_operation", kwargs.get("retry"))
+        return _operation_message(request.operation)
+
+
+# Firestore
+
+# Stand-in for Firestore's server timestamp sentinel when the library is absent
+SERVER_TIMESTAMP = object()
+
+_FILTER_OPS = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a is not None and a < b,
+    "<=": lambda a, b: a is not None and a <= b,
+    ">": lambda a, b: a is not None and a > b,
+    ">=": lambda a, b: a is not None and a >= b,
+    "in": lambda a, b: a in b,
+    "not-in": lambda a, b: a not in b,
+    "array_contains": lambda a, b: isinstance(a, list) and b in a,
+    "array_contains_any": lambda a, b: isinstance(a, list) and any(v in a for v in b),
+}
+
+
+def _get_path(data: Dict, field_path: str):
+    value = data
+    for part in field_path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def _order_value(row: tuple, field_path: str):
+    """Value a (document ID, data) row is ordered by; __name__ orders by document ID."""
+    return row[0] if field_path == "__name__" else _get_path(row[1], field_path)
+
+
+def _resolve_sentinels(data: Dict) -> Dict:
+    return {key: (_now() if (value is SERVER_TIMESTAMP or type(value).__name__ == "Sentinel") else
+                  _resolve_sentinels(value) if isinstance(value, dict) else value)
+            for key, value in data.items()}
+
+
+class FakeDocumentSnapshot:
+    """Stand-in for firestore.DocumentSnapshot."""
+
+    def __init__(self, reference: "FakeDocumentReference", data: Optional[Dict]):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self._data = data
+        self.update_time = reference._write_time() if data is not None else None
+
+    def to_dict(self) -> Optional[Dict]:
+        return dict(self._data) if self._data is not None else None
+
+    def get(self, field_path: str):
+        return _get_path(self._data or {}, field_path)
+
+
+class FakeDocumentReference:
+    """Stand-in for firestore.DocumentReference."""
+
+    def __init__(self, client: "FakeFirestoreClient", collection_path: str, document_id: str):
+        self._client = client
+        self._collection_path = collection_path
+        self.id = document_id
+        self.path = f"{collection_path}/{document_id}"
+
+    @property
+    def parent(self) -> "FakeCollectionReference":
+        return FakeCollectionReference(self._client, self._collection_path)
+
+    def _collection(self, create: bool = False) -> Dict[str, Dict]:
+        documents = self._client._documents()
+        if create:
+            return documents.setdefault(self._collection_path, {})
+        return documents.get(self._collection_path, {})
+
+    def collection(self, collection_id: str) -> "FakeCollectionReference":
+        return FakeCollectionReference(self._client, f"{self.path}/{collection_id}")
+
+    def _time_key(self) -> tuple:
+        return (self._client.project, self._client._database, self.path)
+
+    def _write_time(self) -> Optional[datetime]:
+        with _store.lock:
+            return _store.document_times.get(self._time_key())
+
+    def collections(self) -> List["FakeCollectionReference"]:
+        _api_call("firestore.list_collections")
+        prefix = f"{self.path}/"
+        with _store.lock:
+            paths = [p for p, docs in self._client._documents().items()
+                     if docs and p.startswith(prefix) and "/" not in p[len(prefix):]]
+        return [FakeCollectionReference(self._client, p) for p in sorted(paths)]
+
+    def set(self, document_data: Dict, merge: bool = False) -> None:
+        _api_call("firestore.set")
+        with _store.lock:
+            collection = self._collection(create=True)
+            data = _resolve_sentinels(document_data)
+            if merge and self.id in collection:
+                collection[self.id] = {**collection[self.id], **data}
+            else:
+                collection[self.id] = data
+            _store.document_times[self._time_key()] = _now()
+
+    def create(self, document_data: Dict) -> None:
+        with _store.lock:
+            if self.id in self._collection():
+                raise exceptions.Conflict(f"Document already exists: {self.path}")
+            self.set(document_data)
+
+    def update(self, field_updates: Dict) -> None:
+        _api_call("firestore.update")
+        with _store.lock:
+            collection = self._collection()
+            if self.id not in collection:
+                raise exceptions.NotFound(f"No document to update: {self.path}")
+            collection[self.id] = {**collection[self.id], **_resolve_sentinels(field_updates)}
+            _store.document_times[self._time_key()] = _now()
+
+    def get(self, field_paths: Optional[Iterable[str]] = None, **kwargs) -> FakeDocumentSnapshot:
+        _api_call("firestore.get", kwargs.get("retry"))
+        with _store.lock:
+            data = self._collection().get(self.id)
+        if data is not None and field_paths:
+            data = {path: _get_path(data, path) for path in field_paths}
+        return FakeDocumentSnapshot(self, dict(data) if data is not None else None)
+
+    def delete(self, **kwargs) -> None:
+        _api_call("firestore.delete", kwargs.get("retry"))
+        with _store.lock:
+            self._collection().pop(self.id, None)
+            _store.document_times.pop(self._time_key(), None)
+
+
+class _FakeAggregationResult:
+    def __init__(self, alias: str, value: int):
+        self.alias = alias
+        self.value = value
+
+
+class _FakeAggregationQuery:
+    def __init__(self, query: "FakeQuery", alias: str):
+        self._query = query
+        self._alias = alias
+
+    def get(self, **kwargs) -> List[List[_FakeAggregationResult]]:
+        _api_call("firestore.run_aggregation_query", kwargs.get("retry"))
+        return [[_FakeAggregationResult(self._alias, len(self._query._matching()))]]
+
+
+class FakeFieldFilter:
+    """Stand-in for firestore.FieldFilter."""
+
+    def __init__(self, field_path: str, op_string: str, value=None):
+        self.field_path = field_path
+        self.op_string = op_string
+        self.value = value
+
+
+class FakeQuery:
+    """Stand-in for firestore.Query with where/order_by/limit/cursors/select."""
+
+    def __init__(self, collection: "FakeCollectionReference", filters=None, orders=None,
+                 limit=None, start_after=None, projection=None):
+        self._collection = collection
+        self._filters = filters or []
+        self._orders = orders or []
+        self._limit = limit
+        self._start_after = start_after
+        self._projection = projection
+
+    def _copy(self, **changes) -> "FakeQuery":
+        settings = {
+            "filters": self._filters, "orders": self._orders, "limit": self._limit,
+            "start_after": self._start_after, "projection": self._projection
+        }
+        settings.update(changes)
+        return FakeQuery(self._collection, **settings)
+
+    def where(self, field_path: Optional[str] = None, op_string: Optional[str] = None,
+              value=None, filter=None) -> "FakeQuery":
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        if op_string not in _FILTER_OPS:
+            raise exceptions.InvalidArgument(f"Unsupported filter operator: {op_string}")
+        return self._copy(filters=self._filters + [(field_path, op_string, value)])
+
+    def order_by(self, field_path: str, direction: str = "ASCENDING") -> "FakeQuery":
+        return self._copy(orders=self._orders + [(field_path, str(direction).upper().startswith("DESC"))])
+
+    def limit(self, count: int) -> "FakeQuery":
+        return self._copy(limit=count)
+
+    def start_after(self, document_fields_or_snapshot) -> "FakeQuery":
+        return self._copy(start_after=document_fields_or_snapshot)
+
+    def select(self, field_paths: Iterable[str]) -> "FakeQuery":
+        return self._copy(projection=list(field_paths))
+
+    def count(self, alias: Optional[str] = None) -> _FakeAggregationQuery:
+        return _FakeAggregationQuery(self._copy(limit=None), alias or "count")
+
+    def _matching(self) -> List[tuple]:
+        with _store.lock:
+            documents = sorted(self._collection._documents().items())
+        rows = [
+            (doc_id, data) for doc_id, data in documents
+            if all(_FILTER_OPS[op](_get_path(data, path), value) for path, op, value in self._filters)
+        ]
+        for path, descending in reversed(self._orders):
+            rows.sort(key=lambda row: (_order_value(row, path) is None, _order_value(row, path)),
+                      reverse=descending)
+        if self._start_after is not None:
+            cursor_id = getattr(self._start_after, "id", None)
+            if cursor_id is not None:
+                ids = [doc_id for doc_id, _ in rows]
+                rows = rows[ids.index(cursor_id) + 1:] if cursor_id in ids else rows
+            elif self._orders:
+                path, descending = self._orders[0]
+                bound = _get_path(self._start_after, path)
+                if path == "__name__":
+                    bound = getattr(bound, "id", bound)
+                rows = [row for row in rows
+                        if (_order_value(row, path) < bound if descending else _order_value(row, path) > bound)]
+        if self._limit is not None:
+            rows = rows[:self._limit]
+        return rows
+
+    def stream(self, **kwargs):
+        _api_call("firestore.run_query", kwargs.get("retry"))
+        for doc_id, data in self._matching():
+            if self._projection is not None:
+                data = {path: _get_path(data, path) for path in self._projection}
+            yield FakeDocumentSnapshot(self._collection.document(doc_id), dict(data))
+
+    def get(self, **kwargs) -> List[FakeDocumentSnapshot]:
+        return list(self.stream())
+
+
+class FakeCollectionReference(FakeQuery):
+    """Stand-in for firestore.CollectionReference."""
+
+    def __init__(self, client: "FakeFirestoreClient", path: str):
+        self._client = client
+        self.path = path
+        self.id = path.split("/")[-1]
+        super().__init__(self)
+
+    def _documents(self) -> Dict[str, Dict]:
+        return self._client._documents().get(self.path, {})
+
+    def document(self, document_id: Optional[str] = None) -> FakeDocumentReference:
+        return FakeDocumentReference(self._client, self.path, document_id or uuid.uuid4().hex[:20])
+
+    def add(self, document_data: Dict, document_id: Optional[str] = None) -> tuple:
+        reference = self.document(document_id)
+        reference.set(document_data)
+        return _now(), reference
+
+    def list_documents(self, page_size: Optional[int] = None) -> List[FakeDocumentReference]:
+        _api_call("firestore.list_documents")
+        with _store.lock:
+            ids = sorted(self._documents())
+        return [self.document(doc_id) for doc_id in ids]
+
+
+class FakeQueryPartition:
+    """Stand-in for firestore.QueryPartition; bounds are document references."""
+
+    def __init__(self, group: "FakeCollectionGroup", start_at, end_at):
+        self._group = group
+        self.start_at = start_at
+        self.end_at = end_at
+
+    def query(self) -> "FakeCollectionGroup":
+        query = self._group.order_by("__name__")
+        if self.start_at is not None:
+            query = query.start_at({"__name__": self.start_at})
+        if self.end_at is not None:
+            query = query.end_before({"__name__": self.end_at})
+        return query
+
+
+class FakeCollectionGroup:
+    """Stand-in for firestore.CollectionGroup; only ordering by __name__ is supported."""
+
+    def __init__(self, client: "FakeFirestoreClient", collection_id: str, start: Optional[str] = None,
+                 after: Optional[str] = None, end: Optional[str] = None, projection=None):
+        self._client = client
+        self._collection_id = collection_id
+        self._start = start
+        self._after = after
+        self._end = end
+        self._projection = projection
+
+    def _copy(self, **changes) -> "FakeCollectionGroup":
+        settings = {"start": self._start, "after": self._after, "end": self._end, "projection": self._projection}
+        settings.update(changes)
+        return FakeCollectionGroup(self._client, self._collection_id, **settings)
+
+    @staticmethod
+    def _cursor_path(cursor) -> str:
+        reference = cursor.get("__name__") if isinstance(cursor, dict) else getattr(cursor, "reference", cursor)
+        return reference.path
+
+    def order_by(self, field_path: str, direction: str = "ASCENDING") -> "FakeCollectionGroup":
+        if field_path != "__name__" or str(direction).upper().startswith("DESC"):
+            raise exceptions.InvalidArgument("The fake collection group only orders by __name__ ascending")
+        return self
+
+    def start_at(self, cursor) -> "FakeCollectionGroup":
+        return self._copy(start=self._cursor_path(cursor), after=None)
+
+    def start_after(self, cursor) -> "FakeCollectionGroup":
+        return self._copy(after=self._cursor_path(cursor), start=None)
+
+    def end_before(self, cursor) -> "FakeCollectionGroup":
+        return self._copy(end=self._cursor_path(cursor))
+
+    def select(self, field_paths: Iterable[str]) -> "FakeCollectionGroup":
+        return self._copy(projection=list(field_paths))
+
+    def _rows(self) -> List[tuple]:
+        with _store.lock:
+            rows = sorted(
+                (f"{path}/{doc_id}", path, doc_id, data)
+                for path, documents in self._client._documents().items()
+                if path.split("/")[-1] == self._collection_id
+                for doc_id, data in documents.items()
+            )
+        return [row for row in rows
+                if (self._start is None or row[0] >= self._start) and (self._after is None or row[0] > self._after)
+                and (self._end is None or row[0] < self._end)]
+
+    def stream(self, **kwargs):
+        _api_call("firestore.run_query", kwargs.get("retry"))
+        for _, path, doc_id, data in self._rows():
+            if self._projection is not None:
+                data = {field_path: _get_path(data, field_path) for field_path in self._projection}
+            yield FakeDocumentSnapshot(FakeDocumentReference(self._client, path, doc_id), dict(data))
+
+    def get_partitions(self, partition_count: int, **kwargs):
+        _api_call("firestore.partition_query", kwargs.get("retry"))
+        rows = self._rows()
+        step = max(1, -(-len(rows) // max(1, partition_count)))
+        start = None
+        for index in range(step, len(rows), step):
+            cursor = FakeDocumentReference(self._client, rows[index][1], rows[index][2])
+            yield FakeQueryPartition(self, start, cursor)
+            start = cursor
+        yield FakeQueryPartition(self, start, None)
+
+
+class FakeWriteBatch:
+    """Stand-in for firestore.WriteBatch; writes are applied on commit."""
+
+    def __init__(self):
+        self._writes = []
+
+    def set(self, reference: FakeDocumentReference, document_data: Dict, merge: bool = False) -> None:
+        self._writes.append(lambda: reference.set(document_data, merge=merge))
+
+    def update(self, reference: FakeDocumentReference, field_updates: Dict) -> None:
+        self._writes.append(lambda: reference.update(field_updates))
+
+    def delete(self, reference: FakeDocumentReference) -> None:
+        self._writes.append(reference.delete)
+
+    def commit(self) -> List:
+        _api_call("firestore.commit")
+        with _store.lock:
+            for write in self._writes:
+                write()
+        count = len(self._writes)
+        self._writes = []
+        return [None] * count
+
+
+class FakeFirestoreClient:
+    """Stand-in for firestore.Client bound to one database."""
+
+    def __init__(self, project: Optional[str] = None, database: Optional[str] = None, credentials=None, **kwargs):
+        self.project = project
+        self._database = database or "(default)"
+        key = (project, self._database)
+        with _store.lock:
+            if self._database == "(default)" and key not in _store.databases:
+                # Like the real client, first use of the default database brings it up
+                _store.databases[key] = _database_record(project, self._database, "nam5", "FIRESTORE_NATIVE")
+
+    def _documents(self) -> Dict[str, Dict[str, Dict]]:
+        key = (self.project, self._database)
+        if key not in _store.databases:
+            raise exceptions.NotFound(f"The database {self._database} does not exist for project {self.project}")
+        return _store.documents.setdefault(key, {})
+
+    def collection(self, collection_id: str) -> FakeCollectionReference:
+        return FakeCollectionReference(self, collection_id)
+
+    def document(self, document_path: str) -> FakeDocumentReference:
+        collection_path, document_id = document_path.rsplit("/", 1)
+        return FakeDocumentReference(self, collection_path, document_id)
+
+    def collections(self, **kwargs) -> List[FakeCollectionReference]:
+        _api_call("firestore.list_collections", kwargs.get("retry"))
+        with _store.lock:
+            paths = [path for path, docs in self._documents().items() if docs and "/" not in path]
+        return [FakeCollectionReference(self, path) for path in sorted(paths)]
+
+    def collection_group(self, collection_id: str) -> FakeCollectionGroup:
+        return FakeCollectionGroup(self, collection_id)
+
+    def batch(self) -> FakeWriteBatch:
+        return FakeWriteBatch()
+
+    def get_all(self, references: Iterable[FakeDocumentReference], field_paths=None, **kwargs):
+        for reference in references:
+            yield reference.get(field_paths=field_paths)
+
+
+# Firestore Admin
+
+class _FakeEnum:
+    """Minimal proto-enum stand-in exposing .name."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __str__(self):
+        return self.name
+
+
+class _FakeDatabase:
+    def __init__(self, record: Dict):
+        self.name = record["name"]
+        self.location_id = record["location_id"]
+        self.type_ = _FakeEnum(record["type"])
+        self.state = _FakeEnum("READY")
+        self.create_time = record["create_time"]
+        self.update_time = record["update_time"]
+        self.etag = record["etag"]
+
+
+def _database_record(project: str, database_id: str, location_id: str, database_type: str) -> Dict:
+    now = _now()
+    return {
+        "name": f"projects/{project}/databases/{database_id}",
+        "location_id": location_id,
+        "type": database_type,
+        "create_time": now,
+        "update_time": now,
+        "etag": _etag()
+    }
+
+
+class _FakeOperationStatus:
+    def __init__(self, name: str, done: bool, error: Optional[str]):
+        self.name = name
+        self.done = done
+        self.error = type("Status", (), {"code": 2 if error else 0, "message": error or ""})()
+
+
+class FakeAdminOperation:
+    """Stand-in for the google.api_core.operation.Operation returned by admin calls."""
+
+    def __init__(self, name: str, result=None):
+        self.operation = type("OperationProto", (), {"name": name})()
+        self._result = result
+
+    def done(self) -> bool:
+        return _admin_operation_status(self.operation.name).done
+
+    def result(self, timeout: Optional[float] = None):
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while not self.done():
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"Operation {self.operation.name} did not complete in {timeout}s")
+            time.sleep(0.05)
+        return self._result
+
+
+def _admin_operation_status(name: str) -> _FakeOperationStatus:
+    with _store.lock:
+        record = _store.operations.get(name)
+    if record is None:
+        raise exceptions.NotFound(f"Operation {name} not found")
+    done = time.monotonic() - record["started"] >= _config.operation_seconds
+    return _FakeOperationStatus(name, done, record["error"] if done else None)
+
+
+class FakeFirestoreAdminClient:
+    """Stand-in for firestore_admin_v1.FirestoreAdminClient."""
+
+    def __init__(self, credentials=None, **kwargs):
+        pass
+
+    def _new_operation(self, project: str, operation_type: str, target: str, result=None) -> FakeAdminOperation:
+        name = f"projects/{project}/databases/{target}/operations/{uuid.uuid4().hex}"
+        with _store.lock:
+            _store.operations[name] = {
+                "started": time.monotonic(), "project": project, "zone": None,
+                "type": operation_type, "target": target, "error": None
+            }
+        return FakeAdminOperation(name, result)
+
+    def create_database(self, request=None, parent: Optional[str] = None, database=None,
+                        database_id: Optional[str] = None, **kwargs) -> FakeAdminOperation:
+        _api_call("firestore_admin.create_database", kwargs.get("retry"))
+        parent = _field(request, "parent", parent)
+        database = _field(request, "database", database)
+        database_id = _field(request, "database_id", database_id)
+        project = parent.split("/")[1]
+        database_type = getattr(_field(database, "type_"), "name", None) or str(_field(database, "type_") or "FIRESTORE_NATIVE")
+        record = _database_record(project, database_id, _field(database, "location_id") or "nam5", database_type)
+        with _store.lock:
+            if (project, database_id) in _store.databases:
+                raise exceptions.AlreadyExists(f"Database already exists: {database_id}")
+            _store.databases[(project, database_id)] = record
+        return self._new_operation(project, "create", database_id, _FakeDatabase(record))
+
+    def get_database(self, request=None, name: Optional[str] = None, **kwargs) -> _FakeDatabase:
+        _api_call("firestore_admin.get_database", kwargs.get("retry"))
+        name = _field(request, "name", name)
+        project, database_id = name.split("/")[1], name.split("/")[-1]
+        with _store.lock:
+            record = _store.databases.get((project, database_id))
+        if record is None:
+            raise exceptions.NotFound(f"Database not found: {name}")
+        return _FakeDatabase(record)
+
+    def delete_database(self, request=None, name: Optional[str] = None, **kwargs) -> FakeAdminOperation:
+        _api_call("firestore_admin.delete_database", kwargs.get("retry"))
+        name = _field(request, "name", name)
+        project, database_id = name.split("/")[1], name.split("/")[-1]
+        with _store.lock:
+            record = _store.databases.pop((project, database_id), None)
+            _store.documents.pop((project, database_id), None)
+        if record is None:
+            raise exceptions.NotFound(f"Database not found: {name}")
+        return self._new_operation(project, "delete", database_id, _FakeDatabase(record))
+
+    def list_databases(self, request=None, parent: Optional[str] = None, **kwargs):
+        _api_call("firestore_admin.list_databases", kwargs.get("retry"))
+        project = _field(request, "parent", parent).split("/")[1]
+        with _store.lock:
+            databases = [_FakeDatabase(record) for (p, _), record in sorted(_store.databases.items()) if p == project]
+        return type("ListDatabasesResponse", (), {"databases": databases, "unreachable": []})()
+
+    def get_operation(self, request=None, **kwargs) -> _FakeOperationStatus:
+        _api_call("firestore_admin.get_operation", kwargs.get("retry"))
+        return _admin_operation_status(_field(request, "name"))
+
+
+# Cloud SQL, GKE and Cloud Functions hold no resources in the fakes; their
+# listings are empty so inventories over every resource type still complete
+
+class FakeSqlInstancesClient:
+    """Stand-in for sql_v1.SqlInstancesServiceClient."""
+
+    def __init__(self, credentials=None, **kwargs):
+        pass
+
+    def list(self, request=None, **kwargs) -> _FakeResponse:
+        _api_call("sql.list", kwargs.get("retry"))
+        return _FakeResponse(items=[], next_page_token="")
+
+
+class FakeClusterManagerClient:
+    """Stand-in for container_v1.ClusterManagerClient."""
+
+    def __init__(self, credentials=None, **kwargs):
+        pass
+
+    def list_clusters(self, request=None, parent: Optional[str] = None, **kwargs) -> _FakeResponse:
+        _api_call("gke.list_clusters", kwargs.get("retry"))
+        return _FakeResponse(clusters=[], missing_zones=[])
+
+
+class FakeCloudFunctionsClient:
+    """Stand-in for functions_v1.CloudFunctionsServiceClient."""
+
+    def __init__(self, credentials=None, **kwargs):
+        pass
+
+    def list_functions(self, request=None, parent: Optional[str] = None, **kwargs) -> _FakeIterator:
+        return _FakeIterator("functions.list_functions", [], retry=kwargs.get("retry"))
+
+
+# Cloud Billing
+
+class _FakeBillingAccount:
+    def __init__(self, name: str, record: Dict):
+        self.name = name
+        self.display_name = record["display_name"]
+        self.open = record["open"]
+        self.currency_code = record["currency_code"]
+        self.master_billing_account = record["master_billing_account"]
+
+
+class _FakeProjectBillingInfo:
+    def __init__(self, project: str, account: str):
+        self.name = f"projects/{project}/billingInfo"
+        self.project_id = project
+        self.billing_account_name = account
+        self.billing_enabled = bool(account)
+
+
+class FakeCloudBillingClient:
+    """Stand-in for billing_v1.CloudBillingClient."""
+
+    def __init__(self, credentials=None, **kwargs):
+        pass
+
+    def get_project_billing_info(self, request=None, name: Optional[str] = None, **kwargs) -> _FakeProjectBillingInfo:
+        _api_call("billing.get_project_billing_info", kwargs.get("retry"))
+        project = _field(request, "name", name).split("/")[1]
+        with _store.lock:
+            account = _store.project_billing.setdefault(project, DEFAULT_BILLING_ACCOUNT)
+        return _FakeProjectBillingInfo(project, account)
+
+    def get_billing_account(self, request=None, name: Optional[str] = None, **kwargs) -> _FakeBillingAccount:
+        _api_call("billing.get_billing_account", kwargs.get("retry"))
+        name = _field(request, "name", name)
+        with _store.lock:
+            record = _store.billing_accounts.get(name)
+        if record is None:
+            raise exceptions.NotFound(f"Billing account not found: {name}")
+        return _FakeBillingAccount(name, record)
+
+    def list_billing_accounts(self, request=None, page_size: Optional[int] = None, **kwargs) -> _FakePager:
+        with _store.lock:
+            items = [_FakeBillingAccount(name, record) for name, record in sorted(_store.billing_accounts.items())]
+        return _FakePager(
+            "billing.list_billing_accounts", items,
+            _field(request, "page_size", page_size) or None, _field(request, "page_token") or None,
+            lambda chunk, token: _FakeResponse(billing_accounts=chunk, next_page_token=token),
+            unpack=lambda response: response.billing_accounts, retry=kwargs.get("retry")
+        )
+
+    def list_project_billing_info(self, request=None, name: Optional[str] = None, **kwargs) -> _FakePager:
+        name = _field(request, "name", name)
+        with _store.lock:
+            items = [_FakeProjectBillingInfo(project, account)
+                     for project, account in sorted(_store.project_billing.items()) if account == name]
+        return _FakePager(
+            "billing.list_project_billing_info", items, _field(request, "page_size"), _field(request, "page_token") or None,
+            lambda chunk, token: _FakeResponse(project_billing_info=chunk, next_page_token=token),
+            unpack=lambda response: response.project_billing_info, retry=kwargs.get("retry")
+        )
+
+
+# Resource Manager
+
+class FakeProjectsClient:
+    """Stand-in for resourcemanager_v3.ProjectsClient."""
+
+    def __init__(self, credentials=None, **kwargs):
+        pass
+
+    def list_projects(self, request=None, parent: Optional[str] = None, **kwargs) -> _FakePager:
+        parent = _field(request, "parent", parent)
+        with _store.lock:
+            items = [
+                _FakeResponse(name=f"projects/{project}", project_id=project, parent=project_parent,
+                              display_name=project, state=_FakeEnum("ACTIVE"))
+                for project, project_parent in sorted(_store.projects.items()) if project_parent == parent
+            ]
+        return _FakePager(
+            "resource_manager.list_projects", items, _field(request, "page_size"), _field(request, "page_token") or None,
+            lambda chunk, token: _FakeResponse(projects=chunk, next_page_token=token),
+            unpack=lambda response: response.projects, retry=kwargs.get("retry")
+        )
+
+
+class FakeFoldersClient:
+    """Stand-in for resourcemanager_v3.FoldersClient."""
+
+    def __init__(self, credentials=None, **kwargs):
+        pass
+
+    def list_folders(self, request=None, parent: Optional[str] = None, **kwargs) -> _FakePager:
+        parent = _field(request, "parent", parent)
+        with _store.lock:
+            items = [
+                _FakeResponse(name=folder, parent=folder_parent, display_name=folder, state=_FakeEnum("ACTIVE"))
+                for folder, folder_parent in sorted(_store.folders.items()) if folder_parent == parent
+            ]
+        return _FakePager(
+            "resource_manager.list_folders", items, _field(request, "page_size"), _field(request, "page_token") or None,
+            lambda chunk, token: _FakeResponse(folders=chunk, next_page_token=token),
+            unpack=lambda response: response.folders, retry=kwargs.get("retry")
+        )
+
+
+# client key in clients.py -> fake factory
+FAKE_CLIENTS = {
+    "storage": FakeStorageClient,
+    "compute_instances": FakeInstancesClient,
+    "compute_zones": FakeZonesClient,
+    "compute_zone_operations": FakeComputeOperationsClient,
+    "compute_region_operations": FakeComputeOperationsClient,
+    "compute_global_operations": FakeComputeOperationsClient,
+    "sql_instances": FakeSqlInstancesClient,
+    "gke": FakeClusterManagerClient,
+    "functions": FakeCloudFunctionsClient,
+    "firestore": FakeFirestoreClient,
+    "firestore_admin": FakeFirestoreAdminClient,
+    "billing": FakeCloudBillingClient,
+    "resource_manager_projects": FakeProjectsClient,
+    "resource_manager_folders": FakeFoldersClient,
+}
+
+
+def seed_fake_folder(folder: str, parent: str = "organizations/0") -> None:
+    """Registers a folder (e.g. "folders/100") under a parent folder or organization."""
+    with _store.lock:
+        _store.folders[folder] = parent
+
+
+def seed_fake_project(project_id: str, buckets: int = 0, objects_per_bucket: int = 0,
+                      instances: int = 0, zones: Optional[List[str]] = None,
+                      firestore_documents: int = 0, collections: int = 1,
+                      prefix: str = "bench", parent: Optional[str] = None) -> Dict:
+    """
+    Populates the fake backends with synthetic resources for benchmarks.
+
+    Seeding goes straight to the store, so it neither counts as API calls nor
+    pays the injected latency.
+
+    Args:
+        project_id: Project to create the resources in
+        buckets: Number of buckets to create
+        objects_per_bucket: Number of small objects per bucket
+        instances: Number of Compute Engine instances, spread over zones
+        zones: Zones to spread instances over (default: FAKE_ZONES)
+        firestore_documents: Documents per collection in the default database
+        collections: Number of Firestore collections
+        prefix: Name prefix for generated resources
+        parent: Folder or organization the project belongs to, for scoped listings
+
+    Returns:
+        Dictionary with the number of resources created per type
+    """
+    zones = zones or FAKE_ZONES
+    now = _now()
+    with _store.lock:
+        if parent:
+            _store.projects[project_id] = parent
+        for i in range(buckets):
+            name = f"{prefix}-{project_id}-{i:05d}"
+            blobs = {}
+            for j in range(objects_per_bucket):
+                content = f"{name}/{j}".encode("utf-8")
+                blobs[f"objects/{j:06d}.txt"] = {
+                    "content": content, "size": len(content), "md5_hash": hashlib.md5(content).hexdigest(),
+                    "crc32c": None, "generation": j + 1, "storage_class": "STANDARD",
+                    "time_created": now, "updated": now, "content_type": "text/plain", "etag": _etag()
+                }
+            _store.buckets[name] = {
+                "project": project_id,
+                "meta": {
+                    "location": "US", "storage_class": "STANDARD", "versioning_enabled": False,
+                    "labels": {"seeded": prefix}, "lifecycle_rules": [],
+                    "time_created": now, "updated": now, "etag": _etag()
+                },
+                "blobs": blobs
+            }
+        for i in range(instances):
+            zone = zones[i % len(zones)]
+            name = f"{prefix}-vm-{i:05d}"
+            properties = compute_v1.InstanceProperties(
+                machine_type="e2-micro",
+                disks=[compute_v1.AttachedDisk(boot=True, auto_delete=True, initialize_params=compute_v1.AttachedDiskInitializeParams(
+                    source_image="projects/debian-cloud/global/images/family/debian-12", disk_size_gb=10
+                ))],
+                labels={"seeded": prefix}
+            )
+            _store.instances[(project_id, zone, name)] = _build_instance(project_id, zone, name, properties)
+        if firestore_documents:
+            _store.databases.setdefault((project_id, "(default)"),
+                                        _database_record(project_id, "(default)", "nam5", "FIRESTORE_NATIVE"))
+            documents = _store.documents.setdefault((project_id, "(default)"), {})
+            for c in range(collections):
+                documents[f"{prefix}_{c}"] = {
+                    f"doc-{d:06d}": {"index": d, "group": d % 10, "created_at": now}
+                    for d in range(firestore_documents)
+                }
+                _store.document_times.update({
+                    (project_id, "(default)", f"{prefix}_{c}/doc-{d:06d}"): now
+                    for d in range(firestore_documents)
+                })
+
+    return {
+        "buckets": buckets,
+        "objects": buckets * objects_per_bucket,
+        "instances": instances,
+        "firestore_documents": firestore_documents * collections if firestore_documents else 0
+    }
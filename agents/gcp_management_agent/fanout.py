@@ -0,0 +1,267 @@
+"""
+Multi-project fan-out for the listing and inventory tools.
+
+A listing scoped to several projects, or to a folder or organization, runs
+the single-project lister for every project on a bounded worker pool. Each
+project has its own timeout, so one slow or inaccessible project is reported
+in project_errors instead of failing or stalling the whole listing.
+
+Rows from every project are tagged with project_id and merged into one
+snapshot. The first page carries counts per project and per summary column;
+later pages are cut from the same snapshot, so paging through a merged view
+does not list every project again.
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from .clients import folders_client, projects_client
+from .listing import clamp_page_size, group_counts, offset_page
+
+FANOUT_MAX_WORKERS = int(os.getenv('FANOUT_MAX_WORKERS', '16'))
+# Seconds one project may take before it is reported as timed out
+FANOUT_PROJECT_TIMEOUT = float(os.getenv('FANOUT_PROJECT_TIMEOUT', '30'))
+# Upper bound on the projects a folder or organization scope may expand to
+FANOUT_MAX_PROJECTS = int(os.getenv('FANOUT_MAX_PROJECTS', '500'))
+# Seconds a merged listing stays available for its next_page_token
+FANOUT_SNAPSHOT_TTL = float(os.getenv('FANOUT_SNAPSHOT_TTL', '600'))
+FANOUT_MAX_SNAPSHOTS = 32
+
+_TOKEN_PREFIX = "fanout:"
+
+_snapshots: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+_snapshots_lock = threading.Lock()
+
+
+def _normalize_parent(scope: str) -> str:
+    """Accepts folders/123, organizations/456 or a bare folder number."""
+    scope = scope.strip()
+    if scope.startswith(("folders/", "organizations/")):
+        return scope
+    if scope.isdigit():
+        return f"folders/{scope}"
+    raise ValueError(f"folder must look like folders/123, organizations/456 or 123, got '{scope}'")
+
+
+def _is_active(project) -> bool:
+    state = getattr(project, "state", None)
+    return getattr(state, "name", state) in (None, "ACTIVE", 1)
+
+
+def resolve_projects(projects: Optional[Union[str, Sequence[str]]] = None,
+                     folder: Optional[str] = None) -> List[str]:
+    """
+    Expands a project set and/or a folder scope into a list of project IDs.
+
+    Folders are walked recursively; only ACTIVE projects are included.
+
+    Args:
+        projects: Project IDs, as a list or a comma-separated string
+        folder: folders/<id>, organizations/<id> or a bare folder ID
+
+    Returns:
+        Project IDs in the order given, followed by the folder's projects, without duplicates
+
+    Raises:
+        ValueError: If the scope is empty, malformed or larger than FANOUT_MAX_PROJECTS
+    """
+    if isinstance(projects, str):
+        projects = projects.split(",")
+    resolved = [project.strip() for project in projects or [] if project and project.strip()]
+
+    if folder:
+        parents = [_normalize_parent(folder)]
+        seen = set()
+        while parents:
+            parent = parents.pop(0)
+            if parent in seen:
+                continue
+            seen.add(parent)
+            for project in projects_client().list_projects(parent=parent):
+                if _is_active(project):
+                    resolved.append(project.project_id)
+            parents.extend(child.name for child in folders_client().list_folders(parent=parent))
+            if len(resolved) > FANOUT_MAX_PROJECTS:
+                break
+
+    resolved = list(dict.fromkeys(resolved))
+    if not resolved:
+        raise ValueError("The project scope is empty: pass project IDs or a folder that contains projects")
+    if len(resolved) > FANOUT_MAX_PROJECTS:
+        raise ValueError(f"The scope has more than {FANOUT_MAX_PROJECTS} projects; narrow it with "
+                         f"a smaller folder or an explicit project list")
+    return resolved
+
+
+def fan_out(project_ids: List[str], fetch: Callable[[str], object], timeout: Optional[float] = None,
+            max_workers: Optional[int] = None) -> Dict:
+    """
+    Runs fetch(project_id) for every project on a bounded pool with a per-project timeout.
+
+    fetch returns a list of rows, or (rows, warnings) where warnings describe
+    parts of the project that could not be listed.
+
+    Returns:
+        Dictionary with rows per project, project_errors (failures, timeouts and
+        warnings, one entry each) and per-project timings in milliseconds
+    """
+    timeout = FANOUT_PROJECT_TIMEOUT if timeout is None else timeout
+    started: Dict[str, float] = {}
+
+    def run(project_id):
+        started[project_id] = time.monotonic()
+        return fetch(project_id)
+
+    results: Dict[str, List[Dict]] = {}
+    errors: List[Dict] = []
+    timings: Dict[str, float] = {}
+
+    # Not used as a context manager: timed-out projects must not block the response
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers or FANOUT_MAX_WORKERS, len(project_ids))))
+    try:
+        pending = {executor.submit(run, project_id): project_id for project_id in project_ids}
+        while pending:
+            now = time.monotonic()
+            deadlines = [started[project_id] + timeout for project_id in pending.values() if project_id in started]
+            wait_for = max(0.0, min(deadlines) - now) if deadlines else timeout
+            done, _ = wait(list(pending), timeout=min(wait_for, 1.0) + 0.01, return_when=FIRST_COMPLETED)
+            for future in done:
+                project_id = pending.pop(future)
+                timings[project_id] = round((time.monotonic() - started[project_id]) * 1000, 1)
+                try:
+                    value = future.result()
+                except Exception as e:
+                    errors.append({"project_id": project_id, "error": str(e), "error_type": type(e).__name__})
+                    continue
+                rows, warnings = value if isinstance(value, tuple) else (value, [])
+                results[project_id] = rows
+                errors.extend({"project_id": project_id, "partial": True, **warning} for warning in warnings)
+            now = time.monotonic()
+            for future, project_id in list(pending.items()):
+                if project_id in started and now - started[project_id] >= timeout:
+                    future.cancel()
+                    del pending[future]
+                    timings[project_id] = round(timeout * 1000, 1)
+                    errors.append({"project_id": project_id, "error": f"Timed out after {timeout}s",
+                                   "error_type": "Timeout"})
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return {"results": results, "project_errors": errors, "timings_ms": timings}
+
+
+def _store_snapshot(snapshot: Dict) -> str:
+    snapshot_id = uuid.uuid4().hex[:16]
+    now = time.time()
+    with _snapshots_lock:
+        _snapshots[snapshot_id] = (now, snapshot)
+        while _snapshots and (len(_snapshots) > FANOUT_MAX_SNAPSHOTS or
+                              now - next(iter(_snapshots.values()))[0] > FANOUT_SNAPSHOT_TTL):
+            _snapshots.popitem(last=False)
+    return snapshot_id
+
+
+def _load_snapshot(page_token: str) -> Tuple[str, Dict, str]:
+    """
+    Returns the snapshot ID, snapshot and offset token of a fan-out page token.
+
+    Raises:
+        ValueError: If the token is not a fan-out token or its listing expired
+    """
+    if not page_token.startswith(_TOKEN_PREFIX) or page_token.count(":") != 2:
+        raise ValueError("page_token is not from a multi-project listing; "
+                         "pass the next_page_token returned with the same projects or folder")
+    _, snapshot_id, offset = page_token.split(":")
+    with _snapshots_lock:
+        entry = _snapshots.get(snapshot_id)
+    if entry is None or time.time() - entry[0] > FANOUT_SNAPSHOT_TTL:
+        raise ValueError("The multi-project listing for this page_token expired; list again without page_token")
+    return snapshot_id, entry[1], offset
+
+
+def fan_out_listing(items_key: str, count_key: str, fetch: Callable[[str], object],
+                    projects: Optional[Union[str, Sequence[str]]] = None, folder: Optional[str] = None, page_size: Optional[int] = None,
+                    page_token: Optional[str] = None, summary_keys: Sequence[str] = (),
+                    sort_key: str = "name", include_summary: bool = True,
+                    timeout: Optional[float] = None) -> Dict:
+    """
+    Lists across a project scope and returns one page of the merged rows as a tool result.
+
+    Args:
+        items_key: Result key for the rows, e.g. "buckets"
+        count_key: Result key for the number of rows on the page, e.g. "bucket_count"
+        fetch: Single-project lister, called with a project ID
+        projects: Project IDs, as a list or a comma-separated string
+        folder: Folder or organization whose projects are listed
+        page_size: Rows per page (default: DEFAULT_PAGE_SIZE, max: MAX_PAGE_SIZE)
+        page_token: next_page_token of a previous page of the same listing
+        summary_keys: Columns counted in the first page's summary besides project_id
+        sort_key: Column the merged rows are sorted by within each project
+        include_summary: Include the summary on the first page
+        timeout: Per-project timeout in seconds (default: FANOUT_PROJECT_TIMEOUT)
+
+    Returns:
+        Dictionary with status (success, partial_success or error), the page of
+        rows, next_page_token, the project scope, project_errors and, on the
+        first page, the summary and per-project timings
+
+    Raises:
+        ValueError: If the scope or page_token is invalid
+    """
+    page_size = clamp_page_size(page_size)
+    if page_token:
+        snapshot_id, snapshot, offset = _load_snapshot(page_token)
+    else:
+        project_ids = resolve_projects(projects, folder)
+        outcome = fan_out(project_ids, fetch, timeout)
+        rows = [
+            {"project_id": project_id, **row}
+            for project_id in project_ids
+            for row in sorted(outcome["results"].get(project_id, []), key=lambda row: str(row.get(sort_key) or ""))
+        ]
+        snapshot = {
+            "project_ids": project_ids,
+            "folder": folder,
+            "rows": rows,
+            "project_errors": outcome["project_errors"],
+            "timings_ms": outcome["timings_ms"],
+            "failed_projects": len({error["project_id"] for error in outcome["project_errors"]
+                                    if not error.get("partial")})
+        }
+        snapshot_id, offset = _store_snapshot(snapshot), None
+
+    page, next_offset = offset_page(snapshot["rows"], page_size, offset)
+    failed = snapshot["failed_projects"]
+    if not snapshot["project_errors"]:
+        status = "success"
+    elif failed == len(snapshot["project_ids"]):
+        status = "error"
+    else:
+        status = "partial_success"
+
+    result = {
+        "status": status,
+        "scope": {
+            "projects": len(snapshot["project_ids"]),
+            "projects_succeeded": len(snapshot["project_ids"]) - failed,
+            "folder": snapshot["folder"]
+        },
+        "total_count": len(snapshot["rows"]),
+        count_key: len(page),
+        items_key: page,
+        "next_page_token": f"{_TOKEN_PREFIX}{snapshot_id}:{next_offset}" if next_offset else None,
+        "page_size": page_size,
+        "project_errors": snapshot["project_errors"]
+    }
+    if status == "error":
+        result["message"] = "Listing failed in every project; see project_errors"
+    if not page_token:
+        if include_summary:
+            result["summary"] = group_counts(snapshot["rows"], ["project_id", *summary_keys])
+        result["timings_ms"] = snapshot["timings_ms"]
+    return result
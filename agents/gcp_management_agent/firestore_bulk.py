@@ -0,0 +1,788 @@
+"""
+Bulk Firestore document import and export.
+
+Imports stream an NDJSON or CSV file (optionally gzipped) into a collection
+in batched writes. Batches are committed concurrently; concurrency grows
+while commits succeed and is halved when Firestore pushes back (resource
+exhausted, aborted or unavailable), and the write rate follows the 500/50/5
+ramp-up rule: start at FIRESTORE_BULK_INITIAL_OPS writes per second and grow
+by 50% every FIRESTORE_BULK_RAMP_SECONDS. A batch that fails for any other
+reason is retried document by document, so one bad row does not lose the
+rest of its batch.
+
+Exports split a top-level collection into partitions with Firestore's
+partition queries and stream them concurrently into part files, which are
+joined into one NDJSON or CSV file when every partition is done.
+
+Both keep a checkpoint in FIRESTORE_BULK_STATE_DIR: the file offset up to
+which every row is committed for imports, and the last document written for
+each export partition. A call stops after its time budget, and calling again
+with the same arguments continues from the checkpoint. Writes are document
+sets, so rows committed again after an interruption are simply overwritten.
+"""
+
+import base64
+import csv
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from google.api_core import exceptions
+
+FIRESTORE_BULK_BATCH_SIZE = int(os.getenv('FIRESTORE_BULK_BATCH_SIZE', '500'))
+FIRESTORE_BULK_MAX_WORKERS = int(os.getenv('FIRESTORE_BULK_MAX_WORKERS', '32'))
+# Concurrent batch commits at the start of a run; adjusted while the import runs
+FIRESTORE_BULK_INITIAL_WORKERS = int(os.getenv('FIRESTORE_BULK_INITIAL_WORKERS', '4'))
+# 500/50/5 ramp-up: initial writes per second, grown by 50% every FIRESTORE_BULK_RAMP_SECONDS
+FIRESTORE_BULK_INITIAL_OPS = float(os.getenv('FIRESTORE_BULK_INITIAL_OPS', '500'))
+FIRESTORE_BULK_MAX_OPS = float(os.getenv('FIRESTORE_BULK_MAX_OPS', '10000'))
+FIRESTORE_BULK_RAMP_SECONDS = float(os.getenv('FIRESTORE_BULK_RAMP_SECONDS', '300'))
+FIRESTORE_BULK_MAX_RETRIES = int(os.getenv('FIRESTORE_BULK_MAX_RETRIES', '5'))
+FIRESTORE_EXPORT_PARTITIONS = int(os.getenv('FIRESTORE_EXPORT_PARTITIONS', '8'))
+# Seconds one call may run before it checkpoints and returns
+FIRESTORE_BULK_MAX_SECONDS = float(os.getenv('FIRESTORE_BULK_MAX_SECONDS', '300'))
+# Seconds between checkpoint saves while a job runs
+FIRESTORE_BULK_CHECKPOINT_SECONDS = float(os.getenv('FIRESTORE_BULK_CHECKPOINT_SECONDS', '5'))
+FIRESTORE_BULK_STATE_DIR = os.getenv('FIRESTORE_BULK_STATE_DIR',
+                                     os.path.join(tempfile.gettempdir(), 'gcp-firestore-bulk'))
+
+MAX_REPORTED_ERRORS = 20
+
+# Errors that mean "slow down and try again"
+_THROTTLED = (exceptions.ResourceExhausted, exceptions.Aborted, exceptions.ServiceUnavailable,
+              exceptions.DeadlineExceeded, exceptions.InternalServerError)
+# Errors no retry will fix; the job stops and keeps its checkpoint
+_FATAL = (exceptions.NotFound, exceptions.PermissionDenied, exceptions.Unauthenticated)
+
+_FORMATS = ("ndjson", "csv")
+
+
+def file_format(path: str, requested: Optional[str] = None) -> str:
+    """
+    Returns "ndjson" or "csv" for a file, from requested or from the file extension.
+
+    Raises:
+        ValueError: If the format is unknown
+    """
+    if requested:
+        requested = requested.lower()
+        if requested in ("json", "jsonl"):
+            requested = "ndjson"
+        if requested not in _FORMATS:
+            raise ValueError(f"file_format must be ndjson or csv, got '{requested}'")
+        return requested
+    name = path.lower()
+    if name.endswith(".gz"):
+        name = name[:-3]
+    if name.endswith((".ndjson", ".jsonl", ".json")):
+        return "ndjson"
+    if name.endswith(".csv"):
+        return "csv"
+    raise ValueError(f"Cannot tell the format of '{path}' from its extension; pass file_format='ndjson' or 'csv'")
+
+
+def bulk_job_id(kind: str, *key) -> str:
+    """Derives the job ID from the job's arguments, so the same call finds its checkpoint."""
+    return hashlib.sha256(json.dumps([kind, *key], sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+def _state_path(job_id: str) -> str:
+    return os.path.join(FIRESTORE_BULK_STATE_DIR, f"{job_id}.json")
+
+
+def _load_state(job_id: str) -> Optional[Dict]:
+    try:
+        with open(_state_path(job_id)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_state(state: Dict) -> None:
+    os.makedirs(FIRESTORE_BULK_STATE_DIR, exist_ok=True)
+    path = _state_path(state["job_id"])
+    with open(path + ".tmp", "w") as f:
+        json.dump(state, f)
+    os.replace(path + ".tmp", path)
+
+
+def _discard_state(job_id: str) -> None:
+    if os.path.exists(_state_path(job_id)):
+        os.remove(_state_path(job_id))
+    shutil.rmtree(os.path.join(FIRESTORE_BULK_STATE_DIR, job_id), ignore_errors=True)
+
+
+def _open(path: str, mode: str = "rb"):
+    return gzip.open(path, mode) if path.lower().endswith(".gz") else open(path, mode)
+
+
+def _valid_document_id(document_id: str) -> bool:
+    return bool(document_id) and "/" not in document_id and document_id not in (".", "..") \
+        and not (document_id.startswith("__") and document_id.endswith("__")) \
+        and len(document_id.encode("utf-8")) <= 1500
+
+
+class _WriteRate:
+    """Write-rate limiter following the 500/50/5 ramp-up from ramp_started (epoch seconds)."""
+
+    def __init__(self, ramp_started: float, initial: float, maximum: float, ramp_seconds: float):
+        self.ramp_started = ramp_started
+        self.initial = initial
+        self.maximum = max(initial, maximum)
+        self.ramp_seconds = ramp_seconds
+        self.lock = threading.Lock()
+        self.allowance = initial
+        self.last = time.monotonic()
+
+    def rate(self) -> float:
+        steps = int(max(0.0, time.time() - self.ramp_started) // self.ramp_seconds) if self.ramp_seconds > 0 else 0
+        return min(self.maximum, self.initial * 1.5 ** min(steps, 64))
+
+    def acquire(self, count: int) -> None:
+        """Takes count writes from the budget, sleeping off any deficit."""
+        rate = self.rate()
+        with self.lock:
+            now = time.monotonic()
+            # At most one second of unused budget carries over
+            self.allowance = min(rate, self.allowance + (now - self.last) * rate) - count
+            self.last = now
+            wait = -self.allowance / rate if self.allowance < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+
+class _Concurrency:
+    """Additive-increase, multiplicative-decrease limit on in-flight batch commits."""
+
+    def __init__(self, initial: int, maximum: int):
+        self.maximum = max(1, maximum)
+        self.limit = max(1, min(initial, self.maximum))
+        self.peak = self.limit
+        self.in_flight = 0
+        self.successes = 0
+        self.condition = threading.Condition()
+
+    def acquire(self) -> None:
+        with self.condition:
+            while self.in_flight >= self.limit:
+                self.condition.wait()
+            self.in_flight += 1
+
+    def release(self) -> None:
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def succeeded(self) -> None:
+        with self.condition:
+            self.successes += 1
+            # One more slot per full round of successful commits
+            if self.successes >= self.limit and self.limit < self.maximum:
+                self.limit += 1
+                self.peak = max(self.peak, self.limit)
+                self.successes = 0
+                self.condition.notify_all()
+
+    def throttled(self) -> None:
+        with self.condition:
+            self.limit = max(1, self.limit // 2)
+            self.successes = 0
+
+
+def _convert_scalar(text: str):
+    """Types a CSV cell: empty is null, then bool, int and float, else the text."""
+    if text == "":
+        return None
+    lowered = text.lower()
+    if lowered in ("true", "false"):
+        return lowered == "true"
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+def _set_path(data: Dict, field_path: str, value) -> None:
+    parts = field_path.split(".")
+    for part in parts[:-1]:
+        child = data.get(part)
+        if not isinstance(child, dict):
+            child = data[part] = {}
+        data = child
+    data[parts[-1]] = value
+
+
+def _parse_timestamps(data: Dict, timestamp_fields: List[str]) -> None:
+    """Turns ISO 8601 strings in timestamp_fields (dotted paths allowed) into UTC datetimes."""
+    for field_path in timestamp_fields:
+        parent = data
+        parts = field_path.split(".")
+        for part in parts[:-1]:
+            parent = parent.get(part) if isinstance(parent, dict) else None
+        value = parent.get(parts[-1]) if isinstance(parent, dict) else None
+        if isinstance(value, str) and value:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            parent[parts[-1]] = parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _read_rows(path: str, fmt: str, offset: int, header: Optional[List[str]]) -> Iterator[Tuple[int, object]]:
+    """
+    Yields (end offset, row) from offset on; row is a dict, or an error string for a malformed row.
+
+    Offsets are in the uncompressed stream, so gzipped files can be resumed too.
+    """
+    with _open(path) as f:
+        if offset:
+            f.seek(offset)
+        position = [offset]
+
+        def lines():
+            for raw in f:
+                position[0] += len(raw)
+                yield raw.decode("utf-8-sig" if position[0] == len(raw) else "utf-8")
+
+        if fmt == "ndjson":
+            for line in lines():
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    yield position[0], f"invalid JSON: {e}"
+                    continue
+                yield position[0], row if isinstance(row, dict) else "each line must be a JSON object"
+            return
+
+        for cells in csv.reader(lines()):
+            if not cells:
+                continue
+            if len(cells) != len(header):
+                yield position[0], f"expected {len(header)} columns, got {len(cells)}"
+                continue
+            row = {}
+            for column, cell in zip(header, cells):
+                _set_path(row, column, _convert_scalar(cell))
+            yield position[0], row
+
+
+def _csv_header(path: str) -> Tuple[List[str], int]:
+    """Returns the CSV header and the offset of the first data row."""
+    with _open(path) as f:
+        raw = f.readline()
+    header = next(csv.reader([raw.decode("utf-8-sig")]), [])
+    if not header or any(not column.strip() for column in header):
+        raise ValueError(f"{path} needs a header row naming every column")
+    return [column.strip() for column in header], len(raw)
+
+
+class _Import:
+    """One run of an import job; commit threads share its counters and checkpoint."""
+
+    def __init__(self, client, state: Dict, deadline: float, max_workers: int):
+        self.client = client
+        self.state = state
+        self.options = state["options"]
+        self.collection = client.collection(state["collection"])
+        self.deadline = deadline
+        self.rate = _WriteRate(state["ramp_started"], FIRESTORE_BULK_INITIAL_OPS, FIRESTORE_BULK_MAX_OPS,
+                               FIRESTORE_BULK_RAMP_SECONDS)
+        self.concurrency = _Concurrency(FIRESTORE_BULK_INITIAL_WORKERS, max_workers)
+        self.pool = ThreadPoolExecutor(max_workers=max(1, max_workers))
+        self.lock = threading.Lock()
+        self.run = {"rows": 0, "written": 0, "failed": 0, "retries": 0, "throttled": 0}
+        # Batches finished out of order wait here until every earlier batch is done
+        self.finished: Dict[int, Tuple[int, int]] = {}
+        self.next_sequence = 0
+        self.fatal: Optional[Exception] = None
+        self.last_saved = time.monotonic()
+
+    def _error(self, row: int, document_id: Optional[str], error: str) -> None:
+        self.run["failed"] += 1
+        self.state["totals"]["failed"] += 1
+        if len(self.state["errors"]) < MAX_REPORTED_ERRORS:
+            self.state["errors"].append({"row": row, "document_id": document_id, "error": error})
+
+    def _commit(self, batch: List[Tuple[int, str, Dict]]) -> None:
+        """Commits one batch, backing off while throttled and isolating rows that cannot be written."""
+        if not batch:
+            return
+        merge = self.options["merge"]
+        for attempt in range(FIRESTORE_BULK_MAX_RETRIES + 1):
+            self.rate.acquire(len(batch))
+            try:
+                writes = self.client.batch()
+                for _, document_id, data in batch:
+                    writes.set(self.collection.document(document_id), data, merge=merge)
+                writes.commit()
+                self.concurrency.succeeded()
+                with self.lock:
+                    self.run["written"] += len(batch)
+                    self.state["totals"]["written"] += len(batch)
+                return
+            except _FATAL as e:
+                self.fatal = e
+                return
+            except _THROTTLED:
+                self.concurrency.throttled()
+                with self.lock:
+                    self.run["throttled"] += 1
+                    self.run["retries"] += 1
+                time.sleep(min(30.0, 0.5 * 2 ** attempt))
+            except Exception:
+                break
+
+        # Write row by row so only the rows that cannot be written are lost
+        for row, document_id, data in batch:
+            self.rate.acquire(1)
+            try:
+                self.collection.document(document_id).set(data, merge=merge)
+                with self.lock:
+                    self.run["written"] += 1
+                    self.state["totals"]["written"] += 1
+            except _FATAL as e:
+                self.fatal = e
+                return
+            except Exception as e:
+                with self.lock:
+                    self._error(row, document_id, str(e))
+
+    def _run_batch(self, sequence: int, batch: List[Tuple[int, str, Dict]], end: Tuple[int, int]) -> None:
+        try:
+            self._commit(batch)
+        except Exception as e:
+            with self.lock:
+                for row, document_id, _ in batch:
+                    self._error(row, document_id, str(e))
+        finally:
+            self.concurrency.release()
+            if self.fatal is None:
+                self._finish(sequence, end)
+
+    def _finish(self, sequence: int, end: Tuple[int, int]) -> None:
+        """Advances the checkpoint past every batch that is done, in file order."""
+        with self.lock:
+            self.finished[sequence] = end
+            while self.next_sequence in self.finished:
+                self.state["offset"], self.state["rows_read"] = self.finished.pop(self.next_sequence)
+                self.next_sequence += 1
+            if time.monotonic() - self.last_saved >= FIRESTORE_BULK_CHECKPOINT_SECONDS:
+                _save_state(self.state)
+                self.last_saved = time.monotonic()
+
+    def _document_id(self, row_number: int, data: Dict) -> Optional[str]:
+        id_field = self.options["id_field"]
+        if id_field and data.get(id_field) is not None:
+            return str(data.pop(id_field))
+        # Derived from the row, so a resumed import rewrites the same document
+        return hashlib.sha1(f"{self.state['source']}:{row_number}".encode("utf-8")).hexdigest()[:20]
+
+    def import_rows(self) -> bool:
+        """Reads and submits rows until the file ends or the time budget runs out; returns True at the end."""
+        timestamp_fields = self.options["timestamp_fields"] or []
+        last_end = (self.state["offset"], self.state["rows_read"])
+        submitted_end = last_end
+        sequence = 0
+        batch: List[Tuple[int, str, Dict]] = []
+        reached_end = True
+
+        def submit():
+            nonlocal batch, sequence, submitted_end
+            # Waiting for a free slot keeps memory bounded by the in-flight batches
+            self.concurrency.acquire()
+            self.pool.submit(self._run_batch, sequence, batch, last_end)
+            sequence += 1
+            submitted_end = last_end
+            batch = []
+
+        for end_offset, row in _read_rows(self.state["source"], self.state["format"], self.state["offset"],
+                                          self.state.get("header")):
+            if self.fatal is not None or time.monotonic() >= self.deadline:
+                reached_end = False
+                break
+            row_number = last_end[1] + 1
+            last_end = (end_offset, row_number)
+            self.run["rows"] += 1
+            self.state["totals"]["rows"] += 1
+            if isinstance(row, str):
+                with self.lock:
+                    self._error(row_number, None, row)
+                continue
+            document_id = self._document_id(row_number, row)
+            try:
+                if not _valid_document_id(document_id):
+                    raise ValueError(f"invalid document ID '{document_id}'")
+                _parse_timestamps(row, timestamp_fields)
+            except ValueError as e:
+                with self.lock:
+                    self._error(row_number, document_id, str(e))
+                continue
+            batch.append((row_number, document_id, row))
+            if len(batch) >= FIRESTORE_BULK_BATCH_SIZE:
+                submit()
+
+        # The last batch also carries the checkpoint past trailing rows that failed validation
+        if batch or last_end != submitted_end:
+            submit()
+        return reached_end and self.fatal is None
+
+
+def import_documents(client, source_path: str, collection: str, database_id: str = "(default)",
+                     file_format_name: Optional[str] = None, id_field: Optional[str] = "id", merge: bool = False,
+                     timestamp_fields: Optional[List[str]] = None, max_seconds: Optional[float] = None,
+                     restart: bool = False, max_workers: Optional[int] = None) -> Dict:
+    """
+    Imports an NDJSON or CSV file into a Firestore collection.
+
+    Args:
+        client: firestore.Client of the target database
+        source_path: Local .ndjson/.jsonl/.json or .csv file, optionally gzipped (.gz)
+        collection: Collection path to write to
+        database_id: Database the client is bound to, for the job ID and report
+        file_format_name: "ndjson" or "csv" (default: from the file extension)
+        id_field: Field holding each document's ID; it is not stored in the document.
+            Rows without it get an ID derived from their row number
+        merge: Merge into existing documents instead of replacing them
+        timestamp_fields: Fields (dotted paths allowed) whose ISO 8601 strings are stored as timestamps
+        max_seconds: Time budget for this call (default: FIRESTORE_BULK_MAX_SECONDS)
+        restart: Discard the job's checkpoint and start from the beginning
+        max_workers: Upper bound on concurrent batch commits (default: FIRESTORE_BULK_MAX_WORKERS)
+
+    Returns:
+        Dictionary with the job_id, whether the import is complete, totals across
+        all runs of the job, this run's throughput, write rate and concurrency,
+        file progress and sample errors from this run
+
+    Raises:
+        ValueError: If the file is missing, its format is unknown or a CSV file has no header
+        google.api_core.exceptions.NotFound: If the database does not exist
+    """
+    source = os.path.abspath(source_path)
+    if not os.path.isfile(source):
+        raise ValueError(f"Source file not found: {source_path}")
+    collection = collection.strip("/")
+    if not collection or len(collection.split("/")) % 2 == 0:
+        raise ValueError(f"collection must be a collection path such as 'orders' or 'users/alice/orders', "
+                         f"got '{collection}'")
+    fmt = file_format(source, file_format_name)
+    stat = os.stat(source)
+    options = {"id_field": id_field, "merge": merge, "timestamp_fields": timestamp_fields}
+    job_id = bulk_job_id("import", getattr(client, "project", None), database_id, collection, source,
+                         stat.st_size, stat.st_mtime_ns, options)
+
+    state = None if restart else _load_state(job_id)
+    resumed = state is not None
+    if state is None:
+        _discard_state(job_id)
+        header, offset = _csv_header(source) if fmt == "csv" else (None, 0)
+        state = {"job_id": job_id, "kind": "import", "source": source, "format": fmt, "collection": collection,
+                 "database_id": database_id, "options": options, "header": header, "offset": offset,
+                 "rows_read": 0, "totals": {"rows": 0, "written": 0, "failed": 0}, "runs": 0,
+                 "ramp_started": time.time(), "last_run_ended": None}
+    elif state["last_run_ended"] and time.time() - state["last_run_ended"] > FIRESTORE_BULK_RAMP_SECONDS:
+        # Traffic stopped long enough that the ramp-up starts over
+        state["ramp_started"] = time.time()
+    state["runs"] += 1
+    state["errors"] = []
+
+    started = time.monotonic()
+    budget = FIRESTORE_BULK_MAX_SECONDS if max_seconds is None else max_seconds
+    job = _Import(client, state, started + budget, max_workers or FIRESTORE_BULK_MAX_WORKERS)
+    try:
+        complete = job.import_rows()
+    finally:
+        job.pool.shutdown(wait=True)
+        state["last_run_ended"] = time.time()
+
+    if job.fatal is not None:
+        _save_state(state)
+        raise job.fatal
+    if complete:
+        _discard_state(job_id)
+    else:
+        _save_state(state)
+
+    elapsed = max(time.monotonic() - started, 1e-6)
+    run = job.run
+    size = None if source.lower().endswith(".gz") else stat.st_size
+    return {
+        "job_id": job_id,
+        "complete": complete,
+        "resumed": resumed,
+        "runs": state["runs"],
+        "collection": collection,
+        "format": fmt,
+        "totals": dict(state["totals"]),
+        "this_run": {
+            **run,
+            "elapsed_seconds": round(elapsed, 3),
+            "documents_per_second": round(run["written"] / elapsed, 1),
+            "documents_per_hour": round(run["written"] / elapsed * 3600),
+            "write_rate_limit": round(job.rate.rate()),
+            "concurrency": {"final": job.concurrency.limit, "peak": job.concurrency.peak}
+        },
+        "progress": {
+            "rows_committed": state["rows_read"],
+            "percent": 100.0 if complete else (round(state["offset"] / size * 100, 1) if size else None)
+        },
+        "errors": list(state["errors"])
+    }
+
+
+def _export_value(value):
+    """Converts a Firestore value into JSON: timestamps as ISO 8601, bytes as base64, references as paths."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode("ascii")
+    if isinstance(value, dict):
+        return {str(key): _export_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_export_value(item) for item in value]
+    if hasattr(value, "latitude") and hasattr(value, "longitude"):
+        return {"latitude": value.latitude, "longitude": value.longitude}
+    if hasattr(value, "path") and hasattr(value, "id"):
+        # DocumentReference
+        return value.path
+    return str(value)
+
+
+def _flatten(data: Dict, prefix: str = "") -> Dict:
+    """Flattens nested maps into dotted CSV columns; lists become JSON text."""
+    flat = {}
+    for key, value in data.items():
+        if isinstance(value, dict) and value:
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = json.dumps(value) if isinstance(value, (list, dict)) else value
+    return flat
+
+
+def plan_partitions(client, collection: str, partitions: int) -> List[Dict]:
+    """
+    Splits a collection into export partitions by document name.
+
+    Top-level collections are split with a collection-group partition query;
+    nested collections, or a single partition, are read with one ordered query.
+    """
+    partition = {"start": None, "end": None, "group": False, "last": None, "count": 0, "bytes": 0,
+                 "columns": [], "done": False}
+    if partitions <= 1 or "/" in collection:
+        return [partition]
+    bounds = [part.end_at.path for part in client.collection_group(collection).get_partitions(partitions)
+              if part.end_at is not None]
+    if not bounds:
+        return [partition]
+    starts, ends = [None] + bounds, bounds + [None]
+    return [{**partition, "start": start, "end": end, "group": True} for start, end in zip(starts, ends)]
+
+
+class _Export:
+    """One run of an export job; partition threads share its counters and checkpoint."""
+
+    def __init__(self, client, state: Dict, deadline: float):
+        self.client = client
+        self.state = state
+        self.options = state["options"]
+        self.deadline = deadline
+        self.directory = os.path.join(FIRESTORE_BULK_STATE_DIR, state["job_id"])
+        self.lock = threading.Lock()
+        self.run = {"documents": 0}
+
+    def part_path(self, index: int) -> str:
+        return os.path.join(self.directory, f"part-{index:05d}.ndjson")
+
+    def _query(self, partition: Dict):
+        collection = self.state["collection"]
+        base = self.client.collection_group(collection) if partition["group"] else self.client.collection(collection)
+        query = base.order_by("__name__")
+        if partition["last"]:
+            query = query.start_after({"__name__": self.client.document(partition["last"])})
+        elif partition["start"]:
+            query = query.start_at({"__name__": self.client.document(partition["start"])})
+        if partition["end"]:
+            query = query.end_before({"__name__": self.client.document(partition["end"])})
+        if self.options["fields"] is not None:
+            query = query.select(self.options["fields"])
+        return query
+
+    def _checkpoint(self, partition: Dict, f, last: Optional[str], count: int, columns: set) -> None:
+        """Publishes a partition's progress together with the part-file length it corresponds to."""
+        f.flush()
+        with self.lock:
+            partition.update(last=last, count=count, bytes=f.tell(), columns=sorted(columns))
+            _save_state(self.state)
+
+    def export_partition(self, index: int) -> None:
+        partition = self.state["partitions"][index]
+        collection = self.state["collection"]
+        id_field = self.options["id_field"]
+        want_columns = self.state["format"] == "csv"
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.part_path(index)
+        if partition["bytes"] and os.path.exists(path):
+            f = open(path, "r+b")
+            # Drop anything written after the last checkpoint; those documents are read again
+            f.truncate(partition["bytes"])
+            f.seek(0, os.SEEK_END)
+        else:
+            f = open(path, "wb")
+            partition.update(last=None, count=0, columns=[])
+
+        last, count, columns = partition["last"], partition["count"], set(partition["columns"])
+        saved = time.monotonic()
+        stream = self._query(partition).stream()
+        try:
+            for snapshot in stream:
+                if time.monotonic() >= self.deadline:
+                    break
+                document_path = snapshot.reference.path
+                # Collection-group partitions also see same-named collections nested elsewhere
+                if partition["group"] and document_path.rsplit("/", 1)[0] != collection:
+                    continue
+                data = _export_value(snapshot.to_dict() or {})
+                data.pop(id_field, None)
+                row = {id_field: snapshot.id, **data}
+                f.write(json.dumps(row, separators=(",", ":")).encode("utf-8") + b"\n")
+                if want_columns:
+                    columns.update(_flatten(row))
+                last, count = document_path, count + 1
+                with self.lock:
+                    self.run["documents"] += 1
+                    self.state["totals"]["documents"] += 1
+                if time.monotonic() - saved >= FIRESTORE_BULK_CHECKPOINT_SECONDS:
+                    self._checkpoint(partition, f, last, count, columns)
+                    saved = time.monotonic()
+            else:
+                partition["done"] = True
+        finally:
+            close = getattr(stream, "close", None)
+            if close:
+                close()
+            self._checkpoint(partition, f, last, count, columns)
+            f.close()
+
+    def assemble(self, destination: str) -> int:
+        """Joins the part files into destination; returns its size in bytes."""
+        partitions = self.state["partitions"]
+        compressed = destination.lower().endswith(".gz")
+        temporary = destination + ".tmp"
+        os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+        if self.state["format"] == "ndjson":
+            with (gzip.open(temporary, "wb") if compressed else open(temporary, "wb")) as out:
+                for index in range(len(partitions)):
+                    with open(self.part_path(index), "rb") as part:
+                        shutil.copyfileobj(part, out)
+        else:
+            id_field = self.options["id_field"]
+            columns = set().union(*(partition["columns"] for partition in partitions)) - {id_field}
+            header = [id_field] + sorted(columns)
+            with (gzip.open(temporary, "wt", newline="", encoding="utf-8") if compressed
+                  else open(temporary, "w", newline="", encoding="utf-8")) as out:
+                writer = csv.writer(out)
+                writer.writerow(header)
+                for index in range(len(partitions)):
+                    with open(self.part_path(index), "rb") as part:
+                        for line in part:
+                            flat = _flatten(json.loads(line))
+                            writer.writerow(["" if flat.get(column) is None else flat[column] for column in header])
+        os.replace(temporary, destination)
+        return os.path.getsize(destination)
+
+
+def export_documents(client, collection: str, destination_path: str, database_id: str = "(default)",
+                     fields: Optional[List[str]] = None, file_format_name: Optional[str] = None,
+                     id_field: str = "id", partitions: Optional[int] = None, max_seconds: Optional[float] = None,
+                     restart: bool = False) -> Dict:
+    """
+    Exports a Firestore collection to an NDJSON or CSV file.
+
+    Args:
+        client: firestore.Client of the source database
+        collection: Collection path to export
+        destination_path: Local .ndjson/.jsonl/.json or .csv file to write, optionally gzipped (.gz)
+        database_id: Database the client is bound to, for the job ID and report
+        fields: Only export these fields (default: whole documents)
+        file_format_name: "ndjson" or "csv" (default: from the file extension)
+        id_field: Column holding each document's ID
+        partitions: Partitions read concurrently (default: FIRESTORE_EXPORT_PARTITIONS)
+        max_seconds: Time budget for this call (default: FIRESTORE_BULK_MAX_SECONDS)
+        restart: Discard the job's checkpoint and start from the beginning
+
+    Returns:
+        Dictionary with the job_id, whether the export is complete, documents
+        exported across all runs, this run's throughput and partition progress
+
+    Raises:
+        ValueError: If the collection path or format is invalid
+        google.api_core.exceptions.NotFound: If the database does not exist
+    """
+    destination = os.path.abspath(destination_path)
+    collection = collection.strip("/")
+    if not collection or len(collection.split("/")) % 2 == 0:
+        raise ValueError(f"collection must be a collection path such as 'orders' or 'users/alice/orders', "
+                         f"got '{collection}'")
+    fmt = file_format(destination, file_format_name)
+    partitions = max(1, min(partitions or FIRESTORE_EXPORT_PARTITIONS, FIRESTORE_BULK_MAX_WORKERS))
+    options = {"fields": list(fields) if fields is not None else None, "id_field": id_field or "id"}
+    job_id = bulk_job_id("export", getattr(client, "project", None), database_id, collection, destination, fmt,
+                         partitions, options)
+
+    state = None if restart else _load_state(job_id)
+    resumed = state is not None
+    if state is None:
+        _discard_state(job_id)
+        state = {"job_id": job_id, "kind": "export", "collection": collection, "database_id": database_id,
+                 "destination": destination, "format": fmt, "options": options, "totals": {"documents": 0},
+                 "runs": 0, "partitions": plan_partitions(client, collection, partitions)}
+    state["runs"] += 1
+
+    started = time.monotonic()
+    budget = FIRESTORE_BULK_MAX_SECONDS if max_seconds is None else max_seconds
+    job = _Export(client, state, started + budget)
+    pending = [index for index, partition in enumerate(state["partitions"]) if not partition["done"]]
+    if pending:
+        with ThreadPoolExecutor(max_workers=len(pending)) as pool:
+            list(pool.map(job.export_partition, pending))
+
+    complete = all(partition["done"] for partition in state["partitions"])
+    size = None
+    if complete:
+        size = job.assemble(destination)
+        _discard_state(job_id)
+    else:
+        _save_state(state)
+
+    elapsed = max(time.monotonic() - started, 1e-6)
+    return {
+        "job_id": job_id,
+        "complete": complete,
+        "resumed": resumed,
+        "runs": state["runs"],
+        "collection": collection,
+        "destination": destination,
+        "format": fmt,
+        "bytes": size,
+        "totals": dict(state["totals"]),
+        "this_run": {
+            **job.run,
+            "elapsed_seconds": round(elapsed, 3),
+            "documents_per_second": round(job.run["documents"] / elapsed, 1),
+            "documents_per_hour": round(job.run["documents"] / elapsed * 3600)
+        },
+        "partitions": {"total": len(state["partitions"]),
+                       "done": sum(partition["done"] for partition in state["partitions"])}
+    }
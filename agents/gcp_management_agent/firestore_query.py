@@ -0,0 +1,395 @@
+"""
+Streaming Firestore document queries.
+
+query_firestore_documents runs a filtered, ordered query over one collection
+with an optional field mask. Results are streamed and the stream is closed as
+soon as the page is full or the page reaches FIRESTORE_QUERY_MAX_RESULT_CHARS
+of JSON, so memory stays bounded by one page no matter how many documents
+match. Long strings and lists inside documents are cut before they reach the
+model.
+
+Pages continue from a cursor on the last returned document. Parsed queries
+are memoized, and pages (with the cursor snapshot behind their
+next_page_token) are cached for FIRESTORE_QUERY_CACHE_TTL seconds, so paging
+back and forth or repeating a question does not read the documents again.
+"""
+
+import base64
+import functools
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from google.api_core import exceptions
+
+from .clients import firestore_client, using_fake_backends
+from .lazy_imports import lazy_import
+
+firestore = lazy_import("google.cloud.firestore")
+
+FIRESTORE_QUERY_DEFAULT_LIMIT = 50
+FIRESTORE_QUERY_MAX_LIMIT = int(os.getenv('FIRESTORE_QUERY_MAX_LIMIT', '500'))
+# JSON characters of documents returned per page; the page ends early once they are used up
+FIRESTORE_QUERY_MAX_RESULT_CHARS = int(os.getenv('FIRESTORE_QUERY_MAX_RESULT_CHARS', '10000'))
+# Longest string value and list returned inside a document
+FIRESTORE_QUERY_MAX_VALUE_CHARS = int(os.getenv('FIRESTORE_QUERY_MAX_VALUE_CHARS', '200'))
+FIRESTORE_QUERY_MAX_LIST_ITEMS = int(os.getenv('FIRESTORE_QUERY_MAX_LIST_ITEMS', '20'))
+# Seconds a page stays cached
+FIRESTORE_QUERY_CACHE_TTL = float(os.getenv('FIRESTORE_QUERY_CACHE_TTL', '60'))
+FIRESTORE_QUERY_CACHE_SIZE = 128
+
+_TOKEN_PREFIX = "fq:"
+
+# Word operators first so "not-in" is not read as "in"
+_OPERATORS = {
+    "==": "==", "=": "==", "!=": "!=", "<": "<", "<=": "<=", ">": ">", ">=": ">=",
+    "in": "in", "not-in": "not-in", "not_in": "not-in",
+    "array_contains": "array_contains", "array-contains": "array_contains",
+    "array_contains_any": "array_contains_any", "array-contains-any": "array_contains_any",
+}
+_LIST_OPERATORS = ("in", "not-in", "array_contains_any")
+_SYMBOL_FILTER = re.compile(r"^\s*([^\s=!<>]+)\s*(==|!=|<=|>=|=|<|>)\s*(.*?)\s*$")
+_WORD_FILTER = re.compile(r"^\s*(\S+)\s+(not[-_]in|in|array[-_]contains[-_]any|array[-_]contains)\s+(.*?)\s*$",
+                          re.IGNORECASE)
+_ISO_TIME = re.compile(r"^\d{4}-\d{2}-\d{2}([T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?(Z|[+-]\d{2}:?\d{2})?$")
+
+_pages: "OrderedDict[tuple, Tuple[float, Dict]]" = OrderedDict()
+_cursors: "OrderedDict[str, Tuple[float, object]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _parse_value(text: str, operator: str):
+    """
+    Parses a filter value.
+
+    JSON literals (numbers, true, false, null, "quoted strings", [lists]) keep
+    their type; unquoted ISO dates become UTC timestamps; anything else is a
+    string. List operators also accept comma-separated values.
+    """
+    if operator in _LIST_OPERATORS and not text.startswith("["):
+        return [_parse_value(part.strip(), "==") for part in text.split(",") if part.strip()]
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    if len(text) >= 2 and text[0] == text[-1] == "'":
+        return text[1:-1]
+    if _ISO_TIME.match(text):
+        try:
+            parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
+            return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+        except ValueError:
+            pass
+    return text
+
+
+@functools.lru_cache(maxsize=256)
+def _query_plan(collection: str, filters: Tuple[str, ...], order_by: str, fields: Optional[Tuple[str, ...]]) -> Dict:
+    """
+    Parses and validates a query into filters, orderings and a field mask.
+
+    Raises:
+        ValueError: If the collection, a filter or an ordering is malformed
+    """
+    collection = collection.strip("/ ")
+    if not collection or len(collection.split("/")) % 2 == 0:
+        raise ValueError(f"collection must be a collection path such as 'orders' or 'users/alice/orders', "
+                         f"got '{collection}'")
+
+    parsed_filters = []
+    for text in filters:
+        match = _SYMBOL_FILTER.match(text) or _WORD_FILTER.match(text)
+        if not match or not match.group(3):
+            raise ValueError(f"Filters look like 'status == failed' or 'region in us,eu', got '{text}'")
+        field_path, operator, value = match.groups()
+        operator = _OPERATORS[operator.lower()]
+        parsed_filters.append((field_path, operator, _parse_value(value, operator)))
+
+    orders = []
+    for part in (order_by or "").split(","):
+        words = part.split()
+        if not words:
+            continue
+        if len(words) > 2 or (len(words) == 2 and words[1].lower() not in ("asc", "desc")):
+            raise ValueError(f"order_by looks like 'created_at desc, name', got '{order_by}'")
+        orders.append((words[0], len(words) == 2 and words[1].lower() == "desc"))
+
+    return {
+        "collection": collection,
+        "filters": tuple(parsed_filters),
+        "orders": tuple(orders),
+        "fields": fields
+    }
+
+
+def _describe(plan: Dict) -> Dict:
+    return {
+        "filters": [f"{path} {operator} {json.dumps(value, default=str)}" for path, operator, value in plan["filters"]],
+        "order_by": [f"{path} {'desc' if descending else 'asc'}" for path, descending in plan["orders"]],
+        "fields": list(plan["fields"]) if plan["fields"] is not None else None
+    }
+
+
+def _fingerprint(project_id: str, database_id: str, plan: Dict) -> str:
+    return hashlib.sha256(
+        json.dumps([project_id, database_id, plan["collection"], _describe(plan)], sort_keys=True).encode("utf-8")
+    ).hexdigest()[:16]
+
+
+def _field_filter(field_path: str, operator: str, value):
+    """Builds the filter passed to Query.where(filter=...)."""
+    if using_fake_backends():
+        from .fake_backends import FakeFieldFilter
+        return FakeFieldFilter(field_path, operator, value)
+    return firestore.FieldFilter(field_path, operator, value)
+
+
+def _json_value(value):
+    """Converts a Firestore value into a JSON-safe value, cutting long strings and lists."""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, str):
+        if len(value) > FIRESTORE_QUERY_MAX_VALUE_CHARS:
+            return value[:FIRESTORE_QUERY_MAX_VALUE_CHARS] + f"... ({len(value)} chars)"
+        return value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return f"<{len(value)} bytes>"
+    if isinstance(value, dict):
+        return {str(key): _json_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        items = [_json_value(item) for item in value[:FIRESTORE_QUERY_MAX_LIST_ITEMS]]
+        if len(value) > FIRESTORE_QUERY_MAX_LIST_ITEMS:
+            items.append(f"... {len(value) - FIRESTORE_QUERY_MAX_LIST_ITEMS} more")
+        return items
+    if hasattr(value, "latitude") and hasattr(value, "longitude"):
+        return {"latitude": value.latitude, "longitude": value.longitude}
+    if hasattr(value, "path") and hasattr(value, "id"):
+        # DocumentReference
+        return value.path
+    return _json_value(str(value))
+
+
+def _encode_token(fingerprint: str, document_path: str) -> str:
+    payload = json.dumps({"q": fingerprint, "d": document_path}, separators=(",", ":"))
+    return _TOKEN_PREFIX + base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def _decode_token(page_token: str, fingerprint: str) -> str:
+    """
+    Returns the cursor document path of a page token.
+
+    Raises:
+        ValueError: If the token is malformed or belongs to a different query
+    """
+    try:
+        if not page_token.startswith(_TOKEN_PREFIX):
+            raise ValueError
+        payload = json.loads(base64.urlsafe_b64decode(page_token[len(_TOKEN_PREFIX):].encode("ascii")))
+        query, document_path = payload["q"], payload["d"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("page_token is not a Firestore query page token; pass the next_page_token "
+                         "returned by query_firestore_documents")
+    if query != fingerprint:
+        raise ValueError("page_token belongs to a different query; repeat the same collection, "
+                         "filters, order_by and fields when paging")
+    return document_path
+
+
+def _cache_get(store: OrderedDict, key):
+    with _cache_lock:
+        entry = store.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry[0] > FIRESTORE_QUERY_CACHE_TTL:
+            del store[key]
+            return None
+        store.move_to_end(key)
+        return entry[1]
+
+
+def _cache_put(store: OrderedDict, key, value) -> None:
+    with _cache_lock:
+        store[key] = (time.time(), value)
+        store.move_to_end(key)
+        while len(store) > FIRESTORE_QUERY_CACHE_SIZE:
+            store.popitem(last=False)
+
+
+def invalidate_query_cache(project_id: Optional[str] = None, database_id: Optional[str] = None) -> None:
+    """
+    Drops cached query pages, e.g. after documents were written.
+
+    Args:
+        project_id: Only drop pages of this project
+        database_id: Only drop pages of this database
+    """
+    with _cache_lock:
+        for key in list(_pages):
+            if (project_id is None or key[0] == project_id) and (database_id is None or key[1] == database_id):
+                del _pages[key]
+        if project_id is None and database_id is None:
+            _cursors.clear()
+
+
+def run_query(project_id: str, database_id: str, plan: Dict, limit: int,
+              page_token: Optional[str] = None) -> Dict:
+    """
+    Streams one page of a parsed query.
+
+    Returns:
+        Dictionary with the documents, next_page_token and whether the page was
+        cut short by FIRESTORE_QUERY_MAX_RESULT_CHARS
+
+    Raises:
+        ValueError: If page_token is invalid or its cursor document no longer exists
+    """
+    fingerprint = _fingerprint(project_id, database_id, plan)
+    client = firestore_client(project_id, database_id)
+    query = client.collection(plan["collection"])
+    for field_path, operator, value in plan["filters"]:
+        query = query.where(filter=_field_filter(field_path, operator, value))
+    for field_path, descending in plan["orders"]:
+        query = query.order_by(field_path, direction="DESCENDING" if descending else "ASCENDING")
+    if plan["fields"] is not None:
+        query = query.select(list(plan["fields"]))
+
+    if page_token:
+        document_path = _decode_token(page_token, fingerprint)
+        cursor = _cache_get(_cursors, page_token)
+        if cursor is None:
+            cursor = client.document(document_path).get()
+            if not cursor.exists:
+                raise ValueError("The document this page_token continues from was deleted; "
+                                 "run the query again without page_token")
+        query = query.start_after(cursor)
+
+    documents = []
+    used_chars = 0
+    truncated = False
+    last = None
+    # One document past the limit tells whether another page exists
+    stream = query.limit(limit + 1).stream()
+    try:
+        for snapshot in stream:
+            if len(documents) == limit:
+                break
+            row = {"id": snapshot.id, "data": _json_value(snapshot.to_dict() or {})}
+            size = len(json.dumps(row, separators=(",", ":")))
+            if documents and used_chars + size > FIRESTORE_QUERY_MAX_RESULT_CHARS:
+                truncated = True
+                break
+            documents.append(row)
+            used_chars += size
+            last = snapshot
+        else:
+            last = None
+    finally:
+        close = getattr(stream, "close", None)
+        if close:
+            close()
+
+    next_page_token = None
+    if last is not None:
+        next_page_token = _encode_token(fingerprint, last.reference.path)
+        _cache_put(_cursors, next_page_token, last)
+    return {"documents": documents, "next_page_token": next_page_token, "truncated": truncated}
+
+
+def query_firestore_documents(collection: str, filters: Optional[List[str]] = None,
+                              order_by: Optional[str] = None, fields: Optional[List[str]] = None,
+                              limit: int = FIRESTORE_QUERY_DEFAULT_LIMIT, page_token: Optional[str] = None,
+                              database_id: str = "(default)", force_refresh: bool = False) -> Dict:
+    """
+    Queries documents in a Firestore collection.
+
+    Example: the last 50 failed orders are collection="orders",
+    filters=["status == failed"], order_by="created_at desc", limit=50.
+
+    Args:
+        collection: Collection path, e.g. "orders" or "users/alice/orders"
+        filters: Conditions combined with AND, each "field operator value". Operators:
+            ==, !=, <, <=, >, >=, in, not-in, array_contains, array_contains_any.
+            Values are JSON (42, true, "text", [1, 2]) or plain text; unquoted ISO dates
+            such as 2024-01-31 compare as timestamps; in lists may be comma-separated
+        order_by: Comma-separated fields, each optionally followed by asc or desc
+        fields: Only return these fields (default: whole documents; [] returns IDs only)
+        limit: Maximum documents to return (default: 50, max: FIRESTORE_QUERY_MAX_LIMIT)
+        page_token: next_page_token of the previous page of the same query
+        database_id: Database to query (default: "(default)")
+        force_refresh: Read from Firestore even if the page is cached
+
+    Returns:
+        Dictionary containing the matching documents, next_page_token and the parsed query
+    """
+    try:
+        project_id = os.getenv('GOOGLE_CLOUD_PROJECT')
+        if not project_id:
+            return {
+                "status": "error",
+                "message": "GOOGLE_CLOUD_PROJECT environment variable not set"
+            }
+
+        limit = max(1, min(int(limit or FIRESTORE_QUERY_DEFAULT_LIMIT), FIRESTORE_QUERY_MAX_LIMIT))
+        plan = _query_plan(collection, tuple(filters or ()), order_by or "",
+                           tuple(fields) if fields is not None else None)
+        started = time.monotonic()
+        cache_key = (project_id, database_id, _fingerprint(project_id, database_id, plan), limit, page_token)
+        page = None if force_refresh else _cache_get(_pages, cache_key)
+        cached = page is not None
+        if page is None:
+            page = run_query(project_id, database_id, plan, limit, page_token)
+            _cache_put(_pages, cache_key, page)
+
+        count = len(page["documents"])
+        message = f"Returned {count} document(s) from {plan['collection']}"
+        if page["truncated"]:
+            message += "; the page was cut short to keep the result small, use next_page_token for the rest"
+        elif page["next_page_token"]:
+            message += "; more documents match, use next_page_token for the next page"
+        return {
+            "status": "success",
+            "project_id": project_id,
+            "database_id": database_id,
+            "collection": plan["collection"],
+            "message": message,
+            "document_count": count,
+            "documents": page["documents"],
+            "next_page_token": page["next_page_token"],
+            "truncated": page["truncated"],
+            "query": _describe(plan),
+            "cached": cached,
+            "query_ms": round((time.monotonic() - started) * 1000, 1)
+        }
+
+    except ValueError as e:
+        return {
+            "status": "error",
+            "message": str(e)
+        }
+    except exceptions.FailedPrecondition as e:
+        # Firestore names the missing composite index, with a link to create it
+        return {
+            "status": "error",
+            "message": f"This query needs a composite index: {e.message}",
+            "error_type": "FailedPrecondition"
+        }
+    except exceptions.NotFound as e:
+        return {
+            "status": "error",
+            "message": f"Database '{database_id}' not found: {e.message}",
+            "error_type": "NotFound"
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Failed to query Firestore: {str(e)}",
+            "error_type": str(type(e).__name__)
+        }
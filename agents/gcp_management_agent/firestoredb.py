@@ -1,19 +1,32 @@
+"""
+Firestore database create, list and delete helpers.
+
+Run the demo as a module from the repository root (the package uses
+relative imports, so `python firestoredb.py` does not work):
+    python -m agents.gcp_management_agent.firestoredb
+"""
+
 import os
 from pprint import pprint
 from typing import Dict
 
-from google.cloud import firestore, firestore_admin_v1
 from google.auth import default
-from google.api_core.exceptions import AlreadyExists, NotFound
-from google.cloud.firestore_admin_v1.types import Database
+from google.api_core.exceptions import AlreadyExists, NotFound, GoogleAPICallError
+
+from .clients import firestore_admin_client, firestore_client
+from .lazy_imports import lazy_import
+from .operations import get_tracker
+
+# Client libraries are imported on first use (see lazy_imports)
+firestore_admin_v1 = lazy_import("google.cloud.firestore_admin_v1")
 
 
 def create_firestore_database(database_id: str = "(default)", location_id: str = "nam5",
                               database_type: str = "FIRESTORE_NATIVE") -> Dict:
-    credentials, project_id = default()
+    _, project_id = default()
 
     if database_id == "(default)":
-        db = firestore.Client(project=project_id, credentials=credentials)
+        db = firestore_client(project_id)
         db.collection("init_check").document("ping").set({"status": "initialized"})
         return {
             "status": "success",
@@ -21,7 +34,7 @@ def create_firestore_database(database_id: str = "(default)", location_id: str =
         }
 
     # Named database creation
-    admin_client = firestore_admin_v1.FirestoreAdminClient(credentials=credentials)
+    admin_client = firestore_admin_client()
     parent = f"projects/{project_id}"
     db_path = f"{parent}/databases/{database_id}"
 
@@ -35,6 +48,7 @@ def create_firestore_database(database_id: str = "(default)", location_id: str =
         pass  # Safe to create
 
     # Use the correct enum for database type
+    Database = firestore_admin_v1.types.Database
     db_type = Database.DatabaseType.FIRESTORE_NATIVE if database_type == "FIRESTORE_NATIVE" \
         else Database.DatabaseType.DATASTORE_MODE
 
@@ -48,27 +62,26 @@ def create_firestore_database(database_id: str = "(default)", location_id: str =
     )
 
     op = admin_client.create_database(request=request)
-    result = op.result(timeout=300)
+    tracked = get_tracker().track("firestore", op.operation.name, project_id,
+                                  resource=f"firestore_database/{database_id}")
 
     return {
-        "status": "success",
-        "message": f"Named database '{database_id}' created",
+        "status": "pending",
+        "message": f"Named database '{database_id}' creation started",
         "details": {
-            "name": result.name,
-            "location_id": result.location_id,
-            "type": result.type_.name
+            "name": db_path,
+            "location_id": location_id,
+            "type": database_type,
+            "operation_id": tracked["operation_id"]
         }
     }
 
 
-import time
-from google.api_core.exceptions import GoogleAPICallError
-
 def delete_firestore_database(database_id: str = "(default)") -> Dict:
-    credentials, project_id = default()
+    _, project_id = default()
 
     if database_id == "(default)":
-        db = firestore.Client(project=project_id, credentials=credentials)
+        db = firestore_client(project_id)
         cleared = 0
         for col in db.collections():
             for doc in col.stream():
@@ -79,28 +92,21 @@ def delete_firestore_database(database_id: str = "(default)") -> Dict:
             "message": f"Cleared {cleared} documents from default Firestore database"
         }
 
-    admin_client = firestore_admin_v1.FirestoreAdminClient(credentials=credentials)
+    admin_client = firestore_admin_client()
     db_path = f"projects/{project_id}/databases/{database_id}"
 
     try:
         admin_client.get_database(name=db_path)
         op = admin_client.delete_database(name=db_path)
+        tracked = get_tracker().track("firestore", op.operation.name, project_id,
+                                      resource=f"firestore_database/{database_id}")
 
-        # Manual polling with extended timeout
-        timeout = 600  # 10 minutes
-        start_time = time.time()
-
-        print(f"⏳ Waiting for deletion of database '{database_id}'...")
-
-        while not op.done():
-            if time.time() - start_time > timeout:
-                raise TimeoutError(f"Timed out waiting for database '{database_id}' to be deleted.")
-            time.sleep(10)
-
-        op.result()  # ensure it's successful
         return {
-            "status": "deleted",
-            "message": f"Firestore database '{database_id}' deleted successfully"
+            "status": "pending",
+            "message": f"Firestore database '{database_id}' deletion started",
+            "details": {
+                "operation_id": tracked["operation_id"]
+            }
         }
 
     except NotFound:
@@ -113,16 +119,20 @@ def delete_firestore_database(database_id: str = "(default)") -> Dict:
             "status": "error",
             "message": f"Database deletion failed: {str(e)}"
         }
-    except TimeoutError as e:
-        return {
-            "status": "timeout",
-            "message": str(e)
-        }
+
+
+def wait_for_operation(result: Dict, timeout: float = 600) -> Dict:
+    """Blocks until the operation behind a pending result finishes (script use only)."""
+    operation_id = result.get("details", {}).get("operation_id")
+    if result.get("status") != "pending" or not operation_id:
+        return result
+    print(f"⏳ Waiting for operation {operation_id}...")
+    return get_tracker().wait(operation_id, timeout=timeout)
 
 
 def list_firestore_databases() -> Dict:
-    credentials, project_id = default()
-    admin_client = firestore_admin_v1.FirestoreAdminClient(credentials=credentials)
+    _, project_id = default()
+    admin_client = firestore_admin_client()
 
     response = admin_client.list_databases(parent=f"projects/{project_id}")
     db_list = []
@@ -151,14 +161,14 @@ if __name__ == "__main__":
     pprint(create_firestore_database())
 
     print("\n📌 Creating named database 'testdb1'...")
-    pprint(create_firestore_database("testdb1"))
+    pprint(wait_for_operation(create_firestore_database("testdb1")))
 
     print("\n📌 Listing all databases...")
     pprint(list_firestore_databases())
 
     print("\n📌 Deleting named database 'testdb1'...")
     try:
-        pprint(delete_firestore_database("testdb1"))
+        pprint(wait_for_operation(delete_firestore_database("testdb1")))
     except Exception as e:
         print(f"❌ Exception during deletion: {e}")
 
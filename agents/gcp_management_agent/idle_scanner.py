@@ -0,0 +1,425 @@
+"""
+Idle and orphaned resource scanner.
+
+Flags resources that cost money without doing anything, from the local
+inventory index rather than fresh listings:
+
+- Compute Engine instances stopped for more than N days (their disks are
+  still billed)
+- Buckets without any objects
+- Firestore databases with no collections at all, or left behind by
+  run_comprehensive_tests (test-db-*)
+
+Empty buckets and databases are only flagged once they are as old as the
+stopped-instance threshold, so a resource that was just provisioned and not
+yet filled is left alone.
+- Firestore databases with no writes seen since a date. This is advisory
+  only: the check samples documents, so it is never added to the cleanup plan
+
+The per-type checks run concurrently; the per-resource probes they need
+(one object listing per bucket, a document sample per database) run on a
+bounded pool and are cached, so a repeated scan completes in well under a
+second. Findings are ranked by an estimated monthly cost and turned into a
+deletion plan that apply_desired_state executes.
+"""
+
+import fnmatch
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .clients import firestore_client, storage_client
+from .inventory_index import index_snapshot, refresh_index
+from .plan_apply import register_delete_plan
+
+IDLE_SCAN_MAX_WORKERS = int(os.getenv('IDLE_SCAN_MAX_WORKERS', '16'))
+# Seconds a bucket or database probe result is reused by later scans
+IDLE_SCAN_CACHE_TTL = float(os.getenv('IDLE_SCAN_CACHE_TTL', '900'))
+
+IDLE_STOPPED_DAYS = int(os.getenv('IDLE_STOPPED_DAYS', '7'))
+IDLE_NO_WRITES_DAYS = int(os.getenv('IDLE_NO_WRITES_DAYS', '30'))
+
+# Database IDs treated as leftover test databases; run_comprehensive_tests creates test-db-<timestamp>
+IDLE_TEST_DATABASE_PATTERNS = [p.strip() for p in os.getenv('IDLE_TEST_DATABASE_PATTERNS', 'test-db-*').split(',')
+                               if p.strip()]
+# Hours a test database may exist before it counts as abandoned, so a running test is left alone
+IDLE_TEST_DATABASE_MIN_AGE_HOURS = float(os.getenv('IDLE_TEST_DATABASE_MIN_AGE_HOURS', '1'))
+
+# Bounds on the document sample used to find a database's latest write
+IDLE_FIRESTORE_SAMPLE_COLLECTIONS = int(os.getenv('IDLE_FIRESTORE_SAMPLE_COLLECTIONS', '20'))
+IDLE_FIRESTORE_SAMPLE_DOCUMENTS = int(os.getenv('IDLE_FIRESTORE_SAMPLE_DOCUMENTS', '50'))
+
+# List price used to rank stopped instances, USD per GB-month of attached persistent disk
+IDLE_DISK_PRICE_PER_GB_MONTH = float(os.getenv('IDLE_DISK_PRICE_PER_GB_MONTH', '0.04'))
+
+IDLE_RESOURCE_TYPES = ("compute", "storage", "firestore")
+STOPPED_STATUSES = ("TERMINATED", "STOPPED", "SUSPENDED")
+
+# Rules whose evidence is a sample; their findings are reported but never planned for deletion
+ADVISORY_RULES = frozenset({"no_recent_writes"})
+
+# Inventory index type -> plan_apply resource type
+_PLAN_TYPES = {
+    "storage": "bucket",
+    "compute": "instance",
+    "firestore": "firestore_database",
+}
+
+_probes: Dict[tuple, Tuple[float, Dict]] = {}
+_probes_lock = threading.Lock()
+
+
+def _parse_time(value) -> Optional[datetime]:
+    """Parses an RFC 3339 string or datetime into an aware UTC datetime."""
+    if not value:
+        return None
+    if not isinstance(value, datetime):
+        try:
+            value = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _cached_probe(key: tuple, probe: Callable[[], Dict], force_refresh: bool) -> Dict:
+    now = time.time()
+    with _probes_lock:
+        cached = _probes.get(key)
+    if cached and not force_refresh and now - cached[0] < IDLE_SCAN_CACHE_TTL:
+        return {**cached[1], "cached": True}
+    result = probe()
+    with _probes_lock:
+        _probes[key] = (now, result)
+    return {**result, "cached": False}
+
+
+def _probe_bucket(project_id: str, bucket_name: str) -> Dict:
+    """Checks whether a bucket holds any object, including noncurrent versions."""
+    blobs = storage_client(project_id).list_blobs(bucket_name, max_results=1, versions=True,
+                                                  fields="items(name),nextPageToken")
+    return {"empty": next(iter(blobs), None) is None}
+
+
+def _probe_database(project_id: str, database_id: str) -> Dict:
+    """
+    Samples a database's root collections for their most recent document write.
+
+    Firestore has no per-database last-write time, so this reads at most
+    IDLE_FIRESTORE_SAMPLE_DOCUMENTS documents from each of the first
+    IDLE_FIRESTORE_SAMPLE_COLLECTIONS collections, without their fields.
+    Update time is document metadata and cannot be ordered on, so a newer
+    write outside the sample goes unseen.
+    """
+    client = firestore_client(project_id, database_id)
+    collections = list(client.collections())
+    latest = None
+    sampled = 0
+    for collection in collections[:IDLE_FIRESTORE_SAMPLE_COLLECTIONS]:
+        for snapshot in collection.select([]).limit(IDLE_FIRESTORE_SAMPLE_DOCUMENTS).stream():
+            sampled += 1
+            written = _parse_time(getattr(snapshot, "update_time", None))
+            if written and (latest is None or written > latest):
+                latest = written
+    return {
+        "collections": len(collections),
+        "documents_sampled": sampled,
+        "latest_write_seen": latest.isoformat() if latest else None
+    }
+
+
+def _scan_compute(project_id: str, now: datetime, stopped_days: int) -> Tuple[List[Dict], List[Dict]]:
+    findings = []
+    cutoff = now - timedelta(days=stopped_days)
+    for key, instance in sorted(index_snapshot(project_id, "compute").items()):
+        if instance.get("status") not in STOPPED_STATUSES:
+            continue
+        # Instances stopped before lastStopTimestamp existed fall back to their creation time
+        stopped_at = _parse_time(instance.get("last_stop")) or _parse_time(instance.get("created"))
+        if stopped_at is None or stopped_at > cutoff:
+            continue
+        disk_gb = instance.get("disks_total_gb") or 0
+        findings.append({
+            "resource_type": "compute",
+            "name": instance.get("instance_name") or key.split("/")[-1],
+            "zone": instance.get("location"),
+            "rule": "stopped_instance",
+            "reason": f"{instance['status']} for {(now - stopped_at).days} day(s)",
+            "idle_since": stopped_at.isoformat(),
+            "idle_days": (now - stopped_at).days,
+            "estimated_monthly_cost_usd": round(disk_gb * IDLE_DISK_PRICE_PER_GB_MONTH, 2),
+            "cost_basis": f"{disk_gb} GB attached persistent disk at ${IDLE_DISK_PRICE_PER_GB_MONTH}/GB-month"
+        })
+    return findings, []
+
+
+def _old_enough(resource: Dict, now: datetime, min_age: timedelta) -> bool:
+    """Whether a resource was created at least min_age ago; an unknown creation time is not."""
+    created = _parse_time(resource.get("created"))
+    return created is not None and now - created >= min_age
+
+
+def _scan_storage(project_id: str, now: datetime, min_age: timedelta, executor: ThreadPoolExecutor,
+                  force_refresh: bool) -> Tuple[List[Dict], List[Dict]]:
+    # Younger buckets may still be filled, so they are not probed at all
+    buckets = {name: bucket for name, bucket in index_snapshot(project_id, "storage").items()
+               if _old_enough(bucket, now, min_age)}
+
+    def probe(name):
+        try:
+            return name, _cached_probe((project_id, "storage", name), lambda: _probe_bucket(project_id, name),
+                                       force_refresh), None
+        except Exception as e:
+            return name, None, str(e)
+
+    findings, errors = [], []
+    for name, result, error in executor.map(probe, sorted(buckets)):
+        if error:
+            errors.append({"resource_type": "storage", "name": name, "error": error})
+            continue
+        if not result["empty"]:
+            continue
+        created = _parse_time(buckets[name].get("created"))
+        findings.append({
+            "resource_type": "storage",
+            "name": name,
+            "location": buckets[name].get("location"),
+            "rule": "empty_bucket",
+            "reason": "Bucket has no objects",
+            "idle_since": created.isoformat() if created else None,
+            "idle_days": (now - created).days if created else None,
+            "estimated_monthly_cost_usd": 0.0,
+            "cost_basis": "Empty buckets are not billed for storage",
+            "cached": result["cached"]
+        })
+    return findings, errors
+
+
+def _scan_firestore(project_id: str, now: datetime, no_writes_since: datetime, min_age: timedelta,
+                    executor: ThreadPoolExecutor, force_refresh: bool) -> Tuple[List[Dict], List[Dict]]:
+    databases = {name: db for name, db in index_snapshot(project_id, "firestore").items() if name != "(default)"}
+    min_test_age = timedelta(hours=IDLE_TEST_DATABASE_MIN_AGE_HOURS)
+
+    def probe(name):
+        try:
+            return name, _cached_probe((project_id, "firestore", name), lambda: _probe_database(project_id, name),
+                                       force_refresh), None
+        except Exception as e:
+            return name, None, str(e)
+
+    findings, errors = [], []
+    for name, result, error in executor.map(probe, sorted(databases)):
+        database = databases[name]
+        created = _parse_time(database.get("created"))
+        finding = {
+            "resource_type": "firestore",
+            "name": name,
+            "location": database.get("location"),
+            "idle_since": created.isoformat() if created else None,
+            "idle_days": (now - created).days if created else None,
+            "estimated_monthly_cost_usd": 0.0,
+            "cost_basis": "Storage size is not reported by the Admin API"
+        }
+        is_test = any(fnmatch.fnmatchcase(name, pattern) for pattern in IDLE_TEST_DATABASE_PATTERNS)
+
+        if is_test:
+            # A younger test database may belong to a test that is still running
+            if created and now - created >= min_test_age:
+                findings.append({**finding, "rule": "test_database",
+                                 "reason": "Leftover test database matching " + ", ".join(IDLE_TEST_DATABASE_PATTERNS)})
+            continue
+        if error:
+            errors.append({"resource_type": "firestore", "name": name, "error": error})
+            continue
+        if not result["collections"]:
+            if not _old_enough(database, now, min_age):
+                continue
+            findings.append({**finding, "rule": "empty_database", "reason": "Database has no collections",
+                             "cached": result["cached"]})
+            continue
+        latest = _parse_time(result["latest_write_seen"])
+        if latest and latest < no_writes_since:
+            findings.append({
+                **finding,
+                "rule": "no_recent_writes",
+                "reason": f"No writes since {latest.date().isoformat()} in {result['documents_sampled']} sampled "
+                          f"document(s); writes outside the sample are not seen, so this is advisory only",
+                "advisory": True,
+                "idle_since": latest.isoformat(),
+                "idle_days": (now - latest).days,
+                "cached": result["cached"]
+            })
+    return findings, errors
+
+
+def scan_idle_resources(project_id: str, resource_types: Optional[List[str]] = None,
+                        stopped_days: Optional[int] = None, no_writes_since: Optional[datetime] = None,
+                        force_refresh: bool = False, max_workers: Optional[int] = None) -> Dict:
+    """
+    Runs the idle-resource rules over the inventory index of one project.
+
+    Args:
+        project_id: Project to scan
+        resource_types: Inventory types to scan (default: IDLE_RESOURCE_TYPES)
+        stopped_days: Days an instance must have been stopped, and an empty bucket or
+            database must have existed (default: IDLE_STOPPED_DAYS)
+        no_writes_since: Firestore databases without writes after this time are flagged
+            (default: IDLE_NO_WRITES_DAYS ago)
+        force_refresh: Re-sync the inventory and re-run every probe instead of using cached results
+        max_workers: Concurrent probes (default: IDLE_SCAN_MAX_WORKERS)
+
+    Returns:
+        Dictionary with findings ranked by estimated monthly cost, per-resource
+        errors and the inventory refresh summary
+
+    Raises:
+        ValueError: If resource_types names an unknown type
+    """
+    resource_types = list(resource_types or IDLE_RESOURCE_TYPES)
+    unknown = [t for t in resource_types if t not in IDLE_RESOURCE_TYPES]
+    if unknown:
+        raise ValueError(f"Unknown resource types: {', '.join(unknown)}. "
+                         f"Valid types: {', '.join(IDLE_RESOURCE_TYPES)}")
+
+    now = datetime.now(timezone.utc)
+    stopped_days = IDLE_STOPPED_DAYS if stopped_days is None else stopped_days
+    min_age = timedelta(days=stopped_days)
+    no_writes_since = no_writes_since or now - timedelta(days=IDLE_NO_WRITES_DAYS)
+    refreshed = refresh_index(project_id, resource_types, force=force_refresh)
+
+    findings, errors = [], []
+    with ThreadPoolExecutor(max_workers=max(1, max_workers or IDLE_SCAN_MAX_WORKERS)) as probes, \
+            ThreadPoolExecutor(max_workers=len(resource_types)) as scans:
+        checks = {
+            "compute": lambda: _scan_compute(project_id, now, stopped_days),
+            "storage": lambda: _scan_storage(project_id, now, min_age, probes, force_refresh),
+            "firestore": lambda: _scan_firestore(project_id, now, no_writes_since, min_age, probes, force_refresh),
+        }
+        futures = {t: scans.submit(checks[t]) for t in resource_types}
+        for resource_type, future in futures.items():
+            error = (refreshed.get(resource_type) or {}).get("error")
+            if error:
+                errors.append({"resource_type": resource_type, "error": f"Inventory refresh failed: {error}"})
+            type_findings, type_errors = future.result()
+            findings.extend(type_findings)
+            errors.extend(type_errors)
+
+    findings.sort(key=lambda f: (-f["estimated_monthly_cost_usd"], -(f["idle_days"] or 0), f["name"]))
+    return {
+        "findings": findings,
+        "errors": errors,
+        "inventory_refresh": refreshed,
+        "thresholds": {
+            "stopped_days": stopped_days,
+            "no_writes_since": no_writes_since.isoformat(),
+            "test_database_patterns": IDLE_TEST_DATABASE_PATTERNS
+        }
+    }
+
+
+def cleanup_entries(findings: List[Dict]) -> List[Dict]:
+    """Turns findings into plan_apply delete entries, most expensive first; advisory findings are left out."""
+    entries = []
+    for finding in findings:
+        if finding["rule"] in ADVISORY_RULES:
+            continue
+        entry = {"type": _PLAN_TYPES[finding["resource_type"]], "name": finding["name"]}
+        if finding["resource_type"] == "compute":
+            entry["zone"] = finding["zone"]
+        entries.append(entry)
+    return entries
+
+
+def find_idle_resources(resource_types: Optional[str] = None, stopped_days: Optional[int] = None,
+                        no_writes_since: Optional[str] = None, force_refresh: bool = False) -> Dict:
+    """
+    Finds idle or orphaned resources and prepares a bulk-cleanup plan.
+
+    Flags instances stopped for more than stopped_days, buckets without
+    objects and Firestore databases without collections that are at least
+    stopped_days old, and leftover test-db-* databases. Databases without writes since no_writes_since are reported
+    as advisory findings from a document sample and are not added to the
+    cleanup plan. Nothing is deleted: review the findings, then run
+    apply_desired_state with the returned plan_id and confirm_deletes=True.
+
+    Args:
+        resource_types: Comma-separated subset of compute, storage, firestore (default: all)
+        stopped_days: Days an instance must have been stopped, and an empty bucket or
+            database must have existed (default: IDLE_STOPPED_DAYS)
+        no_writes_since: ISO date; databases without writes after it are flagged
+            (default: IDLE_NO_WRITES_DAYS days ago)
+        force_refresh: Re-sync the inventory and re-check every resource instead of using cached results
+
+    Returns:
+        Dictionary containing findings ranked by estimated monthly cost, the
+        cleanup plan of the non-advisory findings and its plan_id
+    """
+    try:
+        project_id = os.getenv('GOOGLE_CLOUD_PROJECT')
+        if not project_id:
+            return {
+                "status": "error",
+                "message": "GOOGLE_CLOUD_PROJECT environment variable not set"
+            }
+
+        since = None
+        if no_writes_since:
+            since = _parse_time(no_writes_since)
+            if since is None:
+                return {
+                    "status": "error",
+                    "message": f"no_writes_since must be an ISO date such as 2024-01-31, got '{no_writes_since}'"
+                }
+
+        started = time.monotonic()
+        types = [t.strip() for t in resource_types.split(",") if t.strip()] if resource_types else None
+        scan = scan_idle_resources(project_id, types, stopped_days, since, force_refresh)
+        findings = scan["findings"]
+
+        plan = cleanup_entries(findings)
+        plan_id = register_delete_plan(project_id, plan) if plan else None
+        monthly = round(sum(f["estimated_monthly_cost_usd"] for f in findings), 2)
+        by_rule = {}
+        for finding in findings:
+            by_rule[finding["rule"]] = by_rule.get(finding["rule"], 0) + 1
+
+        advisory = len(findings) - len(plan)
+
+        if not findings:
+            message = "No idle resources found"
+        elif not plan:
+            message = (f"Found {advisory} advisory finding(s) to review by hand; "
+                       f"nothing was added to a cleanup plan")
+        else:
+            message = (f"Found {len(findings)} idle resource(s), about ${monthly}/month. "
+                       f"Review them, then apply_desired_state(plan_id='{plan_id}', confirm_deletes=True) to delete")
+            if advisory:
+                message += f". {advisory} advisory finding(s) are not in the plan"
+        return {
+            "status": "partial_success" if scan["errors"] else "success",
+            "project_id": project_id,
+            "message": message,
+            "finding_count": len(findings),
+            "by_rule": by_rule,
+            "estimated_monthly_savings_usd": monthly,
+            "findings": findings,
+            "cleanup_plan": {"plan_id": plan_id, "to_delete": plan},
+            "errors": scan["errors"],
+            "thresholds": scan["thresholds"],
+            "scan_ms": round((time.monotonic() - started) * 1000, 1)
+        }
+
+    except ValueError as e:
+        return {
+            "status": "error",
+            "message": str(e)
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Failed to scan for idle resources: {str(e)}"
+        }
@@ -0,0 +1,197 @@
+"""
+Import-time profile of the agent's start-up.
+
+Imports a module in fresh interpreters with -X importtime and reports the
+modules that cost the most, by cumulative and by self time. The median total
+across runs is checked against a start-up budget, and the heavy client
+libraries that tools defer with lazy_import are checked to still be absent
+after start-up, so a stray top-level import shows up as a failure rather than
+as a slower cold start.
+
+Usage:
+    python -m agents.gcp_management_agent.import_profile [--module NAME]
+        [--budget-ms N] [--runs N] [--top N] [--json]
+
+Exits with status 1 when the budget is exceeded, a deferred library was
+imported eagerly, or the module failed to import.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+DEFAULT_MODULE = "agents.gcp_management_agent.agent"
+# Median start-up import time, in milliseconds, the agent must stay under
+STARTUP_IMPORT_BUDGET_MS = float(os.getenv('STARTUP_IMPORT_BUDGET_MS', '2500'))
+
+# Libraries the tool modules import on first use; none may load at start-up
+DEFERRED_MODULES = [
+    "google.cloud.billing_v1",
+    "google.cloud.compute_v1",
+    "google.cloud.container_v1",
+    "google.cloud.firestore",
+    "google.cloud.firestore_admin_v1",
+    "google.cloud.functions_v1",
+    "google.cloud.resourcemanager_v3",
+    "google.cloud.sql_v1",
+    "google.cloud.storage",
+    "numpy",
+    "pyarrow",
+]
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """
+    Parses -X importtime output into one entry per imported module.
+
+    Returns:
+        [{"module", "self_ms", "cumulative_ms", "depth"}] in import order
+    """
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            modules.append({
+                "module": name.strip(),
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+                # importtime indents nested imports by two spaces per level
+                "depth": (len(name) - len(name.lstrip()) - 1) // 2
+            })
+        except ValueError:
+            continue
+    return modules
+
+
+def profile_once(module: str) -> Dict:
+    """
+    Imports module in a fresh interpreter and returns its import profile.
+
+    Returns:
+        Dictionary with total_ms, the parsed modules, and error when the import failed
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True
+    )
+    modules = parse_importtime(completed.stderr)
+    top_level = [entry for entry in modules if entry["depth"] == 0]
+    result = {
+        "total_ms": round(sum(entry["cumulative_ms"] for entry in top_level), 1),
+        "modules": modules
+    }
+    if completed.returncode != 0:
+        errors = [line for line in completed.stderr.splitlines() if not line.startswith("import time:")]
+        result["error"] = errors[-1] if errors else f"exit status {completed.returncode}"
+    return result
+
+
+def profile_imports(module: str = DEFAULT_MODULE, runs: int = 3, top: int = 15,
+                    budget_ms: Optional[float] = None) -> Dict:
+    """
+    Profiles the start-up imports of module and checks them against the budget.
+
+    The first run also warms the bytecode cache, so it is discarded when more
+    than one run is requested.
+
+    Args:
+        module: Dotted name of the module to import
+        runs: Number of fresh interpreters to time
+        top: Number of modules listed per ranking
+        budget_ms: Start-up budget in milliseconds (default: STARTUP_IMPORT_BUDGET_MS)
+
+    Returns:
+        Dictionary with status (success or error), the median and per-run
+        totals, the costliest modules by cumulative and self time, and any
+        deferred libraries that were imported eagerly
+    """
+    budget_ms = STARTUP_IMPORT_BUDGET_MS if budget_ms is None else budget_ms
+    profiles = [profile_once(module) for _ in range(max(1, runs) + (1 if runs > 1 else 0))]
+    if len(profiles) > 1:
+        profiles = profiles[1:]
+
+    failed = next((profile for profile in profiles if "error" in profile), None)
+    if failed:
+        return {
+            "status": "error",
+            "module": module,
+            "message": f"Importing {module} failed: {failed['error']}"
+        }
+
+    totals = [profile["total_ms"] for profile in profiles]
+    median = statistics.median(totals)
+    # Rank by the run closest to the median so one noisy run does not skew the lists
+    representative = min(profiles, key=lambda profile: abs(profile["total_ms"] - median))
+    modules = representative["modules"]
+    imported = {entry["module"] for entry in modules}
+    eager = [name for name in DEFERRED_MODULES
+             if name in imported or any(other.startswith(name + ".") for other in imported)]
+
+    result = {
+        "status": "success",
+        "module": module,
+        "median_ms": round(median, 1),
+        "runs_ms": totals,
+        "budget_ms": budget_ms,
+        "module_count": len(modules),
+        "top_cumulative": [
+            {"module": entry["module"], "ms": round(entry["cumulative_ms"], 1)}
+            for entry in sorted(modules, key=lambda entry: -entry["cumulative_ms"])[:top]
+        ],
+        "top_self": [
+            {"module": entry["module"], "ms": round(entry["self_ms"], 1)}
+            for entry in sorted(modules, key=lambda entry: -entry["self_ms"])[:top]
+        ],
+        "eagerly_imported": eager
+    }
+    problems = []
+    if median > budget_ms:
+        problems.append(f"start-up imports took {median:.0f} ms, over the {budget_ms:.0f} ms budget")
+    if eager:
+        problems.append(f"deferred libraries imported at start-up: {', '.join(eager)}")
+    if problems:
+        result["status"] = "error"
+        result["message"] = "; ".join(problems)
+    else:
+        result["message"] = f"Start-up imports took {median:.0f} ms (budget {budget_ms:.0f} ms)"
+    return result
+
+
+def _print_report(result: Dict) -> None:
+    print(result["message"])
+    if "top_cumulative" not in result:
+        return
+    print(f"Runs: {', '.join(f'{total:.0f} ms' for total in result['runs_ms'])}; "
+          f"{result['module_count']} modules imported")
+    for title, key in (("cumulative", "top_cumulative"), ("self", "top_self")):
+        print(f"\nCostliest modules by {title} time:")
+        for entry in result[key]:
+            print(f"  {entry['ms']:>9.1f} ms  {entry['module']}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Profile the agent's start-up imports")
+    parser.add_argument("--module", default=DEFAULT_MODULE, help="Module to import")
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="Start-up budget in milliseconds (default: STARTUP_IMPORT_BUDGET_MS)")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to time")
+    parser.add_argument("--top", type=int, default=15, help="Modules listed per ranking")
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+    args = parser.parse_args(argv)
+
+    result = profile_imports(args.module, args.runs, args.top, args.budget_ms)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        _print_report(result)
+    return 0 if result["status"] == "success" else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
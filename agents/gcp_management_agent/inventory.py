@@ -0,0 +1,206 @@
+"""
+Concurrent multi-service resource inventory.
+
+Each resource type has a registered lister. Listers run concurrently with a
+per-type timeout, so total inventory latency is bounded by the slowest service
+rather than the sum of all of them, and a slow or failing service only marks
+its own section as incomplete.
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, List, Optional
+
+from .clients import (
+    storage_client,
+    sql_instances_client,
+    gke_client,
+    functions_client,
+    firestore_admin_client,
+)
+from .compute_listing import list_instances
+
+# Default per-type timeout in seconds
+INVENTORY_DEFAULT_TIMEOUT = float(os.getenv('INVENTORY_DEFAULT_TIMEOUT', '30'))
+
+DEFAULT_RESOURCE_TYPES = ["storage", "compute", "sql"]
+
+# resource type -> {"result_key", "lister", "timeout"}
+RESOURCE_LISTERS: Dict[str, Dict] = {}
+
+
+def register_resource_lister(resource_type: str, result_key: str, timeout: Optional[float] = None):
+    """
+    Registers a lister function for a resource type.
+
+    The decorated function takes a project ID and returns a list of resource
+    dictionaries.
+
+    Args:
+        resource_type: Short type name used in resource_types filters (e.g. "gke")
+        result_key: Key the results are stored under in the inventory
+        timeout: Seconds to wait for this type (default: INVENTORY_DEFAULT_TIMEOUT)
+    """
+    def decorator(lister: Callable[[str], List[Dict]]):
+        RESOURCE_LISTERS[resource_type] = {
+            "result_key": result_key,
+            "lister": lister,
+            "timeout": timeout or INVENTORY_DEFAULT_TIMEOUT,
+        }
+        return lister
+    return decorator
+
+
+@register_resource_lister("storage", "storage_buckets")
+def list_storage(project_id: str) -> List[Dict]:
+    """Lists Cloud Storage buckets."""
+    return [
+        {
+            "name": bucket.name,
+            "location": bucket.location,
+            "storage_class": bucket.storage_class,
+            "versioning_enabled": bucket.versioning_enabled,
+            "created": bucket.time_created.isoformat() if bucket.time_created else None
+        } for bucket in storage_client(project_id).list_buckets()
+    ]
+
+
+@register_resource_lister("compute", "compute_instances")
+def list_compute(project_id: str) -> List[Dict]:
+    """Lists Compute Engine instances across all zones."""
+    listing = list_instances(
+        project_id,
+        fields=["name", "zone", "machine_type", "status", "internal_ip", "external_ip", "created"]
+    )
+    return listing["instances"]
+
+
+@register_resource_lister("sql", "sql_instances")
+def list_sql(project_id: str) -> List[Dict]:
+    """Lists Cloud SQL instances."""
+    sql_instances = sql_instances_client().list(request={"project": project_id})
+    return [
+        {
+            "name": instance.name,
+            "database_version": instance.database_version,
+            "region": instance.region,
+            "tier": instance.settings.tier,
+            "state": instance.state,
+            "ip_addresses": [
+                {"ip": ip.ip_address, "type": ip.type_}
+                for ip in instance.ip_addresses
+            ]
+        } for instance in sql_instances.items
+    ]
+
+
+@register_resource_lister("gke", "gke_clusters")
+def list_gke(project_id: str) -> List[Dict]:
+    """Lists GKE clusters in all locations."""
+    response = gke_client().list_clusters(parent=f"projects/{project_id}/locations/-")
+    return [
+        {
+            "name": cluster.name,
+            "location": cluster.location,
+            "status": cluster.status.name,
+            "master_version": cluster.current_master_version,
+            "node_count": cluster.current_node_count,
+            "created": cluster.create_time or None
+        } for cluster in response.clusters
+    ]
+
+
+@register_resource_lister("functions", "cloud_functions")
+def list_functions(project_id: str) -> List[Dict]:
+    """Lists Cloud Functions in all locations."""
+    return [
+        {
+            "name": function.name.split("/")[-1],
+            "location": function.name.split("/")[3],
+            "runtime": function.runtime,
+            "status": function.status.name,
+            "entry_point": function.entry_point,
+            "updated": function.update_time.isoformat() if function.update_time else None
+        } for function in functions_client().list_functions(parent=f"projects/{project_id}/locations/-")
+    ]
+
+
+@register_resource_lister("firestore", "firestore_databases")
+def list_firestore(project_id: str) -> List[Dict]:
+    """Lists Firestore databases."""
+    response = firestore_admin_client().list_databases(parent=f"projects/{project_id}")
+    return [
+        {
+            "database_id": database.name.split("/")[-1],
+            "location_id": database.location_id,
+            "type": getattr(database.type_, "name", "UNKNOWN"),
+            "created": str(database.create_time) if database.create_time else None
+        } for database in response.databases
+    ]
+
+
+def collect_inventory(project_id: str, resource_types: Optional[List[str]] = None,
+                      timeouts: Optional[Dict[str, float]] = None) -> Dict:
+    """
+    Lists the requested resource types concurrently.
+
+    Args:
+        project_id: Project to inventory
+        resource_types: Types to include (default: DEFAULT_RESOURCE_TYPES)
+        timeouts: Optional per-type timeout overrides in seconds
+
+    Returns:
+        Dictionary with resources keyed by result key, the types that failed or
+        timed out, and per-type timings in milliseconds
+
+    Raises:
+        ValueError: If an unknown resource type is requested
+    """
+    resource_types = list(resource_types or DEFAULT_RESOURCE_TYPES)
+    unknown = [t for t in resource_types if t not in RESOURCE_LISTERS]
+    if unknown:
+        raise ValueError(f"Unsupported resource types: {', '.join(unknown)}. "
+                         f"Supported types: {', '.join(RESOURCE_LISTERS)}")
+    timeouts = timeouts or {}
+
+    resources = {}
+    incomplete = []
+    timings = {}
+
+    def timed(lister):
+        start = time.monotonic()
+        result = lister(project_id)
+        return result, (time.monotonic() - start) * 1000
+
+    # Not used as a context manager: timed-out listers must not block the response
+    executor = ThreadPoolExecutor(max_workers=max(1, len(resource_types)))
+    try:
+        started = time.monotonic()
+        futures = {
+            resource_type: executor.submit(timed, RESOURCE_LISTERS[resource_type]["lister"])
+            for resource_type in resource_types
+        }
+
+        for resource_type, future in futures.items():
+            spec = RESOURCE_LISTERS[resource_type]
+            timeout = timeouts.get(resource_type, spec["timeout"])
+            remaining = max(0.0, started + timeout - time.monotonic())
+            try:
+                result, elapsed_ms = future.result(timeout=remaining)
+                resources[spec["result_key"]] = result
+                timings[resource_type] = round(elapsed_ms, 1)
+            except FutureTimeoutError:
+                resources[spec["result_key"]] = {"error": f"Timed out after {timeout}s"}
+                incomplete.append(resource_type)
+            except Exception as e:
+                resources[spec["result_key"]] = {"error": str(e)}
+                incomplete.append(resource_type)
+    finally:
+        executor.shutdown(wait=False)
+
+    return {
+        "resources": resources,
+        "incomplete_types": incomplete,
+        "timings_ms": timings
+    }
@@ -0,0 +1,640 @@
+"""
+Local SQLite index of project resources.
+
+Buckets, Compute Engine instances and Firestore databases are indexed so the
+management agent can filter, sort and group inventory in milliseconds instead
+of enumerating the APIs on every chat turn. A background refresher keeps the
+index current by comparing etags/fingerprints and refetching only resources
+whose change token moved; mutation tools mark the affected type dirty so the
+next query refreshes it.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from .clients import storage_client, firestore_admin_client
+from .compute_listing import list_instances
+from .fanout import fan_out, resolve_projects
+
+INVENTORY_INDEX_PATH = os.getenv(
+    'INVENTORY_INDEX_PATH',
+    os.path.join(tempfile.gettempdir(), 'gcp_management_inventory.sqlite3')
+)
+
+# Seconds an indexed resource type is considered fresh
+INVENTORY_REFRESH_INTERVAL = float(os.getenv('INVENTORY_REFRESH_INTERVAL', '300'))
+
+# Set to 0 to disable the background refresher
+INVENTORY_BACKGROUND_REFRESH = os.getenv('INVENTORY_BACKGROUND_REFRESH', '1') == '1'
+
+INDEXED_RESOURCE_TYPES = ("storage", "compute", "firestore")
+
+SORTABLE_COLUMNS = ("name", "location", "class", "created", "updated", "resource_type")
+GROUPABLE_COLUMNS = ("location", "class", "resource_type")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS resources (
+    project_id TEXT NOT NULL,
+    resource_type TEXT NOT NULL,
+    name TEXT NOT NULL,
+    location TEXT,
+    class TEXT,
+    labels TEXT,
+    created TEXT,
+    updated TEXT,
+    etag TEXT,
+    data TEXT,
+    indexed_at REAL,
+    PRIMARY KEY (project_id, resource_type, name)
+);
+CREATE INDEX IF NOT EXISTS idx_resources_location ON resources (project_id, resource_type, location);
+CREATE INDEX IF NOT EXISTS idx_resources_class ON resources (project_id, resource_type, class);
+CREATE INDEX IF NOT EXISTS idx_resources_created ON resources (project_id, resource_type, created);
+CREATE TABLE IF NOT EXISTS refresh_state (
+    project_id TEXT NOT NULL,
+    resource_type TEXT NOT NULL,
+    refreshed_at REAL,
+    -- Invalidation counter: non-zero means dirty
+    dirty INTEGER DEFAULT 0,
+    PRIMARY KEY (project_id, resource_type)
+);
+"""
+
+# Bumped when the stored row format changes; an older index is emptied and rebuilt
+# (1: created/updated normalized to UTC isoformat)
+_SCHEMA_VERSION = 1
+
+logger = logging.getLogger(__name__)
+
+_write_lock = threading.Lock()
+_initialized_paths = set()
+_refresher_threads: Dict[str, threading.Thread] = {}
+_refresher_lock = threading.Lock()
+
+
+@contextmanager
+def _connect():
+    """Opens a connection to the index, creating the schema on first use."""
+    conn = sqlite3.connect(INVENTORY_INDEX_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    try:
+        if INVENTORY_INDEX_PATH not in _initialized_paths:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            if conn.execute("PRAGMA user_version").fetchone()[0] < _SCHEMA_VERSION:
+                conn.execute("DELETE FROM resources")
+                conn.execute("DELETE FROM refresh_state")
+                conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+            _initialized_paths.add(INVENTORY_INDEX_PATH)
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _utc_iso(value) -> Optional[str]:
+    """
+    Normalizes a datetime or ISO 8601 / RFC 3339 string to UTC isoformat.
+
+    created and updated are compared and sorted as text in SQL, so every
+    type must store them in the same format and offset.
+    """
+    if not value:
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return value
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat()
+
+
+# Fetchers: each returns {name: record} where a record carries the indexed
+# columns plus the raw data and the change token used for incremental refresh.
+
+def _bucket_record(bucket) -> Dict:
+    return {
+        "name": bucket.name,
+        "location": bucket.location,
+        "class": bucket.storage_class,
+        "labels": dict(bucket.labels or {}),
+        "created": _utc_iso(bucket.time_created),
+        "updated": _utc_iso(bucket.updated),
+        "etag": bucket.etag,
+        "data": {
+            "versioning_enabled": bucket.versioning_enabled
+        }
+    }
+
+
+def _fetch_buckets(project_id: str, known_etags: Dict[str, str]) -> Dict[str, Optional[Dict]]:
+    """
+    Lists bucket change tokens and fetches full metadata only for changed buckets.
+
+    Unchanged buckets map to None so the caller can keep their indexed row.
+    """
+    client = storage_client(project_id)
+    tokens = {
+        bucket.name: bucket.etag
+        for bucket in client.list_buckets(fields="items(name,etag),nextPageToken")
+    }
+    changed = [name for name, etag in tokens.items() if known_etags.get(name) != etag]
+
+    records = {name: None for name in tokens}
+    if len(changed) > len(tokens) // 2:
+        # Most buckets changed (or first load) - one full listing is cheaper
+        for bucket in client.list_buckets():
+            records[bucket.name] = _bucket_record(bucket)
+    elif changed:
+        with ThreadPoolExecutor(max_workers=min(16, len(changed))) as executor:
+            for bucket in executor.map(client.get_bucket, changed):
+                records[bucket.name] = _bucket_record(bucket)
+    return records
+
+
+def _fetch_instances(project_id: str, known_etags: Dict[str, str]) -> Dict[str, Optional[Dict]]:
+    """
+    Lists instance fingerprints and refetches full columns only when something changed.
+
+    Starting or stopping an instance does not move its fingerprint, so the
+    status is part of the change token. Indexed instances of zones that could
+    not be listed are kept rather than removed.
+    """
+    listing = list_instances(project_id, fields=["name", "zone", "status", "fingerprint"])
+    keyed = {f"{i['zone']}/{i['name']}": f"{i['fingerprint']}:{i['status']}" for i in listing["instances"]}
+    failed_zones = {error["zone"] for error in listing["zone_errors"]}
+
+    records = {key: None for key in keyed}
+    if any(known_etags.get(key) != token for key, token in keyed.items()):
+        fields = ["name", "zone", "machine_type", "status", "internal_ip", "external_ip",
+                  "created", "last_stop", "disks_total_gb", "labels", "fingerprint"]
+        listing = list_instances(project_id, fields=fields)
+        failed_zones.update(error["zone"] for error in listing["zone_errors"])
+        for instance in listing["instances"]:
+            key = f"{instance['zone']}/{instance['name']}"
+            token = f"{instance['fingerprint']}:{instance['status']}"
+            if known_etags.get(key) == token:
+                continue
+            records[key] = {
+                "name": key,
+                "location": instance["zone"],
+                "class": instance["machine_type"],
+                "labels": instance["labels"],
+                "created": _utc_iso(instance["created"]),
+                "updated": None,
+                "etag": token,
+                "data": {
+                    "instance_name": instance["name"],
+                    "status": instance["status"],
+                    "internal_ip": instance["internal_ip"],
+                    "external_ip": instance["external_ip"],
+                    "last_stop": instance["last_stop"],
+                    "disks_total_gb": instance["disks_total_gb"]
+                }
+            }
+    for key in known_etags:
+        if key.split("/")[0] in failed_zones:
+            records.setdefault(key, None)
+    return records
+
+
+def _fetch_firestore_databases(project_id: str, known_etags: Dict[str, str]) -> Dict[str, Optional[Dict]]:
+    """Lists Firestore databases; the listing is small so it is always fetched in full."""
+    response = firestore_admin_client().list_databases(parent=f"projects/{project_id}")
+    records = {}
+    for database in response.databases:
+        database_id = database.name.split("/")[-1]
+        if known_etags.get(database_id) == database.etag:
+            records[database_id] = None
+            continue
+        records[database_id] = {
+            "name": database_id,
+            "location": database.location_id,
+            "class": getattr(database.type_, "name", "UNKNOWN"),
+            "labels": {},
+            "created": _utc_iso(database.create_time),
+            "updated": _utc_iso(database.update_time),
+            "etag": database.etag,
+            "data": {
+                "state": getattr(database.state, "name", "UNKNOWN")
+            }
+        }
+    return records
+
+
+_FETCHERS = {
+    "storage": _fetch_buckets,
+    "compute": _fetch_instances,
+    "firestore": _fetch_firestore_databases,
+}
+
+
+def _refresh_type(project_id: str, resource_type: str) -> Dict:
+    """Synchronizes one resource type with the live API and returns change counts."""
+    with _connect() as conn:
+        known = {
+            row["name"]: row["etag"]
+            for row in conn.execute(
+                "SELECT name, etag FROM resources WHERE project_id = ? AND resource_type = ?",
+                (project_id, resource_type)
+            )
+        }
+        state = conn.execute(
+            "SELECT dirty FROM refresh_state WHERE project_id = ? AND resource_type = ?",
+            (project_id, resource_type)
+        ).fetchone()
+    generation = state["dirty"] if state else 0
+
+    records = _FETCHERS[resource_type](project_id, known)
+    now = time.time()
+    changed = [record for record in records.values() if record is not None]
+    removed = [name for name in known if name not in records]
+
+    with _write_lock, _connect() as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO resources "
+            "(project_id, resource_type, name, location, class, labels, created, updated, etag, data, indexed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (project_id, resource_type, r["name"], r["location"], r["class"],
+                 json.dumps(r["labels"] or {}), r["created"], r["updated"], r["etag"],
+                 json.dumps(r["data"]), now)
+                for r in changed
+            ]
+        )
+        conn.executemany(
+            "DELETE FROM resources WHERE project_id = ? AND resource_type = ? AND name = ?",
+            [(project_id, resource_type, name) for name in removed]
+        )
+        # Only clear dirty if no invalidation arrived during the fetch; otherwise
+        # the fetched data may predate that write and the type must stay stale
+        conn.execute(
+            "INSERT INTO refresh_state (project_id, resource_type, refreshed_at, dirty) VALUES (?, ?, ?, 0) "
+            "ON CONFLICT (project_id, resource_type) DO UPDATE SET refreshed_at = excluded.refreshed_at, "
+            "dirty = CASE WHEN dirty = ? THEN 0 ELSE dirty END",
+            (project_id, resource_type, now, generation)
+        )
+
+    return {
+        "added": sum(1 for r in changed if r["name"] not in known),
+        "updated": sum(1 for r in changed if r["name"] in known),
+        "unchanged": len(records) - len(changed),
+        "removed": len(removed)
+    }
+
+
+def _stale_types(project_id: str, resource_types: List[str], max_age: float) -> List[str]:
+    """Returns the resource types that are dirty, never indexed, or older than max_age."""
+    with _connect() as conn:
+        state = {
+            row["resource_type"]: row
+            for row in conn.execute(
+                "SELECT resource_type, refreshed_at, dirty FROM refresh_state WHERE project_id = ?",
+                (project_id,)
+            )
+        }
+    now = time.time()
+    return [
+        t for t in resource_types
+        if t not in state or state[t]["dirty"] or now - (state[t]["refreshed_at"] or 0) > max_age
+    ]
+
+
+def refresh_index(project_id: str, resource_types: Optional[List[str]] = None, force: bool = False) -> Dict:
+    """
+    Brings the index up to date for the given resource types.
+
+    Args:
+        project_id: Project to refresh
+        resource_types: Types to refresh (default: all indexed types)
+        force: Refresh even if the indexed data is still fresh
+
+    Returns:
+        Dictionary of per-type change counts, or per-type errors
+    """
+    resource_types = list(resource_types or INDEXED_RESOURCE_TYPES)
+    to_refresh = resource_types if force else _stale_types(project_id, resource_types, INVENTORY_REFRESH_INTERVAL)
+
+    results = {}
+    for resource_type in to_refresh:
+        try:
+            results[resource_type] = _refresh_type(project_id, resource_type)
+        except Exception as e:
+            results[resource_type] = {"error": str(e)}
+    return results
+
+
+def invalidate_inventory(project_id: Optional[str], resource_type: str) -> None:
+    """
+    Marks a resource type dirty so the next query refreshes it.
+
+    Called by mutation tools after a successful write. Never raises, so a
+    broken index can not fail the mutation that triggered it.
+    """
+    if not project_id:
+        return
+    try:
+        with _write_lock, _connect() as conn:
+            conn.execute(
+                "INSERT INTO refresh_state (project_id, resource_type, refreshed_at, dirty) VALUES (?, ?, 0, 1) "
+                "ON CONFLICT (project_id, resource_type) DO UPDATE SET dirty = dirty + 1",
+                (project_id, resource_type)
+            )
+    except Exception:
+        pass
+
+
+def _refresher_loop(project_id: str, interval: float) -> None:
+    while True:
+        # A transient failure must not end the refresher; the next pass retries
+        try:
+            for resource_type, result in refresh_index(project_id).items():
+                if "error" in result:
+                    logger.warning("Inventory refresh of %s/%s failed: %s",
+                                   project_id, resource_type, result["error"])
+        except Exception:
+            logger.exception("Inventory refresh of %s failed", project_id)
+        time.sleep(interval)
+
+
+def start_background_refresher(project_id: str, interval: Optional[float] = None) -> bool:
+    """
+    Starts a daemon thread that keeps the project's index fresh.
+
+    Returns:
+        True if a new refresher was started, False if one is already running
+    """
+    with _refresher_lock:
+        thread = _refresher_threads.get(project_id)
+        if thread and thread.is_alive():
+            return False
+        thread = threading.Thread(
+            target=_refresher_loop,
+            args=(project_id, interval or INVENTORY_REFRESH_INTERVAL),
+            name=f"inventory-refresher-{project_id}",
+            daemon=True
+        )
+        _refresher_threads[project_id] = thread
+        thread.start()
+        return True
+
+
+def index_snapshot(project_id: str, resource_type: str) -> Dict[str, Dict]:
+    """
+    Returns every indexed resource of one type keyed by indexed name.
+
+    Compute instances are keyed as zone/name.
+    """
+    with _connect() as conn:
+        rows = conn.execute(
+            "SELECT name, location, class, labels, created, updated, etag, data FROM resources "
+            "WHERE project_id = ? AND resource_type = ?",
+            (project_id, resource_type)
+        ).fetchall()
+    return {
+        row["name"]: {
+            "name": row["name"],
+            "location": row["location"],
+            "class": row["class"],
+            "labels": json.loads(row["labels"] or "{}"),
+            "created": row["created"],
+            "updated": row["updated"],
+            "etag": row["etag"],
+            **json.loads(row["data"] or "{}")
+        } for row in rows
+    }
+
+
+def _validate_query(sort_by: str, group_by: Optional[str]) -> None:
+    if sort_by not in SORTABLE_COLUMNS:
+        raise ValueError(f"sort_by must be one of: {', '.join(SORTABLE_COLUMNS)}")
+    if group_by and not (group_by in GROUPABLE_COLUMNS or group_by.startswith("label:")):
+        raise ValueError(f"group_by must be one of: {', '.join(GROUPABLE_COLUMNS)} or label:<key>")
+
+
+def query_index(project_id: str, resource_type: Optional[str] = None, name_contains: Optional[str] = None,
+                location: Optional[str] = None, resource_class: Optional[str] = None,
+                label_key: Optional[str] = None, label_value: Optional[str] = None,
+                created_after: Optional[str] = None, created_before: Optional[str] = None,
+                sort_by: str = "name", descending: bool = False, group_by: Optional[str] = None,
+                limit: int = 100) -> Dict:
+    """
+    Runs a filtered, sorted or grouped query against the index.
+
+    Raises:
+        ValueError: If sort_by or group_by is not a supported column
+    """
+    _validate_query(sort_by, group_by)
+
+    where = ["project_id = ?"]
+    params: List = [project_id]
+    if resource_type:
+        where.append("resource_type = ?")
+        params.append(resource_type)
+    if name_contains:
+        where.append("name LIKE ?")
+        params.append(f"%{name_contains}%")
+    if location:
+        where.append("UPPER(location) = UPPER(?)")
+        params.append(location)
+    if resource_class:
+        where.append("UPPER(class) = UPPER(?)")
+        params.append(resource_class)
+    if label_key:
+        where.append("json_extract(labels, ?) IS NOT NULL")
+        params.append(f'$."{label_key}"')
+        if label_value is not None:
+            where.append("json_extract(labels, ?) = ?")
+            params.extend([f'$."{label_key}"', label_value])
+    if created_after:
+        where.append("created >= ?")
+        params.append(_utc_iso(created_after))
+    if created_before:
+        where.append("created < ?")
+        params.append(_utc_iso(created_before))
+    where_sql = " AND ".join(where)
+
+    with _connect() as conn:
+        if group_by:
+            if group_by.startswith("label:"):
+                group_expr = "json_extract(labels, ?)"
+                group_params = [f'$."{group_by[len("label:"):]}"']
+            else:
+                group_expr = group_by
+                group_params = []
+            rows = conn.execute(
+                f"SELECT {group_expr} AS group_value, COUNT(*) AS count FROM resources "
+                f"WHERE {where_sql} GROUP BY group_value ORDER BY count DESC LIMIT ?",
+                group_params + params + [limit]
+            ).fetchall()
+            return {
+                "group_by": group_by,
+                "groups": [{"value": row["group_value"], "count": row["count"]} for row in rows]
+            }
+
+        total = conn.execute(f"SELECT COUNT(*) FROM resources WHERE {where_sql}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT resource_type, name, location, class, labels, created, updated, data FROM resources "
+            f"WHERE {where_sql} ORDER BY {sort_by} {'DESC' if descending else 'ASC'} LIMIT ?",
+            params + [limit]
+        ).fetchall()
+
+    return {
+        "total_matches": total,
+        "resources": [
+            {
+                "resource_type": row["resource_type"],
+                "name": row["name"],
+                "location": row["location"],
+                "class": row["class"],
+                "labels": json.loads(row["labels"] or "{}"),
+                "created": row["created"],
+                "updated": row["updated"],
+                **json.loads(row["data"] or "{}")
+            } for row in rows
+        ]
+    }
+
+
+def _merge_project_queries(results: Dict[str, Dict], sort_by: str, descending: bool,
+                           group_by: Optional[str], limit: int) -> Dict:
+    """Combines per-project query results into one result of at most limit rows or groups."""
+    if group_by:
+        counts: Dict = {}
+        for result in results.values():
+            for group in result["groups"]:
+                counts[group["value"]] = counts.get(group["value"], 0) + group["count"]
+        groups = sorted(counts.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return {"group_by": group_by, "groups": [{"value": value, "count": count} for value, count in groups]}
+
+    resources = [
+        {"project_id": project_id, **resource}
+        for project_id, result in results.items()
+        for resource in result["resources"]
+    ]
+    resources.sort(key=lambda resource: str(resource.get(sort_by) or ""), reverse=descending)
+    return {
+        "total_matches": sum(result["total_matches"] for result in results.values()),
+        "resources": resources[:limit]
+    }
+
+
+def query_resource_inventory(resource_type: Optional[str] = None, name_contains: Optional[str] = None,
+                             location: Optional[str] = None, resource_class: Optional[str] = None,
+                             label_key: Optional[str] = None, label_value: Optional[str] = None,
+                             created_after: Optional[str] = None, created_before: Optional[str] = None,
+                             sort_by: str = "name", descending: bool = False,
+                             group_by: Optional[str] = None, limit: int = 100,
+                             refresh: bool = False, projects: Optional[List[str]] = None,
+                             folder: Optional[str] = None) -> Dict:
+    """
+    Queries the local resource inventory (buckets, compute instances, Firestore databases).
+
+    Much faster than live listing. Stale or recently modified resource types are
+    refreshed automatically before answering. With projects or folder, every
+    project in the scope is queried concurrently and the rows or group counts
+    are merged; projects that fail are listed in project_errors.
+
+    Args:
+        resource_type: storage, compute or firestore (default: all)
+        name_contains: Substring the resource name must contain
+        location: Exact location / zone (case-insensitive), e.g. US, us-central1-a, nam5
+        resource_class: Storage class, machine type or Firestore database type
+        label_key: Only resources that have this label
+        label_value: Only resources whose label_key label has this value
+        created_after: ISO date/time lower bound for creation time
+        created_before: ISO date/time upper bound for creation time
+        sort_by: name, location, class, created, updated or resource_type
+        descending: Sort in descending order
+        group_by: Return counts grouped by location, class, resource_type or label:<key>
+        limit: Maximum number of rows or groups to return
+        refresh: Force a refresh from the live APIs before querying
+        projects: Project IDs to query across (default: the configured project)
+        folder: Folder or organization (folders/123, organizations/456) whose projects are all queried
+
+    Returns:
+        Dictionary containing matching resources or group counts
+    """
+    try:
+        if resource_type and resource_type not in INDEXED_RESOURCE_TYPES:
+            return {
+                "status": "error",
+                "message": f"resource_type must be one of: {', '.join(INDEXED_RESOURCE_TYPES)}"
+            }
+
+        if projects or folder:
+            _validate_query(sort_by, group_by)
+            project_ids = resolve_projects(projects, folder)
+
+            def query_project(project):
+                refresh_index(project, [resource_type] if resource_type else None, force=refresh)
+                return query_index(
+                    project, resource_type, name_contains, location, resource_class,
+                    label_key, label_value, created_after, created_before,
+                    sort_by, descending, group_by, limit
+                )
+
+            outcome = fan_out(project_ids, query_project)
+            if outcome["project_errors"] and not outcome["results"]:
+                status = "error"
+            else:
+                status = "partial_success" if outcome["project_errors"] else "success"
+            return {
+                "status": status,
+                "scope": {"projects": len(project_ids), "projects_succeeded": len(outcome["results"]),
+                          "folder": folder},
+                **_merge_project_queries(outcome["results"], sort_by, descending, group_by, limit),
+                "project_errors": outcome["project_errors"],
+                "timings_ms": outcome["timings_ms"]
+            }
+
+        project_id = os.getenv('GOOGLE_CLOUD_PROJECT')
+        if not project_id:
+            return {
+                "status": "error",
+                "message": "GOOGLE_CLOUD_PROJECT environment variable not set"
+            }
+
+        if INVENTORY_BACKGROUND_REFRESH:
+            start_background_refresher(project_id)
+
+        refresh_results = refresh_index(
+            project_id,
+            [resource_type] if resource_type else None,
+            force=refresh
+        )
+
+        result = query_index(
+            project_id, resource_type, name_contains, location, resource_class,
+            label_key, label_value, created_after, created_before,
+            sort_by, descending, group_by, limit
+        )
+
+        return {
+            "status": "success",
+            "project_id": project_id,
+            **result,
+            "refreshed_types": refresh_results
+        }
+
+    except ValueError as e:
+        return {
+            "status": "error",
+            "message": str(e)
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Failed to query resource inventory: {str(e)}"
+        }
@@ -0,0 +1,80 @@
+"""
+Deferred imports for the heavy client libraries.
+
+Each generated Google Cloud library (compute_v1, billing_v1, sql_v1, ...)
+pulls in a large tree of protobuf and gRPC modules, and every cold start of
+the agent paid for all of them before serving its first request. Tool
+modules bind these libraries with lazy_import instead: the name is a module
+stand-in that performs the real import on first attribute access, i.e. in
+the first tool call that needs the API. module_available tells whether an
+optional library is installed without importing it.
+
+Deferred imports are timed; deferred_import_times() reports what each one
+cost when it finally happened. See import_profile for start-up costs.
+"""
+
+import importlib
+import importlib.util
+import threading
+import time
+import types
+from typing import Dict
+
+_import_lock = threading.RLock()
+_import_times: Dict[str, float] = {}
+
+
+class LazyModule(types.ModuleType):
+    """Module stand-in that imports the real module on first attribute access."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_module"] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            with _import_lock:
+                module = self.__dict__["_lazy_module"]
+                if module is None:
+                    started = time.perf_counter()
+                    module = importlib.import_module(self.__name__)
+                    _import_times[self.__name__] = round((time.perf_counter() - started) * 1000, 1)
+                    # Later lookups hit the copied attributes and skip __getattr__
+                    self.__dict__.update(module.__dict__)
+                    self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, name: str):
+        return getattr(self._load(), name)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.__dict__["_lazy_module"] is not None else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """
+    Returns a stand-in for module name that imports it on first use.
+
+    Importing a missing module raises ImportError at that first use, so
+    optional libraries should be guarded with module_available.
+    """
+    return LazyModule(name)
+
+
+def module_available(name: str) -> bool:
+    """Returns True when module name can be imported, without importing it."""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def deferred_import_times() -> Dict[str, float]:
+    """Milliseconds each deferred import took, for the modules loaded so far."""
+    with _import_lock:
+        return dict(_import_times)
@@ -0,0 +1,193 @@
+"""
+Paging, field selection and summaries for the list tools.
+
+List tools return one page plus a next_page_token instead of every resource,
+and the first page leads with a summary (counts grouped by location and
+class) built from a minimal-field listing. Response size and memory scale with
+the page size rather than the size of the project.
+"""
+
+import os
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_PAGE_SIZE = int(os.getenv('LIST_DEFAULT_PAGE_SIZE', '50'))
+MAX_PAGE_SIZE = 500
+
+# Bucket output column -> JSON API field used in the partial-response mask
+BUCKET_FIELD_PATHS = {
+    "name": "name",
+    "location": "location",
+    "storage_class": "storageClass",
+    "versioning_enabled": "versioning",
+    "created": "timeCreated",
+    "updated": "updated",
+    "labels": "labels",
+}
+
+DEFAULT_BUCKET_FIELDS = ["name", "location", "storage_class", "versioning_enabled", "created", "updated"]
+
+
+def clamp_page_size(page_size: Optional[int]) -> int:
+    """Returns page_size bounded to 1..MAX_PAGE_SIZE, or DEFAULT_PAGE_SIZE when unset."""
+    if not page_size or page_size < 1:
+        return DEFAULT_PAGE_SIZE
+    return min(int(page_size), MAX_PAGE_SIZE)
+
+
+def validate_fields(fields: Optional[Iterable[str]], available: Iterable[str],
+                    default: Sequence[str]) -> List[str]:
+    """
+    Resolves requested output fields.
+
+    Raises:
+        ValueError: If an unknown field is requested
+    """
+    if not fields:
+        return list(default)
+    available = list(available)
+    unknown = [field for field in fields if field not in available]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Available fields: {', '.join(available)}")
+    return list(dict.fromkeys(fields))
+
+
+def group_counts(records: Iterable[Dict], keys: Sequence[str]) -> Dict:
+    """
+    Counts records grouped by each key without keeping the records.
+
+    Returns:
+        Dictionary with "total" and a "by_<key>" count map per key
+    """
+    counters = {key: Counter() for key in keys}
+    total = 0
+    for record in records:
+        total += 1
+        for key in keys:
+            counters[key][record.get(key) or "unknown"] += 1
+    summary = {"total": total}
+    for key in keys:
+        summary[f"by_{key}"] = dict(counters[key].most_common())
+    return summary
+
+
+def offset_page(items: List, page_size: int, page_token: Optional[str]) -> Tuple[List, Optional[str]]:
+    """
+    Slices one page out of an already-listed sequence using offset page tokens.
+
+    Raises:
+        ValueError: If page_token is not a token returned by a previous page
+    """
+    try:
+        start = int(page_token) if page_token else 0
+    except ValueError:
+        raise ValueError(f"Invalid page_token '{page_token}'")
+    end = start + page_size
+    return items[start:end], (str(end) if end < len(items) else None)
+
+
+def first_page(iterator) -> Tuple[List, Optional[str]]:
+    """Fetches only the first page of a google.api_core page iterator."""
+    page = next(iter(iterator.pages), [])
+    return list(page), iterator.next_page_token or None
+
+
+# Cloud Storage
+
+def bucket_mask(fields: Iterable[str]) -> str:
+    """Builds the partial-response mask for a bucket listing that returns only fields."""
+    paths = sorted({BUCKET_FIELD_PATHS[field] for field in fields} | {"name"})
+    return f"items({','.join(paths)}),nextPageToken"
+
+
+def bucket_to_dict(bucket, fields: Iterable[str]) -> Dict:
+    """Converts a Bucket into a dictionary of the requested columns."""
+    fields = set(fields)
+    info = {}
+    if "name" in fields:
+        info["name"] = bucket.name
+    if "location" in fields:
+        info["location"] = bucket.location
+    if "storage_class" in fields:
+        info["storage_class"] = bucket.storage_class
+    if "versioning_enabled" in fields:
+        info["versioning_enabled"] = bucket.versioning_enabled
+    if "created" in fields:
+        info["created"] = bucket.time_created.isoformat() if bucket.time_created else None
+    if "updated" in fields:
+        info["updated"] = bucket.updated.isoformat() if bucket.updated else None
+    if "labels" in fields:
+        info["labels"] = dict(bucket.labels or {})
+    return info
+
+
+def bucket_rows(client, fields: Iterable[str], prefix: Optional[str] = None) -> List[Dict]:
+    """Lists every bucket of the client's project as dictionaries of the requested columns."""
+    fields = list(fields)
+    return [
+        bucket_to_dict(bucket, fields)
+        for bucket in client.list_buckets(prefix=prefix, page_size=1000, fields=bucket_mask(fields))
+    ]
+
+
+def summarize_buckets(client, prefix: Optional[str] = None) -> Dict:
+    """Counts buckets by location and storage class from a two-field listing."""
+    records = (
+        {"location": bucket.location, "storage_class": bucket.storage_class}
+        for bucket in client.list_buckets(prefix=prefix, page_size=1000,
+                                          fields=bucket_mask(["location", "storage_class"]))
+    )
+    return group_counts(records, ["location", "storage_class"])
+
+
+def list_buckets_page(client, page_size: Optional[int] = None, page_token: Optional[str] = None,
+                      fields: Optional[List[str]] = None, prefix: Optional[str] = None,
+                      include_summary: bool = True) -> Dict:
+    """
+    Lists one page of buckets, preceded by a summary on the first page.
+
+    Args:
+        client: storage.Client for the project
+        page_size: Buckets per page (default: DEFAULT_PAGE_SIZE, max: MAX_PAGE_SIZE)
+        page_token: Token from a previous page's next_page_token
+        fields: Bucket columns to return (default: DEFAULT_BUCKET_FIELDS)
+        prefix: Only list buckets whose names start with prefix
+        include_summary: Add location/storage class counts when page_token is not set
+
+    Returns:
+        Dictionary with the buckets, next_page_token and, on the first page, a summary
+
+    Raises:
+        ValueError: If an unknown field is requested
+    """
+    fields = validate_fields(fields, BUCKET_FIELD_PATHS, DEFAULT_BUCKET_FIELDS)
+    page_size = clamp_page_size(page_size)
+
+    iterator = client.list_buckets(max_results=page_size, page_size=page_size, page_token=page_token,
+                                   prefix=prefix, fields=bucket_mask(fields))
+    buckets, next_token = first_page(iterator)
+
+    result = {
+        "bucket_count": len(buckets),
+        "buckets": [bucket_to_dict(bucket, fields) for bucket in buckets],
+        "next_page_token": next_token,
+        "page_size": page_size
+    }
+    if include_summary and not page_token:
+        if next_token is None and {"location", "storage_class"} <= set(fields):
+            # Everything fit on one page - no second listing needed
+            result["summary"] = group_counts(result["buckets"], ["location", "storage_class"])
+        else:
+            result["summary"] = summarize_buckets(client, prefix)
+    return result
+
+
+def count_collection_documents(collection) -> int:
+    """
+    Counts documents in a Firestore collection with a server-side aggregation query.
+
+    Only the aggregate is returned by Firestore, so no document bodies are
+    downloaded regardless of collection size.
+    """
+    results = collection.count(alias="document_count").get()
+    return int(results[0][0].value)
@@ -0,0 +1,394 @@
+"""
+Non-blocking tracker for long-running GCP operations.
+
+Compute Engine (zone, region and global), Cloud SQL and Firestore Admin
+operations are registered with a single tracker. Polling runs on a background
+asyncio event loop with exponential backoff and jitter: each poll is a single
+short status call, so no thread ever sits blocked waiting for an operation to
+finish. Tools register operations and return immediately; callers query status
+or attach completion callbacks.
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from .clients import (
+    compute_zone_operations_client,
+    compute_region_operations_client,
+    compute_global_operations_client,
+    sql_operations_client,
+    firestore_admin_client,
+)
+from .lazy_imports import lazy_import
+
+compute_v1 = lazy_import("google.cloud.compute_v1")
+sql_v1 = lazy_import("google.cloud.sql_v1")
+
+OPERATION_POLL_INITIAL_DELAY = float(os.getenv('OPERATION_POLL_INITIAL_DELAY', '1'))
+OPERATION_POLL_MAX_DELAY = float(os.getenv('OPERATION_POLL_MAX_DELAY', '30'))
+OPERATION_POLL_TIMEOUT = float(os.getenv('OPERATION_POLL_TIMEOUT', '3600'))
+OPERATION_RETENTION_SECONDS = float(os.getenv('OPERATION_RETENTION_SECONDS', '3600'))
+
+# Consecutive failed status calls before an operation is reported as UNKNOWN
+OPERATION_MAX_POLL_ERRORS = 10
+
+OPERATION_TYPES = ("compute", "compute_region", "compute_global", "sql", "firestore")
+
+
+def _poll_compute_zone(record: Dict) -> Dict:
+    operation = compute_zone_operations_client().get(request=compute_v1.GetZoneOperationRequest(
+        project=record["project_id"], zone=record["zone"], operation=record["operation_id"]
+    ))
+    return _compute_status(operation)
+
+
+def _poll_compute_region(record: Dict) -> Dict:
+    operation = compute_region_operations_client().get(request=compute_v1.GetRegionOperationRequest(
+        project=record["project_id"], region=record["region"], operation=record["operation_id"]
+    ))
+    return _compute_status(operation)
+
+
+def _poll_compute_global(record: Dict) -> Dict:
+    operation = compute_global_operations_client().get(request=compute_v1.GetGlobalOperationRequest(
+        project=record["project_id"], operation=record["operation_id"]
+    ))
+    return _compute_status(operation)
+
+
+def _compute_status(operation) -> Dict:
+    done = operation.status == compute_v1.Operation.Status.DONE
+    errors = [error.message for error in operation.error.errors] if operation.error else []
+    return {
+        "done": done,
+        "progress": operation.progress,
+        "error": "; ".join(errors) or None
+    }
+
+
+def _poll_sql(record: Dict) -> Dict:
+    operation = sql_operations_client().get(request=sql_v1.SqlOperationsGetRequest(
+        project=record["project_id"], operation=record["operation_id"]
+    ))
+    errors = [error.message for error in operation.error.errors] if operation.error else []
+    return {
+        "done": operation.status == sql_v1.Operation.SqlOperationStatus.DONE,
+        "progress": None,
+        "error": "; ".join(errors) or None
+    }
+
+
+def _poll_firestore(record: Dict) -> Dict:
+    operation = firestore_admin_client().get_operation(request={"name": record["operation_id"]})
+    error = operation.error.message if operation.done and operation.error.code else None
+    return {
+        "done": operation.done,
+        "progress": None,
+        "error": error
+    }
+
+
+_POLLERS = {
+    "compute": _poll_compute_zone,
+    "compute_region": _poll_compute_region,
+    "compute_global": _poll_compute_global,
+    "sql": _poll_sql,
+    "firestore": _poll_firestore,
+}
+
+
+class OperationTracker:
+    """
+    In-memory registry of long-running operations polled on a background event loop.
+    """
+
+    def __init__(self, initial_delay: float = OPERATION_POLL_INITIAL_DELAY,
+                 max_delay: float = OPERATION_POLL_MAX_DELAY, timeout: float = OPERATION_POLL_TIMEOUT):
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self._operations: Dict[str, Dict] = {}
+        self._callbacks: Dict[str, List[Callable[[Dict], None]]] = {}
+        self._events: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Status calls are short, so a small pool serves every tracked operation
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="operation-poll")
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._loop.run_forever, name="operation-tracker", daemon=True
+                ).start()
+            return self._loop
+
+    def track(self, operation_type: str, operation_id: str, project_id: str, zone: Optional[str] = None,
+              region: Optional[str] = None, resource: Optional[str] = None,
+              on_complete: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """
+        Registers an operation and starts polling it in the background.
+
+        Args:
+            operation_type: compute, compute_region, compute_global, sql or firestore
+            operation_id: Operation name (full resource name for Firestore)
+            project_id: Project the operation belongs to
+            zone: Zone for compute zonal operations
+            region: Region for compute regional operations
+            resource: Human-readable description of the affected resource
+            on_complete: Callback invoked with the final record once the operation finishes
+
+        Returns:
+            Snapshot of the tracked operation record
+
+        Raises:
+            ValueError: If the operation type is unknown or required location is missing
+        """
+        if operation_type not in _POLLERS:
+            raise ValueError(f"Unsupported operation type: {operation_type}. "
+                             f"Supported types: {', '.join(OPERATION_TYPES)}")
+        if operation_type == "compute" and not zone:
+            raise ValueError("zone is required for compute operations")
+        if operation_type == "compute_region" and not region:
+            raise ValueError("region is required for compute_region operations")
+
+        self._prune()
+        now = time.time()
+        with self._lock:
+            if operation_id in self._operations:
+                if on_complete:
+                    self._callbacks.setdefault(operation_id, []).append(on_complete)
+                return dict(self._operations[operation_id])
+            record = {
+                "operation_id": operation_id,
+                "operation_type": operation_type,
+                "project_id": project_id,
+                "zone": zone,
+                "region": region,
+                "resource": resource,
+                "status": "RUNNING",
+                "done": False,
+                "progress": None,
+                "error": None,
+                "polls": 0,
+                "started_at": now,
+                "updated_at": now,
+                "completed_at": None
+            }
+            self._operations[operation_id] = record
+            self._callbacks[operation_id] = [on_complete] if on_complete else []
+            self._events[operation_id] = threading.Event()
+
+        asyncio.run_coroutine_threadsafe(self._poll(operation_id), self._ensure_loop())
+        return dict(record)
+
+    async def _poll(self, operation_id: str) -> None:
+        loop = asyncio.get_running_loop()
+        record = self._operations[operation_id]
+        poller = _POLLERS[record["operation_type"]]
+        delay = self.initial_delay
+        poll_errors = 0
+
+        while True:
+            # Full jitter keeps many operations from polling in lockstep
+            await asyncio.sleep(random.uniform(delay / 2, delay))
+            try:
+                result = await loop.run_in_executor(self._executor, poller, dict(record))
+                poll_errors = 0
+            except Exception as e:
+                poll_errors += 1
+                result = None
+                if poll_errors >= OPERATION_MAX_POLL_ERRORS:
+                    self._finish(operation_id, "UNKNOWN", f"Status polling failed: {str(e)}")
+                    return
+
+            with self._lock:
+                record["polls"] += 1
+                record["updated_at"] = time.time()
+                if result:
+                    record["progress"] = result["progress"]
+
+            if result and result["done"]:
+                self._finish(operation_id, "FAILED" if result["error"] else "DONE", result["error"])
+                return
+            if time.time() - record["started_at"] > self.timeout:
+                self._finish(operation_id, "TIMEOUT", f"Operation still running after {self.timeout}s")
+                return
+            delay = min(self.max_delay, delay * 2)
+
+    def _finish(self, operation_id: str, status: str, error: Optional[str]) -> None:
+        with self._lock:
+            record = self._operations[operation_id]
+            record.update({
+                "status": status,
+                "done": status in ("DONE", "FAILED"),
+                "error": error,
+                "completed_at": time.time()
+            })
+            callbacks = self._callbacks.pop(operation_id, [])
+            snapshot = dict(record)
+            self._events[operation_id].set()
+
+        # Callbacks may do I/O, so keep them off the event loop thread
+        if callbacks:
+            self._executor.submit(self._run_callbacks, record, callbacks, snapshot)
+
+    def _run_callbacks(self, record: Dict, callbacks: List[Callable[[Dict], None]], snapshot: Dict) -> None:
+        for callback in callbacks:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                with self._lock:
+                    record.setdefault("callback_errors", []).append(str(e))
+
+    def _prune(self) -> None:
+        """Forgets finished operations older than the retention window."""
+        cutoff = time.time() - OPERATION_RETENTION_SECONDS
+        with self._lock:
+            expired = [op_id for op_id, record in self._operations.items()
+                       if record["completed_at"] and record["completed_at"] < cutoff]
+            for op_id in expired:
+                del self._operations[op_id]
+                self._events.pop(op_id, None)
+
+    def add_callback(self, operation_id: str, callback: Callable[[Dict], None]) -> bool:
+        """
+        Attaches a completion callback. If the operation already finished the
+        callback runs immediately.
+
+        Returns:
+            False if the operation is not tracked
+        """
+        with self._lock:
+            record = self._operations.get(operation_id)
+            if record is None:
+                return False
+            if record["completed_at"] is None:
+                self._callbacks.setdefault(operation_id, []).append(callback)
+                return True
+            snapshot = dict(record)
+        callback(snapshot)
+        return True
+
+    def get(self, operation_id: str) -> Optional[Dict]:
+        """Returns a snapshot of a tracked operation, or None."""
+        with self._lock:
+            record = self._operations.get(operation_id)
+            return dict(record) if record else None
+
+    def list(self, status: Optional[str] = None) -> List[Dict]:
+        """Returns snapshots of tracked operations, optionally filtered by status."""
+        with self._lock:
+            return [dict(r) for r in self._operations.values() if status is None or r["status"] == status]
+
+    def wait(self, operation_id: str, timeout: Optional[float] = None) -> Optional[Dict]:
+        """
+        Blocks until a tracked operation finishes. Intended for scripts and for
+        ordering dependent creates, not for status checks.
+
+        Returns:
+            Final record, or the current snapshot if the timeout elapsed first
+        """
+        event = self._events.get(operation_id)
+        if event is None:
+            return None
+        event.wait(timeout)
+        return self.get(operation_id)
+
+
+_tracker: Optional[OperationTracker] = None
+_tracker_lock = threading.Lock()
+
+
+def get_tracker() -> OperationTracker:
+    """Returns the process-wide operation tracker."""
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            _tracker = OperationTracker()
+        return _tracker
+
+
+def _format_record(record: Dict) -> Dict:
+    end = record["completed_at"] or time.time()
+    return {
+        "operation_id": record["operation_id"],
+        "operation_type": record["operation_type"],
+        "resource": record["resource"],
+        "operation_status": record["status"],
+        "completed": record["done"],
+        "progress": record["progress"],
+        "error": record["error"],
+        "elapsed_seconds": round(end - record["started_at"], 1),
+        "polls": record["polls"]
+    }
+
+
+def check_operation_status(operation_id: str, operation_type: Optional[str] = None,
+                           zone: Optional[str] = None, region: Optional[str] = None) -> Dict:
+    """
+    Checks the status of a long-running operation (compute, Cloud SQL or Firestore).
+
+    Operations started by the management tools are already tracked; any other
+    operation is registered for tracking when operation_type is given.
+
+    Args:
+        operation_id: The operation ID returned by a create/delete tool
+        operation_type: compute, compute_region, compute_global, sql or firestore
+                        (only needed for operations not started by this agent)
+        zone: Zone for compute operations
+        region: Region for compute_region operations
+
+    Returns:
+        Dictionary containing operation status
+    """
+    try:
+        tracker = get_tracker()
+        record = tracker.get(operation_id)
+        if record is None:
+            if not operation_type:
+                return {
+                    "status": "error",
+                    "message": f"Operation '{operation_id}' is not tracked. Provide operation_type to start tracking it"
+                }
+            project_id = os.getenv('GOOGLE_CLOUD_PROJECT')
+            record = tracker.track(operation_type, operation_id, project_id, zone=zone, region=region)
+
+        return {
+            "status": "success",
+            **_format_record(record)
+        }
+    except ValueError as e:
+        return {
+            "status": "error",
+            "message": str(e)
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Failed to check operation status: {str(e)}"
+        }
+
+
+def list_tracked_operations(operation_status: Optional[str] = None) -> Dict:
+    """
+    Lists long-running operations tracked in this session.
+
+    Args:
+        operation_status: Only include operations in this state (RUNNING, DONE, FAILED, TIMEOUT, UNKNOWN)
+
+    Returns:
+        Dictionary containing tracked operations
+    """
+    operations = [_format_record(r) for r in get_tracker().list(operation_status)]
+    return {
+        "status": "success",
+        "operation_count": len(operations),
+        "operations": operations
+    }
@@ -0,0 +1,477 @@
+"""
+Declarative plan/apply for buckets, Compute Engine instances and Firestore databases.
+
+A desired-state document (same format as a provisioning manifest) is diffed
+against the local inventory index to produce the minimal change set. Plans are
+cached by content, so re-planning an unchanged document against an unchanged
+inventory costs a hash lookup, and applying an empty plan makes no API calls.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from .bulk_provisioning import (
+    BULK_MAX_WORKERS,
+    dependency_levels,
+    execute_manifest,
+    parse_manifest,
+    summarize_rows,
+    validate_manifest,
+)
+from .clients import compute_instances_client, storage_client
+from .inventory_index import index_snapshot, invalidate_inventory, refresh_index
+from .lazy_imports import lazy_import
+from .operations import get_tracker
+from .tools import delete_storage_bucket, delete_firestore_database
+
+compute_v1 = lazy_import("google.cloud.compute_v1")
+
+PLAN_CACHE_TTL = float(os.getenv('PLAN_CACHE_TTL', '900'))
+
+# Desired-state resource type -> inventory index type
+_INDEX_TYPES = {
+    "bucket": "storage",
+    "instance": "compute",
+    "firestore_database": "firestore",
+}
+
+_plans: Dict[str, Dict] = {}
+_plans_lock = threading.Lock()
+
+
+def _evict_expired_plans() -> None:
+    """Drops plans older than PLAN_CACHE_TTL. Call with _plans_lock held."""
+    cutoff = time.time() - PLAN_CACHE_TTL
+    for plan_id in [plan_id for plan_id, cached in _plans.items() if cached["created_at"] < cutoff]:
+        del _plans[plan_id]
+
+
+def _specified_fields(document: Dict) -> Dict[str, set]:
+    """
+    Fields each resource of the document sets itself or through the document's defaults.
+
+    validate_manifest fills in RESOURCE_FIELDS defaults for creates; those
+    must not be diffed against live resources the document leaves them unset for.
+    """
+    defaults = set(document.get("defaults") or {})
+    return {raw["name"]: set(raw) | defaults for raw in document["resources"]}
+
+
+def _live_keys(spec: Dict, specified: set, snapshot: Dict) -> List[str]:
+    """Index keys of the live resources a spec refers to; empty when it does not exist."""
+    if spec["type"] != "instance":
+        return [spec["name"]] if spec["name"] in snapshot else []
+    if "zone" in specified:
+        key = f"{spec['zone']}/{spec['name']}"
+        return [key] if key in snapshot else []
+    # Without a zone, an instance of that name in any zone is the one meant
+    return sorted(key for key, live in snapshot.items()
+                  if (live.get("instance_name") or key.split("/")[-1]) == spec["name"])
+
+
+def _diff_resource(spec: Dict, live: Dict, specified: set) -> Dict:
+    """
+    Compares the fields a desired resource specifies with its live counterpart.
+
+    Returns:
+        Dictionary with in-place "changes" and "conflicts" that would need a replacement
+    """
+    changes = {}
+    conflicts = []
+
+    if spec["type"] == "bucket":
+        if "location" in specified and str(live.get("location", "")).upper() != str(spec["location"]).upper():
+            conflicts.append(f"location {live.get('location')} -> {spec['location']} requires recreating the bucket")
+        if "storage_class" in specified and \
+                str(live.get("class", "")).upper() != str(spec["storage_class"]).upper():
+            changes["storage_class"] = str(spec["storage_class"]).upper()
+        if "versioning_enabled" in specified and \
+                bool(live.get("versioning_enabled")) != bool(spec["versioning_enabled"]):
+            changes["versioning_enabled"] = bool(spec["versioning_enabled"])
+        # Labels in the desired state are added or updated; other live labels are left alone
+        live_labels = live.get("labels") or {}
+        if spec.get("labels") and any(live_labels.get(key) != value for key, value in spec["labels"].items()):
+            changes["labels"] = {**live_labels, **spec["labels"]}
+
+    elif spec["type"] == "instance":
+        if "machine_type" in specified and live.get("class") != spec["machine_type"]:
+            conflicts.append(f"machine_type {live.get('class')} -> {spec['machine_type']} requires stopping the instance")
+
+    elif spec["type"] == "firestore_database":
+        if "location_id" in specified and str(live.get("location", "")).lower() != str(spec["location_id"]).lower():
+            conflicts.append(f"location_id {live.get('location')} -> {spec['location_id']} can not be changed")
+        if "database_type" in specified and live.get("class") != spec["database_type"]:
+            conflicts.append(f"database_type {live.get('class')} -> {spec['database_type']} can not be changed")
+
+    return {"changes": changes, "conflicts": conflicts}
+
+
+def _managed_types(document: Dict, specs: List[Dict]) -> List[str]:
+    """Resource types the document manages: every type it lists plus any prune_types."""
+    types = {spec["type"] for spec in specs} | set(document.get("prune_types") or [])
+    return sorted(t for t in types if t in _INDEX_TYPES)
+
+
+def compute_plan(document: Dict, specs: List[Dict], snapshots: Dict[str, Dict]) -> Dict:
+    """
+    Diffs validated specs against inventory snapshots.
+
+    Only the fields a resource sets in the document (or its defaults) are
+    compared; manifest defaults apply to creates alone.
+
+    Args:
+        document: Parsed desired-state document (for the specified fields and prune settings)
+        specs: Validated resource specs
+        snapshots: Indexed resources per managed type, keyed as in the inventory index
+
+    Returns:
+        Plan with create, update, delete, conflict and unchanged entries
+    """
+    creates, updates, conflicts, unchanged = [], [], [], []
+    desired_keys = {t: set() for t in snapshots}
+    specified_fields = _specified_fields(document)
+
+    for spec in specs:
+        specified = specified_fields[spec["name"]]
+        keys = _live_keys(spec, specified, snapshots[spec["type"]])
+        desired_keys[spec["type"]].update(keys)
+        if not keys:
+            creates.append(spec)
+            continue
+        if len(keys) > 1:
+            conflicts.append({"type": spec["type"], "name": spec["name"],
+                              "reasons": [f"exists in zones {', '.join(k.split('/')[0] for k in keys)}; "
+                                          f"set zone to pick one"]})
+            continue
+        live = snapshots[spec["type"]][keys[0]]
+        diff = _diff_resource(spec, live, specified)
+        if diff["conflicts"]:
+            conflicts.append({"type": spec["type"], "name": spec["name"], "reasons": diff["conflicts"]})
+        if diff["changes"]:
+            updates.append({"type": spec["type"], "name": spec["name"], "changes": diff["changes"]})
+        if not diff["conflicts"] and not diff["changes"]:
+            unchanged.append(f"{spec['type']}/{spec['name']}")
+
+    deletes = []
+    if document.get("prune"):
+        for resource_type, snapshot in snapshots.items():
+            for key, live in snapshot.items():
+                if key in desired_keys[resource_type] or key == "(default)":
+                    continue
+                entry = {"type": resource_type, "name": key}
+                if resource_type == "instance":
+                    entry = {"type": resource_type, "name": live.get("instance_name") or key.split("/")[-1],
+                             "zone": live.get("location")}
+                deletes.append(entry)
+
+    return {
+        "creates": creates,
+        "updates": updates,
+        "deletes": deletes,
+        "conflicts": conflicts,
+        "unchanged": unchanged,
+        "managed_types": sorted(snapshots)
+    }
+
+
+def _plan_fingerprint(project_id: str, document: Dict, snapshots: Dict[str, Dict]) -> str:
+    """Hashes the desired state together with the change tokens of the managed inventory."""
+    tokens = {
+        t: sorted((name, row.get("etag")) for name, row in snapshot.items())
+        for t, snapshot in snapshots.items()
+    }
+    payload = json.dumps({"project": project_id, "document": document, "inventory": tokens},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _plan_summary(plan: Dict) -> Dict:
+    return {
+        "to_create": [f"{spec['type']}/{spec['name']}" for spec in plan["creates"]],
+        "to_update": plan["updates"],
+        "to_delete": plan["deletes"],
+        "conflicts": plan["conflicts"],
+        "unchanged_count": len(plan["unchanged"]),
+        "change_count": len(plan["creates"]) + len(plan["updates"]) + len(plan["deletes"])
+    }
+
+
+def register_delete_plan(project_id: str, deletes: List[Dict]) -> str:
+    """
+    Stores a deletion-only plan so apply_desired_state can execute it by plan_id.
+
+    Args:
+        project_id: Project the resources belong to
+        deletes: Delete entries as produced by compute_plan ({"type", "name"}, plus "zone" for instances)
+
+    Returns:
+        The plan_id
+    """
+    payload = json.dumps({"project": project_id, "deletes": deletes}, sort_keys=True, default=str)
+    plan_id = hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+    plan = {
+        "creates": [],
+        "updates": [],
+        "deletes": deletes,
+        "conflicts": [],
+        "unchanged": [],
+        "managed_types": sorted({entry["type"] for entry in deletes})
+    }
+    with _plans_lock:
+        _evict_expired_plans()
+        _plans[plan_id] = {"plan": plan, "created_at": time.time(), "project_id": project_id}
+    return plan_id
+
+
+def _update_bucket(project_id: str, name: str, changes: Dict) -> Dict:
+    bucket = storage_client(project_id).bucket(name)
+    if "storage_class" in changes:
+        bucket.storage_class = changes["storage_class"]
+    if "versioning_enabled" in changes:
+        bucket.versioning_enabled = changes["versioning_enabled"]
+    if "labels" in changes:
+        bucket.labels = changes["labels"]
+    bucket.patch()
+    invalidate_inventory(project_id, "storage")
+    return {"type": "bucket", "name": name, "status": "updated",
+            "message": f"Updated {', '.join(changes)}"}
+
+
+def _delete_resource(project_id: str, entry: Dict) -> Dict:
+    if entry["type"] == "bucket":
+        result = delete_storage_bucket(entry["name"])
+    elif entry["type"] == "firestore_database":
+        result = delete_firestore_database(entry["name"])
+    else:
+        operation = compute_instances_client().delete(request=compute_v1.DeleteInstanceRequest(
+            project=project_id, zone=entry["zone"], instance=entry["name"]
+        ))
+        get_tracker().track(
+            "compute", operation.name, project_id, zone=entry["zone"],
+            resource=f"compute_instance/{entry['name']}",
+            on_complete=lambda record: invalidate_inventory(project_id, "compute")
+        )
+        invalidate_inventory(project_id, "compute")
+        result = {"status": "success", "message": f"Deletion of '{entry['name']}' initiated",
+                  "details": {"operation_id": operation.name}}
+
+    return {
+        "type": entry["type"],
+        "name": entry["name"],
+        "status": "deleted" if result.get("status") == "success" else "failed",
+        "message": result.get("message"),
+        "operation_id": (result.get("details") or {}).get("operation_id")
+    }
+
+
+def _existing_dependencies(creates: List[Dict]) -> set:
+    """Names the creates depend on that are not created by the plan, i.e. already exist."""
+    created = {spec["name"] for spec in creates}
+    return {dep for spec in creates for dep in spec["depends_on"] if dep not in created}
+
+
+def _apply(project_id: str, plan: Dict, confirm_deletes: bool) -> List[Dict]:
+    """
+    Applies updates and deletes concurrently alongside dependency-ordered creates.
+
+    Raises:
+        ValueError: If the creates can not be ordered; raised before any change is made
+    """
+    satisfied = _existing_dependencies(plan["creates"])
+    dependency_levels(plan["creates"], satisfied)
+
+    tasks = [(u, lambda u=u: _update_bucket(project_id, u["name"], u["changes"]))
+             for u in plan["updates"] if u["type"] == "bucket"]
+    rows = [{"type": u["type"], "name": u["name"], "status": "skipped",
+             "message": "In-place updates are only supported for buckets"}
+            for u in plan["updates"] if u["type"] != "bucket"]
+
+    if confirm_deletes:
+        tasks += [(d, lambda d=d: _delete_resource(project_id, d)) for d in plan["deletes"]]
+    else:
+        rows += [{"type": d["type"], "name": d["name"], "status": "skipped",
+                  "message": "Deletion not confirmed. Set confirm_deletes=True to delete"}
+                 for d in plan["deletes"]]
+
+    def run(task):
+        entry, action = task
+        try:
+            return [action()]
+        except Exception as e:
+            return [{"type": entry["type"], "name": entry["name"], "status": "failed", "message": str(e)}]
+
+    with ThreadPoolExecutor(max_workers=BULK_MAX_WORKERS) as executor:
+        create_future = (executor.submit(execute_manifest, project_id, plan["creates"], satisfied)
+                         if plan["creates"] else None)
+        for result in executor.map(run, tasks):
+            rows.extend(result)
+        if create_future:
+            # Keep the update and delete rows even if the creates fail as a whole
+            try:
+                rows.extend(create_future.result())
+            except Exception as e:
+                rows.extend({"type": spec["type"], "name": spec["name"], "status": "failed", "message": str(e)}
+                            for spec in plan["creates"])
+    return rows
+
+
+def plan_desired_state(desired_state: str, refresh: bool = False) -> Dict:
+    """
+    Computes the minimal change set that makes the project match a desired-state document.
+
+    The document uses the provision_resources manifest format. Add "prune: true"
+    to also plan deletion of buckets, instances or databases of the listed types
+    that are not in the document.
+
+    Args:
+        desired_state: Desired-state document (JSON or YAML text, or a file path)
+        refresh: Re-sync the inventory from the live APIs before diffing
+
+    Returns:
+        Dictionary containing the plan_id and the planned creates, updates and deletes
+    """
+    try:
+        project_id = os.getenv('GOOGLE_CLOUD_PROJECT')
+        if not project_id:
+            return {
+                "status": "error",
+                "message": "GOOGLE_CLOUD_PROJECT environment variable not set"
+            }
+
+        document = parse_manifest(desired_state)
+        specs, errors = validate_manifest(document)
+        if not errors:
+            try:
+                dependency_levels(specs)
+            except ValueError as e:
+                errors.append(str(e))
+        if errors:
+            return {
+                "status": "error",
+                "message": f"Desired state is invalid ({len(errors)} error(s))",
+                "validation_errors": errors
+            }
+
+        managed_types = _managed_types(document, specs)
+        refreshed = refresh_index(project_id, [_INDEX_TYPES[t] for t in managed_types], force=refresh)
+        # A type that failed to refresh would be diffed against stale rows, planning
+        # creates of existing resources or prunes of live ones; such a plan is never cached
+        refresh_errors = [
+            f"{t}: {refreshed[_INDEX_TYPES[t]]['error']}"
+            for t in managed_types if "error" in (refreshed.get(_INDEX_TYPES[t]) or {})
+        ]
+        if refresh_errors:
+            return {
+                "status": "error",
+                "message": "Inventory refresh failed, so no plan was made. Try again with refresh=True",
+                "refresh_errors": refresh_errors
+            }
+        snapshots = {t: index_snapshot(project_id, _INDEX_TYPES[t]) for t in managed_types}
+
+        plan_id = _plan_fingerprint(project_id, document, snapshots)
+        with _plans_lock:
+            _evict_expired_plans()
+            cached = _plans.get(plan_id)
+        if cached:
+            plan = cached["plan"]
+        else:
+            plan = compute_plan(document, specs, snapshots)
+            with _plans_lock:
+                _plans[plan_id] = {"plan": plan, "created_at": time.time(), "project_id": project_id}
+
+        summary = _plan_summary(plan)
+        return {
+            "status": "success",
+            "project_id": project_id,
+            "plan_id": plan_id,
+            "message": "No changes needed" if not summary["change_count"] else
+                       f"{summary['change_count']} change(s) planned",
+            **summary
+        }
+
+    except ValueError as e:
+        return {
+            "status": "error",
+            "message": str(e)
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Failed to plan desired state: {str(e)}"
+        }
+
+
+def apply_desired_state(plan_id: Optional[str] = None, desired_state: Optional[str] = None,
+                        confirm_deletes: bool = False) -> Dict:
+    """
+    Applies a plan produced by plan_desired_state (or plans and applies a document directly).
+
+    Independent changes run in parallel; creations follow depends_on ordering.
+
+    Args:
+        plan_id: ID returned by plan_desired_state
+        desired_state: Desired-state document to plan and apply in one step
+        confirm_deletes: Must be True for planned deletions to be executed
+
+    Returns:
+        Dictionary containing one result row per change and a status summary
+    """
+    try:
+        if not plan_id and not desired_state:
+            return {
+                "status": "error",
+                "message": "Provide plan_id or desired_state"
+            }
+
+        if desired_state:
+            planned = plan_desired_state(desired_state)
+            if planned["status"] != "success":
+                return planned
+            plan_id = planned["plan_id"]
+
+        with _plans_lock:
+            # A plan older than PLAN_CACHE_TTL may no longer match the project
+            _evict_expired_plans()
+            cached = _plans.get(plan_id)
+        if not cached:
+            return {
+                "status": "error",
+                "message": f"Plan '{plan_id}' not found or expired. Run plan_desired_state again"
+            }
+
+        plan = cached["plan"]
+        project_id = cached["project_id"]
+        if not (plan["creates"] or plan["updates"] or plan["deletes"]):
+            return {
+                "status": "success",
+                "plan_id": plan_id,
+                "message": "Nothing to apply - project already matches the desired state",
+                "results": []
+            }
+
+        rows = _apply(project_id, plan, confirm_deletes)
+        with _plans_lock:
+            # The inventory changed, so this plan is no longer valid
+            _plans.pop(plan_id, None)
+
+        summary = summarize_rows(rows)
+        failed = summary.get("failed", 0)
+        return {
+            "status": "success" if not failed else ("partial_success" if failed < len(rows) else "error"),
+            "plan_id": plan_id,
+            "message": f"Applied {len(rows)} change(s): " + ", ".join(f"{v} {k}" for k, v in summary.items()),
+            "summary": summary,
+            "conflicts": plan["conflicts"],
+            "results": rows
+        }
+
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Failed to apply desired state: {str(e)}"
+        }
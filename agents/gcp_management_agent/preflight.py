@@ -0,0 +1,486 @@
+"""
+Local preflight validation for the resource-creating tools.
+
+Names, locations, zones, machine types and storage classes are checked
+against precompiled grammars and a metadata snapshot before any API call, so
+an invalid request fails in microseconds with a structured error instead of
+after a credentials check and a round trip. The snapshot starts from a
+built-in catalog and is refreshed in the background from the Compute Engine
+zones and machine types APIs once it is older than PREFLIGHT_SNAPSHOT_TTL.
+"""
+
+import difflib
+import ipaddress
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from .clients import compute_machine_types_client, compute_zones_client, using_fake_backends
+
+# Seconds before the metadata snapshot is refreshed from the Compute Engine APIs
+PREFLIGHT_SNAPSHOT_TTL = int(os.getenv('PREFLIGHT_SNAPSHOT_TTL', '86400'))
+
+# Snapshot file shared between processes; empty disables the file
+PREFLIGHT_SNAPSHOT_PATH = os.getenv(
+    'PREFLIGHT_SNAPSHOT_PATH', os.path.join(tempfile.gettempdir(), 'gcp_management_metadata.json')
+)
+
+# Set to "false" to only use the built-in catalog and the snapshot file
+PREFLIGHT_AUTO_REFRESH = os.getenv('PREFLIGHT_AUTO_REFRESH', 'true').lower() == 'true'
+
+STORAGE_CLASSES = frozenset({"STANDARD", "NEARLINE", "COLDLINE", "ARCHIVE",
+                             "MULTI_REGIONAL", "REGIONAL", "DURABLE_REDUCED_AVAILABILITY"})
+BUCKET_MULTI_REGIONS = frozenset({"US", "EU", "ASIA"})
+BUCKET_DUAL_REGIONS = frozenset({"NAM4", "EUR4", "EUR5", "EUR7", "EUR8", "ASIA1"})
+FIRESTORE_MULTI_REGIONS = frozenset({"nam5", "nam7", "eur3"})
+FIRESTORE_DATABASE_TYPES = frozenset({"FIRESTORE_NATIVE", "DATASTORE_MODE"})
+
+DISK_SIZE_GB_MIN = 10
+DISK_SIZE_GB_MAX = 65536
+MAX_NETWORK_TAGS = 64
+MAX_LABELS = 64
+
+# Built-in catalog: region -> zone suffixes, used until the first refresh
+_BUILTIN_REGIONS = {
+    "africa-south1": "abc",
+    "asia-east1": "abc",
+    "asia-east2": "abc",
+    "asia-northeast1": "abc",
+    "asia-northeast2": "abc",
+    "asia-northeast3": "abc",
+    "asia-south1": "abc",
+    "asia-south2": "abc",
+    "asia-southeast1": "abc",
+    "asia-southeast2": "abc",
+    "australia-southeast1": "abc",
+    "australia-southeast2": "abc",
+    "europe-central2": "abc",
+    "europe-north1": "abc",
+    "europe-north2": "abc",
+    "europe-southwest1": "abc",
+    "europe-west1": "bcd",
+    "europe-west2": "abc",
+    "europe-west3": "abc",
+    "europe-west4": "abc",
+    "europe-west6": "abc",
+    "europe-west8": "abc",
+    "europe-west9": "abc",
+    "europe-west10": "abc",
+    "europe-west12": "abc",
+    "me-central1": "abc",
+    "me-central2": "abc",
+    "me-west1": "abc",
+    "northamerica-northeast1": "abc",
+    "northamerica-northeast2": "abc",
+    "northamerica-south1": "abc",
+    "southamerica-east1": "abc",
+    "southamerica-west1": "abc",
+    "us-central1": "abcf",
+    "us-east1": "bcd",
+    "us-east4": "abc",
+    "us-east5": "abc",
+    "us-south1": "abc",
+    "us-west1": "abc",
+    "us-west2": "abc",
+    "us-west3": "abc",
+    "us-west4": "abc",
+}
+
+_BUCKET_NAME = re.compile(r"^[a-z0-9][a-z0-9._-]*[a-z0-9]$")
+_GOOGLE_LIKE = re.compile(r"g[o0][o0]g[l1]e")
+_RFC1035_NAME = re.compile(r"^[a-z]([-a-z0-9]{0,61}[a-z0-9])?$")
+_DATABASE_ID = re.compile(r"^[a-z][a-z0-9-]{2,61}[a-z0-9]$")
+_SQL_INSTANCE_NAME = re.compile(r"^[a-z]([-a-z0-9]{0,96}[a-z0-9])?$")
+_LABEL_KEY = re.compile(r"^[a-z][a-z0-9_-]{0,62}$")
+_LABEL_VALUE = re.compile(r"^[a-z0-9_-]{0,63}$")
+# Accelerator types end in a unit letter after the count: a2-highgpu-1g, a3-megagpu-8g, ct5lp-hightpu-4t
+_MACHINE_TYPE = re.compile(
+    r"^(f1-micro|g1-small|e2-(micro|small|medium)"
+    r"|[a-z][a-z0-9]{0,5}-(standard|highmem|highcpu|megamem|ultramem|hypermem"
+    r"|highgpu|megagpu|ultragpu|edgegpu|hightpu)"
+    r"-\d+[a-z]?(-lssd|-metal|-highlssd|-standardlssd|-nolssd)?"
+    r"|([a-z][a-z0-9]{0,3}-)?custom-\d+-\d+(-ext)?)$"
+)
+_CUSTOM_MACHINE_TYPE = re.compile(r"^([a-z][a-z0-9]{0,3}-)?custom-\d+-\d+(-ext)?$")
+_SQL_DATABASE_VERSION = re.compile(
+    r"^(MYSQL_\d+_\d+(_\d+)?|POSTGRES_\d+|SQLSERVER_\d{4}_(STANDARD|ENTERPRISE|EXPRESS|WEB))$"
+)
+_SQL_TIER = re.compile(r"^db-(f1-micro|g1-small|custom-\d+-\d+|n1-(standard|highmem)-\d+|perf-optimized-n-\d+)$")
+
+_snapshot: Dict = {}
+_snapshot_lock = threading.Lock()
+_refresh_thread: Optional[threading.Thread] = None
+
+
+def _builtin_snapshot() -> Dict:
+    return {
+        "source": "builtin",
+        "refreshed_at": 0.0,
+        "regions": {region: [f"{region}-{suffix}" for suffix in suffixes]
+                    for region, suffixes in _BUILTIN_REGIONS.items()},
+        "machine_types": {},
+    }
+
+
+def _index(snapshot: Dict) -> Dict:
+    """Adds the lookup sets validation runs against."""
+    snapshot["region_set"] = frozenset(snapshot["regions"])
+    snapshot["zone_set"] = frozenset(zone for zones in snapshot["regions"].values() for zone in zones)
+    snapshot["machine_type_sets"] = {zone: frozenset(names) for zone, names in snapshot["machine_types"].items()}
+    return snapshot
+
+
+def _load_snapshot_file() -> Optional[Dict]:
+    if not PREFLIGHT_SNAPSHOT_PATH or not os.path.exists(PREFLIGHT_SNAPSHOT_PATH):
+        return None
+    try:
+        with open(PREFLIGHT_SNAPSHOT_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not data.get("regions"):
+            return None
+        data.setdefault("machine_types", {})
+        return data
+    except (OSError, ValueError):
+        return None
+
+
+def _save_snapshot_file(snapshot: Dict) -> None:
+    if not PREFLIGHT_SNAPSHOT_PATH:
+        return
+    data = {key: snapshot[key] for key in ("source", "refreshed_at", "regions", "machine_types")}
+    tmp_path = f"{PREFLIGHT_SNAPSHOT_PATH}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, PREFLIGHT_SNAPSHOT_PATH)
+    except OSError:
+        pass
+
+
+def refresh_metadata_snapshot(project_id: Optional[str] = None) -> Dict:
+    """
+    Rebuilds the metadata snapshot from the Compute Engine zones and machine types APIs.
+
+    Zones are required; machine types are best effort, and zones without them
+    fall back to the machine type grammar.
+
+    Args:
+        project_id: Project to query (default: GOOGLE_CLOUD_PROJECT)
+
+    Returns:
+        Dictionary with the status, zone and machine type counts and snapshot source
+    """
+    global _snapshot
+    project_id = project_id or os.getenv('GOOGLE_CLOUD_PROJECT')
+    if not project_id:
+        return {"status": "error", "message": "GOOGLE_CLOUD_PROJECT environment variable not set"}
+
+    try:
+        regions: Dict[str, List[str]] = {}
+        for zone in compute_zones_client().list(project=project_id):
+            region = (zone.region or zone.name.rsplit("-", 1)[0]).rsplit("/", 1)[-1]
+            regions.setdefault(region, []).append(zone.name)
+    except Exception as e:
+        return {"status": "error", "message": f"Failed to refresh zones: {str(e)}"}
+
+    machine_types: Dict[str, List[str]] = {}
+    machine_types_error = None
+    try:
+        request = {"project": project_id, "return_partial_success": True}
+        for scope, scoped_list in compute_machine_types_client().aggregated_list(request=request):
+            if scoped_list.machine_types:
+                machine_types[scope.rsplit("/", 1)[-1]] = sorted(mt.name for mt in scoped_list.machine_types)
+    except Exception as e:
+        machine_types_error = str(e)
+
+    snapshot = _index({
+        "source": "api",
+        "refreshed_at": time.time(),
+        "regions": {region: sorted(zones) for region, zones in regions.items()},
+        "machine_types": machine_types,
+    })
+    with _snapshot_lock:
+        _snapshot = snapshot
+    if not using_fake_backends():
+        _save_snapshot_file(snapshot)
+
+    result = {
+        "status": "success",
+        "message": "Metadata snapshot refreshed",
+        "regions": len(snapshot["regions"]),
+        "zones": len(snapshot["zone_set"]),
+        "zones_with_machine_types": len(machine_types),
+    }
+    if machine_types_error:
+        result["machine_types_error"] = machine_types_error
+    return result
+
+
+def _refresh_in_background() -> None:
+    global _refresh_thread
+    with _snapshot_lock:
+        if _refresh_thread is not None and _refresh_thread.is_alive():
+            return
+        _refresh_thread = threading.Thread(target=refresh_metadata_snapshot, daemon=True,
+                                           name="preflight-snapshot-refresh")
+        _refresh_thread.start()
+
+
+def metadata_snapshot() -> Dict:
+    """
+    Returns the current metadata snapshot without blocking on the network.
+
+    A stale snapshot is served as-is while a background refresh replaces it.
+    """
+    global _snapshot
+    snapshot = _snapshot
+    if not snapshot:
+        with _snapshot_lock:
+            if not _snapshot:
+                _snapshot = _index(_load_snapshot_file() or _builtin_snapshot())
+            snapshot = _snapshot
+    if (PREFLIGHT_AUTO_REFRESH and os.getenv('GOOGLE_CLOUD_PROJECT') and not using_fake_backends()
+            and time.time() - snapshot["refreshed_at"] > PREFLIGHT_SNAPSHOT_TTL):
+        _refresh_in_background()
+    return snapshot
+
+
+def reset_metadata_snapshot() -> None:
+    """Drops the in-memory snapshot so the next validation reloads it."""
+    global _snapshot
+    with _snapshot_lock:
+        _snapshot = {}
+
+
+def _error(field: str, code: str, message: str, value=None, choices: Optional[Iterable[str]] = None) -> Dict:
+    error = {"field": field, "code": code, "message": message, "value": value}
+    if choices is not None and isinstance(value, str):
+        suggestions = difflib.get_close_matches(value, list(choices), n=3, cutoff=0.6)
+        if suggestions:
+            error["suggestions"] = suggestions
+    return error
+
+
+def _check_name(errors: List[Dict], field: str, value, pattern, rule: str) -> bool:
+    if not isinstance(value, str) or not value:
+        errors.append(_error(field, "required", f"{field} is required", value))
+        return False
+    if not pattern.match(value):
+        errors.append(_error(field, "invalid_name", f"'{value}' is not a valid {field}: {rule}", value))
+        return False
+    return True
+
+
+def _check_region(errors: List[Dict], field: str, region, snapshot: Dict) -> None:
+    if region not in snapshot["region_set"]:
+        errors.append(_error(field, "unknown_region", f"Unknown region '{region}'", region,
+                             snapshot["region_set"]))
+
+
+def validate_labels(labels: Optional[Dict], field: str = "labels") -> List[Dict]:
+    """Checks label count, key and value syntax."""
+    errors = []
+    if not labels:
+        return errors
+    if not isinstance(labels, dict):
+        return [_error(field, "invalid_type", "labels must be a mapping of key to value", labels)]
+    if len(labels) > MAX_LABELS:
+        errors.append(_error(field, "too_many", f"At most {MAX_LABELS} labels are allowed", len(labels)))
+    for key, value in labels.items():
+        if not isinstance(key, str) or not _LABEL_KEY.match(key):
+            errors.append(_error(f"{field}.{key}", "invalid_label_key",
+                                 "Label keys must start with a lowercase letter and contain only lowercase "
+                                 "letters, digits, '_' and '-' (max 63 characters)", key))
+        if not isinstance(value, str) or not _LABEL_VALUE.match(value):
+            errors.append(_error(f"{field}.{key}", "invalid_label_value",
+                                 "Label values may contain only lowercase letters, digits, '_' and '-' "
+                                 "(max 63 characters)", value))
+    return errors
+
+
+def validate_bucket_request(bucket_name: str, location: str = "US", storage_class: str = "STANDARD",
+                            labels: Optional[Dict] = None) -> List[Dict]:
+    """
+    Validates a Cloud Storage bucket creation request.
+
+    Args:
+        bucket_name: Bucket name
+        location: Multi-region, dual-region or region
+        storage_class: Default storage class
+        labels: Optional bucket labels
+
+    Returns:
+        List of structured errors (field, code, message, value, suggestions); empty when valid
+    """
+    errors = []
+    rule = ("3-63 characters (up to 222 with dots), lowercase letters, digits, '-', '_' and '.', "
+            "starting and ending with a letter or digit")
+    if _check_name(errors, "bucket_name", bucket_name, _BUCKET_NAME, rule):
+        components = bucket_name.split(".")
+        if len(bucket_name) > 222 or any(len(part) > 63 for part in components) or (
+                len(components) == 1 and len(bucket_name) > 63):
+            errors.append(_error("bucket_name", "invalid_length", f"'{bucket_name}' is too long: {rule}",
+                                 bucket_name))
+        elif len(bucket_name) < 3:
+            errors.append(_error("bucket_name", "invalid_length", f"'{bucket_name}' is too short: {rule}",
+                                 bucket_name))
+        if "" in components:
+            errors.append(_error("bucket_name", "invalid_name", "Bucket names cannot contain consecutive dots",
+                                 bucket_name))
+        if bucket_name.startswith("goog") or _GOOGLE_LIKE.search(bucket_name):
+            errors.append(_error("bucket_name", "reserved_name",
+                                 "Bucket names cannot start with 'goog' or contain 'google' or close misspellings",
+                                 bucket_name))
+        try:
+            ipaddress.IPv4Address(bucket_name)
+            errors.append(_error("bucket_name", "invalid_name",
+                                 "Bucket names cannot be IP addresses", bucket_name))
+        except ValueError:
+            pass
+
+    snapshot = metadata_snapshot()
+    locations = BUCKET_MULTI_REGIONS | BUCKET_DUAL_REGIONS | {r.upper() for r in snapshot["region_set"]}
+    if not isinstance(location, str) or location.upper() not in locations:
+        errors.append(_error("location", "unknown_location", f"Unknown bucket location '{location}'",
+                             str(location).upper(), locations))
+    if not isinstance(storage_class, str) or storage_class.upper() not in STORAGE_CLASSES:
+        errors.append(_error("storage_class", "unknown_storage_class", f"Unknown storage class '{storage_class}'",
+                             str(storage_class).upper(), STORAGE_CLASSES))
+    errors.extend(validate_labels(labels))
+    return errors
+
+
+def validate_instance_request(instance_name: str, zone: str = "us-central1-a", machine_type: str = "e2-micro",
+                              disk_size_gb: int = 10, network_tags: Optional[List[str]] = None) -> List[Dict]:
+    """
+    Validates a Compute Engine instance creation request.
+
+    The machine type is checked against the zone's machine types when the
+    snapshot has them, otherwise against the machine type grammar.
+
+    Args:
+        instance_name: Instance name
+        zone: Zone for the instance
+        machine_type: Machine type name
+        disk_size_gb: Boot disk size in GB
+        network_tags: Optional network tags
+
+    Returns:
+        List of structured errors (field, code, message, value, suggestions); empty when valid
+    """
+    errors = []
+    _check_name(errors, "instance_name", instance_name, _RFC1035_NAME,
+                "1-63 characters, lowercase letters, digits and '-', starting with a letter "
+                "and not ending with '-'")
+
+    snapshot = metadata_snapshot()
+    if zone not in snapshot["zone_set"]:
+        errors.append(_error("zone", "unknown_zone", f"Unknown zone '{zone}'", zone, snapshot["zone_set"]))
+
+    zone_types = snapshot["machine_type_sets"].get(zone)
+    if not isinstance(machine_type, str) or not machine_type:
+        errors.append(_error("machine_type", "required", "machine_type is required", machine_type))
+    elif zone_types is not None:
+        if machine_type not in zone_types and not _CUSTOM_MACHINE_TYPE.match(machine_type):
+            errors.append(_error("machine_type", "unknown_machine_type",
+                                 f"Machine type '{machine_type}' is not available in {zone}",
+                                 machine_type, zone_types))
+    elif not _MACHINE_TYPE.match(machine_type):
+        errors.append(_error("machine_type", "unknown_machine_type",
+                             f"'{machine_type}' is not a valid machine type (e.g. e2-micro, n2-standard-4, "
+                             "custom-2-4096)", machine_type))
+
+    try:
+        size = int(disk_size_gb)
+        if not DISK_SIZE_GB_MIN <= size <= DISK_SIZE_GB_MAX:
+            errors.append(_error("disk_size_gb", "out_of_range",
+                                 f"disk_size_gb must be between {DISK_SIZE_GB_MIN} and {DISK_SIZE_GB_MAX}", size))
+    except (TypeError, ValueError):
+        errors.append(_error("disk_size_gb", "invalid_type", "disk_size_gb must be an integer", disk_size_gb))
+
+    if network_tags:
+        if len(network_tags) > MAX_NETWORK_TAGS:
+            errors.append(_error("network_tags", "too_many", f"At most {MAX_NETWORK_TAGS} network tags are allowed",
+                                 len(network_tags)))
+        for tag in network_tags:
+            if not isinstance(tag, str) or not _RFC1035_NAME.match(tag):
+                errors.append(_error("network_tags", "invalid_name",
+                                     f"'{tag}' is not a valid network tag: 1-63 characters, lowercase letters, "
+                                     "digits and '-', starting with a letter", tag))
+    return errors
+
+
+def validate_firestore_request(database_id: str = "(default)", location_id: str = "nam5",
+                               database_type: str = "FIRESTORE_NATIVE") -> List[Dict]:
+    """
+    Validates a Firestore database creation request.
+
+    Args:
+        database_id: "(default)" or a named database ID
+        location_id: Firestore multi-region (nam5, eur3, ...) or region
+        database_type: FIRESTORE_NATIVE or DATASTORE_MODE
+
+    Returns:
+        List of structured errors (field, code, message, value, suggestions); empty when valid
+    """
+    errors = []
+    if database_id != "(default)":
+        _check_name(errors, "database_id", database_id, _DATABASE_ID,
+                    "'(default)' or 4-63 characters, lowercase letters, digits and '-', starting with "
+                    "a letter and ending with a letter or digit")
+
+    snapshot = metadata_snapshot()
+    locations = FIRESTORE_MULTI_REGIONS | snapshot["region_set"]
+    if location_id not in locations:
+        errors.append(_error("location_id", "unknown_location", f"Unknown Firestore location '{location_id}'",
+                             location_id, locations))
+    if database_type not in FIRESTORE_DATABASE_TYPES:
+        errors.append(_error("database_type", "unknown_database_type", f"Unknown database type '{database_type}'",
+                             database_type, FIRESTORE_DATABASE_TYPES))
+    return errors
+
+
+def validate_sql_instance_request(instance_name: str, database_version: str = "MYSQL_8_0",
+                                  tier: str = "db-f1-micro", region: str = "us-central1") -> List[Dict]:
+    """
+    Validates a Cloud SQL instance creation request.
+
+    Args:
+        instance_name: Instance name
+        database_version: Database version (MYSQL_8_0, POSTGRES_15, SQLSERVER_2019_STANDARD, ...)
+        tier: Machine tier
+        region: Region for the instance
+
+    Returns:
+        List of structured errors (field, code, message, value, suggestions); empty when valid
+    """
+    errors = []
+    _check_name(errors, "instance_name", instance_name, _SQL_INSTANCE_NAME,
+                "1-98 characters, lowercase letters, digits and '-', starting with a letter "
+                "and not ending with '-'")
+    if not isinstance(database_version, str) or not _SQL_DATABASE_VERSION.match(database_version):
+        errors.append(_error("database_version", "unknown_database_version",
+                             f"'{database_version}' is not a valid database version (e.g. MYSQL_8_0, POSTGRES_15)",
+                             database_version))
+    if not isinstance(tier, str) or not _SQL_TIER.match(tier):
+        errors.append(_error("tier", "unknown_tier",
+                             f"'{tier}' is not a valid tier (e.g. db-f1-micro, db-custom-2-7680)", tier))
+    _check_region(errors, "region", region, metadata_snapshot())
+    return errors
+
+
+def preflight_error(resource_type: str, errors: List[Dict]) -> Dict:
+    """Builds the tool error result for a request that failed preflight validation."""
+    message = errors[0]["message"]
+    if len(errors) > 1:
+        message += f" (and {len(errors) - 1} more)"
+    return {
+        "status": "error",
+        "message": f"Invalid request: {message}",
+        "resource_type": resource_type,
+        "validation_errors": errors
+    }
@@ -0,0 +1,231 @@
+"""
+Shaping of tool results before they are returned to the model.
+
+Every tool result is returned to the LLM as a function response, so a listing
+with thousands of rows inflates prompt tokens and latency. Tools wrapped with
+shaped_tool keep their result untouched while it fits the tool's token budget.
+Larger results keep every scalar field and summary, but each long list is cut
+to its first rows and gets aggregate counts. The full result is parked under a
+handle, and fetch_tool_result reads the remaining rows on demand.
+"""
+
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Default token budget per tool result; 1 token is estimated as 4 characters of JSON
+TOOL_RESULT_TOKEN_BUDGET = int(os.getenv('TOOL_RESULT_TOKEN_BUDGET', '2000'))
+
+# Per-tool budget overrides
+TOOL_RESULT_BUDGETS: Dict[str, int] = {
+    "list_all_resources": 3000,
+    "list_compute_instances": 2500,
+    "query_resource_inventory": 2500,
+    "query_firestore_documents": 3000,
+    "fetch_tool_result": 3000,
+}
+
+# Rows kept per list on the first shaping attempt; halved until the result fits
+TOOL_RESULT_TOP_N = int(os.getenv('TOOL_RESULT_TOP_N', '20'))
+TOOL_RESULT_MIN_ROWS = 3
+
+TOOL_RESULT_HANDLE_TTL = float(os.getenv('TOOL_RESULT_HANDLE_TTL', '3600'))
+TOOL_RESULT_MAX_HANDLES = int(os.getenv('TOOL_RESULT_MAX_HANDLES', '64'))
+
+# Fields with at most this many distinct values get aggregate counts
+AGGREGATE_MAX_DISTINCT = 20
+
+_results: "OrderedDict[str, Tuple[float, str, Dict]]" = OrderedDict()
+_results_lock = threading.Lock()
+_stats = Counter()
+
+
+def estimate_tokens(value) -> int:
+    """Estimates the prompt tokens of a JSON-serializable value."""
+    return len(json.dumps(value, default=str, separators=(",", ":"))) // 4 + 1
+
+
+def _store_result(tool_name: str, result: Dict) -> str:
+    """Parks a full result and returns its handle; identical results share a handle."""
+    digest = hashlib.sha256(
+        json.dumps([tool_name, result], sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()[:16]
+    handle = f"{tool_name}:{digest}"
+    now = time.time()
+    with _results_lock:
+        _results[handle] = (now, tool_name, result)
+        _results.move_to_end(handle)
+        while _results and (len(_results) > TOOL_RESULT_MAX_HANDLES or
+                            now - next(iter(_results.values()))[0] > TOOL_RESULT_HANDLE_TTL):
+            _results.popitem(last=False)
+    return handle
+
+
+def _find_lists(value: Dict, path: Tuple[str, ...] = (), depth: int = 2):
+    """Yields (path, list) for every list in value, looking two dictionaries deep."""
+    for key, item in value.items():
+        if isinstance(item, list):
+            yield path + (key,), item
+        elif isinstance(item, dict) and depth > 0:
+            yield from _find_lists(item, path + (key,), depth - 1)
+
+
+def _aggregate(rows: List) -> Dict:
+    """Counts values of the low-cardinality scalar fields of a list of dictionaries."""
+    counters: Dict[str, Counter] = {}
+    for row in rows:
+        if not isinstance(row, dict):
+            continue
+        for key, value in row.items():
+            if isinstance(value, (str, bool)) or value is None:
+                counters.setdefault(key, Counter())[str(value)] += 1
+    return {
+        key: dict(counter.most_common())
+        for key, counter in counters.items()
+        if 1 < len(counter) <= AGGREGATE_MAX_DISTINCT or (len(counter) == 1 and len(rows) > 1)
+    }
+
+
+def _with_path(value: Dict, path: Tuple[str, ...], replacement) -> Dict:
+    """Returns a copy of value with the item at path replaced, copying only along the path."""
+    copy = dict(value)
+    if len(path) == 1:
+        copy[path[0]] = replacement
+    else:
+        copy[path[0]] = _with_path(value[path[0]], path[1:], replacement)
+    return copy
+
+
+def shape_result(tool_name: str, result, budget: Optional[int] = None):
+    """
+    Fits a tool result into its token budget.
+
+    Args:
+        tool_name: Name of the tool that produced the result
+        result: The tool's return value
+        budget: Token budget (default: the tool's entry in TOOL_RESULT_BUDGETS or
+                TOOL_RESULT_TOKEN_BUDGET)
+
+    Returns:
+        The unchanged result when it fits; otherwise a copy whose long lists are cut
+        to their first rows, with a "result_shaping" entry holding the handle, the
+        per-list totals and aggregates, and the estimated tokens saved
+    """
+    if not isinstance(result, dict):
+        return result
+    budget = budget or TOOL_RESULT_BUDGETS.get(tool_name, TOOL_RESULT_TOKEN_BUDGET)
+    original_tokens = estimate_tokens(result)
+    with _results_lock:
+        _stats["calls"] += 1
+    if original_tokens <= budget:
+        return result
+
+    lists = [(path, rows) for path, rows in _find_lists(result) if len(rows) > TOOL_RESULT_MIN_ROWS]
+    if not lists:
+        return result
+
+    handle = _store_result(tool_name, result)
+    aggregates = {".".join(path): _aggregate(rows) for path, rows in lists}
+
+    top_n = TOOL_RESULT_TOP_N
+    while True:
+        shaped = result
+        truncated = {}
+        for path, rows in lists:
+            if len(rows) <= top_n:
+                continue
+            shaped = _with_path(shaped, path, rows[:top_n])
+            key = ".".join(path)
+            truncated[key] = {"total": len(rows), "returned": top_n}
+            if aggregates[key]:
+                truncated[key]["aggregates"] = aggregates[key]
+        shaped_tokens = estimate_tokens(shaped)
+        if shaped_tokens <= budget or top_n <= TOOL_RESULT_MIN_ROWS:
+            break
+        top_n = max(TOOL_RESULT_MIN_ROWS, top_n // 2)
+
+    shaping = {
+        "handle": handle,
+        "truncated": truncated,
+        "original_tokens": original_tokens,
+        "returned_tokens": shaped_tokens,
+        "tokens_saved": max(0, original_tokens - shaped_tokens),
+        "note": "Lists were shortened. Call fetch_tool_result with this handle and a list path for more rows."
+    }
+    with _results_lock:
+        _stats["shaped_calls"] += 1
+        _stats["tokens_saved"] += shaping["tokens_saved"]
+    return {**shaped, "result_shaping": shaping}
+
+
+def shaped_tool(func: Callable, budget: Optional[int] = None) -> Callable:
+    """
+    Wraps a tool so its results are shaped before they reach the model.
+
+    The wrapper keeps the tool's name, docstring and signature, so the function
+    declaration the agent sends to the model is unchanged.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return shape_result(func.__name__, func(*args, **kwargs), budget)
+    return wrapper
+
+
+def fetch_tool_result(handle: str, path: str, offset: int = 0, limit: int = 50) -> Dict:
+    """
+    Fetches rows of a list that was shortened in an earlier tool result.
+
+    Args:
+        handle: The result_shaping handle from the earlier result
+        path: Dot-separated path of the list, as named in result_shaping.truncated
+        offset: Index of the first row to return
+        limit: Maximum number of rows to return (max 200)
+
+    Returns:
+        Dictionary containing the requested rows and the offset of the next rows
+    """
+    with _results_lock:
+        entry = _results.get(handle)
+    if entry is None:
+        return {
+            "status": "error",
+            "message": f"Result handle '{handle}' not found or expired. Call the original tool again."
+        }
+
+    value = entry[2]
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return {"status": "error", "message": f"Path '{path}' not found in result '{handle}'"}
+        value = value[key]
+    if not isinstance(value, list):
+        return {"status": "error", "message": f"Path '{path}' is not a list"}
+
+    offset = max(0, int(offset))
+    limit = max(1, min(int(limit), 200))
+    rows = value[offset:offset + limit]
+    next_offset = offset + len(rows)
+    return {
+        "status": "success",
+        "handle": handle,
+        "path": path,
+        "total": len(value),
+        "offset": offset,
+        "rows": rows,
+        "next_offset": next_offset if next_offset < len(value) else None
+    }
+
+
+def tool_result_shaping_stats() -> Dict:
+    """Returns the number of tool calls seen, how many were shaped and the estimated tokens saved."""
+    with _results_lock:
+        return {
+            "calls": _stats["calls"],
+            "shaped_calls": _stats["shaped_calls"],
+            "tokens_saved": _stats["tokens_saved"],
+            "stored_results": len(_results)
+        }
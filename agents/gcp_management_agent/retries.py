@@ -0,0 +1,235 @@
+"""
+Retries with backoff and a shared retry budget for GCP API calls.
+
+Every client handed out by clients.py is wrapped in a RetryingClient. Calls
+that are safe to repeat (reads, and Compute Engine mutations made idempotent
+with a request_id) are retried on transient errors (429, 500, 502, 503, 504,
+DEADLINE_EXCEEDED, connection resets) with exponential backoff and jitter.
+Other mutations keep the library's own behaviour, so a create is never sent
+twice by this layer.
+
+All retries draw from one token bucket. Tokens refill over time and with
+successful calls; when the bucket is empty, errors surface immediately
+instead of piling more load on a failing API.
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Dict
+
+from google.api_core import exceptions
+from google.api_core.retry import Retry
+
+try:
+    from google.auth.exceptions import TransportError
+    from requests.exceptions import ConnectionError as RequestsConnectionError
+    _NETWORK_ERRORS = (TransportError, RequestsConnectionError, ConnectionError)
+except ImportError:
+    _NETWORK_ERRORS = (ConnectionError,)
+
+API_RETRY_MAX_ATTEMPTS = int(os.getenv('API_RETRY_MAX_ATTEMPTS', '5'))
+API_RETRY_INITIAL_DELAY = float(os.getenv('API_RETRY_INITIAL_DELAY', '0.5'))
+API_RETRY_MAX_DELAY = float(os.getenv('API_RETRY_MAX_DELAY', '16'))
+API_RETRY_MULTIPLIER = float(os.getenv('API_RETRY_MULTIPLIER', '2'))
+# Total seconds one call may spend retrying
+API_RETRY_DEADLINE = float(os.getenv('API_RETRY_DEADLINE', '60'))
+
+# Token bucket shared by every client in the process
+API_RETRY_BUDGET_TOKENS = float(os.getenv('API_RETRY_BUDGET_TOKENS', '20'))
+API_RETRY_BUDGET_REFILL_PER_SECOND = float(os.getenv('API_RETRY_BUDGET_REFILL_PER_SECOND', '1'))
+API_RETRY_BUDGET_SUCCESS_CREDIT = float(os.getenv('API_RETRY_BUDGET_SUCCESS_CREDIT', '0.1'))
+
+TRANSIENT_ERRORS = (
+    exceptions.TooManyRequests,
+    exceptions.ResourceExhausted,
+    exceptions.InternalServerError,
+    exceptions.BadGateway,
+    exceptions.ServiceUnavailable,
+    exceptions.GatewayTimeout,
+    exceptions.DeadlineExceeded,
+) + _NETWORK_ERRORS
+
+# Method names that only read state and can always be repeated
+_READ_PREFIXES = ("get", "list", "lookup", "aggregated_list", "batch_get", "search", "wait",
+                  "collections", "test_iam_permissions")
+
+
+class RetryBudget:
+    """Token bucket limiting how many retries the whole process may make."""
+
+    def __init__(self, capacity: float, refill_per_second: float, success_credit: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.success_credit = success_credit
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+
+    def try_acquire(self) -> bool:
+        """Takes one retry token; False when the budget is spent."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def credit_success(self) -> None:
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + self.success_credit)
+
+    def available(self) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+
+_budget = RetryBudget(API_RETRY_BUDGET_TOKENS, API_RETRY_BUDGET_REFILL_PER_SECOND,
+                      API_RETRY_BUDGET_SUCCESS_CREDIT)
+_metrics: Dict[str, Counter] = {}
+_metrics_lock = threading.Lock()
+
+
+def _count(api: str, name: str, amount: int = 1) -> None:
+    with _metrics_lock:
+        _metrics.setdefault(api, Counter())[name] += amount
+
+
+def is_transient(error: Exception) -> bool:
+    """Returns True for errors that are worth retrying."""
+    return isinstance(error, TRANSIENT_ERRORS)
+
+
+def _make_idempotent(kwargs: Dict) -> bool:
+    """
+    Gives a Compute Engine mutation a request_id so the server deduplicates repeats.
+
+    Returns:
+        True when the request carries a request_id and can be retried safely
+    """
+    request = kwargs.get("request")
+    if isinstance(request, dict):
+        request.setdefault("request_id", str(uuid.uuid4()))
+        return True
+    fields = getattr(type(request), "meta", None)
+    if fields is not None and "request_id" in getattr(fields, "fields", {}):
+        if not request.request_id:
+            request.request_id = str(uuid.uuid4())
+        return True
+    return False
+
+
+def retry_policy(api: str) -> Retry:
+    """
+    Builds the Retry for one call, bounding attempts and drawing on the shared budget.
+
+    Use it directly for repeatable calls made on objects the clients return,
+    such as blobs; retries are counted in retry_metrics under api.
+    """
+    attempts = [1]
+
+    def predicate(error: Exception) -> bool:
+        if not is_transient(error):
+            return False
+        if attempts[0] >= API_RETRY_MAX_ATTEMPTS:
+            _count(api, "attempts_exhausted")
+            return False
+        if not _budget.try_acquire():
+            _count(api, "budget_exhausted")
+            return False
+        return True
+
+    def on_error(error: Exception) -> None:
+        attempts[0] += 1
+        _count(api, "retries")
+        _count(api, f"retried_{type(error).__name__}")
+
+    return Retry(predicate=predicate, initial=API_RETRY_INITIAL_DELAY, maximum=API_RETRY_MAX_DELAY,
+                 multiplier=API_RETRY_MULTIPLIER, timeout=API_RETRY_DEADLINE, on_error=on_error)
+
+
+class RetryingClient:
+    """
+    Wraps a GCP client so its repeatable methods run under the retry policy.
+
+    The policy is passed as the method's retry= argument, so the client also
+    applies it to the follow-up page requests made by pagers and iterators.
+    """
+
+    def __init__(self, client, service: str):
+        self._client = client
+        self._service = service
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._client, name)
+        if not callable(attribute) or name.startswith("_"):
+            return attribute
+
+        reads = name.startswith(_READ_PREFIXES)
+        compute = self._service.startswith("compute")
+        if not reads and not compute:
+            return attribute
+        api = f"{self._service}.{name}"
+
+        def call(*args, **kwargs):
+            if not reads and not _make_idempotent(kwargs):
+                return attribute(*args, **kwargs)
+            if "retry" in kwargs:
+                return attribute(*args, **kwargs)
+            _count(api, "calls")
+            try:
+                result = attribute(*args, retry=retry_policy(api), **kwargs)
+            except Exception as e:
+                if is_transient(e):
+                    _count(api, "failures")
+                raise
+            _budget.credit_success()
+            return result
+
+        call.__name__ = name
+        call.__doc__ = attribute.__doc__
+        return call
+
+    def __repr__(self) -> str:
+        return f"RetryingClient({self._client!r})"
+
+
+def with_retries(client, service: str) -> RetryingClient:
+    """Wraps client in a RetryingClient for the API named service."""
+    return RetryingClient(client, service)
+
+
+def retry_metrics() -> Dict:
+    """
+    Returns retry counters per API method and the remaining retry budget.
+
+    Counters: calls, retries, retried_<error type>, failures (transient errors
+    that surfaced after retrying), attempts_exhausted and budget_exhausted.
+    """
+    with _metrics_lock:
+        per_api = {api: dict(counter) for api, counter in sorted(_metrics.items())}
+    totals = Counter()
+    for counter in per_api.values():
+        totals.update({key: value for key, value in counter.items() if not key.startswith("retried_")})
+    return {
+        "totals": dict(totals),
+        "by_api": per_api,
+        "budget_tokens_available": round(_budget.available(), 2),
+        "budget_capacity": _budget.capacity
+    }
+
+
+def reset_retry_metrics() -> None:
+    """Clears the retry counters and refills the retry budget."""
+    global _budget
+    with _metrics_lock:
+        _metrics.clear()
+    _budget = RetryBudget(API_RETRY_BUDGET_TOKENS, API_RETRY_BUDGET_REFILL_PER_SECOND,
+                          API_RETRY_BUDGET_SUCCESS_CREDIT)
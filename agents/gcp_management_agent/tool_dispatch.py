@@ -0,0 +1,168 @@
+"""
+Concurrent execution of the read-only tool calls in one model turn.
+
+When the model emits several function calls in one response, ADK runs them one
+after another, so a turn that lists buckets, Firestore databases and tracked
+operations takes the sum of their latencies. ToolDispatcher hooks the agent's
+after_model_callback to read the turn's function calls, and its
+before_tool_callback to run them: when dispatch reaches a read-only call, it
+and the read-only calls that directly follow it are started together on a
+thread pool, and each is answered from its own result as ADK dispatches it.
+
+Mutating calls are never started early. They run through ADK in order, and a
+group of reads is only started once every call before it has completed, so a
+read after a create or delete still sees its effect. ADK keeps the function
+responses in call order and matched to their call ids.
+"""
+
+import inspect
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+# Maximum read-only calls of one turn that run at the same time
+TOOL_DISPATCH_MAX_WORKERS = int(os.getenv('TOOL_DISPATCH_MAX_WORKERS', '8'))
+# Turns whose calls were never all dispatched are dropped after this many seconds
+TOOL_DISPATCH_PLAN_TTL = float(os.getenv('TOOL_DISPATCH_PLAN_TTL', '600'))
+
+# Tools that only read cloud or local state and may run alongside each other
+READ_ONLY_TOOLS = frozenset({
+    "analyze_storage_bucket",
+    "check_operation_status",
+    "fetch_tool_result",
+    "find_idle_resources",
+    "get_billing_summary",
+    "list_all_resources",
+    "list_all_firestore_databases",
+    "list_firestore_databases",
+    "list_storage_buckets",
+    "list_tracked_operations",
+    "query_billing_costs",
+    "query_firestore_documents",
+    "query_resource_inventory",
+})
+
+
+def _call_key(name: str, args: Optional[Dict]) -> str:
+    return name + ":" + json.dumps(args or {}, sort_keys=True, default=str)
+
+
+class _Call:
+    """One function call of a turn, in the order the model emitted it."""
+
+    def __init__(self, name: str, args: Optional[Dict]):
+        self.name = name
+        self.args = dict(args or {})
+        self.key = _call_key(name, args)
+        self.future: Optional[Future] = None
+        self.dispatched = False
+
+
+class ToolDispatcher:
+    """
+    Runs consecutive read-only function calls of a model turn concurrently.
+
+    Pass the agent's tools to the constructor, and after_model and before_tool
+    as the agent's after_model_callback and before_tool_callback.
+    """
+
+    def __init__(self, tools: Iterable[Callable], read_only: Iterable[str] = READ_ONLY_TOOLS,
+                 max_workers: Optional[int] = None):
+        self._tools = {tool.__name__: tool for tool in tools}
+        self._read_only = frozenset(read_only)
+        self._max_workers = max_workers or TOOL_DISPATCH_MAX_WORKERS
+        # invocation_id -> (planned at, calls of the latest model response)
+        self._plans: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self._stats = {"turns_planned": 0, "calls_run_concurrently": 0}
+
+    def _parallel(self, name: str, args: Dict) -> bool:
+        """Whether a call is read-only and its arguments bind, so it can run outside ADK."""
+        tool = self._tools.get(name)
+        if name not in self._read_only or tool is None:
+            return False
+        try:
+            inspect.signature(tool).bind(**args)
+        except TypeError:
+            # Leave missing or unknown arguments to ADK, which reports them to the model
+            return False
+        return True
+
+    def after_model(self, callback_context, llm_response):
+        """Records the function calls of a model response; the response is not changed."""
+        content = getattr(llm_response, "content", None)
+        calls = [
+            _Call(part.function_call.name, part.function_call.args)
+            for part in (getattr(content, "parts", None) or [])
+            if getattr(part, "function_call", None) is not None
+        ]
+        now = time.time()
+        with self._lock:
+            for invocation_id in [key for key, (planned, _) in self._plans.items()
+                                  if now - planned > TOOL_DISPATCH_PLAN_TTL]:
+                del self._plans[invocation_id]
+            # A single read-only call gains nothing from the pool
+            if sum(1 for call in calls if self._parallel(call.name, call.args)) > 1:
+                self._plans[callback_context.invocation_id] = (now, calls)
+                self._stats["turns_planned"] += 1
+            else:
+                self._plans.pop(callback_context.invocation_id, None)
+        return None
+
+    def _start_group(self, calls: List[_Call], index: int) -> None:
+        """Starts the read-only call at index and the read-only calls directly after it."""
+        group = []
+        for call in calls[index:]:
+            if call.dispatched or not self._parallel(call.name, call.args):
+                break
+            if call.future is None:
+                group.append(call)
+        if not group:
+            return
+        # Not used as a context manager: each caller waits only for its own call
+        executor = ThreadPoolExecutor(max_workers=max(1, min(self._max_workers, len(group))))
+        try:
+            for call in group:
+                call.future = executor.submit(self._tools[call.name], **call.args)
+        finally:
+            executor.shutdown(wait=False)
+        if len(group) > 1:
+            self._stats["calls_run_concurrently"] += len(group)
+
+    def before_tool(self, tool, args: Dict, tool_context) -> Optional[Dict]:
+        """
+        Answers a planned read-only call from its concurrent run.
+
+        Returns:
+            The call's result, or None to let ADK run the tool itself
+        """
+        invocation_id = tool_context.invocation_id
+        key = _call_key(tool.name, args)
+        with self._lock:
+            plan = self._plans.get(invocation_id)
+            if plan is None:
+                return None
+            calls = plan[1]
+            index = next((i for i, call in enumerate(calls) if not call.dispatched and call.key == key), None)
+            if index is None:
+                return None
+            call = calls[index]
+            if call.future is None and self._parallel(call.name, call.args):
+                self._start_group(calls, index)
+            call.dispatched = True
+            if all(other.dispatched for other in calls):
+                del self._plans[invocation_id]
+            if call.future is None:
+                return None
+
+        result = call.future.result()
+        # ADK wraps non-dict results the same way, and treats an empty response as "run the tool"
+        return result if isinstance(result, dict) and result else {"result": result}
+
+    def stats(self) -> Dict:
+        """Returns the number of turns with concurrent calls and how many calls ran concurrently."""
+        with self._lock:
+            return {**self._stats, "pending_turns": len(self._plans)}
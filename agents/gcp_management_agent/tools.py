@@ -10,43 +10,102 @@ Part of a multi-agent system for GCP management.
 """
 
 import os
-from typing import Dict
-from google.adk.agents import Agent
-from google.cloud import storage
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 from google.auth import default
+from google.api_core import exceptions as api_exceptions
+from google.api_core.exceptions import AlreadyExists, Conflict, GoogleAPICallError, NotFound
 from dotenv import load_dotenv
 
-# Try to import Firestore - handle gracefully if not available
-try:
-    from google.cloud import firestore
-    from google.cloud import exceptions
-    from google.cloud import firestore_admin_v1
-    from google.api_core import exceptions as api_exceptions
-    from google.api_core.exceptions import AlreadyExists, NotFound, GoogleAPICallError
-    from google.cloud.firestore_admin_v1.types import Database
-    import time
-    FIRESTORE_AVAILABLE = True
-except ImportError:
-    FIRESTORE_AVAILABLE = False
+from .bucket_analytics import analyze_bucket, invalidate_bucket_analytics
+from .bucket_transfer import transfer_bucket
+from .buckets import bucket_conflict_result, bucket_details, insert_bucket
+from .clients import (
+    firestore_admin_client,
+    firestore_client,
+    storage_client as shared_storage_client,
+    using_fake_backends,
+)
+from .fanout import fan_out, fan_out_listing
+from .firestore_bulk import export_documents, import_documents
+from .firestore_query import invalidate_query_cache
+from .inventory import list_firestore
+from .inventory_index import invalidate_inventory
+from .lazy_imports import module_available
+from .listing import (
+    BUCKET_FIELD_PATHS,
+    DEFAULT_BUCKET_FIELDS,
+    bucket_rows,
+    clamp_page_size,
+    count_collection_documents,
+    group_counts,
+    list_buckets_page,
+    offset_page,
+    validate_fields,
+)
+from .operations import get_tracker
+from .preflight import preflight_error, validate_bucket_request, validate_firestore_request
+from .transfers import copy_file, download_file, upload_file
+
+# Firestore is optional - handle gracefully if not available
+FIRESTORE_AVAILABLE = module_available("google.cloud.firestore")
     
     
 # Load environment variables
 load_dotenv()
 
+
+def _auth_project(project_id: Optional[str] = None) -> Optional[str]:
+    """
+    Returns the project of the default credentials, or project_id when they name none.
+    
+    Fake backends need no credentials, so project_id (or GOOGLE_CLOUD_PROJECT) is returned.
+    """
+    if using_fake_backends():
+        return project_id or os.getenv('GOOGLE_CLOUD_PROJECT')
+    _, auth_project = default()
+    return auth_project or project_id
+
+# Collection statistics are cached per database to avoid re-running aggregation
+# queries on every chat turn. The TTL can be overridden per call.
+FIRESTORE_STATS_CACHE_TTL = int(os.getenv('FIRESTORE_STATS_CACHE_TTL', '300'))
+FIRESTORE_STATS_MAX_WORKERS = int(os.getenv('FIRESTORE_STATS_MAX_WORKERS', '8'))
+
+# Database listings and per-database collection probes are cached briefly
+FIRESTORE_DATABASE_CACHE_TTL = int(os.getenv('FIRESTORE_DATABASE_CACHE_TTL', '60'))
+# Seconds one database may take to list its collections
+FIRESTORE_DATABASE_PROBE_TIMEOUT = float(os.getenv('FIRESTORE_DATABASE_PROBE_TIMEOUT', '10'))
+FIRESTORE_DATABASE_PREVIEW_COLLECTIONS = 10
+
+_firestore_stats_cache: Dict[tuple, tuple] = {}
+_firestore_databases_cache: Dict[tuple, tuple] = {}
+_firestore_stats_lock = threading.Lock()
+
 def create_storage_bucket(bucket_name: str, location: str = "US", storage_class: str = "STANDARD", 
-                         versioning_enabled: bool = False):
+                         versioning_enabled: bool = False, lifecycle_rules: Optional[Dict] = None,
+                         labels: Optional[Dict[str, str]] = None):
     """
     Creates a Google Cloud Storage bucket with specified configuration.
     
+    The whole configuration is sent in a single insert request.
+    
     Args:
         bucket_name: Name of the bucket to create
         location: Location for the bucket (default: US)
         storage_class: Storage class (STANDARD, NEARLINE, COLDLINE, ARCHIVE)
         versioning_enabled: Enable object versioning
+        lifecycle_rules: Optional lifecycle management rules
+        labels: Optional bucket labels
         
     Returns:
         Dictionary containing operation status and details
     """
+    errors = validate_bucket_request(bucket_name, location, storage_class, labels)
+    if errors:
+        return preflight_error("storage_bucket", errors)
+    
     try:
         # Get project ID
         project_id = os.getenv('GOOGLE_CLOUD_PROJECT')
@@ -57,30 +116,30 @@ def create_storage_bucket(bucket_name: str, location: str = "US", storage_class:
                 "resource_type": "storage_bucket"
             }
         
-        # Check for credentials file
-        creds_path = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
-        if not creds_path:
-            return {
-                "status": "error",
-                "message": "GOOGLE_APPLICATION_CREDENTIALS environment variable not set. Please check your .env file.",
-                "resource_type": "storage_bucket"
-            }
+        # Fake backends need no credentials file
+        if not using_fake_backends():
+            # Check for credentials file
+            creds_path = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
+            if not creds_path:
+                return {
+                    "status": "error",
+                    "message": "GOOGLE_APPLICATION_CREDENTIALS environment variable not set. Please check your .env file.",
+                    "resource_type": "storage_bucket"
+                }
         
-        if not os.path.exists(creds_path):
-            return {
-                "status": "error", 
-                "message": f"Credentials file not found at: {creds_path}. Please check the file path.",
-                "resource_type": "storage_bucket"
-            }
+            if not os.path.exists(creds_path):
+                return {
+                    "status": "error", 
+                    "message": f"Credentials file not found at: {creds_path}. Please check the file path.",
+                    "resource_type": "storage_bucket"
+                }
         
-        # Explicitly set the credentials
-        os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = creds_path
+            # Explicitly set the credentials
+            os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = creds_path
         
         # Get default credentials to verify they work
         try:
-            credentials, auth_project = default()
-            if auth_project:
-                project_id = auth_project
+            project_id = _auth_project(project_id)
         except Exception as e:
             return {
                 "status": "error",
@@ -88,9 +147,9 @@ def create_storage_bucket(bucket_name: str, location: str = "US", storage_class:
                 "resource_type": "storage_bucket"
             }
         
-        # Initialize client with explicit credentials
+        # Shared client with the retry policy (or the fake backend)
         try:
-            client = storage.Client(project=project_id, credentials=credentials)
+            client = shared_storage_client(project_id)
         except Exception as e:
             return {
                 "status": "error",
@@ -98,40 +157,21 @@ def create_storage_bucket(bucket_name: str, location: str = "US", storage_class:
                 "resource_type": "storage_bucket"
             }
         
-        # Check if bucket already exists
+        # Create the bucket with its full configuration; a 409 means it already exists
         try:
-            bucket = client.get_bucket(bucket_name)
-            return {
-                "status": "error",
-                "message": f"Bucket '{bucket_name}' already exists",
-                "resource_type": "storage_bucket"
-            }
-        except:
-            # Bucket doesn't exist, we can create it
-            pass
-        
-        # Create the bucket
-        bucket = client.create_bucket(bucket_name, location=location)
-        bucket.storage_class = storage_class
+            bucket = insert_bucket(client, bucket_name, location, storage_class,
+                                   versioning_enabled=versioning_enabled,
+                                   lifecycle_rules=lifecycle_rules, labels=labels)
+        except Conflict as e:
+            return bucket_conflict_result(bucket_name, e)
         
-        # Configure versioning if requested
-        if versioning_enabled:
-            bucket.versioning_enabled = True
-            
-        bucket.patch()
+        invalidate_inventory(project_id, "storage")
         
         return {
             "status": "success",
             "message": f"Storage bucket '{bucket_name}' created successfully",
             "resource_type": "storage_bucket",
-            "details": {
-                "name": bucket.name,
-                "location": bucket.location,
-                "storage_class": bucket.storage_class,
-                "versioning_enabled": bucket.versioning_enabled,
-                "created": str(bucket.time_created) if bucket.time_created else None,
-                "self_link": bucket.self_link
-            }
+            "details": bucket_details(bucket)
         }
     except Exception as e:
         return {
@@ -161,23 +201,22 @@ def delete_storage_bucket(bucket_name: str, force_delete_objects: bool = False):
                 "resource_type": "storage_bucket"
             }
         
-        # Check for credentials
-        creds_path = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
-        if not creds_path or not os.path.exists(creds_path):
-            return {
-                "status": "error",
-                "message": "GCP credentials not found. Please check your .env file.",
-                "resource_type": "storage_bucket"
-            }
-        
-        # Explicitly set the credentials
-        os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = creds_path
+        # Fake backends need no credentials file
+        if not using_fake_backends():
+            creds_path = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
+            if not creds_path or not os.path.exists(creds_path):
+                return {
+                    "status": "error",
+                    "message": "GCP credentials not found. Please check your .env file.",
+                    "resource_type": "storage_bucket"
+                }
+            
+            # Explicitly set the credentials
+            os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = creds_path
         
         # Get default credentials
         try:
-            credentials, auth_project = default()
-            if auth_project:
-                project_id = auth_project
+            project_id = _auth_project(project_id)
         except Exception as e:
             return {
                 "status": "error",
@@ -185,8 +224,8 @@ def delete_storage_bucket(bucket_name: str, force_delete_objects: bool = False):
                 "resource_type": "storage_bucket"
             }
         
-        # Initialize client with explicit credentials
-        client = storage.Client(project=project_id, credentials=credentials)
+        # Shared client with the retry policy (or the fake backend)
+        client = shared_storage_client(project_id)
         bucket = client.bucket(bucket_name)
         
         if not bucket.exists():
@@ -213,6 +252,9 @@ def delete_storage_bucket(bucket_name: str, force_delete_objects: bool = False):
         
         bucket.delete()
         
+        invalidate_inventory(project_id, "storage")
+        invalidate_bucket_analytics(bucket_name)
+        
         return {
             "status": "success",
             "message": f"Storage bucket '{bucket_name}' deleted successfully",
@@ -226,14 +268,42 @@ def delete_storage_bucket(bucket_name: str, force_delete_objects: bool = False):
             "resource_type": "storage_bucket"
         }
 
-def list_storage_buckets():
+def list_storage_buckets(page_size: int = 50, page_token: Optional[str] = None,
+                         fields: Optional[List[str]] = None, prefix: Optional[str] = None,
+                         include_summary: bool = True, projects: Optional[List[str]] = None,
+                         folder: Optional[str] = None):
     """
-    Lists all storage buckets in the project.
+    Lists storage buckets in the project one page at a time.
+    
+    The first page starts with a summary of bucket counts by location and
+    storage class; pass next_page_token back as page_token to drill down.
+    With projects or folder, every project in the scope is listed concurrently
+    and the buckets are merged, with failures reported per project.
+    
+    Args:
+        page_size: Buckets per page (default: 50, max: 500)
+        page_token: Token from a previous page's next_page_token
+        fields: Bucket fields to return (name, location, storage_class, versioning_enabled,
+                created, updated, labels). Defaults to all fields except labels.
+        prefix: Only list buckets whose names start with this prefix
+        include_summary: Include the location/storage class summary on the first page
+        projects: Project IDs to list across (default: the configured project)
+        folder: Folder or organization (folders/123, organizations/456) whose projects are all listed
     
     Returns:
-        Dictionary containing list of buckets and their details
+        Dictionary containing a page of buckets, the next page token and a summary
     """
     try:
+        if projects or folder:
+            fields = validate_fields(fields, BUCKET_FIELD_PATHS, DEFAULT_BUCKET_FIELDS)
+            return fan_out_listing(
+                "buckets", "bucket_count",
+                lambda project: bucket_rows(shared_storage_client(project), fields, prefix),
+                projects, folder, page_size, page_token,
+                summary_keys=[key for key in ("location", "storage_class") if key in fields],
+                include_summary=include_summary
+            )
+        
         # Get project ID
         project_id = os.getenv('GOOGLE_CLOUD_PROJECT')
         if not project_id:
@@ -242,53 +312,43 @@ def list_storage_buckets():
                 "message": "GOOGLE_CLOUD_PROJECT environment variable not set"
             }
         
-        # Check for credentials
-        creds_path = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
-        if not creds_path or not os.path.exists(creds_path):
-            return {
-                "status": "error",
-                "message": "GCP credentials not found. Please check your .env file."
-            }
-        
-        # Explicitly set the credentials
-        os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = creds_path
+        # Fake backends need no credentials file
+        if not using_fake_backends():
+            creds_path = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
+            if not creds_path or not os.path.exists(creds_path):
+                return {
+                    "status": "error",
+                    "message": "GCP credentials not found. Please check your .env file."
+                }
+            
+            # Explicitly set the credentials
+            os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = creds_path
         
         # Get default credentials
         try:
-            credentials, auth_project = default()
-            if auth_project:
-                project_id = auth_project
+            project_id = _auth_project(project_id)
         except Exception as e:
             return {
                 "status": "error",
                 "message": f"Failed to authenticate with GCP: {str(e)}"
             }
         
-        # Initialize client with explicit credentials
-        client = storage.Client(project=project_id, credentials=credentials)
-        
-        # List all buckets
-        buckets = list(client.list_buckets())
-        
-        bucket_list = []
-        for bucket in buckets:
-            bucket_info = {
-                "name": bucket.name,
-                "location": bucket.location,
-                "storage_class": bucket.storage_class,
-                "versioning_enabled": bucket.versioning_enabled,
-                "created": str(bucket.time_created) if bucket.time_created else None,
-                "updated": str(bucket.updated) if bucket.updated else None
-            }
-            bucket_list.append(bucket_info)
+        # Shared client with the retry policy (or the fake backend)
+        client = shared_storage_client(project_id)
+        
+        page = list_buckets_page(client, page_size, page_token, fields, prefix, include_summary)
         
         return {
             "status": "success",
             "project_id": project_id,
-            "bucket_count": len(bucket_list),
-            "buckets": bucket_list
+            **page
         }
         
+    except ValueError as e:
+        return {
+            "status": "error",
+            "message": str(e)
+        }
     except Exception as e:
         return {
             "status": "error",
@@ -296,6 +356,308 @@ def list_storage_buckets():
         }
 
 
+def upload_object(bucket_name: str, object_name: str, source_path: str, content_type: Optional[str] = None,
+                  parallel: bool = True, resume: bool = True) -> Dict:
+    """
+    Uploads a local file to a Cloud Storage bucket.
+    
+    Large files are uploaded as parallel parts that are composed into the object;
+    an interrupted upload continues from its finished parts when run again.
+    
+    Args:
+        bucket_name: Destination bucket
+        object_name: Destination object name
+        source_path: Path of the local file
+        content_type: Content type of the object (optional)
+        parallel: Upload large files as parallel composite parts
+        resume: Reuse parts left by an interrupted upload of the same file
+        
+    Returns:
+        Dictionary containing transfer mode, throughput and checksum verification
+    """
+    try:
+        project_id = os.getenv('GOOGLE_CLOUD_PROJECT')
+        if not project_id:
+            return {
+                "status": "error",
+                "message": "GOOGLE_CLOUD_PROJECT environment variable not set",
+                "resource_type": "storage_object"
+            }
+        if not os.path.isfile(source_path):
+            return {
+                "status": "error",
+                "message": f"Local file not found: {source_path}",
+                "resource_type": "storage_object"
+            }
+        
+        details = upload_file(shared_storage_client(project_id), bucket_name, object_name, source_path,
+                              content_type=content_type, parallel=parallel, resume=resume)
+        invalidate_bucket_analytics(bucket_name, object_name)
+        if details["checksum"]["verified"] is False:
+            return {
+                "status": "error",
+                "message": f"Checksum mismatch after uploading gs://{bucket_name}/{object_name}",
+                "resource_type": "storage_object",
+                "details": details
+            }
+        
+        return {
+            "status": "success",
+            "message": f"Uploaded {source_path} to gs://{bucket_name}/{object_name} "
+                       f"({details['throughput_mib_per_second']} MiB/s)",
+            "resource_type": "storage_object",
+            "details": details
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Failed to upload object: {str(e)}",
+            "resource_type": "storage_object"
+        }
+
+
+def download_object(bucket_name: str, object_name: str, destination_path: str,
+                    parallel: bool = True, resume: bool = True) -> Dict:
+    """
+    Downloads a Cloud Storage object to a local file.
+    
+    Large objects are fetched as parallel byte ranges; an interrupted download
+    continues from its finished ranges when run again.
+    
+    Args:
+        bucket_name: Source bucket
+        object_name: Source object name
+        destination_path: Path of the local file to write
+        parallel: Download large objects as parallel ranges
+        resume: Continue an interrupted download of the same object version
+        
+    Returns:
+        Dictionary containing transfer mode, throughput and checksum verification
+    """
+    try:
+        project_id = os.getenv('GOOGLE_CLOUD_PROJECT')
+        if not project_id:
+            return {
+                "status": "error",
+                "message": "GOOGLE_CLOUD_PROJECT environment variable not set",
+                "resource_type": "storage_object"
+            }
+        
+        details = download_file(shared_storage_client(project_id), bucket_name, object_name, destination_path,
+                                parallel=parallel, resume=resume)
+        
+        return {
+            "status": "success",
+            "message": f"Downloaded gs://{bucket_name}/{object_name} to {destination_path} "
+                       f"({details['throughput_mib_per_second']} MiB/s)",
+            "resource_type": "storage_object",
+            "details": details
+        }
+    except NotFound as e:
+        return {
+            "status": "error",
+            "message": str(e),
+            "resource_type": "storage_object"
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Failed to download object: {str(e)}",
+            "resource_type": "storage_object"
+        }
+
+
+def copy_object(source_bucket: str, source_object: str, destination_bucket: str,
+                destination_object: Optional[str] = None, rewrite_token: Optional[str] = None) -> Dict:
+    """
+    Copies an object between buckets server-side, without downloading it.
+    
+    Args:
+        source_bucket: Bucket holding the object
+        source_object: Name of the object to copy
+        destination_bucket: Bucket to copy into
+        destination_object: Name of the copy (default: same as source_object)
+        rewrite_token: Token from an unfinished copy to continue it
+        
+    Returns:
+        Dictionary containing rewrite progress, throughput and checksum verification
+    """
+    try:
+        project_id = os.getenv('GOOGLE_CLOUD_PROJECT')
+        if not project_id:
+            return {
+                "status": "error",
+                "message": "GOOGLE_CLOUD_PROJECT environment variable not set",
+                "resource_type": "storage_object"
+            }
+        
+        destination_object = destination_object or source_object
+        details = copy_file(shared_storage_client(project_id), source_bucket, source_object,
+                            destination_bucket, destination_object, rewrite_token)
+        invalidate_bucket_analytics(destination_bucket, destination_object)
+        
+        return {
+            "status": "success",
+            "message": f"Copied gs://{source_bucket}/{source_object} to gs://{destination_bucket}/{destination_object}",
+            "resource_type": "storage_object",
+            "details": details
+        }
+    except NotFound as e:
+        return {
+            "status": "error",
+            "message": str(e),
+            "resource_type": "storage_object"
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Failed to copy object: {str(e)}",
+            "resource_type": "storage_object"
+        }
+
+
+def transfer_objects(source_bucket: str, destination_bucket: str, prefix: Optional[str] = None,
+                     match_glob: Optional[str] = None, modified_after: Optional[str] = None,
+                     modified_before: Optional[str] = None, destination_prefix: Optional[str] = None,
+                     delete_source: bool = False, overwrite: bool = False,
+                     max_seconds: Optional[int] = None, restart: bool = False) -> Dict:
+    """
+    Copies or moves many objects between buckets server-side.
+    
+    The listing is sharded and copied concurrently. A call stops after
+    max_seconds and saves its progress; calling again with the same arguments
+    continues where it stopped.
+    
+    Args:
+        source_bucket: Bucket to copy from
+        destination_bucket: Bucket to copy into
+        prefix: Only copy objects whose names start with this prefix
+        match_glob: Only copy objects matching this glob, e.g. "logs/**/*.json"
+        modified_after: Only copy objects updated at or after this ISO 8601 time
+        modified_before: Only copy objects updated before this ISO 8601 time
+        destination_prefix: Replaces prefix in the destination object names (default: keep names)
+        delete_source: Delete each source object after its copy is verified (move instead of copy)
+        overwrite: Overwrite destination objects that already exist (default: skip them)
+        max_seconds: Time budget for this call (default: 300)
+        restart: Ignore saved progress and start the transfer from the beginning
+        
+    Returns:
+        Dictionary containing the job_id, completion state, object and byte totals,
+        objects/sec and bytes/sec for this call, and sample errors
+    """
+    try:
+        project_id = os.getenv('GOOGLE_CLOUD_PROJECT')
+        if not project_id:
+            return {
+                "status": "error",
+                "message": "GOOGLE_CLOUD_PROJECT environment variable not set",
+                "resource_type": "storage_object"
+            }
+        
+        try:
+            details = transfer_bucket(shared_storage_client(project_id), source_bucket, destination_bucket,
+                                      prefix=prefix, match_glob=match_glob, modified_after=modified_after,
+                                      modified_before=modified_before, destination_prefix=destination_prefix,
+                                      delete_source=delete_source, overwrite=overwrite,
+                                      max_seconds=max_seconds, restart=restart)
+        finally:
+            invalidate_bucket_analytics(destination_bucket)
+            if delete_source:
+                invalidate_bucket_analytics(source_bucket)
+        
+        totals = details["totals"]
+        run = details["this_run"]
+        action = "Moved" if delete_source else "Copied"
+        message = (f"{action} {totals['copied']} objects ({totals['bytes_copied']} bytes) from "
+                   f"gs://{source_bucket} to gs://{destination_bucket}; {totals['skipped_existing']} already "
+                   f"existed, {totals['failed']} failed. This call: {run['objects_per_second']} objects/s, "
+                   f"{run['bytes_per_second']} bytes/s")
+        if details["shards"]["done"] < details["shards"]["total"]:
+            message += (f". Stopped at the time budget with {details['shards']['done']}/"
+                        f"{details['shards']['total']} shards done; call again with the same arguments to continue")
+        elif not details["complete"]:
+            message += (f". {details['objects_to_retry']} failed objects will be retried by calling again "
+                        f"with the same arguments")
+        
+        return {
+            "status": "success",
+            "message": message,
+            "resource_type": "storage_object",
+            "details": details
+        }
+    except NotFound as e:
+        return {
+            "status": "error",
+            "message": str(e),
+            "resource_type": "storage_object"
+        }
+    except ValueError as e:
+        return {
+            "status": "error",
+            "message": str(e),
+            "resource_type": "storage_object"
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Failed to transfer objects: {str(e)}",
+            "resource_type": "storage_object"
+        }
+
+
+def analyze_storage_bucket(bucket_name: str, prefix: Optional[str] = None, top_n: int = 10,
+                           prefix_depth: int = 1, force_refresh: bool = False) -> Dict:
+    """
+    Reports how big a bucket is and what it contains.
+    
+    Object listings are scanned in parallel shards and summarized; shards that
+    were scanned recently and have not changed are taken from a cache.
+    
+    Args:
+        bucket_name: Bucket to analyze
+        prefix: Only analyze objects whose names start with this prefix
+        top_n: Number of largest prefixes to list (default: 10)
+        prefix_depth: Folder depth below prefix at which the largest prefixes are grouped (default: 1)
+        force_refresh: Scan every object again instead of using cached results
+        
+    Returns:
+        Dictionary containing total objects and bytes, a size histogram, storage class
+        split, age distribution, the largest prefixes and scan statistics
+    """
+    try:
+        project_id = os.getenv('GOOGLE_CLOUD_PROJECT')
+        if not project_id:
+            return {
+                "status": "error",
+                "message": "GOOGLE_CLOUD_PROJECT environment variable not set",
+                "resource_type": "storage_bucket"
+            }
+        
+        details = analyze_bucket(shared_storage_client(project_id), bucket_name, prefix=prefix, top_n=top_n,
+                                 prefix_depth=prefix_depth, force_refresh=force_refresh)
+        
+        location = f"gs://{bucket_name}/{prefix or ''}"
+        return {
+            "status": "success",
+            "message": f"{location} holds {details['objects']} objects ({details['gib']} GiB); "
+                       f"{details['scan']['shards_scanned']} shards scanned, "
+                       f"{details['scan']['shards_from_cache']} from cache",
+            "resource_type": "storage_bucket",
+            "details": details
+        }
+    except NotFound:
+        return {
+            "status": "error",
+            "message": f"Bucket '{bucket_name}' does not exist",
+            "resource_type": "storage_bucket"
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Failed to analyze bucket: {str(e)}",
+            "resource_type": "storage_bucket"
+        }
+
 
 def create_firestore_database(database_id: str = "(default)", location_id: str = "nam5", 
                              database_type: str = "FIRESTORE_NATIVE") -> Dict:
@@ -310,7 +672,11 @@ def create_firestore_database(database_id: str = "(default)", location_id: str =
     Returns:
         Dictionary containing operation status and details
     """
-    if not FIRESTORE_AVAILABLE:
+    errors = validate_firestore_request(database_id, location_id, database_type)
+    if errors:
+        return preflight_error("firestore_database", errors)
+    
+    if not FIRESTORE_AVAILABLE and not using_fake_backends():
         return {
             "status": "error",
             "message": "Firestore not available. Install: pip install google-cloud-firestore",
@@ -323,13 +689,16 @@ def create_firestore_database(database_id: str = "(default)", location_id: str =
         if creds_path:
             os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = creds_path
         
-        credentials, project_id = default()
+        project_id = _auth_project()
         
         if database_id == "(default)":
             # Handle default database creation/initialization
-            db = firestore.Client(project=project_id, credentials=credentials)
+            db = firestore_client(project_id)
             db.collection("init_check").document("ping").set({"status": "initialized"})
             
+            invalidate_inventory(project_id, "firestore")
+            clear_firestore_stats_cache(database_id)
+            
             return {
                 "status": "success",
                 "message": f"Default Firestore initialized in project {project_id}",
@@ -342,7 +711,7 @@ def create_firestore_database(database_id: str = "(default)", location_id: str =
             }
         
         # Named database creation
-        admin_client = firestore_admin_v1.FirestoreAdminClient(credentials=credentials)
+        admin_client = firestore_admin_client()
         parent = f"projects/{project_id}"
         db_path = f"{parent}/databases/{database_id}"
         
@@ -356,33 +725,39 @@ def create_firestore_database(database_id: str = "(default)", location_id: str =
         except NotFound:
             pass  # Safe to create
         
-        # Use the correct enum for database type
-        db_type = Database.DatabaseType.FIRESTORE_NATIVE if database_type == "FIRESTORE_NATIVE" \
-            else Database.DatabaseType.DATASTORE_MODE
+        # The request is given as a mapping, with the database type as its enum name
+        op = admin_client.create_database(request={
+            "parent": parent,
+            "database_id": database_id,
+            "database": {
+                "location_id": location_id,
+                "type_": "FIRESTORE_NATIVE" if database_type == "FIRESTORE_NATIVE" else "DATASTORE_MODE"
+            }
+        })
         
-        request = firestore_admin_v1.types.CreateDatabaseRequest(
-            parent=parent,
-            database_id=database_id,
-            database=Database(
-                location_id=location_id,
-                type_=db_type
-            )
-        )
+        def on_created(record):
+            clear_firestore_stats_cache(database_id)
+            invalidate_inventory(project_id, "firestore")
         
-        op = admin_client.create_database(request=request)
-        result = op.result(timeout=300)
+        # Track the operation in the background instead of blocking on op.result()
+        tracked = get_tracker().track(
+            "firestore", op.operation.name, project_id,
+            resource=f"firestore_database/{database_id}",
+            on_complete=on_created
+        )
         
         return {
             "status": "success",
-            "message": f"Named database '{database_id}' created successfully",
+            "message": f"Named database '{database_id}' creation initiated",
             "resource_type": "firestore_database",
             "details": {
                 "project_id": project_id,
                 "database_id": database_id,
-                "name": result.name,
-                "location_id": result.location_id,
-                "type": result.type_.name,
-                "create_time": str(result.create_time) if result.create_time else None
+                "name": db_path,
+                "location_id": location_id,
+                "type": database_type,
+                "operation_id": tracked["operation_id"],
+                "operation_status": tracked["status"]
             }
         }
         
@@ -404,7 +779,7 @@ def delete_firestore_database(database_id: str = "(default)") -> Dict:
     Returns:
         Dictionary containing operation status and details
     """
-    if not FIRESTORE_AVAILABLE:
+    if not FIRESTORE_AVAILABLE and not using_fake_backends():
         return {
             "status": "error",
             "message": "Firestore not available. Install: pip install google-cloud-firestore",
@@ -417,11 +792,11 @@ def delete_firestore_database(database_id: str = "(default)") -> Dict:
         if creds_path:
             os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = creds_path
         
-        credentials, project_id = default()
+        project_id = _auth_project()
         
         if database_id == "(default)":
             # For default database, clear all data (cannot delete the default database)
-            db = firestore.Client(project=project_id, credentials=credentials)
+            db = firestore_client(project_id)
             cleared = 0
             deleted_collections = []
             
@@ -438,6 +813,8 @@ def delete_firestore_database(database_id: str = "(default)") -> Dict:
                     "documents_deleted": docs_deleted
                 })
             
+            clear_firestore_stats_cache(database_id)
+            
             return {
                 "status": "success",
                 "message": f"Cleared {cleared} documents from default Firestore database",
@@ -453,38 +830,34 @@ def delete_firestore_database(database_id: str = "(default)") -> Dict:
             }
         else:
             # For named databases, delete the entire database
-            admin_client = firestore_admin_v1.FirestoreAdminClient(credentials=credentials)
+            admin_client = firestore_admin_client()
             db_path = f"projects/{project_id}/databases/{database_id}"
             
             try:
                 admin_client.get_database(name=db_path)
                 op = admin_client.delete_database(name=db_path)
                 
-                # Manual polling with extended timeout
-                timeout = 600  # 10 minutes
-                start_time = time.time()
-                
-                print(f"⏳ Waiting for deletion of database '{database_id}'...")
-                
-                while not op.done():
-                    if time.time() - start_time > timeout:
-                        return {
-                            "status": "timeout",
-                            "message": f"Timed out waiting for database '{database_id}' to be deleted",
-                            "resource_type": "firestore_database"
-                        }
-                    time.sleep(10)
+                def on_deleted(record):
+                    clear_firestore_stats_cache(database_id)
+                    invalidate_inventory(project_id, "firestore")
                 
-                op.result()  # ensure it's successful
+                # Track the operation in the background instead of sleep-polling
+                tracked = get_tracker().track(
+                    "firestore", op.operation.name, project_id,
+                    resource=f"firestore_database/{database_id}",
+                    on_complete=on_deleted
+                )
                 
                 return {
                     "status": "success",
-                    "message": f"Firestore database '{database_id}' deleted successfully",
+                    "message": f"Firestore database '{database_id}' deletion initiated",
                     "resource_type": "firestore_database",
                     "details": {
                         "project_id": project_id,
                         "database_id": database_id,
-                        "note": "Database and all its data have been permanently deleted"
+                        "operation_id": tracked["operation_id"],
+                        "operation_status": tracked["status"],
+                        "note": "Database and all its data will be permanently deleted"
                     }
                 }
                 
@@ -500,12 +873,6 @@ def delete_firestore_database(database_id: str = "(default)") -> Dict:
                     "message": f"Database deletion failed: {str(e)}",
                     "resource_type": "firestore_database"
                 }
-            except TimeoutError as e:
-                return {
-                    "status": "timeout",
-                    "message": str(e),
-                    "resource_type": "firestore_database"
-                }
         
     except Exception as e:
         return {
@@ -515,17 +882,197 @@ def delete_firestore_database(database_id: str = "(default)") -> Dict:
             "error_type": str(type(e).__name__)
         }
 
-def list_firestore_databases(database_id: str = "(default)") -> Dict:
+def _sample_field_stats(collection, sample_size: int) -> Dict:
+    """
+    Builds field presence and value type statistics from a small document sample.
+    
+    Args:
+        collection: Firestore collection reference to sample
+        sample_size: Maximum number of documents to read
+        
+    Returns:
+        Dictionary with the number of sampled documents and per-field statistics
+    """
+    fields = {}
+    sampled = 0
+    for doc in collection.limit(sample_size).stream():
+        sampled += 1
+        for field_name, value in (doc.to_dict() or {}).items():
+            field_info = fields.setdefault(field_name, {"present": 0, "types": {}})
+            field_info["present"] += 1
+            type_name = type(value).__name__
+            field_info["types"][type_name] = field_info["types"].get(type_name, 0) + 1
+    
+    return {
+        "sampled_documents": sampled,
+        "fields": fields
+    }
+
+def _collect_collection_stats(collections, include_field_stats: bool, sample_size: int) -> list:
+    """
+    Runs count aggregations (and optional field sampling) concurrently across collections.
+    
+    Args:
+        collections: Collection references to inspect
+        include_field_stats: Whether to sample documents for field statistics
+        sample_size: Number of documents sampled per collection
+        
+    Returns:
+        List of per-collection statistics in the same order as the input
+    """
+    def inspect_collection(collection):
+        info = {
+            "collection_id": collection.id,
+            "path": collection.path
+        }
+        try:
+            info["document_count"] = count_collection_documents(collection)
+        except Exception as e:
+            info["document_count"] = None
+            info["count_error"] = str(e)
+        
+        if include_field_stats:
+            try:
+                info["field_stats"] = _sample_field_stats(collection, sample_size)
+            except Exception as e:
+                info["field_stats"] = {"error": str(e)}
+        return info
+    
+    if not collections:
+        return []
+    
+    max_workers = max(1, min(FIRESTORE_STATS_MAX_WORKERS, len(collections)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(inspect_collection, collections))
+
+def clear_firestore_stats_cache(database_id: Optional[str] = None) -> Dict:
+    """
+    Drops cached Firestore collection statistics and database listings.
+    
+    Args:
+        database_id: Only clear entries for this database (default: clear everything)
+        
+    Returns:
+        Dictionary containing the number of cache entries removed
+    """
+    with _firestore_stats_lock:
+        keys = [key for key in _firestore_stats_cache
+                if database_id is None or key[1] == database_id]
+        for key in keys:
+            del _firestore_stats_cache[key]
+        # Listings include every database, so any change drops them
+        listing_keys = [key for key in _firestore_databases_cache
+                        if database_id is None or key[0] == "databases" or key[2] == database_id]
+        for key in listing_keys:
+            del _firestore_databases_cache[key]
+    
+    return {
+        "status": "success",
+        "message": f"Cleared {len(keys) + len(listing_keys)} cached Firestore statistics entries",
+        "entries_cleared": len(keys) + len(listing_keys)
+    }
+
+def _list_database_metadata(project_id: str, force_refresh: bool = False) -> Tuple[List[Dict], bool]:
+    """Returns the project's databases, sorted by name, and whether they came from the cache."""
+    key = ("databases", project_id)
+    with _firestore_stats_lock:
+        cached = _firestore_databases_cache.get(key)
+    if cached and not force_refresh and time.time() - cached[0] < FIRESTORE_DATABASE_CACHE_TTL:
+        return cached[1], True
+    
+    response = firestore_admin_client().list_databases(parent=f"projects/{project_id}")
+    databases = [
+        {
+            "name": db.name,
+            "database_id": db.name.split("/")[-1],
+            "type": getattr(db.type_, "name", "UNKNOWN"),
+            "state": getattr(db.state, "name", "UNKNOWN") if hasattr(db, "state") else "UNKNOWN",
+            "location_id": db.location_id,
+            "create_time": str(db.create_time) if db.create_time else None,
+            "update_time": str(db.update_time) if db.update_time else None,
+            "etag": db.etag if hasattr(db, "etag") else None
+        }
+        for db in sorted(response.databases, key=lambda database: database.name)
+    ]
+    with _firestore_stats_lock:
+        _firestore_databases_cache[key] = (time.time(), databases)
+    return databases, False
+
+def _probe_database(project_id: str, database_id: str, include_document_counts: bool) -> Dict:
+    """Lists one database's collections and optionally counts the documents of the first few."""
+    collections = sorted(firestore_client(project_id, database_id).collections(),
+                         key=lambda collection: collection.id)
+    preview = collections[:FIRESTORE_DATABASE_PREVIEW_COLLECTIONS]
+    info = {
+        "collections_count": len(collections),
+        "collections": [collection.id for collection in preview]
+    }
+    if include_document_counts:
+        info["collection_stats"] = [
+            {key: value for key, value in stats.items() if key != "path"}
+            for stats in _collect_collection_stats(preview, False, 0)
+        ]
+    return info
+
+def _probe_databases(project_id: str, database_ids: List[str], include_document_counts: bool,
+                     force_refresh: bool = False) -> Dict[str, Dict]:
+    """
+    Probes the collections of several databases concurrently, each with its own timeout.
+    
+    Databases that time out or cannot be read get an access_note instead of
+    collection details; only successful probes are cached.
+    """
+    results = {}
+    pending = []
+    now = time.time()
+    for database_id in database_ids:
+        with _firestore_stats_lock:
+            cached = _firestore_databases_cache.get(("collections", project_id, database_id, include_document_counts))
+        if cached and not force_refresh and now - cached[0] < FIRESTORE_DATABASE_CACHE_TTL:
+            results[database_id] = cached[1]
+        else:
+            pending.append(database_id)
+    if not pending:
+        return results
+    
+    outcome = fan_out(pending, lambda database_id: _probe_database(project_id, database_id, include_document_counts),
+                      timeout=FIRESTORE_DATABASE_PROBE_TIMEOUT, max_workers=FIRESTORE_STATS_MAX_WORKERS)
+    with _firestore_stats_lock:
+        for database_id, info in outcome["results"].items():
+            _firestore_databases_cache[("collections", project_id, database_id, include_document_counts)] = \
+                (time.time(), info)
+    results.update(outcome["results"])
+    for error in outcome["project_errors"]:
+        results[error["project_id"]] = {
+            "collections_count": "Unable to access",
+            "collections": [],
+            "access_note": f"Collection access failed: {error['error']}"
+        }
+    return results
+
+def list_firestore_databases(database_id: str = "(default)", include_field_stats: bool = False,
+                             sample_size: int = 20, cache_ttl_seconds: Optional[int] = None,
+                             page_size: int = 50, page_token: Optional[str] = None) -> Dict:
     """
     Shows specific Firestore database information and collections.
     
+    Document counts are exact and computed with server-side aggregation queries,
+    run concurrently across the collections on the requested page. Results are
+    cached per database and page.
+    
     Args:
         database_id: ID of the database to show (default: "(default)")
+        include_field_stats: Sample documents to report field presence and value types
+        sample_size: Number of documents sampled per collection for field statistics
+        cache_ttl_seconds: Seconds a cached result stays valid (default: FIRESTORE_STATS_CACHE_TTL,
+                           0 forces a fresh read)
+        page_size: Collections per page (default: 50, max: 500)
+        page_token: Token from a previous page's next_page_token
         
     Returns:
-        Dictionary containing database information and collections
+        Dictionary containing database information and a page of collections
     """
-    if not FIRESTORE_AVAILABLE:
+    if not FIRESTORE_AVAILABLE and not using_fake_backends():
         return {
             "status": "error",
             "message": "Firestore not available. Install: pip install google-cloud-firestore"
@@ -546,41 +1093,40 @@ def list_firestore_databases(database_id: str = "(default)") -> Dict:
         
         # Get default credentials
         try:
-            credentials, auth_project = default()
-            if auth_project:
-                project_id = auth_project
+            project_id = _auth_project(project_id)
         except Exception as e:
             return {
                 "status": "error",
                 "message": f"Failed to authenticate with GCP: {str(e)}"
             }
         
-        # Initialize Firestore client for specific database
-        if database_id == "(default)":
-            db = firestore.Client(project=project_id, credentials=credentials)
-        else:
-            db = firestore.Client(project=project_id, database=database_id, credentials=credentials)
+        # Serve from cache while the entry is still fresh
+        ttl = FIRESTORE_STATS_CACHE_TTL if cache_ttl_seconds is None else cache_ttl_seconds
+        page_size = clamp_page_size(page_size)
+        cache_key = (project_id, database_id, include_field_stats, sample_size, page_size, page_token)
+        with _firestore_stats_lock:
+            cached = _firestore_stats_cache.get(cache_key)
+        if cached and ttl > 0 and time.time() - cached[0] < ttl:
+            return {
+                **cached[1],
+                "cached": True,
+                "cache_age_seconds": round(time.time() - cached[0], 1)
+            }
         
-        # Get all collections in the database
-        collections = list(db.collections())
-        collection_info = []
+        # Shared Firestore client for the specific database
+        db = firestore_client(project_id, database_id)
         
-        for collection in collections:
-            # Count documents in each collection (limit for performance)
-            docs = list(collection.limit(100).stream())
-            
-            collection_info.append({
-                "collection_id": collection.id,
-                "document_count": len(docs),
-                "document_count_note": "Limited to first 100 documents for performance",
-                "path": collection.path
-            })
+        # List collection references (cheap) and only count the ones on this page
+        collections = sorted(db.collections(), key=lambda collection: collection.id)
+        page, next_page_token = offset_page(collections, page_size, page_token)
+        collection_info = _collect_collection_stats(page, include_field_stats, sample_size)
+        page_documents = sum(c["document_count"] or 0 for c in collection_info)
         
         # Get database metadata if it's a named database
         database_metadata = {}
         if database_id != "(default)":
             try:
-                admin_client = firestore_admin_v1.FirestoreAdminClient(credentials=credentials)
+                admin_client = firestore_admin_client()
                 database_path = f"projects/{project_id}/databases/{database_id}"
                 db_info = admin_client.get_database(name=database_path)
                 
@@ -594,20 +1140,30 @@ def list_firestore_databases(database_id: str = "(default)") -> Dict:
             except Exception as e:
                 database_metadata = {"metadata_error": f"Could not retrieve metadata: {str(e)}"}
         
-        return {
+        result = {
             "status": "success",
             "project_id": project_id,
             "database_info": {
                 "database_id": database_id,
                 "type": database_metadata.get("type", "FIRESTORE_NATIVE"),
                 "status": "active" if collections or True else "empty",
-                "collections_count": len(collection_info),
+                "collections_count": len(collections),
+                # Only a total when every collection is on this page
+                **({"total_documents": page_documents} if not page_token and not next_page_token
+                   else {"page_documents": page_documents}),
                 **database_metadata
             },
-            "collections": collection_info
+            "collections": collection_info,
+            "next_page_token": next_page_token,
+            "page_size": page_size
         }
         
-    except exceptions.Forbidden:
+        with _firestore_stats_lock:
+            _firestore_stats_cache[cache_key] = (time.time(), result)
+        
+        return {**result, "cached": False}
+        
+    except api_exceptions.Forbidden:
         return {
             "status": "error",
             "message": "Permission denied. Check your GCP credentials and Firestore permissions"
@@ -618,14 +1174,33 @@ def list_firestore_databases(database_id: str = "(default)") -> Dict:
             "message": f"Failed to get Firestore database information: {str(e)}"
         }
 
-def list_all_firestore_databases() -> Dict:
+def list_all_firestore_databases(page_size: int = 50, page_token: Optional[str] = None,
+                                 include_summary: bool = True, projects: Optional[List[str]] = None,
+                                 folder: Optional[str] = None, include_collections: bool = False,
+                                 include_document_counts: bool = False, force_refresh: bool = False) -> Dict:
     """
     Lists all Firestore databases in the project, including named databases.
     
+    Database metadata is cached briefly. Collections are only listed when
+    include_collections or include_document_counts is set, concurrently for
+    the databases on the requested page, each with its own timeout. With
+    projects or folder, the databases of every project in the scope are listed
+    concurrently and merged, without inspecting collections.
+    
+    Args:
+        page_size: Databases per page (default: 50, max: 500)
+        page_token: Token from a previous page's next_page_token
+        include_summary: Include database counts by location and type on the first page
+        projects: Project IDs to list across (default: the configured project)
+        folder: Folder or organization (folders/123, organizations/456) whose projects are all listed
+        include_collections: Report each database's collection count and first collections
+        include_document_counts: Also count the documents in those collections (implies include_collections)
+        force_refresh: List databases and collections again instead of using cached results
+    
     Returns:
-        Dictionary containing all databases in the project
+        Dictionary containing a page of databases in the project
     """
-    if not FIRESTORE_AVAILABLE:
+    if not FIRESTORE_AVAILABLE and not using_fake_backends():
         return {
             "status": "error",
             "message": "Firestore not available. Install: pip install google-cloud-firestore",
@@ -633,62 +1208,54 @@ def list_all_firestore_databases() -> Dict:
         }
     
     try:
+        if projects or folder:
+            result = fan_out_listing(
+                "databases", "database_count", list_firestore, projects, folder, page_size, page_token,
+                summary_keys=["location_id", "type"], sort_key="database_id", include_summary=include_summary
+            )
+            return {**result, "resource_type": "firestore_databases"}
+        
         # Check for credentials
         creds_path = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
         if creds_path:
             os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = creds_path
         
-        credentials, project_id = default()
-        admin_client = firestore_admin_v1.FirestoreAdminClient(credentials=credentials)
-        
-        response = admin_client.list_databases(parent=f"projects/{project_id}")
-        db_list = []
-        
-        for db in response.databases:
-            # Extract database info
-            database_info = {
-                "name": db.name,
-                "database_id": db.name.split("/")[-1],
-                "type": getattr(db.type_, "name", "UNKNOWN"),
-                "state": getattr(db.state, "name", "UNKNOWN") if hasattr(db, "state") else "UNKNOWN",
-                "location_id": db.location_id,
-                "create_time": str(db.create_time) if db.create_time else None,
-                "update_time": str(db.update_time) if db.update_time else None,
-                "etag": db.etag if hasattr(db, "etag") else None
-            }
-            
-            # Try to get collection count for each database (if accessible)
-            try:
-                if database_info["database_id"] == "(default)":
-                    # Use regular client for default database
-                    db_client = firestore.Client(project=project_id, credentials=credentials)
-                else:
-                    # Use named database client
-                    db_client = firestore.Client(
-                        project=project_id, 
-                        database=database_info["database_id"],
-                        credentials=credentials
-                    )
-                
-                collections = list(db_client.collections())
-                database_info["collections_count"] = len(collections)
-                database_info["collections"] = [col.id for col in collections[:10]]  # First 10 collections
-                
-            except Exception as e:
-                database_info["collections_count"] = "Unable to access"
-                database_info["collections"] = []
-                database_info["access_note"] = f"Collection access failed: {str(e)}"
-            
-            db_list.append(database_info)
+        project_id = _auth_project()
+        databases, cached = _list_database_metadata(project_id, force_refresh)
+        page_size = clamp_page_size(page_size)
+        page, next_page_token = offset_page(databases, page_size, page_token)
+        db_list = [dict(database) for database in page]
         
-        return {
+        # Collections are only listed when asked for, for every database on the page at once
+        if include_collections or include_document_counts:
+            probes = _probe_databases(project_id, [database["database_id"] for database in db_list],
+                                      include_document_counts, force_refresh)
+            for database_info in db_list:
+                database_info.update(probes[database_info["database_id"]])
+        
+        result = {
             "status": "success",
             "project_id": project_id,
             "database_count": len(db_list),
             "databases": db_list,
+            "next_page_token": next_page_token,
+            "page_size": page_size,
+            "cached": cached,
             "resource_type": "firestore_databases"
         }
+        if include_summary and not page_token:
+            result["summary"] = group_counts(
+                ({"location": db["location_id"], "type": db["type"]} for db in databases),
+                ["location", "type"]
+            )
+        return result
         
+    except ValueError as e:
+        return {
+            "status": "error",
+            "message": str(e),
+            "resource_type": "firestore_databases"
+        }
     except Exception as e:
         return {
             "status": "error",
@@ -696,3 +1263,160 @@ def list_all_firestore_databases() -> Dict:
             "resource_type": "firestore_databases",
             "error_type": str(type(e).__name__)
         }
+
+def import_firestore_documents(source_path: str, collection: str, database_id: str = "(default)",
+                               file_format: Optional[str] = None, id_field: Optional[str] = "id",
+                               merge: bool = False, timestamp_fields: Optional[List[str]] = None,
+                               max_seconds: Optional[int] = None, restart: bool = False) -> Dict:
+    """
+    Imports documents from an NDJSON or CSV file into a Firestore collection.
+    
+    Rows are written in concurrent batches at a write rate that ramps up
+    gradually. A call stops after max_seconds and saves its progress; calling
+    again with the same arguments continues where it stopped.
+    
+    Args:
+        source_path: Local .ndjson/.jsonl or .csv file, optionally gzipped (.gz)
+        collection: Collection to write to, e.g. "orders" or "users/alice/orders"
+        database_id: Database to write to (default: "(default)")
+        file_format: "ndjson" or "csv" (default: from the file extension)
+        id_field: Field holding the document ID (default: "id"); rows without it get a stable generated ID
+        merge: Merge into existing documents instead of replacing them
+        timestamp_fields: Fields whose ISO 8601 strings are stored as timestamps
+        max_seconds: Time budget for this call (default: 300)
+        restart: Ignore saved progress and import the file from the beginning
+        
+    Returns:
+        Dictionary containing the job_id, completion state, document totals,
+        throughput for this call and sample row errors
+    """
+    if not FIRESTORE_AVAILABLE and not using_fake_backends():
+        return {
+            "status": "error",
+            "message": "Firestore not available. Install: pip install google-cloud-firestore",
+            "resource_type": "firestore_documents"
+        }
+    
+    try:
+        project_id = os.getenv('GOOGLE_CLOUD_PROJECT')
+        if not project_id:
+            return {
+                "status": "error",
+                "message": "GOOGLE_CLOUD_PROJECT environment variable not set",
+                "resource_type": "firestore_documents"
+            }
+        
+        try:
+            details = import_documents(firestore_client(project_id, database_id), source_path, collection,
+                                       database_id=database_id, file_format_name=file_format, id_field=id_field,
+                                       merge=merge, timestamp_fields=timestamp_fields, max_seconds=max_seconds,
+                                       restart=restart)
+        finally:
+            invalidate_query_cache(project_id, database_id)
+            clear_firestore_stats_cache(database_id)
+        
+        totals = details["totals"]
+        run = details["this_run"]
+        message = (f"Imported {totals['written']} of {totals['rows']} rows into {collection}; "
+                   f"{totals['failed']} failed. This call: {run['documents_per_second']} documents/s")
+        if not details["complete"]:
+            message += (f". Stopped at the time budget at {details['progress']['rows_committed']} rows; "
+                        f"call again with the same arguments to continue")
+        
+        return {
+            "status": "success",
+            "message": message,
+            "resource_type": "firestore_documents",
+            "details": details
+        }
+    except (NotFound, ValueError) as e:
+        return {
+            "status": "error",
+            "message": str(e),
+            "resource_type": "firestore_documents"
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Failed to import Firestore documents: {str(e)}",
+            "resource_type": "firestore_documents",
+            "error_type": str(type(e).__name__)
+        }
+
+def export_firestore_documents(collection: str, destination_path: str, database_id: str = "(default)",
+                               fields: Optional[List[str]] = None, file_format: Optional[str] = None,
+                               id_field: str = "id", partitions: Optional[int] = None,
+                               max_seconds: Optional[int] = None, restart: bool = False) -> Dict:
+    """
+    Exports a Firestore collection to an NDJSON or CSV file.
+    
+    The collection is split into partitions that are read concurrently. A call
+    stops after max_seconds and saves its progress; calling again with the
+    same arguments continues where it stopped. The file is written once every
+    partition is done.
+    
+    Args:
+        collection: Collection to export, e.g. "orders" or "users/alice/orders"
+        destination_path: Local .ndjson/.jsonl or .csv file to write, optionally gzipped (.gz)
+        database_id: Database to read from (default: "(default)")
+        fields: Only export these fields (default: whole documents)
+        file_format: "ndjson" or "csv" (default: from the file extension)
+        id_field: Column holding the document ID (default: "id")
+        partitions: Partitions read concurrently (default: 8)
+        max_seconds: Time budget for this call (default: 300)
+        restart: Ignore saved progress and export from the beginning
+        
+    Returns:
+        Dictionary containing the job_id, completion state, documents exported,
+        throughput for this call and partition progress
+    """
+    if not FIRESTORE_AVAILABLE and not using_fake_backends():
+        return {
+            "status": "error",
+            "message": "Firestore not available. Install: pip install google-cloud-firestore",
+            "resource_type": "firestore_documents"
+        }
+    
+    try:
+        project_id = os.getenv('GOOGLE_CLOUD_PROJECT')
+        if not project_id:
+            return {
+                "status": "error",
+                "message": "GOOGLE_CLOUD_PROJECT environment variable not set",
+                "resource_type": "firestore_documents"
+            }
+        
+        details = export_documents(firestore_client(project_id, database_id), collection, destination_path,
+                                   database_id=database_id, fields=fields, file_format_name=file_format,
+                                   id_field=id_field, partitions=partitions, max_seconds=max_seconds,
+                                   restart=restart)
+        
+        run = details["this_run"]
+        if details["complete"]:
+            message = (f"Exported {details['totals']['documents']} documents from {collection} to "
+                       f"{details['destination']} ({details['bytes']} bytes). "
+                       f"This call: {run['documents_per_second']} documents/s")
+        else:
+            message = (f"Exported {details['totals']['documents']} documents so far, "
+                       f"{details['partitions']['done']}/{details['partitions']['total']} partitions done; "
+                       f"call again with the same arguments to continue")
+        
+        return {
+            "status": "success",
+            "message": message,
+            "resource_type": "firestore_documents",
+            "details": details
+        }
+    except (NotFound, ValueError) as e:
+        return {
+            "status": "error",
+            "message": str(e),
+            "resource_type": "firestore_documents"
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Failed to export Firestore documents: {str(e)}",
+            "resource_type": "firestore_documents",
+            "error_type": str(type(e).__name__)
+        }